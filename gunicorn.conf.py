@@ -0,0 +1,41 @@
+"""
+Gunicorn configuration for the pre-fork serving mode:
+
+    pip install -r requirements.txt
+    gunicorn src.web.web_interface:app
+
+The app (and with it the search index) is loaded once in the master
+process and the workers are forked from it. The index is held in flat
+arrays (SimpleVectorStore.freeze), and the garbage collector is kept off
+until fork and then frozen, so the workers share the loaded pages instead
+of copying them. /api/status reports each worker's private memory.
+"""
+
+import gc
+import os
+import sys
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+preload_app = True
+
+# Collections in the master would rewrite object headers the workers
+# are about to share; this file is executed before the app is loaded
+gc.disable()
+
+
+def when_ready(server):
+    # The app module builds its chatbot on a background thread, which
+    # does not survive fork; let it finish here, in the master, so the
+    # index is loaded once and inherited by every worker
+    web_interface = sys.modules.get('src.web.web_interface')
+    if web_interface is not None:
+        web_interface.wait_for_init()
+    # Everything allocated so far is moved to the permanent generation,
+    # which the workers' collections never visit
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    gc.enable()
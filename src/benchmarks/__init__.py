@@ -0,0 +1,14 @@
+"""
+Benchmarks
+==========
+
+Performance measurement scripts for the chatbot pipeline:
+- extraction_benchmark: HTML extraction throughput per parser backend
+- prefork_memory: per-worker memory of pre-forked search workers
+- stub_llm: OpenAI-compatible stub server with a fixed latency
+- async_load_test: threads vs asyncio concurrency at a fixed memory budget
+- cold_start: import-to-first-response time of the serverless entry points
+- retrieval_benchmark: vector store scaling on synthetic corpora of 1k-1M chunks
+- retrieval_eval: recall@k/MRR/nDCG versus latency per retriever configuration
+- http_load_test: open/closed-loop load on /api/chat with query log replay
+"""
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Async vs Threaded Load Test
+===========================
+
+Drives ChatbotEngine with the LLM path enabled against the local stub LLM
+(stub_llm.py) at increasing concurrency, once with one thread per
+in-flight chat (ChatbotEngine.chat, like the threaded Flask server) and
+once with one coroutine per chat (ChatbotEngine.achat, like the ASGI
+app). Every run happens in a fresh process so its peak RSS can be
+compared against a fixed memory budget; the report shows the highest
+concurrency each model sustains within that budget.
+
+Usage (from the repository root):
+    python -m src.benchmarks.async_load_test [--levels 50 200 1000 2000] [--memory-budget-mb 150]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _make_engine():
+    from src.core.chatbot_engine import ChatbotEngine
+    from src.core.circuit_breaker import CircuitBreaker
+    from src.core.degradation import DegradationController
+    # Degradation and the breaker would hide the difference being measured
+    return ChatbotEngine(
+        openai_api_key='stub',
+        model_name='stub-model',
+        generation_mode='llm',
+        degradation=DegradationController(max_tier=0),
+        circuit_breaker=CircuitBreaker(failure_threshold=10 ** 9),
+        llm_timeout=60.0
+    )
+
+
+def run_worker(mode: str, concurrency: int, rounds: int) -> dict:
+    """One measurement: `concurrency` chats in flight for `rounds` requests each"""
+    engine = _make_engine()
+    base_rss = _peak_rss_mb()
+    latencies, errors = [], [0]
+    # Distinct queries so neither the response cache nor coalescing kicks in
+    queries = [[f"question {c}-{r} about smart buildings" for r in range(rounds)] for c in range(concurrency)]
+
+    started = time.perf_counter()
+    if mode == 'threads':
+        def client(batch):
+            for query in batch:
+                t = time.perf_counter()
+                result = engine.chat(query)
+                latencies.append(time.perf_counter() - t)
+                if result.get('model') != 'stub-model':
+                    errors[0] += 1
+        threads = [threading.Thread(target=client, args=(batch,)) for batch in queries]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        async def client(batch):
+            for query in batch:
+                t = time.perf_counter()
+                result = await engine.achat(query)
+                latencies.append(time.perf_counter() - t)
+                if result.get('model') != 'stub-model':
+                    errors[0] += 1
+
+        async def run_all():
+            await asyncio.gather(*(client(batch) for batch in queries))
+        asyncio.run(run_all())
+    elapsed = time.perf_counter() - started
+
+    return {
+        'mode': mode,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors[0],
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(_percentile(latencies, 0.5) * 1000, 1),
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 1),
+        'base_rss_mb': round(base_rss, 1),
+        'peak_rss_mb': round(_peak_rss_mb(), 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Threads vs asyncio concurrency at a fixed memory budget")
+    parser.add_argument('--levels', type=int, nargs='+', default=[50, 200, 1000, 2000])
+    parser.add_argument('--rounds', type=int, default=3, help="requests per concurrent client")
+    parser.add_argument('--latency', type=float, default=0.5, help="stub LLM latency in seconds")
+    parser.add_argument('--memory-budget-mb', type=float, default=150)
+    parser.add_argument('--port', type=int, default=8088)
+    parser.add_argument('--worker', choices=['threads', 'asyncio'], help=argparse.SUPPRESS)
+    parser.add_argument('--concurrency', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.concurrency, args.rounds)))
+        return
+
+    stub = subprocess.Popen(
+        [sys.executable, '-m', 'src.benchmarks.stub_llm', '--port', str(args.port), '--latency', str(args.latency)],
+        stdout=subprocess.PIPE, text=True
+    )
+    stub.stdout.readline()  # Wait until it listens
+    env = dict(os.environ, OPENAI_API_KEY='stub', OPENAI_BASE_URL=f'http://127.0.0.1:{args.port}/v1')
+
+    results = []
+    try:
+        for mode in ('threads', 'asyncio'):
+            for level in args.levels:
+                completed = subprocess.run(
+                    [sys.executable, '-m', 'src.benchmarks.async_load_test', '--worker', mode,
+                     '--concurrency', str(level), '--rounds', str(args.rounds)],
+                    env=env, capture_output=True, text=True
+                )
+                lines = completed.stdout.strip().splitlines()
+                try:
+                    result = json.loads(lines[-1])
+                except (IndexError, ValueError):
+                    result = {'mode': mode, 'concurrency': level, 'failed': completed.stderr.strip()[-300:]}
+                results.append(result)
+                print(json.dumps(result))
+    finally:
+        stub.terminate()
+
+    print(f"\nStub LLM latency {args.latency}s, memory budget {args.memory_budget_mb:.0f} MB")
+    print(f"{'mode':<8} {'conc':>6} {'rps':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'peak MB':>8}")
+    for r in results:
+        if 'failed' in r:
+            print(f"{r['mode']:<8} {r['concurrency']:>6}  failed: {r['failed']}")
+            continue
+        print(f"{r['mode']:<8} {r['concurrency']:>6} {r['throughput_rps']:>8} {r['p50_ms']:>8} "
+              f"{r['p99_ms']:>8} {r['errors']:>7} {r['peak_rss_mb']:>8}")
+    for mode in ('threads', 'asyncio'):
+        fitting = [r['concurrency'] for r in results
+                   if r['mode'] == mode and 'failed' not in r and not r['errors']
+                   and r['peak_rss_mb'] <= args.memory_budget_mb]
+        print(f"{mode}: highest concurrency within budget: {max(fitting) if fitting else 'none'}")
+
+
+if __name__ == "__main__":
+    main()
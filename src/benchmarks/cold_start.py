@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Cold Start Benchmark
+====================
+
+Measures what a serverless cold start costs for each entry point: a fresh
+interpreter imports the module, then answers one /api/chat request
+through the Flask test client. Reported per entry point, with the
+prebuilt index artifacts (data/search_index.bin,
+data/standalone_index.bin) and with CHATBOT_INDEX_ARTIFACT=0:
+- import_ms: importing the entry module
+- first_response_ms: import plus the first chat response
+- process_ms: the same, including interpreter start-up
+
+Usage (from the repository root):
+    python -m src.benchmarks.cold_start [--runs 7]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ENTRY_POINTS = {
+    'standalone': 'standalone_index',  # vercel.json
+    'api': 'api.index'  # Flask app in src/web/web_interface.py
+}
+QUERY = "What smart building solutions do you offer for energy management?"
+
+
+def run_worker(module_name: str) -> dict:
+    """One cold start, inside a fresh interpreter"""
+    import importlib
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    imported = time.perf_counter()
+    response = module.app.test_client().post('/api/chat', json={'message': QUERY})
+    answered = time.perf_counter()
+    return {
+        'import_ms': (imported - started) * 1000,
+        'first_response_ms': (answered - started) * 1000,
+        'status': response.status_code
+    }
+
+
+def measure(module_name: str, use_artifact: bool, runs: int) -> dict:
+    env = dict(os.environ, CHATBOT_INDEX_ARTIFACT='1' if use_artifact else '0')
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, '-m', 'src.benchmarks.cold_start', '--worker', module_name],
+            env=env, capture_output=True, text=True
+        )
+        process_ms = (time.perf_counter() - started) * 1000
+        sample = json.loads(completed.stdout.strip().splitlines()[-1])
+        sample['process_ms'] = process_ms
+        samples.append(sample)
+    return {
+        key: round(statistics.median(s[key] for s in samples), 1)
+        for key in ('import_ms', 'first_response_ms', 'process_ms')
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-to-first-response time of the entry points")
+    parser.add_argument('--runs', type=int, default=7, help="cold starts per configuration (median reported)")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # Entry points print while loading; only the last line is the result
+        print(json.dumps(run_worker(args.worker)))
+        return
+
+    print(f"{'entry':<11} {'artifact':>8} {'import ms':>10} {'first resp ms':>14} {'process ms':>11}")
+    for name, module_name in ENTRY_POINTS.items():
+        for use_artifact in (True, False):
+            result = measure(module_name, use_artifact, args.runs)
+            print(f"{name:<11} {'yes' if use_artifact else 'no':>8} {result['import_ms']:>10} "
+                  f"{result['first_response_ms']:>14} {result['process_ms']:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+HTML extraction benchmark
+=========================
+
+Measures pages/second for each extraction backend over the saved pages and
+checks that every backend produces exactly the same output as the original
+BeautifulSoup extraction.
+
+Pages are read from data/pages/*.html (written by website_scraper.py
+--save-html). When
+no raw pages have been saved, equivalent pages are rebuilt from
+data/scraped_content.json with typical site chrome (scripts, nav, header,
+footer, comments and entities) around the stored content.
+
+Usage:
+    python -m src.benchmarks.extraction_benchmark [--repeat 5] [--workers 4]
+"""
+
+import argparse
+import glob
+import html
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from src.data_processing.html_extractor import (
+    LXML_AVAILABLE, ExtractionPool, extract_page
+)
+
+
+def build_page(page: Dict) -> str:
+    """Rebuild a realistic HTML page around scraped content"""
+    content = page['content']
+    words = content['content'].split(' ')
+    paragraphs = [' '.join(words[i:i + 60]) for i in range(0, len(words), 60)]
+    headings = content['headings']
+
+    body_parts = []
+    for i, paragraph in enumerate(paragraphs):
+        if i < len(headings):
+            body_parts.append(f"<h2 class=\"section-title\">{html.escape(headings[i])}</h2>")
+        body_parts.append(
+            f"<div class=\"row\"><p>{html.escape(paragraph)}</p>"
+            f"<!-- block {i} --><span class=\"sr-only\"> </span></div>"
+        )
+
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{html.escape(content['title'])}</title>
+<meta name="description" content="{html.escape(content['description'])}">
+<link rel="stylesheet" href="/style.css">
+<style>body {{ font-family: sans-serif; }} .row > p {{ margin: 0; }}</style>
+<script>window.dataLayer = window.dataLayer || []; function gtag() {{ dataLayer.push(arguments); }}</script>
+</head>
+<body class="page">
+<header><div class="logo">Real Estate IoT</div><h1>Site header</h1></header>
+<nav><ul><li><a href="/">Home</a></li><li><a href="/careers/">Careers</a></li><li><a href="/contact-us/">Contact</a></li></ul></nav>
+<main id="primary" class="site-main">
+<article class="post">
+{''.join(body_parts)}
+<a href="/contact-us/">Contact us</a> &amp; <a href="/about-us/">about&nbsp;us</a>
+</article>
+</main>
+<footer><p>&copy; Real Estate IoT</p><script>console.log("footer");</script></footer>
+</body>
+</html>"""
+
+
+def load_pages(pages_dir: str, scraped_file: str) -> List[str]:
+    """Saved raw pages, or pages rebuilt from the scraped content"""
+    files = sorted(glob.glob(os.path.join(pages_dir, '*.html')))
+    if files:
+        print(f"Using {len(files)} saved pages from {pages_dir}")
+        pages = []
+        for filename in files:
+            with open(filename, 'rb') as f:
+                pages.append(f.read())
+        return pages
+
+    with open(scraped_file, 'r', encoding='utf-8') as f:
+        scraped = json.load(f)
+    pages = [build_page(page) for page in scraped if page.get('status') == 'success']
+    print(f"No saved pages in {pages_dir}; rebuilt {len(pages)} pages from {scraped_file}")
+    return pages
+
+
+def time_backend(pages: List, parser: str, repeat: int) -> Dict:
+    """Extract every page `repeat` times with one backend"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            extract_page(page, parser)
+    elapsed = time.perf_counter() - start
+    return {'parser': parser, 'seconds': elapsed, 'pages_per_second': len(pages) * repeat / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML extraction backends")
+    parser.add_argument('--pages-dir', default='data/pages')
+    parser.add_argument('--scraped', default='data/scraped_content.json')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages_dir, args.scraped)
+    backends = ['bs4', 'html.parser'] + (['lxml'] if LXML_AVAILABLE else [])
+
+    # Identical output is a precondition for comparing speed
+    reference = [extract_page(page, 'bs4') for page in pages]
+    for backend in backends[1:]:
+        mismatches = [i for i, page in enumerate(pages) if extract_page(page, backend) != reference[i]]
+        status = "identical" if not mismatches else f"{len(mismatches)} pages differ (first: #{mismatches[0]})"
+        print(f"{backend:12s} output vs bs4: {status}")
+
+    print(f"\nSingle process, {len(pages)} pages x {args.repeat}:")
+    results = [time_backend(pages, backend, args.repeat) for backend in backends]
+    baseline = results[0]['pages_per_second']
+    for result in results:
+        print(f"  {result['parser']:12s} {result['pages_per_second']:9.1f} pages/s "
+              f"({result['pages_per_second'] / baseline:.1f}x)")
+
+    # Process pool throughput for the fastest backend
+    fastest = backends[-1]
+    workload = pages * args.repeat
+    with ExtractionPool(workers=args.workers, parser=fastest) as pool:
+        pool.map(pages[:args.workers])  # Start the workers before timing
+        start = time.perf_counter()
+        pool.map(workload)
+        elapsed = time.perf_counter() - start
+    print(f"\nProcess pool ({args.workers} workers, {fastest}): "
+          f"{len(workload) / elapsed:9.1f} pages/s ({len(workload) / elapsed / baseline:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+HTTP Load Test
+==============
+
+Finds the throughput ceiling of POST /api/chat. The app is driven either
+in-process through the Flask test client (--app web|standalone) or over
+HTTP against a running server (--url), in one of two modes:
+- closed loop (--concurrency N): N clients, each sending its next
+  request as soon as the previous one is answered
+- open loop (--rate R): R requests per second on a fixed schedule,
+  whether or not earlier ones are done; latency is measured from the
+  scheduled send time, so queueing in the load generator counts too
+
+Queries are replayed from a log (--replay, JSON lines with a 'query',
+'message' or 'title' field, or plain lines) or drawn from a synthetic
+mix: starter questions, the labeled evaluation queries and a share of
+never-repeated queries that miss the response cache (--unique-share).
+Every request comes from one of --clients client addresses, so the
+per-client rate limit does not dominate the result: in-process as the
+request's remote address, over HTTP as X-Forwarded-For, which the server
+only honors when started with CHATBOT_TRUSTED_PROXIES=1.
+
+Reported: throughput, latency percentiles, status counts, error rate,
+shed rate (503 overloaded/deadline_exceeded, 429 rate_limited), answer
+tiers, and the per-stage breakdown of the Server-Timing header
+(queue, lookup, retrieval, generation).
+
+With --llm-latency the LLM path is measured offline: the stub LLM
+(stub_llm.py) is started and the in-process app is configured with
+CHATBOT_GENERATION_MODE (default llm) against it. For --url, start the
+server with the same variables yourself.
+
+Usage (from the repository root):
+    python -m src.benchmarks.http_load_test [--app web|standalone | --url http://127.0.0.1:5000]
+        [--concurrency 8 | --rate 50] [--duration 20] [--replay queries.jsonl]
+        [--llm-latency 0.5] [--output data/benchmarks/http_load_latest.json]
+"""
+
+import argparse
+import http.client
+import importlib
+import itertools
+import json
+import os
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+APPS = {
+    'web': 'src.web.web_interface',
+    'standalone': 'standalone_index'
+}
+SHED_REASONS = ('overloaded', 'deadline_exceeded')
+STAGES = ['queue', 'lookup', 'retrieval', 'generation']  # Server-Timing stages in request order
+
+
+def load_replay(path: str) -> List[str]:
+    """Queries of a log, in order: JSON lines ('query', 'message' or 'title') or plain lines"""
+    queries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('{'):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                line = str(record.get('query') or record.get('message') or record.get('title') or '').strip()
+            if line:
+                queries.append(line)
+    return queries
+
+
+def synthetic_queries(unique_share: float, seed: int = 7):
+    """Endless query mix: starters and labeled queries, plus never-repeated ones"""
+    from src.benchmarks.retrieval_benchmark import STARTER_QUERIES
+    from src.benchmarks.retrieval_eval import load_eval_queries
+    pool = STARTER_QUERIES + [item['query'] for item in load_eval_queries()]
+    rng = random.Random(seed)
+    for n in itertools.count():
+        query = rng.choice(pool)
+        yield f"{query} (variant {n})" if rng.random() < unique_share else query
+
+
+def parse_server_timing(value: str) -> Dict[str, float]:
+    timings = {}
+    for entry in value.split(','):
+        name, _, params = entry.strip().partition(';')
+        for param in params.split(';'):
+            key, _, number = param.strip().partition('=')
+            if key == 'dur' and name:
+                try:
+                    timings[name] = float(number)
+                except ValueError:
+                    pass
+    return timings
+
+
+class InProcessTarget:
+    """POST through the Flask test client, one client per thread"""
+
+    def __init__(self, app_name: str):
+        module = importlib.import_module(APPS[app_name])
+        if hasattr(module, 'wait_for_init'):
+            module.wait_for_init()
+        self.app = module.app
+        self._local = threading.local()
+
+    def post(self, query: str, client: str):
+        if not hasattr(self._local, 'client'):
+            self._local.client = self.app.test_client()
+        response = self._local.client.post('/api/chat', json={'message': query},
+                                           environ_base={'REMOTE_ADDR': client})
+        return response.status_code, response.get_json(silent=True) or {}, response.headers.get('Server-Timing', '')
+
+
+class HTTPTarget:
+    """POST over HTTP/1.1, one keep-alive connection per thread"""
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        parsed = urlparse(url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self.path = (parsed.path.rstrip('/') or '') + '/api/chat'
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def post(self, query: str, client: str):
+        body = json.dumps({'message': query})
+        headers = {'Content-Type': 'application/json', 'X-Forwarded-For': client}
+        for attempt in (0, 1):
+            if getattr(self._local, 'conn', None) is None:
+                self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self._local.conn.request('POST', self.path, body, headers)
+                response = self._local.conn.getresponse()
+                payload = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # The server closed the keep-alive connection; reconnect once
+                self._local.conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+        try:
+            data = json.loads(payload)
+        except ValueError:
+            data = {}
+        return response.status, data, response.getheader('Server-Timing', '')
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.statuses = Counter()
+        self.outcomes = Counter()
+        self.tiers = Counter()
+        self.stages: Dict[str, List[float]] = defaultdict(list)
+        self.cached = 0
+
+    def record(self, latency: float, status: Optional[int], data: Dict, server_timing: str):
+        with self.lock:
+            self.latencies.append(latency)
+            self.statuses[status or 'exception'] += 1
+            reason = data.get('reason')
+            if status == 429:
+                self.outcomes['rate_limited'] += 1
+            elif status == 503 and reason in SHED_REASONS:
+                self.outcomes['shed'] += 1
+            elif status == 200 and data.get('status') == 'success':
+                self.outcomes['ok'] += 1
+                self.tiers[data.get('tier', 'unknown')] += 1
+                self.cached += bool(data.get('cached'))
+            else:
+                self.outcomes['error'] += 1
+            for stage, ms in parse_server_timing(server_timing).items():
+                self.stages[stage].append(ms)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def _send(target, recorder: Recorder, query: str, client: str, scheduled: float):
+    try:
+        status, data, server_timing = target.post(query, client)
+    except Exception as e:
+        status, data, server_timing = None, {'error': str(e)}, ''
+    recorder.record(time.perf_counter() - scheduled, status, data, server_timing)
+
+
+def run_closed_loop(target, queries, clients: List[str], concurrency: int, duration: float) -> Recorder:
+    recorder = Recorder()
+    lock = threading.Lock()
+    addresses = itertools.cycle(clients)
+    stop_at = time.perf_counter() + duration
+
+    def client_loop():
+        while time.perf_counter() < stop_at:
+            with lock:
+                query, client = next(queries, None), next(addresses)
+            if query is None:
+                return
+            _send(target, recorder, query, client, time.perf_counter())
+
+    threads = [threading.Thread(target=client_loop) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder
+
+
+def run_open_loop(target, queries, clients: List[str], rate: float, duration: float,
+                  max_workers: int) -> Recorder:
+    """Requests at a constant rate; workers pick them up in schedule order"""
+    recorder = Recorder()
+    pending = queue.Queue()
+
+    def worker():
+        while True:
+            item = pending.get()
+            if item is None:
+                return
+            _send(target, recorder, *item)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max_workers)]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    for n in range(int(rate * duration)):
+        scheduled = started + n / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        query = next(queries, None)
+        if query is None:
+            break
+        pending.put((query, clients[n % len(clients)], scheduled))
+    for _ in threads:
+        pending.put(None)
+    for thread in threads:
+        thread.join()
+    return recorder
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict:
+    total = len(recorder.latencies)
+    outcomes = recorder.outcomes
+    return {
+        'requests': total,
+        'elapsed_s': round(elapsed, 2),
+        'throughput_rps': round(outcomes['ok'] / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(_percentile(recorder.latencies, 0.5) * 1000, 1),
+        'p90_ms': round(_percentile(recorder.latencies, 0.9) * 1000, 1),
+        'p99_ms': round(_percentile(recorder.latencies, 0.99) * 1000, 1),
+        'max_ms': round(max(recorder.latencies, default=0.0) * 1000, 1),
+        'error_rate': round(outcomes['error'] / total, 4) if total else 0.0,
+        'shed_rate': round(outcomes['shed'] / total, 4) if total else 0.0,
+        'rate_limited_rate': round(outcomes['rate_limited'] / total, 4) if total else 0.0,
+        'cached_share': round(recorder.cached / outcomes['ok'], 4) if outcomes['ok'] else 0.0,
+        'statuses': {str(status): count for status, count in recorder.statuses.items()},
+        'tiers': dict(recorder.tiers),
+        'stages_ms': {
+            stage: {
+                'mean': round(sum(values) / len(values), 2),
+                'p50': round(_percentile(values, 0.5), 2),
+                'p99': round(_percentile(values, 0.99), 2)
+            }
+            for stage, values in sorted(recorder.stages.items(),
+                                        key=lambda item: STAGES.index(item[0]) if item[0] in STAGES else len(STAGES))
+        }
+    }
+
+
+def start_stub_llm(latency: float, port: int) -> subprocess.Popen:
+    stub = subprocess.Popen(
+        [sys.executable, '-m', 'src.benchmarks.stub_llm', '--port', str(port), '--latency', str(latency)],
+        stdout=subprocess.PIPE, text=True
+    )
+    stub.stdout.readline()  # Wait until it listens
+    return stub
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test POST /api/chat")
+    target_group = parser.add_mutually_exclusive_group()
+    target_group.add_argument('--app', choices=list(APPS), default='web', help="drive the app in-process")
+    target_group.add_argument('--url', help="drive a running server, e.g. http://127.0.0.1:5000")
+    mode_group = parser.add_mutually_exclusive_group()
+    mode_group.add_argument('--concurrency', type=int, default=8, help="closed loop: concurrent clients")
+    mode_group.add_argument('--rate', type=float, help="open loop: requests per second")
+    parser.add_argument('--max-workers', type=int, default=64, help="open loop: sender threads")
+    parser.add_argument('--duration', type=float, default=20.0, help="seconds of load")
+    parser.add_argument('--replay', help="query log to replay instead of the synthetic mix")
+    parser.add_argument('--unique-share', type=float, default=0.3,
+                        help="synthetic mix: share of never-repeated queries")
+    parser.add_argument('--clients', type=int, default=1000, help="distinct client addresses")
+    parser.add_argument('--llm-latency', type=float, help="start the stub LLM with this latency (seconds)")
+    parser.add_argument('--generation-mode', default='llm', choices=['llm', 'hedged'],
+                        help="generation mode with the stub LLM")
+    parser.add_argument('--stub-port', type=int, default=8088)
+    parser.add_argument('--output', help="write the summary as JSON")
+    args = parser.parse_args()
+
+    stub = None
+    if args.llm_latency is not None:
+        stub = start_stub_llm(args.llm_latency, args.stub_port)
+        os.environ.update({
+            'OPENAI_API_KEY': 'stub',
+            'OPENAI_BASE_URL': f'http://127.0.0.1:{args.stub_port}/v1',
+            'CHATBOT_GENERATION_MODE': args.generation_mode
+        })
+
+    try:
+        target = HTTPTarget(args.url) if args.url else InProcessTarget(args.app)
+        if args.replay:
+            replayed = load_replay(args.replay)
+            if not replayed:
+                parser.error(f"no queries in {args.replay}")
+            queries = itertools.cycle(replayed)
+        else:
+            queries = synthetic_queries(args.unique_share)
+        clients = [f"10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}" for n in range(args.clients)]
+
+        started = time.perf_counter()
+        if args.rate:
+            recorder = run_open_loop(target, queries, clients, args.rate, args.duration, args.max_workers)
+        else:
+            recorder = run_closed_loop(target, queries, clients, args.concurrency, args.duration)
+        summary = summarize(recorder, time.perf_counter() - started)
+    finally:
+        if stub:
+            stub.terminate()
+
+    summary['config'] = {
+        'target': args.url or f"in-process:{args.app}",
+        'mode': f"open loop at {args.rate} rps" if args.rate else f"closed loop x{args.concurrency}",
+        'duration_s': args.duration,
+        'queries': args.replay or f"synthetic (unique share {args.unique_share})",
+        'llm_latency_s': args.llm_latency
+    }
+
+    print(f"\n{summary['config']['target']}, {summary['config']['mode']}, {summary['elapsed_s']}s")
+    print(f"requests {summary['requests']}, throughput {summary['throughput_rps']} ok/s")
+    print(f"latency p50 {summary['p50_ms']} ms, p90 {summary['p90_ms']} ms, "
+          f"p99 {summary['p99_ms']} ms, max {summary['max_ms']} ms")
+    print(f"errors {summary['error_rate']:.1%}, shed {summary['shed_rate']:.1%}, "
+          f"rate limited {summary['rate_limited_rate']:.1%}, cached {summary['cached_share']:.1%}")
+    print(f"statuses {summary['statuses']}, tiers {summary['tiers']}")
+    if summary['stages_ms']:
+        print(f"{'stage':<12} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+        for stage, stats in summary['stages_ms'].items():
+            print(f"{stage:<12} {stats['mean']:>9} {stats['p50']:>9} {stats['p99']:>9}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Pre-fork Memory Benchmark
+=========================
+
+Loads the chunk corpus once, forks N workers the way a pre-fork server
+does, runs queries in every worker and reports how much memory each
+worker had to copy (its private memory). Compares per-chunk word lists
+with the frozen flat index plus gc.freeze().
+
+Usage (from the repository root):
+    python -m src.benchmarks.prefork_memory [--workers 4] [--replicate 50]
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from src.core.simple_vector_store import SimpleVectorStore
+from src.core.memory_report import process_memory
+
+
+def load_corpus(path: str, replicate: int):
+    with open(path, 'r', encoding='utf-8') as f:
+        chunks = json.load(f)
+    corpus = []
+    for _ in range(replicate):
+        for chunk in chunks:
+            corpus.append(dict(chunk, global_chunk_id=len(corpus)))
+    return corpus
+
+
+def run_worker(store: SimpleVectorStore, queries, write_fd: int):
+    gc.enable()
+    for query in queries:
+        store.search(query, top_k=5)
+    gc.collect()  # A long-running worker collects sooner or later
+    os.write(write_fd, json.dumps(process_memory()).encode('utf-8'))
+    os.close(write_fd)
+    os._exit(0)
+
+
+def measure(corpus, queries, workers: int, flat: bool):
+    """Load a store, fork workers from it and print their memory"""
+    pid = os.fork()
+    if pid:
+        os.waitpid(pid, 0)
+        return
+    # Each layout is measured in its own process so the two runs do not mix
+    gc.disable()
+    store = SimpleVectorStore()
+    store.add_chunks(corpus)
+    if flat:
+        store.freeze()
+    gc.collect()
+    if flat:
+        gc.freeze()
+    master = process_memory()
+
+    pipes = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        if os.fork() == 0:
+            os.close(read_fd)
+            run_worker(store, queries, write_fd)
+        os.close(write_fd)
+        pipes.append(read_fd)
+
+    reports = []
+    for read_fd in pipes:
+        data = b''
+        while True:
+            block = os.read(read_fd, 65536)
+            if not block:
+                break
+            data += block
+        os.close(read_fd)
+        reports.append(json.loads(data))
+    for _ in pipes:
+        os.wait()
+
+    label = 'flat index + gc.freeze' if flat else 'per-chunk words'
+    private = [report.get('private_mb', 0) for report in reports]
+    print(f"{label:<24} master RSS {master.get('rss_mb', 0):7.1f} MB | "
+          f"worker private {min(private):6.1f}-{max(private):6.1f} MB | "
+          f"total for {workers} workers {sum(private):7.1f} MB")
+    os._exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker memory of pre-forked search workers")
+    parser.add_argument('--chunks-file', default='data/text_chunks.json')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--replicate', type=int, default=50, help="copies of the corpus to load")
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+
+    if not hasattr(os, 'fork'):
+        print("This benchmark needs os.fork (Linux/macOS)")
+        return
+
+    corpus = load_corpus(args.chunks_file, args.replicate)
+    words = [w for chunk in corpus[:500] for w in chunk['text'].split()]
+    rng = random.Random(0)
+    queries = [' '.join(rng.choice(words) for _ in range(6)) for _ in range(args.queries)]
+    print(f"{len(corpus)} chunks, {args.workers} workers, {len(queries)} queries per worker")
+
+    for flat in (False, True):
+        measure(corpus, queries, args.workers, flat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+Retrieval Benchmark
+===================
+
+Measures how the three vector stores scale past the 94 real chunks, on
+synthetic corpora of 1k to 1M chunks generated from the scraped text:
+- vocabulary: the scraped words ranked by frequency, extended with
+  made-up words, drawn from a Zipf distribution whose exponent is fitted
+  to the scraped text; the vocabulary grows with corpus size following
+  Heaps' law, also fitted to the scraped text
+- chunks: lengths drawn from the real chunks; half of each chunk's words
+  come from one real chunk (its topic), half from the global distribution
+- queries: a few words from a topic chunk, plus the starter questions
+
+For every store and mode and every size it reports build time, load
+time, the resident memory the loaded index adds, single-query p50/p99
+latency and batch throughput (queries from a thread pool). Builds and
+queries run in separate child processes with a memory limit and a
+timeout, so a configuration that does not fit is recorded as failed
+instead of taking the machine down.
+
+Results are written as JSON; given a baseline file, every metric that got
+worse by more than the tolerance is reported as a regression (exit
+status 1). Generated corpora are cached in data/benchmark_corpora/.
+
+Usage (from the repository root):
+    python -m src.benchmarks.retrieval_benchmark [--sizes 1000 10000 100000 1000000]
+        [--stores simple:lists simple:flat lightweight:tfidf faiss:minilm]
+        [--output data/benchmarks/retrieval_latest.json]
+        [--baseline data/benchmarks/retrieval_baseline.json]
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import platform
+import random
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.append(REPO_ROOT)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+_WORD_RE = re.compile(r'[^a-z0-9\s]')
+
+# store:mode -> optional modules it needs
+STORES = {
+    'simple:lists': [],
+    'simple:flat': [],
+    'lightweight:tfidf': ['sklearn', 'numpy'],
+    'faiss:minilm': ['faiss', 'sentence_transformers', 'numpy']
+}
+
+# Metric -> (lower is better, smallest change worth reporting)
+METRICS = {
+    'build_s': (True, 0.25),
+    'load_s': (True, 0.25),
+    'index_rss_mb': (True, 10.0),
+    'p50_ms': (True, 2.0),
+    'p99_ms': (True, 5.0),
+    'batch_qps': (False, 0.0)
+}
+
+STARTER_QUERIES = [
+    "What is Real Estate IoT and what do you do?",
+    "What IoT solutions do you offer for buildings?",
+    "What career opportunities are available?",
+    "How can I contact Real Estate IoT?"
+]
+
+
+def tokenize(text: str) -> List[str]:
+    """Same words SimpleVectorStore indexes"""
+    return [word for word in _WORD_RE.sub(' ', text.lower()).split() if len(word) > 2]
+
+
+def _fit_line(xs: List[float], ys: List[float]):
+    """Least-squares slope and intercept"""
+    n = len(xs)
+    mean_x, mean_y = sum(xs) / n, sum(ys) / n
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / \
+        sum((x - mean_x) ** 2 for x in xs)
+    return slope, mean_y - slope * mean_x
+
+
+class CorpusModel:
+    """Word distribution and chunk shapes fitted to the scraped text"""
+
+    def __init__(self, page_texts: List[str], chunk_texts: List[str], seed: int = 42):
+        self.seed = seed
+        tokens = [word for text in page_texts for word in tokenize(text)]
+        counts = Counter(tokens)
+        self.real_words = [word for word, _ in counts.most_common()]
+        frequencies = [count for _, count in counts.most_common()]
+
+        # Zipf: log f = c - s log r, fitted over the head of the distribution
+        head = min(len(frequencies), 500)
+        slope, _ = _fit_line([math.log(r) for r in range(1, head + 1)],
+                             [math.log(f) for f in frequencies[:head]])
+        self.zipf_s = -slope
+
+        # Heaps: V = K T^beta, fitted on the vocabulary growth of the text
+        points, seen = [], set()
+        step = max(1, len(tokens) // 32)
+        for i, word in enumerate(tokens, 1):
+            seen.add(word)
+            if i % step == 0:
+                points.append((math.log(i), math.log(len(seen))))
+        self.heaps_beta, log_k = _fit_line([p[0] for p in points], [p[1] for p in points])
+        self.heaps_k = math.exp(log_k)
+
+        word_ids = {word: i for i, word in enumerate(self.real_words)}
+        self.topics = [[word_ids[w] for w in tokenize(text) if w in word_ids] for text in chunk_texts]
+        self.topics = [topic for topic in self.topics if topic]
+        self.chunk_lengths = [len(text.split()) for text in chunk_texts]
+
+    @classmethod
+    def from_data(cls, data_dir: str = 'data', seed: int = 42) -> 'CorpusModel':
+        with open(os.path.join(data_dir, 'scraped_content.json'), 'r', encoding='utf-8') as f:
+            pages = json.load(f)
+        page_texts = [page['content']['content'] for page in pages
+                      if isinstance(page.get('content'), dict) and page['content'].get('content')]
+        with open(os.path.join(data_dir, 'text_chunks.json'), 'r', encoding='utf-8') as f:
+            chunk_texts = [chunk.get('content', chunk.get('text', '')) for chunk in json.load(f)]
+        return cls(page_texts, chunk_texts, seed)
+
+    def vocabulary_size(self, total_tokens: int) -> int:
+        return max(len(self.real_words), int(self.heaps_k * total_tokens ** self.heaps_beta))
+
+    def vocabulary(self, size: int, rng: random.Random) -> List[str]:
+        """The real words by frequency, then made-up words from their syllables"""
+        words = list(self.real_words[:size])
+        seen = set(words)
+        stems = [w for w in self.real_words if len(w) >= 5 and w.isalpha()]
+        while len(words) < size:
+            word = rng.choice(stems)[:rng.randint(2, 4)] + rng.choice(stems)[-rng.randint(2, 4):]
+            if word in seen:
+                word += rng.choice(stems)[:2]
+            if word not in seen:
+                seen.add(word)
+                words.append(word)
+        return words
+
+    def generate(self, n_chunks: int, path: str) -> Dict:
+        """Write n_chunks synthetic chunks (the TextChunker schema) as JSON lines"""
+        started = time.perf_counter()
+        rng = random.Random(self.seed + n_chunks)
+        mean_length = sum(self.chunk_lengths) / len(self.chunk_lengths)
+        vocab = self.vocabulary(self.vocabulary_size(int(n_chunks * mean_length)), rng)
+        weights = [1.0 / rank ** self.zipf_s for rank in range(1, len(vocab) + 1)]
+        total = sum(weights)
+        cumulative, running = [], 0.0
+        for weight in weights:
+            running += weight / total
+            cumulative.append(running)
+        if NUMPY_AVAILABLE:
+            np_rng = np.random.default_rng(self.seed + n_chunks)
+            np_cumulative = np.array(cumulative)
+            np_topics = [np.array(topic) for topic in self.topics]
+        vocab_size = len(vocab)
+
+        tokens = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            for chunk_id in range(n_chunks):
+                length = rng.choice(self.chunk_lengths)
+                topic_id = rng.randrange(len(self.topics))
+                from_topic = length // 2
+                if NUMPY_AVAILABLE:
+                    ids = np.concatenate([
+                        np_rng.choice(np_topics[topic_id], from_topic),
+                        np.minimum(np.searchsorted(np_cumulative, np_rng.random(length - from_topic)),
+                                   vocab_size - 1)
+                    ]).tolist()
+                else:
+                    ids = rng.choices(self.topics[topic_id], k=from_topic) + \
+                        rng.choices(range(vocab_size), cum_weights=cumulative, k=length - from_topic)
+                rng.shuffle(ids)
+                tokens += length
+                page = chunk_id // 8
+                f.write(json.dumps({
+                    'text': ' '.join([vocab[i] for i in ids]),
+                    'word_count': length,
+                    'source': {'title': f'Synthetic page {page}', 'url': f'https://example.invalid/page/{page}'},
+                    'chunk_id': chunk_id % 8,
+                    'global_chunk_id': chunk_id
+                }) + '\n')
+        os.replace(path + '.tmp', path)
+        return {
+            'chunks': n_chunks,
+            'tokens': tokens,
+            'vocabulary': vocab_size,
+            'generate_s': round(time.perf_counter() - started, 2)
+        }
+
+    def queries(self, count: int) -> List[str]:
+        """Topic-word queries (same seed for every run) plus the starter questions"""
+        rng = random.Random(self.seed)
+        queries = list(STARTER_QUERIES)
+        while len(queries) < count:
+            topic = self.topics[rng.randrange(len(self.topics))]
+            words = {self.real_words[i] for i in rng.sample(topic, min(len(topic), rng.randint(2, 6)))}
+            queries.append(' '.join(sorted(words)))
+        return queries[:count]
+
+
+def load_corpus(path: str) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# Store adapters. Workers run with the run directory as cwd, because
+# VectorStore always reads and writes under data/.
+
+def build_store(store_key: str, chunks: List[Dict]):
+    if store_key.startswith('simple:'):
+        from src.core.simple_vector_store import SimpleVectorStore
+        store = SimpleVectorStore()
+        store.add_chunks(chunks)
+        if store_key == 'simple:flat':
+            store.freeze()
+    elif store_key == 'lightweight:tfidf':
+        from src.core.lightweight_vector_store import LightweightVectorStore
+        store = LightweightVectorStore(use_openai=False)
+        store.build_index(chunks)
+    else:
+        from src.core.vector_store import VectorStore
+        store = VectorStore(use_openai=False)
+        store.create_index(chunks)
+    return store
+
+
+def save_store(store_key: str, store):
+    os.makedirs('data', exist_ok=True)
+    if store_key.startswith('simple:'):
+        from src.core.simple_vector_store import INDEX_ARTIFACT, file_digest
+        store.save_index('data')
+        if store_key == 'simple:flat':
+            store.flat_index.save(os.path.join('data', INDEX_ARTIFACT),
+                                  source_digest=file_digest(os.path.join('data', 'text_chunks.json')))
+    elif store_key == 'lightweight:tfidf':
+        store.save_index('data/vector_store')
+    else:
+        store.save_index('bench_store')
+
+
+def load_store(store_key: str):
+    if store_key.startswith('simple:'):
+        from src.core.simple_vector_store import SimpleVectorStore
+        store = SimpleVectorStore()
+        store.load_index('data', use_artifact=store_key == 'simple:flat')
+        if store_key == 'simple:lists' and store.flat_index is not None:
+            raise RuntimeError("expected the list layout")
+        return store
+    if store_key == 'lightweight:tfidf':
+        from src.core.lightweight_vector_store import LightweightVectorStore
+        store = LightweightVectorStore(use_openai=False)
+        ok = store.load_index('data/vector_store')
+    else:
+        from src.core.vector_store import VectorStore
+        store = VectorStore(use_openai=False)
+        ok = store.load_index('bench_store')
+        if ok:
+            store.model  # Load the embedding model before timing queries
+    if not ok:
+        raise RuntimeError("could not load the saved store")
+    return store
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def build_worker(store_key: str, corpus_path: str) -> Dict:
+    chunks = load_corpus(corpus_path)
+    started = time.perf_counter()
+    store = build_store(store_key, chunks)
+    build_s = time.perf_counter() - started
+    save_store(store_key, store)
+    return {'build_s': round(build_s, 3), 'build_peak_rss_mb': round(_peak_rss_mb(), 1)}
+
+
+def query_worker(store_key: str, queries: List[str], budget_s: float, threads: int) -> Dict:
+    from src.core.memory_report import process_memory
+    def rss_mb():
+        memory = process_memory()
+        return memory.get('rss_mb', memory.get('peak_rss_mb', 0.0))
+
+    before = rss_mb()
+    started = time.perf_counter()
+    store = load_store(store_key)
+    load_s = time.perf_counter() - started
+    index_rss_mb = rss_mb() - before
+
+    # Single queries, one after another, until the queries or the budget run out
+    latencies = []
+    deadline = time.perf_counter() + budget_s
+    for query in queries:
+        t = time.perf_counter()
+        store.search(query, top_k=5)
+        latencies.append(time.perf_counter() - t)
+        if time.perf_counter() > deadline:
+            break
+
+    # Batch: the same queries from a thread pool, as a threaded server would issue them
+    batch = queries[:max(len(latencies), threads)]
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        t = time.perf_counter()
+        list(pool.map(lambda q: store.search(q, top_k=5), batch))
+        batch_s = time.perf_counter() - t
+
+    return {
+        'load_s': round(load_s, 3),
+        'index_rss_mb': round(index_rss_mb, 1),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'queries': len(latencies),
+        'p50_ms': round(_percentile(latencies, 0.5) * 1000, 3),
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 3),
+        'batch_qps': round(len(batch) / batch_s, 1) if batch_s else 0.0
+    }
+
+
+def _run_child(args: List[str], cwd: str, timeout: float) -> Dict:
+    """Run a worker phase; returns its result or {'status': ..., 'error': ...}"""
+    try:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__)] + args,
+            cwd=cwd, capture_output=True, text=True, timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        return {'status': 'timeout', 'error': f'exceeded {timeout:.0f}s'}
+    lines = completed.stdout.strip().splitlines()
+    try:
+        return json.loads(lines[-1])
+    except (IndexError, ValueError):
+        error = completed.stderr.strip().splitlines()
+        return {'status': 'failed', 'error': error[-1] if error else f'exit status {completed.returncode}'}
+
+
+def run_configuration(store_key: str, corpus_path: str, queries_path: str, args) -> Dict:
+    workdir = os.path.join(args.corpus_dir, 'run')
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(workdir)
+    limits = ['--memory-limit-mb', str(args.memory_limit_mb)]
+    try:
+        result = _run_child(['--worker', 'build', '--store', store_key, '--corpus', corpus_path] + limits,
+                            workdir, args.timeout)
+        if 'status' in result:
+            result['phase'] = 'build'
+            return result
+        queried = _run_child(['--worker', 'query', '--store', store_key, '--corpus', queries_path,
+                              '--query-budget-s', str(args.query_budget_s),
+                              '--threads', str(args.threads)] + limits,
+                             workdir, args.timeout)
+        if 'status' in queried:
+            queried['phase'] = 'query'
+            return dict(result, **queried)
+        return dict(result, **queried, status='ok')
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """Metrics that got worse than the baseline by more than the tolerance"""
+    previous = {(r['store'], r['chunks']): r for r in baseline.get('results', []) if r.get('status') == 'ok'}
+    regressions = []
+    for result in results:
+        base = previous.get((result['store'], result['chunks']))
+        if base is None:
+            continue
+        if result.get('status') != 'ok':
+            regressions.append(f"{result['store']} @ {result['chunks']}: {result['status']} (ok in baseline)")
+            continue
+        for metric, (lower_is_better, min_change) in METRICS.items():
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None or abs(new - old) < min_change:
+                continue
+            worse = new > old * (1 + tolerance) if lower_is_better else new < old / (1 + tolerance)
+            if worse:
+                regressions.append(f"{result['store']} @ {result['chunks']}: {metric} {old} -> {new}")
+    return regressions
+
+
+def print_table(results: List[Dict]):
+    print(f"\n{'store':<18} {'chunks':>8} {'build s':>8} {'load s':>8} {'index MB':>9} "
+          f"{'p50 ms':>9} {'p99 ms':>9} {'batch qps':>10}")
+    for r in results:
+        if r.get('status') != 'ok':
+            print(f"{r['store']:<18} {r['chunks']:>8}  {r['status']}: {r.get('error', '')[:60]}")
+            continue
+        print(f"{r['store']:<18} {r['chunks']:>8} {r['build_s']:>8} {r['load_s']:>8} {r['index_rss_mb']:>9} "
+              f"{r['p50_ms']:>9} {r['p99_ms']:>9} {r['batch_qps']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval scaling benchmark on synthetic corpora")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--stores', nargs='+', default=list(STORES), choices=list(STORES))
+    parser.add_argument('--queries', type=int, default=200, help="queries per configuration")
+    parser.add_argument('--query-budget-s', type=float, default=30.0,
+                        help="stop single-query timing after this long")
+    parser.add_argument('--threads', type=int, default=4, help="threads for the batch throughput run")
+    parser.add_argument('--timeout', type=float, default=1800.0, help="seconds per build or query phase")
+    parser.add_argument('--memory-limit-mb', type=int, default=4096, help="address space limit per phase")
+    parser.add_argument('--corpus-dir', default='data/benchmark_corpora')
+    parser.add_argument('--output', default='data/benchmarks/retrieval_latest.json')
+    parser.add_argument('--baseline', help="earlier results to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument('--worker', choices=['build', 'query'], help=argparse.SUPPRESS)
+    parser.add_argument('--store', help=argparse.SUPPRESS)
+    parser.add_argument('--corpus', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        limit = args.memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        if args.worker == 'build':
+            result = build_worker(args.store, args.corpus)
+        else:
+            with open(args.corpus, 'r', encoding='utf-8') as f:
+                queries = json.load(f)
+            result = query_worker(args.store, queries, args.query_budget_s, args.threads)
+        print(json.dumps(result))
+        return
+
+    args.corpus_dir = os.path.abspath(args.corpus_dir)
+    model = CorpusModel.from_data()
+    print(f"Fitted to the scraped text: zipf s={model.zipf_s:.3f}, "
+          f"heaps beta={model.heaps_beta:.3f}, {len(model.real_words)} real words")
+    queries_path = os.path.join(args.corpus_dir, f'queries_{args.queries}.json')
+    os.makedirs(args.corpus_dir, exist_ok=True)
+    with open(queries_path, 'w', encoding='utf-8') as f:
+        json.dump(model.queries(args.queries), f)
+
+    corpora, results = {}, []
+    for size in args.sizes:
+        corpus_path = os.path.join(args.corpus_dir, f'corpus_{size}_seed{model.seed}.jsonl')
+        if not os.path.exists(corpus_path + '.stats'):
+            print(f"Generating {size} chunks...")
+            with open(corpus_path + '.stats', 'w', encoding='utf-8') as f:
+                json.dump(model.generate(size, corpus_path), f)
+        with open(corpus_path + '.stats', 'r', encoding='utf-8') as f:
+            corpora[size] = json.load(f)
+        for store_key in args.stores:
+            missing = [m for m in STORES[store_key] if importlib.util.find_spec(m) is None]
+            if missing:
+                result = {'status': 'unavailable', 'error': f"missing {', '.join(missing)}"}
+            else:
+                print(f"{store_key} @ {size}...")
+                result = run_configuration(store_key, corpus_path, queries_path, args)
+            result.update(store=store_key, chunks=size)
+            results.append(result)
+            print(json.dumps(result))
+
+    print_table(results)
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'queries': args.queries,
+            'threads': args.threads,
+            'memory_limit_mb': args.memory_limit_mb
+        },
+        'corpus_model': {
+            'zipf_s': round(model.zipf_s, 4),
+            'heaps_k': round(model.heaps_k, 4),
+            'heaps_beta': round(model.heaps_beta, 4),
+            'real_words': len(model.real_words)
+        },
+        'corpora': corpora,
+        'results': results
+    }
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Retrieval Evaluation
+====================
+
+Quality versus latency of every retriever configuration, so a speed
+optimization can be shown not to hurt answers. Each configuration is
+loaded into a ChatbotEngine and every labeled query in
+data/eval_queries.json goes through ChatbotEngine.retrieve_context.
+
+A labeled query lists the source URLs that answer it ('relevant', grade
+2) and URLs that help ('related', grade 1). Results are judged per
+source URL: the first chunk of a page counts, further chunks of the
+same page add nothing. Reported per configuration and top_k:
+- recall@k: share of the relevant URLs among the results
+- MRR: reciprocal rank of the first relevant URL
+- nDCG@k: graded gain of the results against the ideal ordering
+- p50/p95/p99 latency of retrieve_context
+
+The table marks the Pareto-optimal configurations (nothing else is both
+better and faster) and recommends the fastest one that meets the quality
+floor; the exit status is 1 when none does.
+
+Usage (from the repository root):
+    python -m src.benchmarks.retrieval_eval [--configs simple:flat lightweight:tfidf]
+        [--top-k 3 5 10] [--min-recall 0.8] [--output data/benchmarks/retrieval_eval.json]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+EVAL_QUERIES = 'data/eval_queries.json'
+
+# Configuration -> ChatbotEngine vector store type and index artifact setting
+CONFIGURATIONS = {
+    'simple:flat': {'vector_store_type': 'simple', 'artifact': True},
+    'simple:lists': {'vector_store_type': 'simple', 'artifact': False},
+    'lightweight:tfidf': {'vector_store_type': 'lightweight', 'artifact': True},
+    'faiss:minilm': {'vector_store_type': 'faiss', 'artifact': True}
+}
+
+
+def load_eval_queries(path: str = EVAL_QUERIES) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['queries']
+
+
+def _grades(item: Dict) -> Dict[str, int]:
+    grades = {url: 1 for url in item.get('related', [])}
+    grades.update({url: 2 for url in item['relevant']})
+    return grades
+
+
+def _ranked_urls(results: List[Dict]) -> List[Optional[str]]:
+    """Source URL per result; None for a repeat of a URL already ranked"""
+    seen = set()
+    urls = []
+    for result in results:
+        url = (result.get('source') or {}).get('url')
+        urls.append(None if url in seen else url)
+        seen.add(url)
+    return urls
+
+
+def score(item: Dict, results: List[Dict], k: int) -> Dict[str, float]:
+    """recall@k, reciprocal rank and nDCG@k of one result list"""
+    grades = _grades(item)
+    relevant = set(item['relevant'])
+    urls = _ranked_urls(results[:k])
+    found = relevant.intersection(url for url in urls if url)
+    reciprocal_rank = next((1.0 / rank for rank, url in enumerate(urls, 1) if url in relevant), 0.0)
+    dcg = sum(grades.get(url, 0) / math.log2(rank + 1) for rank, url in enumerate(urls, 1) if url)
+    ideal = sorted(grades.values(), reverse=True)[:k]
+    idcg = sum(grade / math.log2(rank + 1) for rank, grade in enumerate(ideal, 1))
+    return {
+        'recall': len(found) / len(relevant),
+        'mrr': reciprocal_rank,
+        'ndcg': dcg / idcg if idcg else 0.0
+    }
+
+
+def load_engine(config: Dict):
+    """A ChatbotEngine retrieving with the configuration's store; None if it is unavailable"""
+    from src.core.chatbot_engine import ChatbotEngine
+    previous = os.environ.get('CHATBOT_INDEX_ARTIFACT')
+    os.environ['CHATBOT_INDEX_ARTIFACT'] = '1' if config['artifact'] else '0'
+    try:
+        engine = ChatbotEngine(vector_store_type=config['vector_store_type'])
+    finally:
+        if previous is None:
+            os.environ.pop('CHATBOT_INDEX_ARTIFACT', None)
+        else:
+            os.environ['CHATBOT_INDEX_ARTIFACT'] = previous
+    # _load_primary_store falls back to the simple store when the configured one fails
+    if config['vector_store_type'] != 'simple' and engine.primary_store is engine.vector_store:
+        return None
+    return engine
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+
+def evaluate(engine, queries: List[Dict], top_k: int, repeats: int = 3) -> Dict:
+    """Mean quality and latency percentiles of engine.retrieve_context at top_k"""
+    latencies = []
+    totals = {'recall': 0.0, 'mrr': 0.0, 'ndcg': 0.0}
+    for item in queries:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            results = engine.retrieve_context(item['query'], top_k=top_k)
+            latencies.append(time.perf_counter() - started)
+        for metric, value in score(item, results, top_k).items():
+            totals[metric] += value
+    result = {metric: round(total / len(queries), 4) for metric, total in totals.items()}
+    result.update({
+        'p50_ms': round(_percentile(latencies, 0.5) * 1000, 3),
+        'p95_ms': round(_percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 3)
+    })
+    return result
+
+
+def mark_pareto(rows: List[Dict]):
+    """Flag the rows no other row beats on both nDCG and p50 latency"""
+    for row in rows:
+        row['pareto'] = not any(
+            other['ndcg'] >= row['ndcg'] and other['p50_ms'] <= row['p50_ms']
+            and (other['ndcg'] > row['ndcg'] or other['p50_ms'] < row['p50_ms'])
+            for other in rows
+        )
+
+
+def pick(rows: List[Dict], min_recall: float, min_ndcg: float) -> Optional[Dict]:
+    """The fastest row that meets the quality floor"""
+    passing = [row for row in rows if row['recall'] >= min_recall and row['ndcg'] >= min_ndcg]
+    return min(passing, key=lambda row: row['p50_ms']) if passing else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval quality versus latency per configuration")
+    parser.add_argument('--configs', nargs='+', default=list(CONFIGURATIONS), choices=list(CONFIGURATIONS))
+    parser.add_argument('--top-k', type=int, nargs='+', default=[3, 5, 10])
+    parser.add_argument('--queries', default=EVAL_QUERIES, help="labeled query set")
+    parser.add_argument('--repeats', type=int, default=3, help="timed runs per query")
+    parser.add_argument('--min-recall', type=float, default=0.8, help="quality floor on recall@k")
+    parser.add_argument('--min-ndcg', type=float, default=0.0, help="quality floor on nDCG@k")
+    parser.add_argument('--output', help="write the results as JSON")
+    args = parser.parse_args()
+
+    queries = load_eval_queries(args.queries)
+    rows, unavailable = [], []
+    for name in args.configs:
+        engine = load_engine(CONFIGURATIONS[name])
+        if engine is None:
+            unavailable.append(name)
+            continue
+        engine.retrieve_context(queries[0]['query'])  # Warm-up
+        for top_k in args.top_k:
+            rows.append(dict(evaluate(engine, queries, top_k, args.repeats), config=name, top_k=top_k))
+    mark_pareto(rows)
+    best = pick(rows, args.min_recall, args.min_ndcg)
+
+    print(f"\n{len(queries)} labeled queries, {args.repeats} timed runs each")
+    print(f"{'config':<18} {'k':>3} {'recall':>7} {'mrr':>7} {'ndcg':>7} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8}  pareto")
+    for row in sorted(rows, key=lambda r: r['p50_ms']):
+        print(f"{row['config']:<18} {row['top_k']:>3} {row['recall']:>7.3f} {row['mrr']:>7.3f} "
+              f"{row['ndcg']:>7.3f} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8}  "
+              f"{'*' if row['pareto'] else ''}")
+    for name in unavailable:
+        print(f"{name:<18} unavailable (store could not be loaded)")
+
+    floor = f"recall >= {args.min_recall}, nDCG >= {args.min_ndcg}"
+    if best:
+        print(f"\nFastest configuration meeting {floor}: {best['config']} at top_k={best['top_k']}")
+    else:
+        print(f"\nNo configuration meets {floor}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'queries': len(queries),
+                'floor': {'min_recall': args.min_recall, 'min_ndcg': args.min_ndcg},
+                'recommended': {'config': best['config'], 'top_k': best['top_k']} if best else None,
+                'unavailable': unavailable,
+                'results': rows
+            }, f, indent=2)
+        print(f"Results written to {args.output}")
+    if best is None:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Stub LLM Server
+===============
+
+Minimal OpenAI-compatible endpoint (POST /v1/chat/completions) that waits
+a fixed latency and returns a canned completion. Point the engine at it
+with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 and any OPENAI_API_KEY to
+load test the LLM path without calling the real API.
+
+Usage:
+    python -m src.benchmarks.stub_llm [--port 8088] [--latency 0.5]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+COMPLETION_TEXT = ("Real Estate IoT offers smart building solutions including access control, "
+                   "HVAC automation, energy monitoring and security systems.")
+
+
+def completion_body(model: str) -> bytes:
+    return json.dumps({
+        'id': 'chatcmpl-stub',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': model,
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': COMPLETION_TEXT},
+            'finish_reason': 'stop'
+        }],
+        'usage': {'prompt_tokens': 100, 'completion_tokens': 20, 'total_tokens': 120}
+    }).encode('utf-8')
+
+
+class StubLLMServer:
+    def __init__(self, latency: float = 0.5):
+        self.latency = latency
+        self.requests = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve HTTP/1.1 requests on one keep-alive connection"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                method, path = request_line.decode('latin-1').split()[:2]
+                if method == 'POST' and path.endswith('/chat/completions'):
+                    self.requests += 1
+                    await asyncio.sleep(self.latency)
+                    try:
+                        model = json.loads(body or b'{}').get('model', 'stub')
+                    except ValueError:
+                        model = 'stub'
+                    status, payload = '200 OK', completion_body(model)
+                else:
+                    status, payload = '404 Not Found', b'{"error": "not found"}'
+
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n\r\n".encode('latin-1') + payload
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8088):
+        server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        print(f"Stub LLM listening on http://{host}:{port}/v1 (latency {self.latency}s)", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub for load tests")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8088)
+    parser.add_argument('--latency', type=float, default=0.5, help="seconds per completion")
+    args = parser.parse_args()
+    asyncio.run(StubLLMServer(args.latency).serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Allocation Tracking
+===================
+
+Opt-in tracemalloc control for a live process: start tracing, take
+labeled snapshots, and compare two snapshots (or a snapshot and now) to
+find leaks and allocation hot spots under real load, without a restart.
+Tracing slows allocation-heavy code down noticeably, so it is off until
+started, and only the last few snapshots are kept.
+"""
+
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Frames that only show the tracer and the import machinery
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>')
+)
+GROUP_BY = ('lineno', 'filename', 'traceback')
+
+
+def _stat_entry(stat) -> Dict:
+    entry = {
+        'location': [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+        'size_kb': round(stat.size / 1024, 1),
+        'count': stat.count
+    }
+    if hasattr(stat, 'size_diff'):
+        entry['size_diff_kb'] = round(stat.size_diff / 1024, 1)
+        entry['count_diff'] = stat.count_diff
+    return entry
+
+
+class AllocationTracker:
+    def __init__(self, max_snapshots: int = 8):
+        self.max_snapshots = max_snapshots
+        self._snapshots: 'OrderedDict[int, Dict]' = OrderedDict()  # id -> label, time, snapshot
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def start(self, frames: int = 1):
+        """Start tracing, keeping `frames` frames per allocation"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def stop(self):
+        """Stop tracing and drop the snapshots"""
+        tracemalloc.stop()
+        with self._lock:
+            self._snapshots.clear()
+
+    def status(self) -> Dict:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        with self._lock:
+            snapshots = [{'id': snapshot_id, 'label': entry['label'], 'taken_at': entry['taken_at']}
+                         for snapshot_id, entry in self._snapshots.items()]
+        return {
+            'tracing': tracing,
+            'frames': tracemalloc.get_traceback_limit() if tracing else 0,
+            'traced_mb': round(current / (1024 * 1024), 2),
+            'traced_peak_mb': round(peak / (1024 * 1024), 2),
+            'overhead_mb': round(tracemalloc.get_tracemalloc_memory() / (1024 * 1024), 2),
+            'snapshots': snapshots
+        }
+
+    @staticmethod
+    def _require_tracing():
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not tracing; start it first")
+
+    def _take(self) -> tracemalloc.Snapshot:
+        self._require_tracing()
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+    def snapshot(self, label: str = '') -> int:
+        """Take and keep a snapshot; returns its id (the oldest one is dropped when full)"""
+        snapshot = self._take()
+        with self._lock:
+            snapshot_id = self._next_id
+            self._next_id += 1
+            self._snapshots[snapshot_id] = {
+                'label': label,
+                'taken_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'snapshot': snapshot
+            }
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return snapshot_id
+
+    def _get(self, snapshot_id: int) -> tracemalloc.Snapshot:
+        with self._lock:
+            entry = self._snapshots.get(snapshot_id)
+        if entry is None:
+            raise KeyError(f"no snapshot {snapshot_id}")
+        return entry['snapshot']
+
+    def top(self, snapshot_id: Optional[int] = None, group_by: str = 'lineno', limit: int = 20) -> List[Dict]:
+        """Largest allocation sites of a kept snapshot (default: a fresh one)"""
+        self._require_tracing()
+        snapshot = self._get(snapshot_id) if snapshot_id else self._take()
+        return [_stat_entry(stat) for stat in snapshot.statistics(group_by)[:limit]]
+
+    def diff(self, from_id: int, to_id: Optional[int] = None, group_by: str = 'lineno',
+             limit: int = 20) -> List[Dict]:
+        """Allocation sites that grew the most between two snapshots (to_id None: now)"""
+        self._require_tracing()
+        older = self._get(from_id)
+        newer = self._get(to_id) if to_id else self._take()
+        return [_stat_entry(stat) for stat in newer.compare_to(older, group_by)[:limit]]
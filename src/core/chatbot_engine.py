@@ -1,53 +1,252 @@
+import asyncio
+import functools
 import json
-from typing import List, Dict, Optional
+from typing import Awaitable, Callable, List, Dict, Optional
 from .simple_vector_store import SimpleVectorStore
-import requests
+from .deadline import Deadline, DeadlineExceeded
+from .degradation import DegradationController, TIERS
+from .response_cache import ResponseCache, normalize_query
+from .single_flight import SingleFlight
+from .circuit_breaker import CircuitBreaker
+from .profiling import RequestProfiler
+from .intent_router import KeywordRouter
+from .navigation_index import NavigationIndex
+from .structured_logging import get_logger
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime
+import importlib.util
 import os
+import time
 from dotenv import load_dotenv
 
-# Optional OpenAI import
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+# Optional OpenAI dependency; the package takes most of a second to import,
+# so it is only imported when the first LLM client is created
+OPENAI_AVAILABLE = importlib.util.find_spec('openai') is not None
+if not OPENAI_AVAILABLE:
     print("OpenAI not available. Using fallback responses.")
 
 # Load environment variables
 load_dotenv()
 
+logger = get_logger('engine')
+
+# Keyword routing of the template answers, matched in one pass per query.
+# Within each group the first category listed wins.
+TEMPLATE_ROUTER = KeywordRouter([
+    # Answers when retrieval found nothing
+    ('topic:iot', ['iot', 'sensor']),
+    ('topic:building', ['smart building', 'building']),
+    ('topic:energy', ['energy']),
+    ('topic:contact', ['contact']),
+    ('topic:services', ['service', 'what do you do']),
+    # Sentence appended to answers built from context
+    ('closing:how', ['how']),
+    ('closing:cost', ['cost', 'price']),
+    ('closing:benefit', ['benefit'])
+])
+
+GENERAL_ANSWER = "GaoTech is a leading provider of Real Estate IoT solutions and smart building technologies. We offer comprehensive services including smart sensors, automated systems, energy management, and property management solutions. How can I help you learn more about our specific offerings?"
+TOPIC_ANSWERS = {
+    'topic:iot': "GaoTech provides advanced IoT solutions including smart sensors, automated systems, and energy management for buildings. Our IoT technology helps optimize building performance and reduce operational costs.",
+    'topic:building': "Our smart building solutions include automated lighting, HVAC control, security systems, and energy monitoring. We help transform traditional buildings into intelligent, efficient spaces.",
+    'topic:energy': "GaoTech's energy management solutions help reduce building operating costs through intelligent monitoring, automated controls, and predictive maintenance.",
+    'topic:contact': "You can contact GaoTech for more information about our Real Estate IoT solutions and smart building technologies. We offer free consultations and custom solution design.",
+    'topic:services': "GaoTech specializes in Real Estate IoT solutions, smart building technologies, property management systems, and comprehensive technology services for the real estate industry."
+}
+CLOSINGS = {
+    'closing:how': "Our expert team will work with you to design and implement the perfect solution for your specific needs.",
+    'closing:cost': "Our solutions are designed to provide excellent ROI through energy savings and operational efficiency. Contact us for a personalized quote.",
+    'closing:benefit': "These solutions can help reduce operating costs by up to 30% while improving building efficiency and tenant satisfaction."
+}
+_TOPICS = TEMPLATE_ROUTER.mask(*TOPIC_ANSWERS)
+_CLOSINGS = TEMPLATE_ROUTER.mask(*CLOSINGS)
+
+# Answers and prompts carry the best sentence windows of the retrieved
+# chunks (SimpleVectorStore.passages) instead of the whole chunks
+ANSWER_PASSAGES = 2
+ANSWER_WINDOW = 2
+PROMPT_PASSAGES = 4
+PROMPT_WINDOW = 3
+
 class ChatbotEngine:
     def __init__(self, 
                  openai_api_key: Optional[str] = None,
                  use_openai_embeddings: bool = False,
-                 model_name: str = "gpt-3.5-turbo"):
+                 model_name: str = "gpt-3.5-turbo",
+                 vector_store_type: str = "simple",
+                 degradation: Optional[DegradationController] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 generation_mode: str = "template",
+                 llm_client: Optional[Callable[[str, Optional[float]], Dict]] = None,
+                 async_llm_client: Optional[Callable[[str, Optional[float]], Awaitable[Dict]]] = None,
+                 llm_slo: float = 2.0,
+                 llm_timeout: float = 30.0,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 profiler: Optional[RequestProfiler] = None,
+                 load: bool = True):
         
         # Use provided key or load from environment
         if not openai_api_key:
             openai_api_key = os.getenv('OPENAI_API_KEY')
         
+        # SimpleVectorStore is always loaded: it is the cheap retriever used under load
         self.vector_store = SimpleVectorStore()
         self.openai_api_key = openai_api_key
         self.model_name = model_name
         
-        # Load vector store
-        if not self.vector_store.load_index():
+        if vector_store_type not in ('simple', 'lightweight', 'faiss'):
+            raise ValueError(f"Unknown vector store type: {vector_store_type}")
+        self.vector_store_type = vector_store_type
+        # Until load_primary_store() runs, retrieval uses the cheap store
+        self.primary_store = self.vector_store
+        
+        self.degradation = degradation or DegradationController()
+        self.response_cache = response_cache or ResponseCache()
+        self.single_flight = SingleFlight()
+        
+        # Generation modes:
+        #   template - template answers only (the default)
+        #   llm      - LLM answers, template answers while the circuit breaker is open
+        #   hedged   - LLM and template answers in parallel; the template answer
+        #              is returned when the LLM misses the llm_slo (seconds)
+        if generation_mode not in ('template', 'llm', 'hedged'):
+            raise ValueError(f"Unknown generation mode: {generation_mode}")
+        self.generation_mode = generation_mode
+        custom_llm_client = llm_client is not None or async_llm_client is not None
+        self.llm_client = llm_client or self.generate_answer_openai
+        if async_llm_client is None:
+            # A custom sync client runs on a worker thread; OpenAI has a native async client
+            async_llm_client = self._run_llm_client_in_thread if llm_client else self.agenerate_answer_openai
+        self.async_llm_client = async_llm_client
+        self._openai = None
+        self._async_openai = None
+        self.llm_slo = llm_slo
+        self.llm_timeout = llm_timeout  # Provider timeout; late hedged answers still land in the cache
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.profiler = profiler  # Optional RequestProfiler, see chat()
+        # Pages of the indexed chunks, for queries that ask for one (see _navigation_answer)
+        self.navigation = NavigationIndex()
+        self._llm_executor = None
+        self.generation_stats = {
+            'llm_answers': 0,
+            'template_fallbacks': 0,
+            'slo_misses': 0,
+            'late_answers_cached': 0,
+            'circuit_skips': 0
+        }
+        
+        self.use_openai = generation_mode != 'template' and (custom_llm_client or bool(openai_api_key))
+        if self.use_openai:
+            print(f"Using LLM responses ({generation_mode} mode).")
+        else:
+            print("Using template-based responses (OpenAI disabled for stability).")
+        
+        # With load=False the caller runs load_index() and load_primary_store()
+        # itself, e.g. in phases on a background thread
+        if load:
+            self.load_index()
+            self.load_primary_store()
+    
+    async def _run_llm_client_in_thread(self, prompt: str, timeout: Optional[float]) -> Dict:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.llm_client, prompt, timeout)
+    
+    def load_index(self) -> bool:
+        """Load the chunks into the cheap retriever (SimpleVectorStore)"""
+        loaded = self.vector_store.load_index()
+        if not loaded:
             print("Warning: Vector store not found. Please run the setup process first.")
+        self.navigation = NavigationIndex(self.vector_store.chunk_store())
+        return loaded
+    
+    def load_primary_store(self):
+        """Load the configured primary store; it replaces the cheap retriever once loaded"""
+        self.primary_store = self._load_primary_store(self.vector_store_type)
+        return self.primary_store
+    
+    def warm_up(self, query: str = "What smart building solutions do you offer?") -> float:
+        """Pay the one-time costs (embedding model, first searches, LLM client) up front
         
-        # Force non-OpenAI mode for now to avoid client issues
-        self.use_openai = False
-        print("Using template-based responses (OpenAI disabled for stability).")
+        Runs retrieval and template generation once without touching the
+        response cache or the load statistics. Returns the seconds it took.
+        """
+        started = time.perf_counter()
+        stores = [self.vector_store]
+        if self.primary_store is not self.vector_store:
+            stores.append(self.primary_store)
+        for store in stores:
+            context_chunks = store.search(query, top_k=3)
+        self.generate_answer_free(query, context_chunks)
+        if self.use_openai and self.llm_client == self.generate_answer_openai and OPENAI_AVAILABLE:
+            self._openai_client()
+            self._async_openai_client()
+        return time.perf_counter() - started
+    
+    def _openai_client(self):
+        if self._openai is None:
+            import openai
+            self._openai = openai.OpenAI(api_key=self.openai_api_key)
+        return self._openai
     
-    def retrieve_context(self, query: str, top_k: int = 5) -> List[Dict]:
-        """Retrieve relevant context from vector store"""
+    def _async_openai_client(self):
+        if self._async_openai is None:
+            import openai
+            self._async_openai = openai.AsyncOpenAI(api_key=self.openai_api_key)
+        return self._async_openai
+    
+    def _load_primary_store(self, vector_store_type: str):
+        """TF-IDF ('lightweight') or FAISS ('faiss') store, falling back to SimpleVectorStore"""
+        if vector_store_type == 'simple':
+            return self.vector_store
+        
+        try:
+            if vector_store_type == 'lightweight':
+                from .lightweight_vector_store import LightweightVectorStore
+                store = LightweightVectorStore(use_openai=False)
+                if store.load_index("data/vector_store"):
+                    return store
+            else:
+                from .vector_store import VectorStore
+                store = VectorStore(use_openai=False)
+                if store.load_index("faiss_store"):
+                    return store
+        except ImportError as e:
+            print(f"Could not load the {vector_store_type} vector store: {e}")
+        print("Falling back to SimpleVectorStore for retrieval.")
+        return self.vector_store
+    
+    def memory_usage(self) -> Dict[str, Dict[str, int]]:
+        """Estimated bytes per component of each store and the response cache"""
+        usage = {'simple_store': self.vector_store.memory_usage()}
+        if self.primary_store is not self.vector_store:
+            usage['primary_store'] = self.primary_store.memory_usage()
+        usage['response_cache'] = self.response_cache.memory_usage()
+        return usage
+    
+    @property
+    def index_version(self) -> str:
+        return self.vector_store.index_version
+    
+    def retrieve_context(self, query: str, top_k: int = 5, store=None) -> List[Dict]:
+        """Retrieve relevant context from vector store (the primary one by default)"""
         try:
-            results = self.vector_store.search(query, top_k=top_k)
+            results = (store or self.primary_store).search(query, top_k=top_k)
             return results
         except Exception as e:
-            print(f"Error retrieving context: {e}")
+            logger.error("Error retrieving context: %s", e, extra={'event': 'retrieval.error'})
             return []
     
+    def select_passages(self, query: str, context_chunks: List[Dict], limit: int, window: int) -> List[Dict]:
+        """Best sentence windows of the retrieved chunks; the chunks themselves when none match"""
+        if not context_chunks:
+            return []
+        try:
+            passages = self.vector_store.passages(query, top_k=limit, window=window, chunks=context_chunks)
+        except Exception as e:
+            logger.error("Error selecting passages: %s", e, extra={'event': 'passages.error'})
+            passages = []
+        return passages or context_chunks[:limit]
+    
     def build_prompt(self, query: str, context_chunks: List[Dict]) -> str:
         """Build the prompt for the language model"""
         
@@ -63,9 +262,9 @@ Guidelines:
 - If asked about services, pricing, or contact information, refer to the website content
 - Always maintain a professional tone suitable for real estate and IoT industry"""
         
-        # Build context from retrieved chunks
+        # Build context from the relevant passages of the retrieved chunks
         context_text = ""
-        for i, chunk in enumerate(context_chunks):
+        for i, chunk in enumerate(self.select_passages(query, context_chunks, PROMPT_PASSAGES, PROMPT_WINDOW)):
             if 'source' in chunk:
                 source_info = f"Source: {chunk['source']['title']} ({chunk['source']['url']})"
             else:
@@ -85,8 +284,8 @@ ANSWER (based on the website content above):"""
         
         return prompt
     
-    def generate_answer_openai(self, prompt: str) -> Dict:
-        """Generate answer using OpenAI API"""
+    def generate_answer_openai(self, prompt: str, timeout: Optional[float] = None) -> Dict:
+        """Generate answer using OpenAI API (timeout in seconds, e.g. what is left of a deadline)"""
         if not OPENAI_AVAILABLE:
             return {
                 'answer': "OpenAI is not available. Please install the openai package.",
@@ -96,15 +295,14 @@ ANSWER (based on the website content above):"""
             }
         
         try:
-            client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-            
-            response = client.chat.completions.create(
+            response = self._openai_client().chat.completions.create(
                 model=self.model_name,
                 messages=[
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=500,
-                temperature=0.7
+                temperature=0.7,
+                timeout=timeout
             )
             
             answer = response.choices[0].message.content.strip()
@@ -117,7 +315,44 @@ ANSWER (based on the website content above):"""
             }
             
         except Exception as e:
-            print(f"OpenAI API error: {e}")
+            logger.error("OpenAI API error: %s", e, extra={'event': 'llm.api_error'})
+            return {
+                'answer': f"I apologize, but I'm having trouble generating a response right now. Error: {str(e)}",
+                'model': self.model_name,
+                'status': 'error',
+                'error': str(e)
+            }
+    
+    async def agenerate_answer_openai(self, prompt: str, timeout: Optional[float] = None) -> Dict:
+        """Async generate_answer_openai; one client (and connection pool) is shared by all calls"""
+        if not OPENAI_AVAILABLE:
+            return {
+                'answer': "OpenAI is not available. Please install the openai package.",
+                'model': 'fallback',
+                'status': 'error',
+                'tokens_used': 0
+            }
+        
+        try:
+            response = await self._async_openai_client().chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=500,
+                temperature=0.7,
+                timeout=timeout
+            )
+            
+            return {
+                'answer': response.choices[0].message.content.strip(),
+                'model': self.model_name,
+                'status': 'success',
+                'tokens_used': response.usage.total_tokens
+            }
+            
+        except Exception as e:
+            logger.error("OpenAI API error: %s", e, extra={'event': 'llm.api_error'})
             return {
                 'answer': f"I apologize, but I'm having trouble generating a response right now. Error: {str(e)}",
                 'model': self.model_name,
@@ -129,50 +364,33 @@ ANSWER (based on the website content above):"""
         """Generate answer using free alternatives (template-based)"""
         
         try:
-            query_lower = query.lower()
+            intents = TEMPLATE_ROUTER.match(query.lower())
             
             # If no context chunks, provide general information
             if not context_chunks:
-                if 'iot' in query_lower or 'sensor' in query_lower:
-                    answer = "GaoTech provides advanced IoT solutions including smart sensors, automated systems, and energy management for buildings. Our IoT technology helps optimize building performance and reduce operational costs."
-                elif 'smart building' in query_lower or 'building' in query_lower:
-                    answer = "Our smart building solutions include automated lighting, HVAC control, security systems, and energy monitoring. We help transform traditional buildings into intelligent, efficient spaces."
-                elif 'energy' in query_lower:
-                    answer = "GaoTech's energy management solutions help reduce building operating costs through intelligent monitoring, automated controls, and predictive maintenance."
-                elif 'contact' in query_lower:
-                    answer = "You can contact GaoTech for more information about our Real Estate IoT solutions and smart building technologies. We offer free consultations and custom solution design."
-                elif 'service' in query_lower or 'what do you do' in query_lower:
-                    answer = "GaoTech specializes in Real Estate IoT solutions, smart building technologies, property management systems, and comprehensive technology services for the real estate industry."
-                else:
-                    answer = "GaoTech is a leading provider of Real Estate IoT solutions and smart building technologies. We offer comprehensive services including smart sensors, automated systems, energy management, and property management solutions. How can I help you learn more about our specific offerings?"
-                
+                topic = TEMPLATE_ROUTER.first(intents, _TOPICS)
                 return {
-                    'response': answer,
+                    'response': TOPIC_ANSWERS[topic] if topic else GENERAL_ANSWER,
                     'model': 'template-based',
                     'status': 'success'
                 }
             
-            # Extract key information from context chunks
+            # Extract the best passages of the context chunks
             relevant_content = []
-            for chunk in context_chunks:
-                content = chunk.get('content', chunk.get('text', ''))
+            for passage in self.select_passages(query, context_chunks, ANSWER_PASSAGES, ANSWER_WINDOW):
+                content = passage.get('content', passage.get('text', ''))
                 if content:
                     relevant_content.append(content)
             
             # Use the most relevant content
             if relevant_content:
-                # Combine and use the best matching content
-                combined_content = ' '.join(relevant_content[:2])  # Use top 2 chunks
+                # Combine the best matching passages
+                answer = ' '.join(relevant_content)
                 
                 # Add context-specific enhancements based on query
-                if 'how' in query_lower:
-                    answer = f"{combined_content} Our expert team will work with you to design and implement the perfect solution for your specific needs."
-                elif 'cost' in query_lower or 'price' in query_lower:
-                    answer = f"{combined_content} Our solutions are designed to provide excellent ROI through energy savings and operational efficiency. Contact us for a personalized quote."
-                elif 'benefit' in query_lower:
-                    answer = f"{combined_content} These solutions can help reduce operating costs by up to 30% while improving building efficiency and tenant satisfaction."
-                else:
-                    answer = combined_content
+                closing = TEMPLATE_ROUTER.first(intents, _CLOSINGS)
+                if closing:
+                    answer = f"{answer} {CLOSINGS[closing]}"
                 
                 return {
                     'response': answer,
@@ -188,7 +406,7 @@ ANSWER (based on the website content above):"""
             }
             
         except Exception as e:
-            print(f"Error in generate_answer_free: {e}")
+            logger.error("Error in generate_answer_free: %s", e, extra={'event': 'generation.error'})
             return {
                 'response': "I apologize, but I'm experiencing technical difficulties. GaoTech specializes in Real Estate IoT solutions and smart building technologies. Please try asking your question again or contact us directly for more information.",
                 'model': 'template-based',
@@ -196,109 +414,355 @@ ANSWER (based on the website content above):"""
                 'error': str(e)
             }
     
-    def _build_contextual_answer(self, query_lower: str, relevant_info: List[str], sources: set) -> str:
-        """Build a contextual answer based on the query type"""
-        
-        # Combine all relevant information
-        full_context = " ".join(relevant_info)
-        
-        # Extract key sentences based on query keywords
-        key_sentences = []
-        
-        # Split context into sentences
-        sentences = full_context.split('. ')
-        
-        # Define keyword categories
-        keywords_map = {
-            'what is': ['Real Estate IoT', 'company', 'about', 'services'],
-            'how does': ['work', 'function', 'operate', 'help'],
-            'benefits': ['benefit', 'advantage', 'improve', 'efficiency'],
-            'hvac': ['HVAC', 'heating', 'cooling', 'climate', 'temperature'],
-            'lighting': ['lighting', 'light', 'illumination', 'LED'],
-            'security': ['security', 'surveillance', 'CCTV', 'alarm', 'intrusion'],
-            'energy': ['energy', 'power', 'consumption', 'efficiency', 'monitoring'],
-            'smart': ['smart', 'IoT', 'automation', 'technology'],
-            'career': ['career', 'job', 'internship', 'opportunity', 'position'],
-            'contact': ['contact', 'reach', 'phone', 'email', 'address']
+    def _store_for(self, tier: Dict):
+        return self.primary_store if tier['retriever'] == 'primary' else self.vector_store
+    
+    def _finish(self, query: str, tier: Dict, context_chunks: List[Dict], result: Dict,
+                late_answer=None, pinned: bool = False) -> Dict:
+        """Add metadata, cache a successful answer and hook up a late LLM answer"""
+        if 'response' not in result and 'answer' in result:
+            result['response'] = result['answer']
+        metadata = {
+            'context_chunks_count': len(context_chunks),
+            'sources': [chunk.get('source', {}) for chunk in context_chunks],
+            'tier': tier['name'],
+            'cached': False
         }
+        result.update(metadata)
+        if result.get('status') == 'success':
+            self.response_cache.put(query, self.index_version, result, tier=tier['level'], pinned=pinned)
+        
+        if late_answer is not None:
+            # The LLM answer replaces the cached template answer when it arrives
+            index_version = self.index_version
+            late_answer.add_done_callback(
+                lambda future: self._cache_late_answer(future, query, index_version, tier, metadata)
+            )
+            result = dict(result, better_answer_pending=True)
+        return result
+    
+    def _generate(self, query: str, tier: Dict, deadline: Optional[Deadline] = None,
+                  pinned: bool = False) -> Dict:
+        """Retrieve context and generate an answer at the given degradation tier"""
+        # Retrieve relevant context
+        if deadline:
+            deadline.check('retrieval')
+        context_chunks = self.retrieve_context(query, top_k=tier['top_k'], store=self._store_for(tier))
+        
+        # Generate answer
+        if deadline:
+            deadline.check('generation')
+        late_answer = None
+        if self.use_openai and tier['generation'] == 'llm':
+            result, late_answer = self._generate_with_llm(query, context_chunks, deadline)
+        else:
+            result = self.generate_answer_free(query, context_chunks)
+        return self._finish(query, tier, context_chunks, result, late_answer, pinned)
+    
+    async def _agenerate(self, query: str, tier: Dict, deadline: Optional[Deadline] = None) -> Dict:
+        """Async _generate: retrieval in an executor, LLM I/O awaited"""
+        if deadline:
+            deadline.check('retrieval')
+        context_chunks = await self.aretrieve_context(query, top_k=tier['top_k'], store=self._store_for(tier))
         
-        # Find relevant sentences based on query
-        for sentence in sentences:
-            sentence_lower = sentence.lower()
-            for category, keywords in keywords_map.items():
-                if any(keyword.lower() in query_lower for keyword in keywords):
-                    if any(keyword.lower() in sentence_lower for keyword in keywords):
-                        key_sentences.append(sentence.strip())
-                        break
-        
-        # If no specific matches, use first few sentences
-        if not key_sentences:
-            key_sentences = sentences[:3]
-        
-        # Remove duplicates and empty sentences
-        key_sentences = list(dict.fromkeys([s for s in key_sentences if s.strip()]))
-        
-        # Build answer
-        if 'what is' in query_lower or 'about' in query_lower:
-            answer = "Real Estate IoT is a company that specializes in smart building solutions. "
-        elif 'how' in query_lower:
-            answer = "Here's how it works: "
-        elif 'benefit' in query_lower:
-            answer = "The key benefits include: "
-        elif 'career' in query_lower or 'job' in query_lower:
-            answer = "Regarding career opportunities: "
-        elif 'contact' in query_lower:
-            answer = "To contact Real Estate IoT: "
+        if deadline:
+            deadline.check('generation')
+        late_answer = None
+        if self.use_openai and tier['generation'] == 'llm':
+            result, late_answer = await self._agenerate_with_llm(query, context_chunks, deadline)
         else:
-            answer = "Based on Real Estate IoT's website: "
+            result = self.generate_answer_free(query, context_chunks)
+        return self._finish(query, tier, context_chunks, result, late_answer)
+    
+    def _call_llm(self, query: str, context_chunks: List[Dict], timeout: Optional[float]) -> Dict:
+        return self.llm_client(self.build_prompt(query, context_chunks), timeout)
+    
+    async def _acall_llm(self, query: str, context_chunks: List[Dict], timeout: Optional[float]) -> Dict:
+        return await self.async_llm_client(self.build_prompt(query, context_chunks), timeout)
+    
+    def _llm_timeout(self, deadline: Optional[Deadline]) -> float:
+        return min(self.llm_timeout, deadline.remaining()) if deadline else self.llm_timeout
+    
+    def _hedge_wait(self, deadline: Optional[Deadline]) -> float:
+        return min(self.llm_slo, deadline.remaining()) if deadline else self.llm_slo
+    
+    def _llm_outcome(self, result: Dict, query: str, context_chunks: List[Dict],
+                     template: Optional[Dict] = None) -> Dict:
+        """Record an LLM result with the circuit breaker; the template answer replaces failures"""
+        if result.get('status') == 'success':
+            self.circuit_breaker.record_success()
+            self.generation_stats['llm_answers'] += 1
+            return result
+        self.circuit_breaker.record_failure()
+        self.generation_stats['template_fallbacks'] += 1
+        return template or self.generate_answer_free(query, context_chunks)
+    
+    def _generate_with_llm(self, query: str, context_chunks: List[Dict],
+                           deadline: Optional[Deadline] = None):
+        """LLM answer (llm/hedged modes); returns (result, future of a late LLM answer or None)"""
+        if not self.circuit_breaker.allow():
+            self.generation_stats['circuit_skips'] += 1
+            return self.generate_answer_free(query, context_chunks), None
+        
+        if self.generation_mode == 'llm':
+            try:
+                result = self._call_llm(query, context_chunks, self._llm_timeout(deadline))
+            except Exception as e:
+                logger.warning("LLM call failed: %r", e, extra={'event': 'llm.failed'})
+                result = {'status': 'error'}
+            return self._llm_outcome(result, query, context_chunks), None
+        
+        # Hedged: start the LLM call, build the template answer meanwhile
+        if self._llm_executor is None:
+            self._llm_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='llm')
+        future = self._llm_executor.submit(self._call_llm, query, context_chunks, self.llm_timeout)
+        template = self.generate_answer_free(query, context_chunks)
+        
+        try:
+            result = future.result(timeout=self._hedge_wait(deadline))
+        except FutureTimeout:
+            self.circuit_breaker.record_failure()
+            self.generation_stats['slo_misses'] += 1
+            return template, future
+        except Exception as e:
+            logger.warning("LLM call failed: %r", e, extra={'event': 'llm.failed'})
+            result = {'status': 'error'}
+        return self._llm_outcome(result, query, context_chunks, template), None
+    
+    async def _agenerate_with_llm(self, query: str, context_chunks: List[Dict],
+                                  deadline: Optional[Deadline] = None):
+        """Async _generate_with_llm; a late answer is returned as an asyncio task"""
+        if not self.circuit_breaker.allow():
+            self.generation_stats['circuit_skips'] += 1
+            return self.generate_answer_free(query, context_chunks), None
         
-        # Add the most relevant information
-        if key_sentences:
-            answer += key_sentences[0]
-            if len(key_sentences) > 1:
-                answer += f" {key_sentences[1]}"
+        if self.generation_mode == 'llm':
+            timeout = self._llm_timeout(deadline)
+            try:
+                result = await asyncio.wait_for(self._acall_llm(query, context_chunks, timeout), timeout)
+            except Exception as e:
+                logger.warning("LLM call failed: %r", e, extra={'event': 'llm.failed'})
+                result = {'status': 'error'}
+            return self._llm_outcome(result, query, context_chunks), None
         
-        # Add sources
-        if sources:
-            source_list = list(sources)[:2]
-            answer += f"\n\nFor more information, visit: {', '.join(source_list)}"
+        task = asyncio.ensure_future(self._acall_llm(query, context_chunks, self.llm_timeout))
+        template = self.generate_answer_free(query, context_chunks)
         
-        return answer
+        done, _ = await asyncio.wait({task}, timeout=self._hedge_wait(deadline))
+        if not done:
+            self.circuit_breaker.record_failure()
+            self.generation_stats['slo_misses'] += 1
+            return template, task
+        try:
+            result = task.result()
+        except Exception as e:
+            logger.warning("LLM call failed: %r", e, extra={'event': 'llm.failed'})
+            result = {'status': 'error'}
+        return self._llm_outcome(result, query, context_chunks, template), None
     
-    def chat(self, query: str, include_sources: bool = True) -> Dict:
-        """Main chat function"""
+    def _cache_late_answer(self, future, query: str, index_version: str, tier: Dict, metadata: Dict):
+        """Done-callback for an LLM answer that missed the SLO"""
         try:
-            # Retrieve relevant context
-            context_chunks = self.retrieve_context(query, top_k=5)
-            
-            # Build prompt
-            prompt = self.build_prompt(query, context_chunks)
-            
-            # Generate answer
-            if self.use_openai:
-                result = self.generate_answer_openai(prompt)
-            else:
-                result = self.generate_answer_free(query, context_chunks)
-            
-            # Add metadata
-            result.update({
+            result = future.result()
+        except Exception as e:
+            logger.warning("Late LLM call failed: %r", e, extra={'event': 'llm.late_failed'})
+            return
+        if result.get('status') != 'success':
+            return
+        result = dict(result, late_answer=True, **metadata)
+        if 'response' not in result:
+            result['response'] = result.get('answer', '')
+        self.response_cache.put(query, index_version, result, tier=tier['level'])
+        self.generation_stats['late_answers_cached'] += 1
+    
+    def _cached_answer(self, query: str, tier: Dict, include_sources: bool) -> Optional[Dict]:
+        cached = self.response_cache.get(query, self.index_version, max_tier=tier['level'])
+        if cached is not None:
+            cached.update({
                 'query': query,
                 'timestamp': datetime.now().isoformat(),
-                'context_chunks_count': len(context_chunks),
-                'sources': [chunk.get('source', {}) for chunk in context_chunks] if include_sources else []
+                'tier': tier['name'],
+                'cached': True
             })
+            if not include_sources:
+                cached['sources'] = []
+        return cached
+    
+    def _navigation_answer(self, query: str, tier: Dict, include_sources: bool) -> Optional[Dict]:
+        """The page summary and link when the query asks for one page (contact, careers, ...)"""
+        page = self.navigation.lookup(query)
+        if page is None:
+            return None
+        return {
+            'response': f"{page['title']}: {page['summary']}\n\nFor more information, visit: {page['url']}",
+            'model': 'navigation',
+            'status': 'success',
+            'query': query,
+            'timestamp': datetime.now().isoformat(),
+            'context_chunks_count': 0,
+            'sources': [{'title': page['title'], 'url': page['url']}] if include_sources else [],
+            'tier': tier['name'],
+            'cached': False
+        }
+    
+    def _cache_only_answer(self, query: str, tier: Dict) -> Dict:
+        """Keyword templates only: no retrieval, no generation"""
+        result = self.generate_answer_free(query, [])
+        result.update({
+            'query': query,
+            'timestamp': datetime.now().isoformat(),
+            'context_chunks_count': 0,
+            'sources': [],
+            'tier': tier['name'],
+            'cached': False
+        })
+        return result
+    
+    def _caller_copy(self, shared_result: Dict, query: str, coalesced: bool,
+                     include_sources: bool) -> Dict:
+        """Every caller gets its own copy of a (possibly shared) answer"""
+        result = dict(shared_result)
+        result.update({
+            'query': query,
+            'timestamp': datetime.now().isoformat(),
+            'coalesced': coalesced
+        })
+        if not include_sources:
+            result['sources'] = []
+        return result
+    
+    def _error_answer(self, query: str, e: Exception) -> Dict:
+        logger.error("Error in chat method: %s", e, extra={'event': 'chat.error'})
+        return {
+            'response': f"I apologize, but I encountered an issue while processing your question about Real Estate IoT. Please try rephrasing your question or ask about our IoT solutions, smart building technology, or career opportunities. Error details: {str(e)}",
+            'status': 'error',
+            'error': str(e),
+            'query': query,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def chat(self, query: str, include_sources: bool = True,
+             deadline: Optional[Deadline] = None, profile: Optional[str] = None) -> Dict:
+        """Main chat function
+        
+        With a deadline, DeadlineExceeded is raised when it expires between
+        stages, and the OpenAI call only gets the time that is left. The
+        degradation tier decides how much work is spent on the answer, and
+        identical concurrent queries share a single computation.
+        Navigational queries are answered from the navigation index
+        before the cache or any retrieval.
+        
+        profile ('cprofile' or 'sample') asks the profiler to capture this
+        request; the answer then carries the kept profile's 'profile_id'.
+        """
+        profiler = self.profiler
+        if profiler is None or not (profile or profiler.armed):
+            return self._chat(query, include_sources, deadline)
+        with profiler.capture(query, profile) as outcome:
+            result = self._chat(query, include_sources, deadline)
+        if 'id' in outcome:
+            result['profile_id'] = outcome['id']
+        return result
+    
+    def _chat(self, query: str, include_sources: bool, deadline: Optional[Deadline]) -> Dict:
+        started = time.perf_counter()
+        tier = self.degradation.current_tier()
+        try:
+            navigation = self._navigation_answer(query, tier, include_sources)
+            if navigation is not None:
+                return navigation
+            cached = self._cached_answer(query, tier, include_sources)
+            if cached is not None:
+                return cached
+            if tier['generation'] == 'cache':
+                return self._cache_only_answer(query, tier)
             
-            return result
+            try:
+                shared_result, coalesced = self.single_flight.do(
+                    (normalize_query(query), self.index_version),
+                    lambda: self._generate(query, tier, deadline),
+                    timeout=deadline.remaining() if deadline else None
+                )
+            except TimeoutError:
+                raise DeadlineExceeded('coalesced request')
+            return self._caller_copy(shared_result, query, coalesced, include_sources)
             
+        except DeadlineExceeded:
+            raise
         except Exception as e:
-            print(f"Error in chat method: {e}")
-            return {
-                'response': f"I apologize, but I encountered an issue while processing your question about Real Estate IoT. Please try rephrasing your question or ask about our IoT solutions, smart building technology, or career opportunities. Error details: {str(e)}",
-                'status': 'error',
-                'error': str(e),
-                'query': query,
-                'timestamp': datetime.now().isoformat()
-            }
+            return self._error_answer(query, e)
+        finally:
+            self.degradation.observe(time.perf_counter() - started)
+    
+    async def aretrieve_context(self, query: str, top_k: int = 5, store=None) -> List[Dict]:
+        """retrieve_context on the default executor, keeping the event loop free"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.retrieve_context, query, top_k, store))
+    
+    async def achat(self, query: str, include_sources: bool = True,
+                    deadline: Optional[Deadline] = None) -> Dict:
+        """Async chat: same answers as chat(), without holding a thread while the LLM responds"""
+        started = time.perf_counter()
+        tier = self.degradation.current_tier()
+        try:
+            navigation = self._navigation_answer(query, tier, include_sources)
+            if navigation is not None:
+                return navigation
+            cached = self._cached_answer(query, tier, include_sources)
+            if cached is not None:
+                return cached
+            if tier['generation'] == 'cache':
+                return self._cache_only_answer(query, tier)
+            
+            try:
+                shared_result, coalesced = await self.single_flight.do_async(
+                    (normalize_query(query), self.index_version),
+                    lambda: self._agenerate(query, tier, deadline),
+                    timeout=deadline.remaining() if deadline else None
+                )
+            except TimeoutError:
+                raise DeadlineExceeded('coalesced request')
+            return self._caller_copy(shared_result, query, coalesced, include_sources)
+            
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            return self._error_answer(query, e)
+        finally:
+            self.degradation.observe(time.perf_counter() - started)
+    
+    def precompute_answers(self, queries: List[str], refresh: bool = False) -> Dict:
+        """Answer queries at the full tier and pin the answers in the response cache
+        
+        Queries already pinned for the current index version are skipped
+        unless refresh is set. Returns counts and the time taken.
+        """
+        started = time.perf_counter()
+        index_version = self.index_version
+        tier = dict(TIERS[0], level=0)
+        computed, skipped, failed = 0, 0, 0
+        for query in queries:
+            if not refresh and self.response_cache.is_pinned(query, index_version):
+                skipped += 1
+                continue
+            try:
+                result = self._generate(query, tier, pinned=True)
+            except Exception as e:
+                logger.warning("Could not precompute an answer for %r: %s", query, e,
+                               extra={'event': 'precompute.error'})
+                failed += 1
+                continue
+            if result.get('status') == 'success':
+                computed += 1
+            else:
+                failed += 1
+        return {
+            'index_version': index_version,
+            'computed': computed,
+            'skipped': skipped,
+            'failed': failed,
+            'seconds': round(time.perf_counter() - started, 3)
+        }
     
     def get_conversation_starter(self) -> List[str]:
         """Get suggested conversation starters based on website content"""
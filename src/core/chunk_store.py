@@ -0,0 +1,238 @@
+"""
+Chunk Store
+===========
+
+Columnar storage for text chunks, shared by all three vector stores.
+A chunk dict from the chunker costs a dict, a str and, per chunk, its
+own copy of the page's source record; here every field is a column:
+- texts: one UTF-8 blob, sliced with text_offsets
+- sources: each distinct source record kept once, referenced by id
+- chunk_ids, global_ids, word_counts: one array each
+
+Per-chunk access goes through ChunkView (no per-chunk objects are kept
+around); get() returns a fresh dict in the chunker's schema, which is
+what search results are made of.
+
+The normalized schema is the chunker's: 'text', 'word_count', 'source',
+'chunk_id' and 'global_chunk_id'. Older chunks that carry their text in
+'content' are read the same way; any other field is kept in a sparse
+side table. dumps()/loads() write and read the columns as they are, so
+loading a store parses one JSON header and copies a few arrays.
+"""
+
+import hashlib
+import json
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .memory_report import deep_sizeof
+
+CHUNK_STORE_MAGIC = b'CHUNKST1'
+_ARRAYS = ('text_offsets', 'source_ids', 'chunk_ids', 'global_ids', 'word_counts')
+_FIELDS = ('text', 'content', 'source', 'chunk_id', 'global_chunk_id', 'word_count')
+_MISSING = -1  # chunk_id / global_chunk_id / word_count not given
+
+
+class ChunkView:
+    """One chunk of a ChunkStore, read lazily from the columns"""
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store: 'ChunkStore', index: int):
+        self.store = store
+        self.index = index
+
+    @property
+    def text(self) -> str:
+        return self.store.text(self.index)
+
+    @property
+    def source(self) -> Dict:
+        return self.store.sources[self.store.source_ids[self.index]]
+
+    @property
+    def chunk_id(self) -> Optional[int]:
+        value = self.store.chunk_ids[self.index]
+        return None if value == _MISSING else value
+
+    @property
+    def global_chunk_id(self) -> Optional[int]:
+        value = self.store.global_ids[self.index]
+        return None if value == _MISSING else value
+
+    @property
+    def word_count(self) -> int:
+        value = self.store.word_counts[self.index]
+        return len(self.text.split()) if value == _MISSING else value
+
+    def to_dict(self) -> Dict:
+        return self.store.get(self.index)
+
+
+class ChunkStore:
+    def __init__(self):
+        self._blob = bytearray()
+        self.text_offsets = array('Q', [0])
+        self.source_ids = array('I')
+        self.chunk_ids = array('i')
+        self.global_ids = array('q')
+        self.word_counts = array('i')
+        self.sources: List[Dict] = []
+        self._source_keys: Optional[Dict[bytes, int]] = {}  # Digest -> source id, built on first append
+        self.extras: Dict[int, Dict] = {}  # Chunk index -> fields outside the schema
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[Dict]) -> 'ChunkStore':
+        if isinstance(chunks, ChunkStore):
+            return chunks
+        store = cls()
+        for chunk in chunks:
+            store.append(chunk)
+        return store
+
+    def append(self, chunk: Dict) -> int:
+        """Add a chunk dict (either schema); returns its index"""
+        index = len(self)
+        text = chunk.get('text', chunk.get('content', '')) or ''
+        self._blob.extend(text.encode('utf-8'))
+        self.text_offsets.append(len(self._blob))
+        self.source_ids.append(self._intern(chunk.get('source') or {}))
+        self.chunk_ids.append(_int_or_missing(chunk.get('chunk_id')))
+        self.global_ids.append(_int_or_missing(chunk.get('global_chunk_id')))
+        self.word_counts.append(_int_or_missing(chunk.get('word_count')))
+        extra = {key: value for key, value in chunk.items() if key not in _FIELDS}
+        if extra:
+            self.extras[index] = extra
+        return index
+
+    def _intern(self, source: Dict) -> int:
+        if self._source_keys is None:
+            self._source_keys = {_source_key(known): source_id for source_id, known in enumerate(self.sources)}
+        key = _source_key(source)
+        source_id = self._source_keys.get(key)
+        if source_id is None:
+            source_id = self._source_keys[key] = len(self.sources)
+            self.sources.append(source)
+        return source_id
+
+    def __len__(self) -> int:
+        return len(self.source_ids)
+
+    def __getitem__(self, index: int) -> ChunkView:
+        if not -len(self) <= index < len(self):
+            raise IndexError('chunk index out of range')
+        return ChunkView(self, index % len(self))
+
+    def __iter__(self) -> Iterator[ChunkView]:
+        for index in range(len(self)):
+            yield ChunkView(self, index)
+
+    def text(self, index: int) -> str:
+        return self._blob[self.text_offsets[index]:self.text_offsets[index + 1]].decode('utf-8')
+
+    def texts(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self.text(index)
+
+    def get(self, index: int) -> Dict:
+        """Chunk dict in the normalized schema (a fresh dict each time)"""
+        chunk = {'text': self.text(index)}
+        if self.word_counts[index] != _MISSING:
+            chunk['word_count'] = self.word_counts[index]
+        chunk['source'] = dict(self.sources[self.source_ids[index]])
+        if self.chunk_ids[index] != _MISSING:
+            chunk['chunk_id'] = self.chunk_ids[index]
+        if self.global_ids[index] != _MISSING:
+            chunk['global_chunk_id'] = self.global_ids[index]
+        if index in self.extras:
+            chunk.update(self.extras[index])
+        return chunk
+
+    def to_list(self) -> List[Dict]:
+        return [self.get(index) for index in range(len(self))]
+
+    def stats(self) -> Dict:
+        """Sizes of the columns in bytes"""
+        return {
+            'chunks': len(self),
+            'sources': len(self.sources),
+            'text_bytes': len(self._blob),
+            'array_bytes': sum(getattr(self, name).itemsize * len(getattr(self, name)) for name in _ARRAYS)
+        }
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Estimated bytes per component (see memory_report)"""
+        return {
+            'texts': sys.getsizeof(self._blob),
+            'columns': sum(sys.getsizeof(getattr(self, name)) for name in _ARRAYS),
+            'sources': deep_sizeof(self.sources) + deep_sizeof(self._source_keys or {}),
+            'extras': deep_sizeof(self.extras)
+        }
+
+    def dumps(self) -> bytes:
+        """The store as bytes: magic, JSON header (sources, extras), raw arrays, text blob"""
+        header = {
+            'byteorder': sys.byteorder,
+            'sources': self.sources,
+            'extras': [[index, extra] for index, extra in self.extras.items()],
+            'arrays': [[name, getattr(self, name).typecode, getattr(self, name).itemsize,
+                        len(getattr(self, name))] for name in _ARRAYS],
+            'text_bytes': len(self._blob)
+        }
+        header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        parts = [CHUNK_STORE_MAGIC, struct.pack('<I', len(header_bytes)), header_bytes]
+        parts.extend(getattr(self, name).tobytes() for name in _ARRAYS)
+        parts.append(bytes(self._blob))
+        return b''.join(parts)
+
+    @classmethod
+    def loads(cls, data: bytes, position: int = 0) -> Tuple[Optional['ChunkStore'], int]:
+        """Read a store written by dumps() starting at `position`; returns it and the end offset
+
+        The store is None when it was written on an incompatible platform.
+        """
+        magic_end = position + len(CHUNK_STORE_MAGIC)
+        if data[position:magic_end] != CHUNK_STORE_MAGIC:
+            raise ValueError("not a chunk store")
+        header_length, = struct.unpack('<I', data[magic_end:magic_end + 4])
+        position = magic_end + 4
+        header = json.loads(bytes(data[position:position + header_length]).decode('utf-8'))
+        position += header_length
+        view = memoryview(data)  # Slices without an intermediate copy
+
+        store = cls.__new__(cls)
+        for name, typecode, itemsize, length in header['arrays']:
+            values = array(typecode)
+            if values.itemsize != itemsize:
+                return None, position
+            end = position + itemsize * length
+            values.frombytes(view[position:end])
+            if header['byteorder'] != sys.byteorder:
+                values.byteswap()
+            setattr(store, name, values)
+            position = end
+        end = position + header['text_bytes']
+        store._blob = bytearray(view[position:end])
+        store.sources = header['sources']
+        store._source_keys = None
+        store.extras = {index: extra for index, extra in header['extras']}
+        return store, end
+
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            f.write(self.dumps())
+
+    @classmethod
+    def load(cls, path: str) -> Optional['ChunkStore']:
+        with open(path, 'rb') as f:
+            return cls.loads(f.read())[0]
+
+
+def _source_key(source: Dict) -> bytes:
+    return hashlib.blake2b(json.dumps(source, sort_keys=True, ensure_ascii=False).encode('utf-8'),
+                           digest_size=16).digest()
+
+
+def _int_or_missing(value) -> int:
+    return _MISSING if value is None else int(value)
@@ -0,0 +1,67 @@
+"""
+Request Deadlines
+=================
+
+A Deadline is created when a request arrives and handed down to the
+engine, which checks it between stages and passes the remaining time on
+as the timeout of slow calls (e.g. the OpenAI API). Work that can no
+longer finish in time is abandoned instead of piling up.
+
+The stage boundaries are also recorded, so the web layer can report
+where a request spent its time (Server-Timing header).
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs out of time"""
+
+    def __init__(self, stage: str = ''):
+        super().__init__(f"Deadline exceeded{' during ' + stage if stage else ''}")
+        self.stage = stage
+
+
+class Deadline:
+    def __init__(self, timeout: Optional[float] = None, start: Optional[float] = None):
+        """timeout in seconds from start (default: now); None never expires"""
+        self.start = time.monotonic() if start is None else start
+        self.expires_at = None if timeout is None else self.start + timeout
+        self.marks: List[Tuple[str, float]] = []  # (stage, monotonic time it started)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left (never negative), or None without a limit"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.start
+
+    def mark(self, stage: str):
+        """Record that a stage starts now"""
+        self.marks.append((stage, time.monotonic()))
+
+    def check(self, stage: str = ''):
+        """Raise DeadlineExceeded if there is no time left for the next stage"""
+        if stage:
+            self.mark(stage)
+        if self.expired():
+            raise DeadlineExceeded(stage)
+
+    def timings(self) -> Dict[str, float]:
+        """Milliseconds per stage (each lasts until the next one starts) and in total"""
+        now = time.monotonic()
+        timings = {}
+        for (stage, started), (_, ended) in zip(self.marks, self.marks[1:] + [('', now)]):
+            timings[stage] = timings.get(stage, 0.0) + (ended - started) * 1000
+        timings['total'] = (now - self.start) * 1000
+        return timings
+
+    def server_timing(self) -> str:
+        """timings() as a Server-Timing header value"""
+        return ', '.join(f"{stage};dur={ms:.2f}" for stage, ms in self.timings().items())
@@ -0,0 +1,118 @@
+"""
+Load-Adaptive Degradation
+=========================
+
+Trades answer quality for speed when the service is under pressure.
+The controller watches recent request latencies and the admission queue
+depth and moves between tiers, one step at a time:
+
+    0 full             top_k=5, primary retriever, LLM when enabled
+    1 reduced_top_k    top_k=2
+    2 cheap_retriever  SimpleVectorStore instead of TF-IDF/FAISS
+    3 template         no prompt building or LLM: generate_answer_free
+    4 cache_only       only cached answers, otherwise a canned reply
+
+It steps down while the p90 latency is above the target or requests are
+queueing, and back up once latency is well below the target with an
+empty queue. Changes are at least `cooldown` seconds apart so the tier
+does not flap, and decisions only use latencies observed since the last
+change.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from .structured_logging import get_logger
+
+logger = get_logger('degradation')
+
+TIERS = [
+    {'name': 'full', 'top_k': 5, 'retriever': 'primary', 'generation': 'llm'},
+    {'name': 'reduced_top_k', 'top_k': 2, 'retriever': 'primary', 'generation': 'llm'},
+    {'name': 'cheap_retriever', 'top_k': 2, 'retriever': 'simple', 'generation': 'llm'},
+    {'name': 'template', 'top_k': 2, 'retriever': 'simple', 'generation': 'template'},
+    {'name': 'cache_only', 'top_k': 0, 'retriever': None, 'generation': 'cache'}
+]
+
+
+class DegradationController:
+    def __init__(self, latency_target: float = 1.0, queue_high: int = 4, window: int = 50,
+                 min_samples: int = 5, cooldown: float = 5.0, recover_ratio: float = 0.5,
+                 max_tier: int = len(TIERS) - 1):
+        self.latency_target = latency_target  # Seconds, compared with the p90
+        self.queue_high = queue_high  # Queue depth that counts as pressure on its own
+        self.min_samples = min_samples
+        self.cooldown = cooldown
+        self.recover_ratio = recover_ratio  # Step up below latency_target * recover_ratio
+        self.max_tier = max_tier
+        self.queue_depth_source: Optional[Callable[[], int]] = None  # Set by the web layer
+
+        self.tier = 0
+        self._latencies = deque(maxlen=window)
+        self._changed_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.counters = {'steps_down': 0, 'steps_up': 0}
+        self.requests_per_tier = [0] * len(TIERS)
+
+    def observe(self, latency: float):
+        """Record the latency of a finished request"""
+        with self._lock:
+            self._latencies.append(latency)
+
+    def _p90(self) -> Optional[float]:
+        if len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+
+    def _queue_depth(self) -> int:
+        try:
+            return self.queue_depth_source() if self.queue_depth_source else 0
+        except Exception:
+            return 0
+
+    def current_tier(self) -> Dict:
+        """Re-evaluate the load and return the settings of the tier to use"""
+        queue_depth = self._queue_depth()
+        change = None
+        with self._lock:
+            now = time.monotonic()
+            if now - self._changed_at >= self.cooldown:
+                p90 = self._p90()
+                overloaded = queue_depth > self.queue_high or (p90 is not None and p90 > self.latency_target)
+                relaxed = queue_depth == 0 and p90 is not None and \
+                    p90 < self.latency_target * self.recover_ratio
+                if overloaded and self.tier < self.max_tier:
+                    change = (self.tier, self.tier + 1, p90, queue_depth)
+                    self._change(self.tier + 1, now)
+                    self.counters['steps_down'] += 1
+                elif relaxed and self.tier > 0:
+                    change = (self.tier, self.tier - 1, p90, queue_depth)
+                    self._change(self.tier - 1, now)
+                    self.counters['steps_up'] += 1
+            self.requests_per_tier[self.tier] += 1
+            tier = dict(TIERS[self.tier], level=self.tier)
+        if change is not None:
+            # Logged outside the lock: other requests are waiting on it
+            previous, current, p90, queue_depth = change
+            logger.warning("Degradation tier: %s -> %s", TIERS[previous]['name'], TIERS[current]['name'],
+                           extra={'event': 'degradation.tier_change', 'tier': TIERS[current]['name'],
+                                  'p90_latency': p90, 'queue_depth': queue_depth})
+        return tier
+
+    def _change(self, tier: int, now: float):
+        self.tier = tier
+        self._changed_at = now
+        self._latencies.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(
+                self.counters,
+                tier=self.tier,
+                tier_name=TIERS[self.tier]['name'],
+                p90_latency=self._p90(),
+                requests_per_tier={TIERS[i]['name']: n for i, n in enumerate(self.requests_per_tier)}
+            )
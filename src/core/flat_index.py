@@ -0,0 +1,175 @@
+"""
+Flat Search Index
+=================
+
+Read-only copy of a SimpleVectorStore laid out in a handful of large
+objects instead of one dict and word list per chunk:
+- vocab: word -> term id
+- postings / term_freqs: chunk ids and in-chunk counts for each term,
+  concatenated into two arrays and sliced with term_offsets
+- chunk_lengths: number of (filtered) words in each chunk
+- the chunks themselves, in a columnar ChunkStore
+
+When the index is built in a pre-fork server's master process, workers
+share these pages copy-on-write. Searching only reads the arrays, so a
+query writes to the refcounts of its own terms and nothing else, and
+the garbage collector has almost nothing to traverse.
+
+Scores are the same multiset Jaccard similarity SimpleVectorStore
+computes, worked out from the postings of the query terms only.
+
+save() writes the whole index to one prebuilt artifact file (a JSON
+header with the vocabulary, then the raw arrays and the chunk store);
+load() reads it back without tokenizing or parsing any chunk, which is
+what keeps serverless cold starts short.
+"""
+
+import heapq
+import json
+import struct
+import sys
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .chunk_store import ChunkStore
+
+ARTIFACT_MAGIC = b'FLATIDX2'
+_ARRAYS = ('chunk_lengths', 'term_offsets', 'postings', 'term_freqs')
+
+
+class FlatIndex:
+    def __init__(self, chunks: Iterable[Dict], chunk_words: List[List[str]]):
+        """Build from chunks (dicts or a ChunkStore) and their already preprocessed words"""
+        vocab: Dict[str, int] = {}
+        term_chunks: List[array] = []
+        term_counts: List[array] = []
+        self.chunk_lengths = array('I')
+        self.chunks = ChunkStore.from_chunks(chunks)
+
+        for chunk_id, words in enumerate(chunk_words):
+            self.chunk_lengths.append(len(words))
+            for word, count in Counter(words).items():
+                term_id = vocab.get(word)
+                if term_id is None:
+                    term_id = vocab[word] = len(term_chunks)
+                    term_chunks.append(array('I'))
+                    term_counts.append(array('I'))
+                term_chunks[term_id].append(chunk_id)
+                term_counts[term_id].append(count)
+
+        self.vocab = vocab
+        self.term_offsets = array('Q', [0])
+        self.postings = array('I')
+        self.term_freqs = array('I')
+        for chunk_ids, counts in zip(term_chunks, term_counts):
+            self.postings.extend(chunk_ids)
+            self.term_freqs.extend(counts)
+            self.term_offsets.append(len(self.postings))
+        self.source_digest = None  # Digest of the chunks the index was built from, set by save()/load()
+
+    def __len__(self) -> int:
+        return len(self.chunk_lengths)
+
+    def chunk(self, chunk_id: int) -> Dict:
+        """One chunk as a dict (a fresh dict each time)"""
+        return self.chunks.get(chunk_id)
+
+    def iter_chunks(self) -> Iterator[Dict]:
+        for chunk_id in range(len(self)):
+            yield self.chunk(chunk_id)
+
+    def search(self, query_words: List[str], top_k: int = 5) -> List[Dict]:
+        """Top chunks by Jaccard similarity, ties broken like SimpleVectorStore"""
+        if not query_words:
+            return []
+        query_counts = Counter(query_words)
+        overlap: Dict[int, int] = {}
+        for word, query_count in query_counts.items():
+            term_id = self.vocab.get(word)
+            if term_id is None:
+                continue
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            for chunk_id, count in zip(self.postings[start:end], self.term_freqs[start:end]):
+                overlap[chunk_id] = overlap.get(chunk_id, 0) + min(query_count, count)
+
+        # |A & B| / |A | B| for multisets, with |A | B| = |A| + |B| - |A & B|
+        query_length = len(query_words)
+        scored = [
+            (shared / (query_length + self.chunk_lengths[chunk_id] - shared), chunk_id)
+            for chunk_id, shared in overlap.items()
+        ]
+        results = []
+        for similarity, chunk_id in heapq.nlargest(top_k, scored):
+            chunk = self.chunk(chunk_id)
+            chunk['similarity'] = similarity
+            results.append(chunk)
+        return results
+
+    def stats(self) -> Dict:
+        """Sizes of the flat structures in bytes"""
+        arrays = [getattr(self, name) for name in _ARRAYS]
+        chunk_stats = self.chunks.stats()
+        return {
+            'chunks': len(self),
+            'terms': len(self.vocab),
+            'postings': len(self.postings),
+            'array_bytes': sum(a.itemsize * len(a) for a in arrays),
+            'chunk_bytes': chunk_stats['text_bytes'] + chunk_stats['array_bytes'],
+            'sources': chunk_stats['sources']
+        }
+
+    def save(self, path: str, source_digest: str):
+        """Write the index to a single artifact file"""
+        header = {
+            'byteorder': sys.byteorder,
+            'source_digest': source_digest,
+            'vocab': sorted(self.vocab, key=self.vocab.get),
+            'arrays': [[name, getattr(self, name).typecode, getattr(self, name).itemsize,
+                        len(getattr(self, name))] for name in _ARRAYS]
+        }
+        header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(ARTIFACT_MAGIC)
+            f.write(struct.pack('<I', len(header_bytes)))
+            f.write(header_bytes)
+            for name in _ARRAYS:
+                f.write(getattr(self, name).tobytes())
+            f.write(self.chunks.dumps())
+        self.source_digest = source_digest
+
+    @classmethod
+    def load(cls, path: str, source_digest: Optional[str] = None) -> Optional['FlatIndex']:
+        """Read an artifact written by save()
+        
+        Returns None when source_digest is given and the artifact was built
+        from different chunks, or when it was written on an incompatible platform.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:len(ARTIFACT_MAGIC)] != ARTIFACT_MAGIC:
+            raise ValueError(f"{path} is not a flat index artifact")
+        position = len(ARTIFACT_MAGIC) + 4
+        header_length, = struct.unpack('<I', data[len(ARTIFACT_MAGIC):position])
+        header = json.loads(data[position:position + header_length].decode('utf-8'))
+        position += header_length
+        if source_digest is not None and header['source_digest'] != source_digest:
+            return None
+
+        index = cls.__new__(cls)
+        for name, typecode, itemsize, length in header['arrays']:
+            values = array(typecode)
+            if values.itemsize != itemsize:
+                return None
+            end = position + itemsize * length
+            values.frombytes(data[position:end])
+            if header['byteorder'] != sys.byteorder:
+                values.byteswap()
+            setattr(index, name, values)
+            position = end
+        index.chunks, _ = ChunkStore.loads(data, position)
+        if index.chunks is None:
+            return None
+        index.vocab = {word: term_id for term_id, word in enumerate(header['vocab'])}
+        index.source_digest = header['source_digest']
+        return index
@@ -0,0 +1,84 @@
+"""
+Intent Router
+=============
+
+Keyword routing for the template answers, compiled once at startup.
+A KeywordRouter takes categories in priority order, each a list of
+keywords, and compiles all keywords into one Aho-Corasick automaton
+(a DFA over the keywords' characters). Matching walks the text once,
+one dict lookup per character however many keywords there are, and
+yields the bitmask of every category with a keyword in the text: the
+same substring semantics as a chain of `'x' in text` tests.
+"""
+
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class KeywordRouter:
+    def __init__(self, categories: Sequence[Tuple[str, Sequence[str]]]):
+        """categories: (name, keywords) pairs, highest priority first"""
+        self.names = [name for name, _ in categories]
+        if len(set(self.names)) != len(self.names):
+            raise ValueError("category names must be unique")
+        self.bits = {name: 1 << position for position, name in enumerate(self.names)}
+
+        # Trie of the keywords; outputs[state] is the mask of the keywords ending there
+        goto: List[Dict[str, int]] = [{}]
+        self._outputs = [0]
+        for name, keywords in categories:
+            for keyword in keywords:
+                state = 0
+                for char in keyword.lower():
+                    following = goto[state].get(char)
+                    if following is None:
+                        following = goto[state][char] = len(goto)
+                        goto.append({})
+                        self._outputs.append(0)
+                    state = following
+                self._outputs[state] |= self.bits[name]
+
+        # Failure links in breadth-first order, then the full transition table:
+        # characters without an entry lead back to the root
+        self._transitions: List[Dict[str, int]] = [dict(goto[0])]
+        self._transitions.extend({} for _ in goto[1:])
+        failure = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            self._outputs[state] |= self._outputs[failure[state]]
+            transitions = self._transitions[state]
+            for char, following in self._transitions[failure[state]].items():
+                transitions[char] = following
+            for char, following in goto[state].items():
+                failure[following] = self._transitions[failure[state]].get(char, 0)
+                transitions[char] = following
+                queue.append(following)
+
+    def mask(self, *names: str) -> int:
+        """Bitmask of the named categories"""
+        mask = 0
+        for name in names:
+            mask |= self.bits[name]
+        return mask
+
+    def match(self, text: str) -> int:
+        """Bitmask of every category with a keyword in the (already lowercased) text"""
+        transitions = self._transitions
+        outputs = self._outputs
+        state = 0
+        found = 0
+        for char in text:
+            state = transitions[state].get(char, 0)
+            found |= outputs[state]
+        return found
+
+    def first(self, mask: int, among: int = -1) -> Optional[str]:
+        """Highest-priority category set in both masks"""
+        mask &= among
+        if not mask:
+            return None
+        return self.names[(mask & -mask).bit_length() - 1]
+
+    def categories(self, mask: int) -> List[str]:
+        return [name for name in self.names if mask & self.bits[name]]
@@ -1,18 +1,23 @@
 import json
 import numpy as np
 import pickle
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Iterable
 import openai
 import os
 from datetime import datetime
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import re
+from .chunk_store import ChunkStore
+from .memory_report import deep_sizeof, sampled_sizeof
+from .structured_logging import get_logger
+
+logger = get_logger('lightweight_store')
 
 class LightweightVectorStore:
     def __init__(self, use_openai: bool = False, openai_api_key: str = None):
         self.use_openai = use_openai
-        self.chunks = []
+        self.chunks = ChunkStore()
         self.embeddings = []
         self.vectorizer = None
         
@@ -39,7 +44,7 @@ class LightweightVectorStore:
                 )
                 return np.array(response.data[0].embedding, dtype=np.float32)
             except Exception as e:
-                print(f"OpenAI embedding error: {e}")
+                logger.error("OpenAI embedding error: %s", e, extra={'event': 'embedding.error'})
                 return self._get_tfidf_embedding(text)
         else:
             return self._get_tfidf_embedding(text)
@@ -47,28 +52,28 @@ class LightweightVectorStore:
     def _get_tfidf_embedding(self, text: str) -> np.ndarray:
         """Get TF-IDF embedding for text"""
         if self.vectorizer is None:
-            print("Warning: Vectorizer not loaded, using zero vector")
+            logger.warning("Vectorizer not loaded, using zero vector", extra={'event': 'embedding.no_vectorizer'})
             return np.zeros(1000, dtype=np.float32)
         
         try:
             # Check if vectorizer is fitted
             if not hasattr(self.vectorizer, 'idf_'):
-                print("Warning: Vectorizer not fitted, using zero vector")
+                logger.warning("Vectorizer not fitted, using zero vector", extra={'event': 'embedding.no_vectorizer'})
                 return np.zeros(1000, dtype=np.float32)
             
             # Transform single text
             embedding = self.vectorizer.transform([text]).toarray()[0]
             return embedding.astype(np.float32)
         except Exception as e:
-            print(f"TF-IDF embedding error: {e}")
+            logger.error("TF-IDF embedding error: %s", e, extra={'event': 'embedding.error'})
             return np.zeros(1000, dtype=np.float32)
     
     def build_index(self, chunks: List[Dict]):
         """Build the vector index from text chunks"""
         print(f"Building lightweight vector index for {len(chunks)} chunks...")
         
-        self.chunks = chunks
-        texts = [chunk.get('content', chunk.get('text', '')) for chunk in chunks]
+        self.chunks = ChunkStore.from_chunks(chunks)
+        texts = list(self.chunks.texts())
         
         if self.use_openai:
             # Use OpenAI embeddings
@@ -88,6 +93,26 @@ class LightweightVectorStore:
         print(f"Vector index built with shape: {self.embeddings.shape}")
         return True
     
+    def build_index_streaming(self, chunk_iter: Iterable[Dict]):
+        """Build the index from chunks as they arrive
+        
+        TF-IDF needs the whole vocabulary, so the vectorizer consumes the
+        chunk stream in a single pass and the matrix is built at the end.
+        """
+        self.chunks = ChunkStore()
+        
+        def texts():
+            for chunk in chunk_iter:
+                yield self.chunks.text(self.chunks.append(chunk))
+        
+        if self.use_openai:
+            self.embeddings = np.array([self.get_embedding(text) for text in texts()])
+        else:
+            self.embeddings = self.vectorizer.fit_transform(texts()).toarray().astype(np.float32)
+        
+        print(f"Vector index built with shape: {self.embeddings.shape}")
+        return True
+    
     def search(self, query: str, top_k: int = 5) -> List[Dict]:
         """Search for similar chunks"""
         if len(self.chunks) == 0 or len(self.embeddings) == 0:
@@ -99,7 +124,8 @@ class LightweightVectorStore:
             
             # If embedding is all zeros (vectorizer not working), do simple text matching
             if np.all(query_embedding == 0):
-                print("Using fallback text matching")
+                # Every query without a known term ends up here; a sample is enough
+                logger.info("Using fallback text matching", extra={'event': 'search.fallback', 'sample': 0.01})
                 return self._fallback_text_search(query, top_k)
             
             if len(query_embedding.shape) == 1:
@@ -114,14 +140,14 @@ class LightweightVectorStore:
             results = []
             for idx in top_indices:
                 if similarities[idx] > 0.1:  # Minimum similarity threshold
-                    result = self.chunks[idx].copy()
+                    result = self.chunks.get(idx)
                     result['similarity'] = float(similarities[idx])
                     results.append(result)
             
             return results
             
         except Exception as e:
-            print(f"Search error: {e}")
+            logger.error("Search error: %s", e, extra={'event': 'search.error'})
             return self._fallback_text_search(query, top_k)
     
     def _fallback_text_search(self, query: str, top_k: int = 5) -> List[Dict]:
@@ -129,14 +155,13 @@ class LightweightVectorStore:
         query_words = set(query.lower().split())
         results = []
         
-        for chunk in self.chunks:
-            text = chunk.get('content', chunk.get('text', '')).lower()
-            text_words = set(text.split())
+        for idx, text in enumerate(self.chunks.texts()):
+            text_words = set(text.lower().split())
             
             # Calculate simple word overlap score
             overlap = len(query_words.intersection(text_words))
             if overlap > 0:
-                result = chunk.copy()
+                result = self.chunks.get(idx)
                 result['similarity'] = overlap / len(query_words)
                 results.append(result)
         
@@ -144,14 +169,27 @@ class LightweightVectorStore:
         results.sort(key=lambda x: x['similarity'], reverse=True)
         return results[:top_k]
     
+    def memory_usage(self) -> Dict[str, int]:
+        """Estimated bytes per component (see memory_report)"""
+        usage = {
+            'chunks': sum(self.chunks.memory_usage().values()),
+            'embeddings': deep_sizeof(self.embeddings) if isinstance(self.embeddings, np.ndarray)
+            else sampled_sizeof(self.embeddings)
+        }
+        if self.vectorizer is not None:
+            usage['vectorizer'] = sum(
+                sampled_sizeof(value) if isinstance(value, (dict, set)) else deep_sizeof(value)
+                for name, value in vars(self.vectorizer).items() if name.endswith('_')
+            )
+        return usage
+    
     def save_index(self, base_path: str = "data/vector_store"):
         """Save the vector index"""
         try:
             os.makedirs(os.path.dirname(base_path), exist_ok=True)
             
-            # Save chunks
-            with open(f"{base_path}_chunks.json", 'w', encoding='utf-8') as f:
-                json.dump(self.chunks, f, ensure_ascii=False, indent=2)
+            # Save chunks (columnar, see chunk_store)
+            self.chunks.save(f"{base_path}_chunks.bin")
             
             # Save embeddings
             with open(f"{base_path}_embeddings.pkl", 'wb') as f:
@@ -183,14 +221,19 @@ class LightweightVectorStore:
     def load_index(self, base_path: str = "data/vector_store") -> bool:
         """Load the vector index"""
         try:
-            # Load chunks
-            chunks_path = f"{base_path}_chunks.json"
-            if not os.path.exists(chunks_path):
+            # Load chunks (stores saved before the chunk store kept them as JSON)
+            chunks_path = f"{base_path}_chunks.bin"
+            if os.path.exists(chunks_path):
+                self.chunks = ChunkStore.load(chunks_path)
+                if self.chunks is None:
+                    print(f"Chunks file was written on an incompatible platform: {chunks_path}")
+                    return False
+            elif os.path.exists(f"{base_path}_chunks.json"):
+                with open(f"{base_path}_chunks.json", 'r', encoding='utf-8') as f:
+                    self.chunks = ChunkStore.from_chunks(json.load(f))
+            else:
                 print(f"Chunks file not found: {chunks_path}")
                 return False
-                
-            with open(chunks_path, 'r', encoding='utf-8') as f:
-                self.chunks = json.load(f)
             
             # Load embeddings
             embeddings_path = f"{base_path}_embeddings.pkl"
@@ -224,7 +267,7 @@ class LightweightVectorStore:
                 # Rebuild vectorizer if loading failed or not fitted
                 if not vectorizer_loaded and len(self.chunks) > 0:
                     print("Rebuilding vectorizer from chunks...")
-                    texts = [chunk.get('content', chunk.get('text', '')) for chunk in self.chunks]
+                    texts = list(self.chunks.texts())
                     self.vectorizer = TfidfVectorizer(
                         max_features=1000,
                         stop_words='english',
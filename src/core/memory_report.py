@@ -0,0 +1,113 @@
+"""
+Process Memory Report
+=====================
+
+Memory figures for the current process. On Linux they come from
+/proc/self/smaps_rollup, which splits resident memory into pages shared
+with other processes (e.g. a pre-fork master and its sibling workers) and
+pages private to this process; the private part is what each additional
+worker really costs. Elsewhere only the peak RSS is available.
+
+memory_breakdown() splits the engine's share of that into components
+(chunks, token lists, postings, embeddings, vectorizer, caches), using
+each component's memory_usage(). Large collections are sized from an
+evenly spaced sample of their items, so the report stays cheap enough to
+request from a live server.
+"""
+
+import os
+import resource
+import sys
+import time
+from typing import Callable, Dict, Optional
+
+_SMAPS_ROLLUP = '/proc/self/smaps_rollup'
+
+
+def _read_smaps_rollup() -> Dict[str, int]:
+    """Fields of smaps_rollup in kB"""
+    fields = {}
+    with open(_SMAPS_ROLLUP, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return fields
+
+
+def process_memory() -> Dict:
+    """RSS, PSS and the shared/private split of this process in MB"""
+    try:
+        fields = _read_smaps_rollup()
+    except OSError:
+        # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {
+            'pid': os.getpid(),
+            'peak_rss_mb': round(peak / (1024 * 1024 if os.uname().sysname == 'Darwin' else 1024), 1),
+            'source': 'getrusage'
+        }
+
+    def mb(*names):
+        return round(sum(fields.get(name, 0) for name in names) / 1024, 1)
+
+    return {
+        'pid': os.getpid(),
+        'rss_mb': mb('Rss'),
+        'pss_mb': mb('Pss'),
+        'shared_mb': mb('Shared_Clean', 'Shared_Dirty'),
+        'private_mb': mb('Private_Clean', 'Private_Dirty'),
+        'source': 'smaps_rollup'
+    }
+
+
+def deep_sizeof(obj, seen: Optional[set] = None) -> int:
+    """Bytes of obj and everything it references (each object counted once)"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    nbytes = getattr(obj, 'nbytes', None)  # numpy arrays: the data buffer
+    if isinstance(nbytes, int):
+        return max(sys.getsizeof(obj), nbytes)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+def sampled_sizeof(items, sample: int = 256, sizeof: Callable = deep_sizeof) -> int:
+    """Estimated deep size of a list or dict from an evenly spaced sample of its items"""
+    count = len(items)
+    if count == 0:
+        return sys.getsizeof(items)
+    step = max(1, count // sample)
+    if isinstance(items, dict):
+        picked = [item for i, item in enumerate(items.items()) if i % step == 0]
+        sizes = [deep_sizeof(key) + sizeof(value) for key, value in picked]
+    else:
+        picked = [items[i] for i in range(0, count, step)]
+        sizes = [sizeof(item) for item in picked]
+    return sys.getsizeof(items) + int(sum(sizes) / len(sizes) * count)
+
+
+def _mb(nbytes: int) -> float:
+    return round(nbytes / (1024 * 1024), 2)
+
+
+def memory_breakdown(engine) -> Dict:
+    """Process memory plus the engine's components in MB, largest first"""
+    started = time.perf_counter()
+    components = {}
+    for group, usage in engine.memory_usage().items():
+        ordered = sorted(usage.items(), key=lambda item: item[1], reverse=True)
+        components[group] = {name: _mb(nbytes) for name, nbytes in ordered}
+    accounted = sum(sum(usage.values()) for usage in components.values())
+    return {
+        'process': process_memory(),
+        'components': components,
+        'accounted_mb': round(accounted, 2),
+        'seconds': round(time.perf_counter() - started, 4)
+    }
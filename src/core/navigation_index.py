@@ -0,0 +1,218 @@
+"""
+Navigation Index
+================
+
+Fast path for navigational queries ("how can I contact you", "careers",
+"internships"): the answer is one known page, so there is nothing to
+retrieve. The index is built once from the pages in the chunks' source
+metadata, each page keyed by
+- its title (and each part of a title like "A | B - Site")
+- its URL slugs: the last path segment and the whole path
+Headings are not keys: too many of them are generic ("About", "Product
+Quality") and would turn ordinary questions into page answers.
+
+Queries and keys are normalized the same way: lowercased words, filler
+words ("how", "can", "you", "page", ...) dropped, a few aliases applied
+("jobs" -> "career"), plurals reduced to a crude stem, then sorted, so
+word order does not matter. A query is navigational when what is left
+equals a key (exact), or is one deleted character away from one (near
+exact, for typos): the deletion variants of every key are precomputed,
+so a lookup is a few dict probes. Keys shared by two pages are dropped
+rather than guessed.
+
+lookup() returns the page's title, URL and summary: its meta description
+unless it is site boilerplate (another page has it as its description or
+in its text), else the first passage of its text that names a word of the
+title; stats() reports the hit rate and lookup latency.
+"""
+
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from .chunk_store import ChunkStore
+
+FILLER = frozenset("""
+    a an the i im me my we our us you your yours it its this that there here
+    to of for in on at by from with and or
+    is are am be was do does did can could would should will may might
+    how what where which who when
+    please hi hello hey thanks thank
+    show give tell find get go open take visit see want need looking like
+    page pages link links site website url section
+""".split())
+# Dropped only when other words are left, so "about us" still finds the About page
+WEAK = frozenset(['about', 'info', 'information', 'details', 'more'])
+ALIASES = {
+    'touch': 'contact', 'reach': 'contact', 'email': 'contact', 'phone': 'contact', 'address': 'contact',
+    'job': 'career', 'jobs': 'career', 'hiring': 'career', 'vacancies': 'career',
+    'intern': 'internship'
+}
+
+MAX_QUERY_WORDS = 8  # Longer queries are questions, not page lookups
+MIN_FUZZY_CHARS = 6  # Shorter keys only match exactly
+MAX_FUZZY_WORDS = 3  # And so do longer ones (a typo there is rarely a page name)
+SUMMARY_WORDS = 40
+
+_WORD = re.compile(r'[a-z0-9]+')
+_TITLE_PARTS = re.compile(r'\s+[|–—-]\s+|\s+[|–—-]\s*$')
+_AMBIGUOUS = -1
+
+
+def normalize(text: str) -> str:
+    """Sorted content words of a query or page name, joined by spaces"""
+    words = []
+    for word in _WORD.findall(text.lower()):
+        word = ALIASES.get(word, word)
+        if word in FILLER:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        words.append(ALIASES.get(word, word))
+    strong = [word for word in words if word not in WEAK]
+    return ' '.join(sorted(set(strong or words)))
+
+
+def _deletions(key: str) -> Iterable[str]:
+    return {key[:position] + key[position + 1:] for position in range(len(key))}
+
+
+class NavigationIndex:
+    def __init__(self, chunks: Optional[ChunkStore] = None):
+        """Index the pages (distinct source URLs) of a chunk store"""
+        self.pages: List[Dict] = []
+        self._exact: Dict[str, int] = {}
+        self._near: Dict[str, int] = {}  # Deletion variant of a key -> page
+        self._lock = threading.Lock()
+        self.counters = {'lookups': 0, 'hits': 0, 'near_hits': 0, 'lookup_seconds': 0.0}
+        if chunks is not None:
+            self._build(chunks)
+
+    def _build(self, chunks: ChunkStore):
+        by_url: Dict[str, Dict] = {}
+        bodies: Dict[str, List[str]] = {}
+        for view in chunks:
+            source = view.source
+            url = source.get('url')
+            if not url:
+                continue
+            page = by_url.get(url)
+            if page is None:
+                page = by_url[url] = {'url': url, 'title': '', 'description': '', 'headings': [], 'text': ''}
+            page['title'] = page['title'] or (source.get('title') or '').strip()
+            page['description'] = page['description'] or (source.get('description') or '').strip()
+            page['text'] = page['text'] or view.text
+            page['headings'] = page['headings'] or list(source.get('headings') or [])
+            bodies.setdefault(url, []).append(' '.join(_WORD.findall(view.text.lower())))
+
+        # Shallow pages first: on a clash between titles, /careers/ beats /careers/x/
+        pages = sorted(by_url.values(), key=lambda page: page['url'].rstrip('/').count('/'))
+
+        # A key two pages claim is dropped
+        claims: Dict[str, int] = {}
+        def claim(name: str, page_id: int):
+            key = normalize(name)
+            if claims.get(key, page_id) != page_id:
+                claims[key] = _AMBIGUOUS
+            else:
+                claims[key] = page_id
+        for page_id, page in enumerate(pages):
+            for part in _TITLE_PARTS.split(page['title']):
+                claim(part, page_id)
+        for page_id, page in enumerate(pages):
+            path = re.sub(r'^[a-z]+://[^/]+', '', page['url']).strip('/')
+            if path:
+                claim(path.rsplit('/', 1)[-1].replace('-', ' '), page_id)
+                claim(path.replace('/', ' ').replace('-', ' '), page_id)
+
+        descriptions = Counter(page['description'] for page in pages)
+        def boilerplate(page: Dict) -> bool:
+            if descriptions[page['description']] > 1:
+                return True
+            description = ' '.join(_WORD.findall(page['description'].lower()))
+            return any(description in body for url, texts in bodies.items() if url != page['url'] for body in texts)
+        self.pages = [self._summarize(page, not page['description'] or boilerplate(page)) for page in pages]
+        self._exact = {key: page_id for key, page_id in claims.items() if key and page_id != _AMBIGUOUS}
+        near: Dict[str, int] = {}
+        for key, page_id in self._exact.items():
+            if len(key) < MIN_FUZZY_CHARS or len(key.split()) > MAX_FUZZY_WORDS:
+                continue
+            for variant in _deletions(key):
+                near[variant] = page_id if near.get(variant, page_id) == page_id else _AMBIGUOUS
+        self._near = {variant: page_id for variant, page_id in near.items() if page_id != _AMBIGUOUS}
+
+    @staticmethod
+    def _summarize(page: Dict, boilerplate: bool) -> Dict:
+        title = _TITLE_PARTS.split(page['title'])[0].strip() or page['url']
+        # Site-wide boilerplate ("Real Estate IoT delivers ...") says nothing about the page
+        if not boilerplate:
+            return {'title': title, 'url': page['url'], 'summary': page['description']}
+        subject = set(normalize(title).split())
+        def about_page(words: List[str]) -> bool:
+            return any(normalize(word) in subject for word in words)
+
+        words = page['text'].split()
+        start = 0
+        if page['headings']:
+            # The text opens with the page's own heading (its "&"s stripped)
+            opening = [word for word in page['headings'][0].split() if _WORD.search(word.lower())]
+            if normalize(' '.join(words[:len(opening)])) == normalize(' '.join(opening)):
+                start = len(opening)
+        if not about_page(words[start:start + SUMMARY_WORDS]):
+            mention = next((position for position in range(start, len(words)) if about_page(words[position:position + 1])), None)
+            if mention is not None:
+                # Back to the start of that sentence (a capitalized word a few words before)
+                start = next((position for position in range(mention, max(start, mention - 10) - 1, -1)
+                              if words[position][:1].isupper()), mention)
+        summary = ' '.join(words[start:start + SUMMARY_WORDS])
+        return {'title': title, 'url': page['url'], 'summary': summary}
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def _find(self, query: str) -> Optional[Dict]:
+        key = normalize(query)
+        if not key or len(key.split()) > MAX_QUERY_WORDS:
+            return None
+        page_id = self._exact.get(key)
+        if page_id is not None:
+            return self.pages[page_id]
+        if len(key) < MIN_FUZZY_CHARS or len(key.split()) > MAX_FUZZY_WORDS:
+            return None
+        # One typo: a missing, extra or replaced character
+        page_id = self._near.get(key)
+        if page_id is None:
+            for variant in _deletions(key):
+                page_id = self._exact.get(variant, self._near.get(variant))
+                if page_id is not None:
+                    break
+        return dict(self.pages[page_id], near=True) if page_id is not None else None
+
+    def lookup(self, query: str) -> Optional[Dict]:
+        """The page a navigational query asks for (title, url, summary), or None"""
+        started = time.perf_counter()
+        page = self._find(query)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.counters['lookups'] += 1
+            self.counters['lookup_seconds'] += elapsed
+            if page is not None:
+                self.counters['hits'] += 1
+                if page.get('near'):
+                    self.counters['near_hits'] += 1
+        return page
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.counters['lookups']
+            return {
+                'pages': len(self.pages),
+                'keys': len(self._exact),
+                'lookups': lookups,
+                'hits': self.counters['hits'],
+                'near_hits': self.counters['near_hits'],
+                'hit_rate': round(self.counters['hits'] / lookups, 3) if lookups else 0.0,
+                'mean_lookup_us': round(self.counters['lookup_seconds'] / lookups * 1e6, 1) if lookups else 0.0
+            }
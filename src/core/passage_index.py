@@ -0,0 +1,261 @@
+"""
+Passage Index
+=============
+
+Sentence-level index over the chunks of a ChunkStore, so answers and
+prompts can carry the few sentences that match a query instead of whole
+~400-word chunks. Like FlatIndex it is a handful of arrays:
+- chunk_sentences: first sentence of each chunk (sliced like offsets)
+- sentence_chunks: parent chunk of each sentence
+- sentence_bounds: start and end of each sentence in its chunk's text
+- vocab, term_offsets, postings, term_freqs, sentence_lengths: the
+  per-sentence term statistics BM25 needs
+
+Sentences end after '.', '!' or '?'. The scraped pages lose most of
+their punctuation, so a longer stretch of text is also cut where a
+capitalized word follows a lowercase one (a heading, or the next
+sentence) once the piece has MIN_WORDS words, and after MAX_WORDS
+words at the latest.
+
+search() scores sentences with BM25 and returns the best windows of up
+to `window` consecutive sentences of one chunk, each linked to its
+parent chunk and source; `within` restricts it to the chunks a
+retriever already picked. The index keeps no text of its own: passages
+are sliced out of the ChunkStore it was built from, and save()/load()
+only write and read the arrays.
+"""
+
+import heapq
+import json
+import math
+import re
+import struct
+import sys
+from array import array
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .chunk_store import ChunkStore
+from .memory_report import sampled_sizeof
+
+ARTIFACT_MAGIC = b'PASSAGE1'
+_ARRAYS = ('chunk_sentences', 'sentence_chunks', 'sentence_bounds', 'sentence_lengths',
+           'term_offsets', 'postings', 'term_freqs')
+
+MIN_WORDS = 8
+MAX_WORDS = 40
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+_WORD = re.compile(r'\S+')
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """(start, end) offsets of the sentences of a text"""
+    bounds = []
+    start = 0
+    for boundary in [m.start() for m in _SENTENCE_END.finditer(text)] + [len(text)]:
+        words = list(_WORD.finditer(text, start, boundary))
+        piece_start = 0
+        for position in range(1, len(words)):
+            length = position - piece_start
+            previous, word = words[position - 1].group(), words[position].group()
+            if length >= MAX_WORDS or (length >= MIN_WORDS and word[0].isupper() and previous[-1].islower()):
+                bounds.append((words[piece_start].start(), words[position - 1].end()))
+                piece_start = position
+        if piece_start < len(words):
+            bounds.append((words[piece_start].start(), words[-1].end()))
+        start = boundary
+    return bounds
+
+
+class PassageIndex:
+    def __init__(self, chunks: ChunkStore, tokenize: Callable[[str], List[str]]):
+        """Split every chunk of the store into sentences and index their words"""
+        self.chunks = chunks
+        self.chunk_sentences = array('I', [0])
+        self.sentence_chunks = array('I')
+        self.sentence_bounds = array('I')
+        self.sentence_lengths = array('I')
+        vocab: Dict[str, int] = {}
+        term_sentences: List[array] = []
+        term_counts: List[array] = []
+
+        for chunk_index, text in enumerate(chunks.texts()):
+            for start, end in split_sentences(text):
+                sentence_id = len(self.sentence_chunks)
+                words = tokenize(text[start:end])
+                self.sentence_chunks.append(chunk_index)
+                self.sentence_bounds.extend((start, end))
+                self.sentence_lengths.append(len(words))
+                for word, count in Counter(words).items():
+                    term_id = vocab.get(word)
+                    if term_id is None:
+                        term_id = vocab[word] = len(term_sentences)
+                        term_sentences.append(array('I'))
+                        term_counts.append(array('I'))
+                    term_sentences[term_id].append(sentence_id)
+                    term_counts[term_id].append(count)
+            self.chunk_sentences.append(len(self.sentence_chunks))
+
+        self.vocab = vocab
+        self.term_offsets = array('Q', [0])
+        self.postings = array('I')
+        self.term_freqs = array('I')
+        for sentence_ids, counts in zip(term_sentences, term_counts):
+            self.postings.extend(sentence_ids)
+            self.term_freqs.extend(counts)
+            self.term_offsets.append(len(self.postings))
+        self._init_lookup()
+
+    def _init_lookup(self):
+        total = sum(self.sentence_lengths)
+        self.average_length = total / len(self.sentence_lengths) if self.sentence_lengths else 0.0
+        self._by_global_id: Optional[Dict[int, int]] = None  # Built by locate() on first use
+        self._by_text: Optional[Dict[int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.sentence_chunks)
+
+    def locate(self, chunk: Dict) -> Optional[int]:
+        """Index of a retrieved chunk (from any store built from the same chunks) in the store"""
+        global_id = chunk.get('global_chunk_id')
+        if global_id is not None:
+            if self._by_global_id is None:
+                self._by_global_id = {value: index for index, value in enumerate(self.chunks.global_ids)}
+            return self._by_global_id.get(global_id)
+        text = chunk.get('text', chunk.get('content'))
+        if text is None:
+            return None
+        if self._by_text is None:
+            self._by_text = {hash(known): index for index, known in enumerate(self.chunks.texts())}
+        index = self._by_text.get(hash(text))
+        return index if index is not None and self.chunks.text(index) == text else None
+
+    def _scores(self, query_words: List[str], within: Optional[set]) -> Dict[int, float]:
+        sentence_count = len(self)
+        scores: Dict[int, float] = {}
+        for word in set(query_words):
+            term_id = self.vocab.get(word)
+            if term_id is None:
+                continue
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            idf = math.log(1 + (sentence_count - (end - start) + 0.5) / (end - start + 0.5))
+            for sentence_id, count in zip(self.postings[start:end], self.term_freqs[start:end]):
+                if within is not None and self.sentence_chunks[sentence_id] not in within:
+                    continue
+                norm = K1 * (1 - B + B * self.sentence_lengths[sentence_id] / self.average_length)
+                scores[sentence_id] = scores.get(sentence_id, 0.0) + idf * count * (K1 + 1) / (count + norm)
+        return scores
+
+    def search(self, query_words: List[str], top_k: int = 3, window: int = 1,
+               within: Optional[Iterable[int]] = None) -> List[Dict]:
+        """Best non-overlapping windows of up to `window` sentences, by summed BM25 score"""
+        if not query_words or not len(self):
+            return []
+        scores = self._scores(query_words, set(within) if within is not None else None)
+        # Windows around the best sentences only; a window scores what its sentences do
+        candidates = []
+        for sentence_id in heapq.nlargest(top_k * 4, scores, key=scores.get):
+            chunk_index = self.sentence_chunks[sentence_id]
+            first_in_chunk = self.chunk_sentences[chunk_index]
+            last_in_chunk = self.chunk_sentences[chunk_index + 1] - 1
+            for first in range(max(first_in_chunk, sentence_id - window + 1), sentence_id + 1):
+                last = min(first + window - 1, last_in_chunk)
+                total = sum(scores.get(s, 0.0) for s in range(first, last + 1))
+                candidates.append((total, -first, last))
+
+        results = []
+        taken = set()
+        for total, negative_first, last in sorted(set(candidates), reverse=True):
+            first = -negative_first
+            if any(s in taken for s in range(first, last + 1)):
+                continue
+            taken.update(range(first, last + 1))
+            results.append(self.passage(first, last, total))
+            if len(results) == top_k:
+                break
+        return results
+
+    def passage(self, first: int, last: int, score: float = 0.0) -> Dict:
+        """Sentences first..last (of one chunk) with their parent chunk and source"""
+        chunk_index = self.sentence_chunks[first]
+        view = self.chunks[chunk_index]
+        passage = {
+            'text': view.text[self.sentence_bounds[2 * first]:self.sentence_bounds[2 * last + 1]],
+            'source': dict(view.source),
+            'chunk_index': chunk_index,
+            'sentences': [first - self.chunk_sentences[chunk_index], last - self.chunk_sentences[chunk_index]],
+            'score': score
+        }
+        for name in ('chunk_id', 'global_chunk_id'):
+            if getattr(view, name) is not None:
+                passage[name] = getattr(view, name)
+        return passage
+
+    def stats(self) -> Dict:
+        return {
+            'chunks': len(self.chunk_sentences) - 1,
+            'sentences': len(self),
+            'terms': len(self.vocab),
+            'array_bytes': sum(getattr(self, name).itemsize * len(getattr(self, name)) for name in _ARRAYS)
+        }
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Estimated bytes per component (see memory_report); the chunk texts belong to the store"""
+        return {
+            'arrays': self.stats()['array_bytes'],
+            'vocabulary': sampled_sizeof(self.vocab)
+        }
+
+    def save(self, path: str, source_digest: str):
+        """Write the arrays and vocabulary to an artifact file (the chunks are not included)"""
+        header = {
+            'byteorder': sys.byteorder,
+            'source_digest': source_digest,
+            'vocab': sorted(self.vocab, key=self.vocab.get),
+            'arrays': [[name, getattr(self, name).typecode, getattr(self, name).itemsize,
+                        len(getattr(self, name))] for name in _ARRAYS]
+        }
+        header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(ARTIFACT_MAGIC)
+            f.write(struct.pack('<I', len(header_bytes)))
+            f.write(header_bytes)
+            for name in _ARRAYS:
+                f.write(getattr(self, name).tobytes())
+
+    @classmethod
+    def load(cls, path: str, chunks: ChunkStore, source_digest: str) -> Optional['PassageIndex']:
+        """Read an artifact written by save() for the same chunks; None if it does not match"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:len(ARTIFACT_MAGIC)] != ARTIFACT_MAGIC:
+            raise ValueError(f"{path} is not a passage index artifact")
+        position = len(ARTIFACT_MAGIC) + 4
+        header_length, = struct.unpack('<I', data[len(ARTIFACT_MAGIC):position])
+        header = json.loads(data[position:position + header_length].decode('utf-8'))
+        position += header_length
+        if header['source_digest'] != source_digest:
+            return None
+
+        index = cls.__new__(cls)
+        view = memoryview(data)
+        for name, typecode, itemsize, length in header['arrays']:
+            values = array(typecode)
+            if values.itemsize != itemsize:
+                return None
+            end = position + itemsize * length
+            values.frombytes(view[position:end])
+            if header['byteorder'] != sys.byteorder:
+                values.byteswap()
+            setattr(index, name, values)
+            position = end
+        if len(index.chunk_sentences) != len(chunks) + 1:
+            return None
+        index.chunks = chunks
+        index.vocab = {word: term_id for term_id, word in enumerate(header['vocab'])}
+        index._init_lookup()
+        return index
@@ -0,0 +1,103 @@
+"""
+Answer Prewarming
+=================
+
+Starter questions and a handful of frequent queries make up most chat
+traffic. AnswerPrewarmer answers them once at start-up and pins the
+answers in the engine's response cache, so those requests are served
+from memory from the very first hit.
+
+Frequent queries come from a query log: one query per line, or JSON
+lines with a 'query' (or 'message') field; the most common ones (after
+normalization) are precomputed. The web layer's JSON log works too with
+CHATBOT_LOG_QUERIES=1: only its chat.request records are read.
+Whenever the engine's index version changes, the answers are recomputed
+on a background thread and the pinned answers of the old version are
+dropped.
+"""
+
+import json
+import os
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+from .response_cache import normalize_query
+
+
+def load_frequent_queries(path: str, top_n: int = 50) -> List[str]:
+    """The top_n most frequent queries in a query log (missing file: none)"""
+    if not path or not os.path.exists(path):
+        return []
+    counts = Counter()
+    spelling: Dict[str, str] = {}  # First spelling seen for each normalized query
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{'):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if 'event' in record and record['event'] != 'chat.request':
+                    continue  # Other records of a structured log
+                line = str(record.get('query') or record.get('message') or '').strip()
+            normalized = normalize_query(line)
+            if normalized:
+                counts[normalized] += 1
+                spelling.setdefault(normalized, line)
+    return [spelling[query] for query, _ in counts.most_common(top_n)]
+
+
+class AnswerPrewarmer:
+    def __init__(self, engine, starters: List[str], query_log: Optional[str] = None, top_n: int = 50):
+        self.engine = engine
+        self.starters = starters
+        self.query_log = query_log
+        self.top_n = top_n
+        self.index_version: Optional[str] = None  # Version the pinned answers belong to
+        self.last_run: Dict = {}
+        self.refreshes = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def queries(self) -> List[str]:
+        """Starters first, then frequent queries, without duplicates"""
+        seen = set()
+        queries = []
+        for query in self.starters + load_frequent_queries(self.query_log, self.top_n):
+            normalized = normalize_query(query)
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                queries.append(query)
+        return queries
+
+    def run(self, refresh: bool = False) -> Dict:
+        """Precompute and pin the answers for the current index version"""
+        queries = self.queries()
+        result = self.engine.precompute_answers(queries, refresh=refresh)
+        dropped = self.engine.response_cache.drop_pinned(keep_version=result['index_version'])
+        with self._lock:
+            self.index_version = result['index_version']
+            self.last_run = dict(result, queries=len(queries), dropped=dropped)
+        print(f"Precomputed {result['computed']} answers ({len(queries)} queries) in {result['seconds']}s")
+        return self.last_run
+
+    def maybe_refresh(self) -> bool:
+        """Recompute in the background if the index version changed; cheap to call per request"""
+        if self.index_version is None or self.engine.index_version == self.index_version:
+            return False
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self.refreshes += 1
+            self._thread = threading.Thread(target=self.run, name='answer-prewarm', daemon=True)
+            self._thread.start()
+        return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self.last_run, refreshes=self.refreshes,
+                        refreshing=bool(self._thread and self._thread.is_alive()))
@@ -0,0 +1,224 @@
+"""
+Request Profiling
+=================
+
+Captures profiles of individual chat requests in production, so a slow
+class of query can be examined without reproducing it locally:
+- cprofile: deterministic cProfile of the whole request, downloadable as
+  a pstats file (python -m pstats, snakeviz)
+- sample: the request's thread stack sampled every few milliseconds by a
+  background thread, downloadable as collapsed stacks (flamegraph.pl,
+  speedscope)
+
+A request is profiled when it asks for it (mode passed to
+ChatbotEngine.chat), while profiling is toggled on for all requests, or,
+with a slow threshold set, once it has run longer than the threshold:
+such requests are sampled from that point on, so fast requests pay only
+for registering with the sampler. With no toggle and no threshold the
+engine never calls into the profiler. Finished profiles are kept in a
+bounded ring buffer, newest last.
+"""
+
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+MODES = ('cprofile', 'sample')
+
+
+def _collapse(frame) -> str:
+    """Root-first 'file:function' stack of a frame, ';'-separated"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class _Watch:
+    __slots__ = ('thread_id', 'sample_after', 'samples')
+
+    def __init__(self, thread_id: int, sample_after: float):
+        self.thread_id = thread_id
+        self.sample_after = sample_after  # perf_counter time sampling starts
+        self.samples = Counter()
+
+
+class StackSampler:
+    """One background thread sampling the stacks of the watched request threads"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._watches: Dict[int, _Watch] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, delay: float = 0.0) -> int:
+        """Sample the calling thread from `delay` seconds on; returns a handle for unwatch()"""
+        handle = next(self._ids)
+        with self._lock:
+            self._watches[handle] = _Watch(threading.get_ident(), time.perf_counter() + delay)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return handle
+
+    def unwatch(self, handle: int) -> Counter:
+        """Stop sampling; returns the collapsed stack counts"""
+        with self._lock:
+            return self._watches.pop(handle).samples
+
+    def _run(self):
+        sampler_id = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._watches:
+                    self._wake.clear()
+            # Sleep without waking up while nothing is watched
+            self._wake.wait()
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            with self._lock:
+                due = [w for w in self._watches.values() if w.sample_after <= now]
+            if not due:
+                continue
+            frames = sys._current_frames()
+            for watch in due:
+                frame = frames.get(watch.thread_id)
+                if frame is not None and watch.thread_id != sampler_id:
+                    watch.samples[_collapse(frame)] += 1
+
+
+class RequestProfiler:
+    def __init__(self, max_profiles: int = 32, slow_threshold: Optional[float] = None,
+                 sample_interval: float = 0.005):
+        self.max_profiles = max_profiles
+        self.slow_threshold = slow_threshold  # Seconds; None disables automatic capture
+        self.toggle: Optional[str] = None  # Mode every request is profiled with, or None
+        self.sampler = StackSampler(sample_interval)
+        self._profiles: 'OrderedDict[int, Dict]' = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'RequestProfiler':
+        slow_ms = os.getenv('CHATBOT_PROFILE_SLOW_MS')
+        return cls(
+            max_profiles=int(os.getenv('CHATBOT_PROFILE_BUFFER', '32')),
+            slow_threshold=float(slow_ms) / 1000 if slow_ms else None,
+            sample_interval=float(os.getenv('CHATBOT_PROFILE_INTERVAL_MS', '5')) / 1000
+        )
+
+    @property
+    def armed(self) -> bool:
+        """Whether requests that did not ask for a profile may still be profiled"""
+        return self.toggle is not None or self.slow_threshold is not None
+
+    def configure(self, toggle: Optional[str] = None, slow_threshold: Optional[float] = None):
+        if toggle is not None and toggle not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        self.toggle = toggle
+        self.slow_threshold = slow_threshold
+
+    @contextmanager
+    def capture(self, query: str, mode: Optional[str] = None):
+        """Profile the block; yields a dict that gets the profile 'id' if one was kept"""
+        mode = mode or self.toggle
+        trigger = 'request' if mode else 'slow'
+        outcome: Dict = {}
+        started = time.perf_counter()
+        if mode == 'cprofile':
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield outcome
+            finally:
+                profile.disable()
+                profile.create_stats()
+                outcome['id'] = self._keep(query, 'cprofile', trigger, started, marshal.dumps(profile.stats))
+            return
+
+        if mode is None and self.slow_threshold is None:
+            yield outcome
+            return
+        handle = self.sampler.watch(delay=0.0 if mode else self.slow_threshold)
+        try:
+            yield outcome
+        finally:
+            samples = self.sampler.unwatch(handle)
+            if samples:
+                outcome['id'] = self._keep(query, 'sample', trigger, started, samples)
+
+    def _keep(self, query: str, kind: str, trigger: str, started: float, data) -> int:
+        profile_id = next(self._ids)
+        with self._lock:
+            self._profiles[profile_id] = {
+                'id': profile_id,
+                'kind': kind,
+                'trigger': trigger,
+                'query': query[:200],
+                'at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+                'data': data
+            }
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return [{key: value for key, value in p.items() if key != 'data'} for p in self._profiles.values()]
+
+    def get(self, profile_id: int) -> Optional[Dict]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def status(self) -> Dict:
+        with self._lock:
+            kept = len(self._profiles)
+        return {
+            'toggle': self.toggle,
+            'slow_threshold_ms': self.slow_threshold * 1000 if self.slow_threshold is not None else None,
+            'sample_interval_ms': self.sampler.interval * 1000,
+            'profiles': kept,
+            'max_profiles': self.max_profiles
+        }
+
+
+def export(profile: Dict, fmt: str) -> bytes:
+    """A kept profile as 'pstats' (cprofile), 'collapsed' (sample) or 'text' (either)"""
+    if profile['kind'] == 'cprofile':
+        if fmt == 'pstats':
+            return profile['data']
+        if fmt == 'text':
+            stats = pstats.Stats(_StatsSource(marshal.loads(profile['data'])), stream=io.StringIO())
+            stats.sort_stats('cumulative').print_stats(40)
+            return stats.stream.getvalue().encode('utf-8')
+    else:
+        lines = [f"{stack} {count}" for stack, count in profile['data'].most_common()]
+        if fmt in ('collapsed', 'text'):
+            return ('\n'.join(lines) + '\n').encode('utf-8')
+    raise ValueError(f"a {profile['kind']} profile cannot be exported as {fmt}")
+
+
+class _StatsSource:
+    """Minimal stand-in for a profiler, so pstats.Stats can load kept stats"""
+
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
@@ -0,0 +1,110 @@
+"""
+Readiness Tracking
+==================
+
+Per-component loading state for phased start-up. Each component moves
+from pending to loading to ready (or failed), and the tracker records how
+long every phase took, so a status endpoint can report progress while the
+engine is still initializing on a background thread.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+PENDING = 'pending'
+LOADING = 'loading'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class Readiness:
+    def __init__(self, components: List[str]):
+        self._condition = threading.Condition()
+        self.created = time.monotonic()
+        self.components = {
+            name: {'state': PENDING, 'started': None, 'seconds': None, 'detail': {}}
+            for name in components
+        }
+
+    def start(self, name: str):
+        with self._condition:
+            component = self.components[name]
+            component['state'] = LOADING
+            component['started'] = time.monotonic()
+
+    def ready(self, name: str, **detail):
+        self._finish(name, READY, detail)
+
+    def fail(self, name: str, error: str):
+        self._finish(name, FAILED, {'error': error})
+
+    def _finish(self, name: str, state: str, detail: Dict):
+        with self._condition:
+            component = self.components[name]
+            started = component['started'] or time.monotonic()
+            component['state'] = state
+            component['seconds'] = round(time.monotonic() - started, 3)
+            component['detail'] = detail
+            self._condition.notify_all()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Mark a component loading for the block; ready on exit, failed on an exception"""
+        self.start(name)
+        try:
+            yield
+        except Exception as e:
+            self.fail(name, str(e))
+            raise
+        else:
+            if self.state(name) == LOADING:
+                self.ready(name)
+
+    def state(self, name: str) -> str:
+        with self._condition:
+            return self.components[name]['state']
+
+    def is_ready(self, name: Optional[str] = None) -> bool:
+        """Whether one component (or every component) is ready"""
+        with self._condition:
+            names = [name] if name else list(self.components)
+            return all(self.components[n]['state'] == READY for n in names)
+
+    def failed(self) -> bool:
+        with self._condition:
+            return any(c['state'] == FAILED for c in self.components.values())
+
+    def status(self, serving: bool) -> str:
+        """Overall status for a status endpoint; serving: whether chats are answered yet"""
+        if self.is_ready():
+            return 'ready'
+        if self.failed():
+            return 'degraded' if serving else 'error'
+        return 'warming_up' if serving else 'initializing'
+
+    def wait(self, name: str, timeout: float) -> bool:
+        """Wait until a component has finished loading; True if it is ready"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.components[name]['state'] in (READY, FAILED), timeout=timeout
+            )
+            return self.components[name]['state'] == READY
+
+    def snapshot(self) -> Dict:
+        with self._condition:
+            components = {}
+            for name, component in self.components.items():
+                entry = {'state': component['state']}
+                if component['state'] == LOADING:
+                    entry['seconds'] = round(time.monotonic() - component['started'], 3)
+                elif component['seconds'] is not None:
+                    entry['seconds'] = component['seconds']
+                entry.update(component['detail'])
+                components[name] = entry
+            return {
+                'ready': all(c['state'] == READY for c in self.components.values()),
+                'uptime_seconds': round(time.monotonic() - self.created, 3),
+                'components': components
+            }
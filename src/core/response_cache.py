@@ -0,0 +1,130 @@
+"""
+Response Cache
+==============
+
+LRU cache of chat answers with a time-to-live. Keys combine the
+normalized query with the index version, so answers computed against an
+older index are never served after a rebuild. Each entry remembers the
+degradation tier it was produced at, which lets callers refuse answers of
+lower quality than they are currently able to compute.
+
+Pinned entries (precomputed answers for starter and frequent questions)
+are kept apart from the LRU: they neither expire nor get evicted, and
+are dropped explicitly once their index version is superseded.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .memory_report import sampled_sizeof
+
+_NON_WORD_RE = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_query(query: str) -> str:
+    """Case, punctuation and whitespace insensitive form of a query"""
+    return ' '.join(_NON_WORD_RE.sub(' ', query.lower()).split())
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 1000, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl  # Seconds an answer stays valid
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[float, int, Dict]]' = OrderedDict()
+        self._pinned: Dict[Tuple[str, str], Tuple[int, Dict]] = {}
+        self._lock = threading.Lock()
+        self.stats_counters = {'hits': 0, 'pinned_hits': 0, 'misses': 0, 'expired': 0,
+                               'stores': 0, 'evictions': 0}
+
+    @staticmethod
+    def key(query: str, index_version: str) -> Tuple[str, str]:
+        return normalize_query(query), index_version
+
+    def get(self, query: str, index_version: str, max_tier: Optional[int] = None) -> Optional[Dict]:
+        """Cached answer, or None; with max_tier only answers from that tier or better"""
+        key = self.key(query, index_version)
+        with self._lock:
+            pinned = self._pinned.get(key)
+            if pinned is not None and (max_tier is None or pinned[0] <= max_tier):
+                self.stats_counters['hits'] += 1
+                self.stats_counters['pinned_hits'] += 1
+                return dict(pinned[1])
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats_counters['misses'] += 1
+                return None
+            expires_at, tier, response = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.stats_counters['expired'] += 1
+                self.stats_counters['misses'] += 1
+                return None
+            if max_tier is not None and tier > max_tier:
+                self.stats_counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats_counters['hits'] += 1
+            return dict(response)
+
+    def put(self, query: str, index_version: str, response: Dict, tier: int = 0, pinned: bool = False):
+        """Store an answer; a better-tier answer is never replaced by a worse one
+        
+        With pinned (or when the query is already pinned) the answer is kept
+        until drop_pinned() removes its index version.
+        """
+        key = self.key(query, index_version)
+        with self._lock:
+            if pinned or key in self._pinned:
+                existing = self._pinned.get(key)
+                if existing is None or existing[0] >= tier:
+                    self._pinned[key] = (tier, dict(response))
+                    self._entries.pop(key, None)
+                    self.stats_counters['stores'] += 1
+                return
+            existing = self._entries.get(key)
+            if existing is not None and existing[1] < tier and existing[0] >= time.monotonic():
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, tier, dict(response))
+            self._entries.move_to_end(key)
+            self.stats_counters['stores'] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats_counters['evictions'] += 1
+
+    def is_pinned(self, query: str, index_version: str) -> bool:
+        with self._lock:
+            return self.key(query, index_version) in self._pinned
+
+    def drop_pinned(self, keep_version: Optional[str] = None) -> int:
+        """Unpin answers of every index version but keep_version; returns how many were dropped"""
+        with self._lock:
+            stale = [key for key in self._pinned if key[1] != keep_version]
+            for key in stale:
+                del self._pinned[key]
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._pinned)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Estimated bytes of the cached and the pinned answers"""
+        with self._lock:
+            return {'entries': sampled_sizeof(dict(self._entries)), 'pinned': sampled_sizeof(dict(self._pinned))}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.stats_counters['hits'] + self.stats_counters['misses']
+            return dict(
+                self.stats_counters,
+                entries=len(self._entries),
+                pinned=len(self._pinned),
+                hit_rate=round(self.stats_counters['hits'] / lookups, 3) if lookups else 0.0
+            )
@@ -1,9 +1,29 @@
+import gzip
+import hashlib
 import json
 import re
 import os
-from typing import List, Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 from collections import Counter
 import math
+from .chunk_store import ChunkStore
+from .flat_index import FlatIndex
+from .memory_report import sampled_sizeof
+from .passage_index import PassageIndex
+
+# Prebuilt indexes next to the chunks file (see build_pipeline.py, stages search_index and passage_index)
+INDEX_ARTIFACT = "search_index.bin"
+PASSAGE_ARTIFACT = "passage_index.bin"
+
+
+def file_digest(path: str) -> str:
+    """sha256 of a file's contents"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
 
 class SimpleVectorStore:
     """
@@ -12,8 +32,11 @@ class SimpleVectorStore:
     """
     
     def __init__(self):
-        self.chunks = []
-        self.processed_chunks = []
+        self.chunks = ChunkStore()
+        self.chunk_words = []  # Preprocessed words of each chunk
+        self.flat_index = None  # Set by freeze()
+        self.passage_index = None  # Sentences of the chunks, see passages()
+        self.index_version = 'empty'  # Changes whenever a different chunks file is loaded
         
     def preprocess_text(self, text: str) -> List[str]:
         """Simple text preprocessing"""
@@ -46,19 +69,90 @@ class SimpleVectorStore:
     
     def add_chunks(self, chunks: List[Dict]):
         """Add text chunks to the store"""
-        self.chunks = chunks
-        self.processed_chunks = []
+        self.chunks = ChunkStore()
+        self.chunk_words = []
+        self.flat_index = None
+        self.passage_index = None
         
         for chunk in chunks:
-            processed_text = self.preprocess_text(chunk.get('content', ''))
-            self.processed_chunks.append({
-                'words': processed_text,
-                'original': chunk
-            })
+            self.add_chunk(chunk)
+    
+    def add_chunk(self, chunk: Dict):
+        """Add a single chunk (used when chunks are streamed in)"""
+        if self.flat_index is not None:
+            raise RuntimeError("Cannot add chunks to a frozen store")
+        index = self.chunks.append(chunk)
+        self.passage_index = None
+        self.chunk_words.append(self.preprocess_text(self.chunks.text(index)))
+    
+    def freeze(self):
+        """Move the loaded chunks into a read-only FlatIndex
+        
+        Call once in a pre-fork server's master process: the flat arrays are
+        then shared copy-on-write by all workers instead of each worker
+        touching (and so copying) thousands of per-chunk objects.
+        """
+        if self.flat_index is None:
+            self.flat_index = FlatIndex(self.chunks, self.chunk_words)
+            self.chunks = ChunkStore()
+            self.chunk_words = []
+        return self.flat_index
+    
+    def chunk_store(self) -> ChunkStore:
+        """ChunkStore of the loaded chunks, frozen or not"""
+        return self.flat_index.chunks if self.flat_index is not None else self.chunks
+    
+    def build_passage_index(self) -> PassageIndex:
+        """Split the loaded chunks into sentences (done by load_index, or on first use)"""
+        self.passage_index = PassageIndex(self.chunk_store(), self.preprocess_text)
+        return self.passage_index
+    
+    def passages(self, query: str, top_k: int = 3, window: int = 2,
+                 chunks: Optional[List[Dict]] = None) -> List[Dict]:
+        """Best sentence windows for a query, optionally only from already retrieved chunks
+        
+        Each passage has 'text', 'source' and its parent chunk's ids
+        (see PassageIndex.search). The chunks may come from any store
+        built from the same chunks file.
+        """
+        index = self.passage_index or self.build_passage_index()
+        within = None
+        if chunks is not None:
+            within = [position for position in map(index.locate, chunks) if position is not None]
+            if not within:
+                return []
+        return index.search(self.preprocess_text(query), top_k, window, within)
+    
+    def index_stats(self) -> Dict:
+        """Chunk count and, when frozen, the flat index sizes"""
+        if self.flat_index is not None:
+            return dict(self.flat_index.stats(), frozen=True)
+        return {'chunks': len(self.chunks), 'frozen': False}
+    
+    def memory_usage(self) -> Dict[str, int]:
+        """Estimated bytes per component (see memory_report)"""
+        if self.flat_index is not None:
+            stats = self.flat_index.stats()
+            return {
+                'postings': stats['array_bytes'],
+                'chunks': sum(self.flat_index.chunks.memory_usage().values()),
+                'vocabulary': sampled_sizeof(self.flat_index.vocab),
+                'passages': self._passage_bytes()
+            }
+        return {
+            'chunks': sum(self.chunks.memory_usage().values()),
+            'token_lists': sampled_sizeof(self.chunk_words),
+            'passages': self._passage_bytes()
+        }
+    
+    def _passage_bytes(self) -> int:
+        return sum(self.passage_index.memory_usage().values()) if self.passage_index is not None else 0
     
     def search(self, query: str, top_k: int = 5) -> List[Dict]:
         """Search for similar chunks"""
-        if not self.processed_chunks:
+        if self.flat_index is not None:
+            return self.flat_index.search(self.preprocess_text(query), top_k)
+        if not self.chunk_words:
             return []
         
         query_words = self.preprocess_text(query)
@@ -67,8 +161,8 @@ class SimpleVectorStore:
         
         # Calculate similarities
         similarities = []
-        for i, processed_chunk in enumerate(self.processed_chunks):
-            similarity = self.calculate_similarity(query_words, processed_chunk['words'])
+        for i, chunk_words in enumerate(self.chunk_words):
+            similarity = self.calculate_similarity(query_words, chunk_words)
             similarities.append((similarity, i))
         
         # Sort by similarity (descending)
@@ -78,29 +172,67 @@ class SimpleVectorStore:
         results = []
         for similarity, idx in similarities[:top_k]:
             if similarity > 0:  # Only return chunks with some similarity
-                chunk = self.processed_chunks[idx]['original'].copy()
+                chunk = self.chunks.get(idx)
                 chunk['similarity'] = similarity
                 results.append(chunk)
         
         return results
     
-    def load_index(self, data_dir: str = "data") -> bool:
-        """Load chunks from JSON file"""
+    def load_index(self, data_dir: str = "data", use_artifact: Optional[bool] = None) -> bool:
+        """Load chunks from JSON file (or the streaming pipeline's JSONL output)
+        
+        When a prebuilt index artifact built from the same chunks file sits
+        next to it, that is loaded instead and the store starts out frozen.
+        Set CHATBOT_INDEX_ARTIFACT=0 to always build from the chunks.
+        """
+        if use_artifact is None:
+            use_artifact = os.getenv('CHATBOT_INDEX_ARTIFACT', '1') != '0'
         try:
             # Try different possible paths
-            possible_paths = [
-                os.path.join(data_dir, "text_chunks.json"),
-                os.path.join(os.path.dirname(__file__), "..", "..", data_dir, "text_chunks.json"),
-                os.path.join(os.getcwd(), data_dir, "text_chunks.json")
+            possible_dirs = [
+                data_dir,
+                os.path.join(os.path.dirname(__file__), "..", "..", data_dir),
+                os.path.join(os.getcwd(), data_dir)
             ]
             
-            for chunks_file in possible_paths:
-                if os.path.exists(chunks_file):
+            for directory in possible_dirs:
+                candidates = [
+                    os.path.join(directory, name)
+                    for name in ("text_chunks.json", "text_chunks.jsonl.gz")
+                    if os.path.exists(os.path.join(directory, name))
+                ]
+                if not candidates:
+                    continue
+                
+                # Whichever format was written most recently wins
+                chunks_file = max(candidates, key=os.path.getmtime)
+                artifact_file = os.path.join(directory, INDEX_ARTIFACT)
+                digest = file_digest(chunks_file) if use_artifact else None
+                flat_index = None
+                if use_artifact and os.path.exists(artifact_file):
+                    flat_index = FlatIndex.load(artifact_file, source_digest=digest)
+                if flat_index is not None:
+                    self.chunks = ChunkStore()
+                    self.chunk_words = []
+                    self.flat_index = flat_index
+                    chunks_file = artifact_file
+                elif chunks_file.endswith('.gz'):
+                    self.chunks = ChunkStore()
+                    self.chunk_words = []
+                    self.flat_index = None
+                    with gzip.open(chunks_file, 'rt', encoding='utf-8') as f:
+                        for line in f:
+                            if line.strip():
+                                self.add_chunk(json.loads(line))
+                else:
                     with open(chunks_file, 'r', encoding='utf-8') as f:
-                        chunks = json.load(f)
-                    self.add_chunks(chunks)
-                    print(f"Loaded {len(chunks)} chunks from {chunks_file}")
-                    return True
+                        self.add_chunks(json.load(f))
+                self._load_passage_index(os.path.join(directory, PASSAGE_ARTIFACT), digest)
+                stat = os.stat(chunks_file)
+                self.index_version = f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+                count = len(self.flat_index) if self.flat_index is not None else len(self.chunks)
+                print(f"Loaded {count} chunks from {chunks_file}")
+                return True
             
             # If no file found, create some default chunks
             print("No chunks file found, using default content")
@@ -113,27 +245,36 @@ class SimpleVectorStore:
             self._create_default_chunks()
             return True
     
+    def _load_passage_index(self, artifact_file: str, digest: Optional[str]):
+        """The prebuilt passage index if it matches the chunks file, else build it"""
+        self.passage_index = None
+        if digest is not None and os.path.exists(artifact_file):
+            self.passage_index = PassageIndex.load(artifact_file, self.chunk_store(), source_digest=digest)
+        if self.passage_index is None:
+            self.build_passage_index()
+    
     def _create_default_chunks(self):
         """Create default chunks if no data file is found"""
         default_chunks = [
             {
-                "content": "GaoTech is a leading provider of Real Estate IoT solutions and smart building technologies.",
+                "text": "GaoTech is a leading provider of Real Estate IoT solutions and smart building technologies.",
                 "source": {"title": "About GaoTech", "url": "https://gaotech.com/about"}
             },
             {
-                "content": "Our IoT solutions include smart sensors, automated systems, and energy management for buildings.",
+                "text": "Our IoT solutions include smart sensors, automated systems, and energy management for buildings.",
                 "source": {"title": "IoT Solutions", "url": "https://gaotech.com/solutions"}
             },
             {
-                "content": "We provide comprehensive real estate technology services including property management systems.",
+                "text": "We provide comprehensive real estate technology services including property management systems.",
                 "source": {"title": "Services", "url": "https://gaotech.com/services"}
             },
             {
-                "content": "Contact us for more information about our smart building solutions and IoT implementations.",
+                "text": "Contact us for more information about our smart building solutions and IoT implementations.",
                 "source": {"title": "Contact", "url": "https://gaotech.com/contact"}
             }
         ]
         self.add_chunks(default_chunks)
+        self.index_version = 'default'
         print(f"Created {len(default_chunks)} default chunks")
     
     def save_index(self, data_dir: str = "data"):
@@ -141,8 +282,9 @@ class SimpleVectorStore:
         try:
             os.makedirs(data_dir, exist_ok=True)
             chunks_file = os.path.join(data_dir, "text_chunks.json")
+            chunks = (self.chunks if self.flat_index is None else self.flat_index.chunks).to_list()
             with open(chunks_file, 'w', encoding='utf-8') as f:
-                json.dump(self.chunks, f, indent=2, ensure_ascii=False)
-            print(f"Saved {len(self.chunks)} chunks to {chunks_file}")
+                json.dump(chunks, f, indent=2, ensure_ascii=False)
+            print(f"Saved {len(chunks)} chunks to {chunks_file}")
         except Exception as e:
             print(f"Error saving chunks: {e}")
\ No newline at end of file
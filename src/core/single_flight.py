@@ -0,0 +1,97 @@
+"""
+Single-Flight Request Coalescing
+================================
+
+When several identical requests arrive at the same time, only the first
+one (the leader) does the work; the others wait on the leader's Future
+and share its result. Threads block on the Future directly and asyncio
+tasks await it through asyncio.wrap_future, so both kinds of caller can
+join the same flight.
+
+Nothing is remembered once a flight lands: if the leader fails, the
+requests that were already waiting see the same exception, and the next
+request starts a fresh flight.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.counters = {'leaders': 0, 'coalesced': 0, 'failures': 0}
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """The flight for key and whether the caller leads it"""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.counters['coalesced'] += 1
+                return future, False
+            future = Future()
+            self._flights[key] = future
+            self.counters['leaders'] += 1
+            return future, True
+
+    def _land(self, key: Hashable, future: Future, result: Any = None,
+              error: Optional[BaseException] = None):
+        with self._lock:
+            del self._flights[key]
+            if error is not None:
+                self.counters['failures'] += 1
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: Hashable, fn: Callable[[], Any],
+           timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Run fn, or wait for the identical call in progress
+
+        Returns (result, shared); shared is True when another caller computed
+        the result. Waiting callers raise TimeoutError after `timeout` seconds.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            try:
+                return future.result(timeout=timeout), True
+            except FutureTimeout:
+                raise TimeoutError("Timed out waiting for a coalesced request")
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._land(key, future, error=e)
+            raise
+        self._land(key, future, result=result)
+        return result, False
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]],
+                       timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """Coroutine version of do(); fn returns an awaitable"""
+        future, leader = self._join(key)
+        if not leader:
+            try:
+                return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout), True
+            except asyncio.TimeoutError:
+                raise TimeoutError("Timed out waiting for a coalesced request")
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._land(key, future, error=e)
+            raise
+        self._land(key, future, result=result)
+        return result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self.counters, in_flight=len(self._flights))
@@ -0,0 +1,199 @@
+"""
+Structured Logging
+==================
+
+Logging for the request path that never blocks a request on stdout:
+records are handed to a bounded queue (QueueHandler) and written by a
+background thread (QueueListener). When the queue is full a record is
+dropped and counted rather than waited for.
+
+Before a record is queued, a filter applies per-event rate limiting (a
+token bucket per event, where the event is the 'event' extra or the
+message template) and sampling (the 'sample' extra, a probability), so a
+hot-path message cannot flood the output under load; the number of
+records suppressed since the last one written is reported with it.
+Buckets are kept for the most recently seen events only (max_events),
+so messages formatted before logging cannot grow them without bound.
+Records carry the current request id (request_id_var, set by the web
+layer) and any extra fields, e.g. stage timings, and are written as JSON
+lines (CHATBOT_LOG_FORMAT=text for plain lines).
+
+Loggers live under 'chatbot' (get_logger); without configure_logging()
+only warnings and errors reach stderr, through Python's default handler.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional
+
+ROOT_LOGGER = 'chatbot'
+
+# Request id of the request being handled, for every record logged meanwhile
+request_id_var: contextvars.ContextVar = contextvars.ContextVar('request_id', default=None)
+
+# LogRecord attributes that are not extra fields
+_RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {
+    'message', 'asctime', 'event', 'sample', 'request_id', 'suppressed', 'taskName'
+}
+
+
+_REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def new_request_id(incoming: Optional[str] = None) -> str:
+    """The caller's X-Request-Id if it looks like one, else a fresh id"""
+    if incoming and _REQUEST_ID_RE.match(incoming):
+        return incoming
+    return uuid.uuid4().hex[:16]
+
+
+class EventFilter(logging.Filter):
+    """Sampling and per-event rate limiting; tags records with event and request id"""
+
+    def __init__(self, rate: float = 20.0, burst: float = 50.0, max_events: int = 10000):
+        super().__init__()
+        self.rate = rate  # Records per second and event
+        self.burst = burst
+        self.max_events = max_events
+        # event -> [tokens, last update, suppressed], least recently seen first
+        self._buckets: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        event = getattr(record, 'event', None) or f"{record.name}:{record.msg}"
+        sample = getattr(record, 'sample', 1.0)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(event)
+            if bucket is None:
+                if len(self._buckets) >= self.max_events:
+                    self._buckets.popitem(last=False)  # The event idle the longest
+                bucket = self._buckets[event] = [self.burst, now, 0]
+            else:
+                self._buckets.move_to_end(event)
+            if sample < 1.0 and random.random() >= sample:
+                bucket[2] += 1
+                return False
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1.0
+            suppressed, bucket[2] = bucket[2], 0
+        record.event = event
+        record.request_id = request_id_var.get()
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f".{int(record.msecs):03d}",
+            'level': record.levelname,
+            'logger': record.name,
+            'event': getattr(record, 'event', None),
+            'message': record.getMessage()
+        }
+        for name in ('request_id', 'suppressed'):
+            if getattr(record, name, None) is not None:
+                entry[name] = getattr(record, name)
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_FIELDS})
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking on a full queue"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[_DroppingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_output: Optional[logging.Handler] = None
+_listener_running = False
+_lock = threading.Lock()
+
+
+def _start_listener():
+    global _listener, _listener_running
+    _listener = logging.handlers.QueueListener(_handler.queue, _output, respect_handler_level=False)
+    _listener.start()
+    _listener_running = True
+
+
+def _restart_after_fork():
+    # The writer thread does not survive fork: a forked worker gets its own
+    if _handler is None:
+        return
+    _handler.queue = queue.Queue(_handler.queue.maxsize)
+    _start_listener()
+
+
+def _stop():
+    global _listener_running
+    if _listener_running:
+        _listener_running = False
+        _listener.stop()  # Writes what is still queued
+
+
+def configure_logging(stream=None, fmt: Optional[str] = None, level: Optional[str] = None) -> logging.Logger:
+    """Route the 'chatbot' loggers through the queue (once per process); returns the root logger"""
+    global _handler, _output
+    logger = logging.getLogger(ROOT_LOGGER)
+    with _lock:
+        if _handler is not None:
+            return logger
+        fmt = fmt or os.getenv('CHATBOT_LOG_FORMAT', 'json')
+        _output = logging.StreamHandler(stream or sys.stdout)
+        _output.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(
+            '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'
+        ))
+        _handler = _DroppingQueueHandler(queue.Queue(int(os.getenv('CHATBOT_LOG_QUEUE', '10000'))))
+        _handler.addFilter(EventFilter(
+            rate=float(os.getenv('CHATBOT_LOG_RATE', '20')),
+            burst=float(os.getenv('CHATBOT_LOG_BURST', '50'))
+        ))
+        logger.addHandler(_handler)
+        logger.setLevel(level or os.getenv('CHATBOT_LOG_LEVEL', 'INFO'))
+        logger.propagate = False
+        _start_listener()
+        os.register_at_fork(after_in_child=_restart_after_fork)
+        atexit.register(_stop)
+    return logger
+
+
+def logging_stats() -> Dict:
+    return {
+        'configured': _handler is not None,
+        'queued': _handler.queue.qsize() if _handler else 0,
+        'dropped': _handler.dropped if _handler else 0
+    }
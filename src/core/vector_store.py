@@ -2,18 +2,22 @@ import json
 import numpy as np
 import faiss
 import pickle
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Iterable
 import openai
 from sentence_transformers import SentenceTransformer
 import os
+import threading
 from datetime import datetime
+from .chunk_store import ChunkStore
+from .memory_report import sampled_sizeof
 
 class VectorStore:
-    def __init__(self, use_openai: bool = False, openai_api_key: str = None):
+    def __init__(self, use_openai: bool = False, openai_api_key: str = None,
+                 model_name: str = 'all-MiniLM-L6-v2'):
         self.use_openai = use_openai
         self.dimension = 384  # Default for sentence-transformers
         self.index = None
-        self.chunks = []
+        self.chunks = ChunkStore()
         self.embeddings = []
         
         if use_openai and openai_api_key:
@@ -21,10 +25,25 @@ class VectorStore:
             self.dimension = 1536  # OpenAI embedding dimension
             self.embedding_model = "text-embedding-ada-002"
         else:
-            # Use free sentence-transformers model
-            print("Loading sentence transformer model...")
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
+            # Free sentence-transformers model, loaded on first use (see model)
             self.dimension = 384
+        self.model_name = model_name
+        self._model = None
+        self._model_lock = threading.Lock()
+    
+    @property
+    def model(self) -> SentenceTransformer:
+        """The sentence transformer, loaded by the first call that embeds text
+        
+        Loading takes seconds, so constructing the store stays cheap and the
+        cost moves to whoever embeds first (ideally a warm-up call).
+        """
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    print("Loading sentence transformer model...")
+                    self._model = SentenceTransformer(self.model_name)
+        return self._model
     
     def get_embedding(self, text: str) -> np.ndarray:
         """Get embedding for a single text"""
@@ -77,10 +96,10 @@ class VectorStore:
         print("Creating vector index...")
         
         # Store chunks
-        self.chunks = chunks
+        self.chunks = ChunkStore.from_chunks(chunks)
         
         # Extract texts for embedding
-        texts = [chunk['text'] for chunk in chunks]
+        texts = list(self.chunks.texts())
         
         # Get embeddings
         self.embeddings = self.get_embeddings_batch(texts)
@@ -95,7 +114,32 @@ class VectorStore:
         # Add to index
         self.index.add(embeddings_array)
         
-        print(f"Index created with {len(chunks)} chunks")
+        print(f"Index created with {len(self.chunks)} chunks")
+    
+    def create_index_streaming(self, chunk_iter: Iterable[Dict], batch_size: int = 32):
+        """Create the FAISS index incrementally, embedding chunks in batches as they arrive"""
+        self.chunks = ChunkStore()
+        self.embeddings = []
+        self.index = faiss.IndexFlatIP(self.dimension)
+        
+        batch = []
+        for chunk in chunk_iter:
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                self._add_batch(batch)
+                batch = []
+        if batch:
+            self._add_batch(batch)
+        
+        print(f"Index created with {len(self.chunks)} chunks")
+    
+    def _add_batch(self, batch: List[Dict]):
+        """Embed and index one batch of chunks"""
+        indices = [self.chunks.append(chunk) for chunk in batch]
+        embeddings = np.array(self.get_embeddings_batch([self.chunks.text(i) for i in indices]), dtype=np.float32)
+        self.embeddings.extend(embeddings)
+        faiss.normalize_L2(embeddings)
+        self.index.add(embeddings)
     
     def search(self, query: str, top_k: int = 5) -> List[Dict]:
         """Search for similar chunks"""
@@ -115,22 +159,33 @@ class VectorStore:
         # Return results with metadata
         results = []
         for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
-            if idx < len(self.chunks):  # Valid index
-                result = self.chunks[idx].copy()
+            if 0 <= idx < len(self.chunks):  # Valid index (faiss pads with -1)
+                result = self.chunks.get(int(idx))
                 result['similarity_score'] = float(score)
                 result['rank'] = i + 1
                 results.append(result)
         
         return results
     
+    def memory_usage(self) -> Dict[str, int]:
+        """Estimated bytes per component (see memory_report)"""
+        usage = {
+            'chunks': sum(self.chunks.memory_usage().values()),
+            'embeddings': sampled_sizeof(self.embeddings),
+            'faiss_index': self.index.ntotal * self.dimension * 4 if self.index is not None else 0
+        }
+        if self._model is not None:
+            usage['model'] = sum(p.numel() * p.element_size() for p in self._model.parameters())
+        return usage
+    
     def save_index(self, base_filename: str = 'vector_store'):
         """Save the vector store to disk"""
         # Save FAISS index
         faiss.write_index(self.index, f"data/{base_filename}.faiss")
         
-        # Save metadata
+        # Save chunks (columnar, see chunk_store) and metadata
+        self.chunks.save(f"data/{base_filename}_chunks.bin")
         metadata = {
-            'chunks': self.chunks,
             'dimension': self.dimension,
             'use_openai': self.use_openai,
             'created_at': datetime.now().isoformat(),
@@ -168,7 +223,15 @@ class VectorStore:
             with open(f"data/{base_filename}_metadata.json", 'r', encoding='utf-8') as f:
                 metadata = json.load(f)
             
-            self.chunks = metadata['chunks']
+            # Stores saved before the chunk store kept the chunks in the metadata
+            chunks_path = f"data/{base_filename}_chunks.bin"
+            if os.path.exists(chunks_path):
+                self.chunks = ChunkStore.load(chunks_path)
+            else:
+                self.chunks = ChunkStore.from_chunks(metadata['chunks'])
+            if self.chunks is None:
+                print(f"Chunks file was written on an incompatible platform: {chunks_path}")
+                return False
             self.dimension = metadata['dimension']
             
             # Load embeddings
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""
+Data Build Pipeline
+===================
+
+Runs the data preparation scripts as a build graph instead of a fixed
+chain. Every stage declares its input files, output files, the source
+files it is built from and its configuration:
+
+    scrape -> data/scraped_content.json
+                    |
+                  chunk -> data/text_chunks.json
+                    |                   |                  |
+             tfidf_store           faiss_store      search_index      passage_index
+                                                        (run in parallel)
+
+    standalone_index.py -> standalone_index -> data/standalone_index.bin
+
+search_index and standalone_index prebuild the word-overlap index the web
+app and the serverless entry point search (tokens, postings and chunk
+texts in one file), so they load it instead of building it on cold start.
+passage_index prebuilds the sentence offsets and per-sentence term
+statistics answers are cut from (data/passage_index.bin).
+
+A stage's fingerprint is a hash of its input and source file contents plus
+its configuration (chunk_size, overlap, vectorizer params, model name). A
+stage is skipped when the fingerprint matches the one recorded for the
+last successful build and its outputs are still the files it produced.
+File hashes are cached by size and mtime in data/.build_cache.json, so a
+no-op rebuild only stats files and never imports the heavy libraries.
+
+The scrape stage talks to the live site, so it only runs when requested
+with --scrape; its output is rewritten only when the crawl found changes.
+
+Usage (from the repository root):
+    python src/data_processing/build_pipeline.py
+    python src/data_processing/build_pipeline.py --scrape
+    python src/data_processing/build_pipeline.py --stages chunk tfidf_store --force
+    python src/data_processing/build_pipeline.py --dry-run
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+CACHE_FILE = 'data/.build_cache.json'
+
+_DATA_DIR = 'src/data_processing'
+_CORE_DIR = 'src/core'
+
+
+class FileHashCache:
+    """Content hashes of files, recomputed only when size or mtime change"""
+
+    def __init__(self, entries: Optional[Dict] = None):
+        self.entries = entries or {}
+
+    def digest(self, path: str) -> Optional[str]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        cached = self.entries.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        digest = sha.hexdigest()
+        self.entries[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+
+class Stage:
+    def __init__(self, name: str, func: Callable[[Dict], Optional[Dict]],
+                 inputs: List[str], outputs: List[str], config: Optional[Dict] = None,
+                 sources: Optional[List[str]] = None, requires: Optional[List[str]] = None,
+                 always_run: bool = False):
+        self.name = name
+        self.func = func  # Top-level function so it can run in a worker process
+        self.inputs = inputs
+        self.outputs = outputs
+        self.config = config or {}
+        self.sources = sources or []  # Code the stage is built from
+        self.requires = requires or []  # Optional modules the stage needs
+        self.always_run = always_run  # Inputs live outside the repo (e.g. the website)
+
+    def missing_requirements(self) -> List[str]:
+        return [module for module in self.requires if importlib.util.find_spec(module) is None]
+
+
+class BuildPipeline:
+    def __init__(self, stages: List[Stage], cache_file: str = CACHE_FILE, jobs: int = 2):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache_file = cache_file
+        self.jobs = jobs
+
+        # A stage depends on whichever stage produces one of its inputs
+        producers = {path: stage.name for stage in stages for path in stage.outputs}
+        self.dependencies = {
+            stage.name: sorted({producers[path] for path in stage.inputs if path in producers})
+            for stage in stages
+        }
+        self._load_cache()
+
+    def _load_cache(self):
+        cache = {}
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+            except Exception as e:
+                print(f"Ignoring unreadable build cache: {e}")
+        self.hashes = FileHashCache(cache.get('files'))
+        self.records: Dict[str, Dict] = cache.get('stages', {})
+
+    def _save_cache(self):
+        directory = os.path.dirname(self.cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = f"{self.cache_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'files': self.hashes.entries, 'stages': self.records}, f, indent=1)
+        os.replace(tmp_file, self.cache_file)
+
+    def fingerprint(self, stage: Stage) -> str:
+        """Hash of the stage's configuration, input files and source files"""
+        payload = {
+            'stage': stage.name,
+            'config': stage.config,
+            'inputs': {path: self.hashes.digest(path) for path in stage.inputs},
+            'sources': {path: self.hashes.digest(path) for path in stage.sources}
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def is_up_to_date(self, stage: Stage, fingerprint: str) -> bool:
+        if stage.always_run:
+            return False
+        record = self.records.get(stage.name)
+        if not record or record.get('fingerprint') != fingerprint:
+            return False
+        # Outputs deleted or edited by hand since the last build are rebuilt
+        return all(
+            self.hashes.digest(path) == digest and digest is not None
+            for path, digest in record.get('outputs', {}).items()
+        )
+
+    def _selected(self, targets: Optional[List[str]]) -> List[str]:
+        """Targets plus everything upstream of them, in declaration order"""
+        if not targets:
+            return list(self.stages)
+        wanted = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage: {name}")
+            if name not in wanted:
+                wanted.add(name)
+                pending.extend(self.dependencies[name])
+        return [name for name in self.stages if name in wanted]
+
+    def run(self, targets: Optional[List[str]] = None, force: bool = False,
+            dry_run: bool = False, skip: Optional[List[str]] = None) -> Dict[str, str]:
+        """Build the targets; returns each stage's outcome
+
+        Outcomes: built, up_to_date, failed, blocked (an upstream stage
+        failed), unavailable (optional dependency missing), skipped
+        (excluded with `skip`), would_build (dry run).
+        """
+        started = time.perf_counter()
+        order = self._selected(targets)
+        skip = set(skip or [])
+        results: Dict[str, str] = {}
+        running = {}
+        executor = None
+
+        def finished(name):
+            return name in results and results[name] != 'building'
+
+        try:
+            while len(results) < len(order) or running:
+                progressed = False
+                for name in order:
+                    if name in results or not all(finished(dep) for dep in self.dependencies[name]
+                                                  if dep in order):
+                        continue
+                    progressed = True
+                    stage = self.stages[name]
+                    upstream = [results.get(dep) for dep in self.dependencies[name]]
+                    if name in skip:
+                        results[name] = 'skipped'
+                    elif any(outcome in ('failed', 'blocked') for outcome in upstream):
+                        results[name] = 'blocked'
+                    elif stage.missing_requirements():
+                        print(f"[{name}] unavailable: missing {', '.join(stage.missing_requirements())}")
+                        results[name] = 'unavailable'
+                    elif dry_run and 'would_build' in upstream:
+                        results[name] = 'would_build'
+                    else:
+                        fingerprint = self.fingerprint(stage)
+                        if not force and self.is_up_to_date(stage, fingerprint):
+                            results[name] = 'up_to_date'
+                        elif dry_run:
+                            results[name] = 'would_build'
+                        else:
+                            if executor is None:
+                                executor = ProcessPoolExecutor(max_workers=self.jobs)
+                            print(f"[{name}] building...")
+                            future = executor.submit(_run_stage, stage.func, stage.inputs,
+                                                     stage.outputs, stage.config)
+                            running[future] = (name, fingerprint, time.perf_counter())
+                            results[name] = 'building'
+
+                if not running:
+                    if not progressed:
+                        break
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, fingerprint, stage_started = running.pop(future)
+                    results[name] = self._finish(self.stages[name], future, fingerprint,
+                                                 time.perf_counter() - stage_started)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if not dry_run:
+                self._save_cache()
+
+        for name in order:
+            print(f"  {name:<14} {results.get(name, 'not_run')}")
+        print(f"Build finished in {time.perf_counter() - started:.3f}s")
+        return results
+
+    def _finish(self, stage: Stage, future, fingerprint: str, duration: float) -> str:
+        try:
+            summary = future.result()
+        except Exception as e:
+            print(f"[{stage.name}] failed: {e}")
+            self.records.pop(stage.name, None)
+            return 'failed'
+
+        missing = [path for path in stage.outputs if not os.path.exists(path)]
+        if missing:
+            print(f"[{stage.name}] failed: did not produce {', '.join(missing)}")
+            self.records.pop(stage.name, None)
+            return 'failed'
+
+        self.records[stage.name] = {
+            'fingerprint': fingerprint,
+            'outputs': {path: self.hashes.digest(path) for path in stage.outputs},
+            'config': stage.config,
+            'built_at': datetime.now().isoformat(),
+            'duration_s': round(duration, 3),
+            'summary': summary or {}
+        }
+        print(f"[{stage.name}] built in {duration:.2f}s")
+        return 'built'
+
+
+def _run_stage(func, inputs, outputs, config):
+    """Worker process entry point"""
+    # The core modules are imported as the src.core package (they use relative imports)
+    for path in ('.', _DATA_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    return func(inputs, outputs, config)
+
+
+# Stage implementations (imports are deferred so a no-op build stays fast)
+
+def scrape_stage(inputs, outputs, config):
+    import website_scraper
+    website_scraper.main()
+
+
+def chunk_stage(inputs, outputs, config):
+    from text_chunker import TextChunker
+    from chunk_dedup import ChunkDeduplicator
+
+    chunker = TextChunker(chunk_size=config['chunk_size'], overlap=config['overlap'])
+    chunks = chunker.chunk_scraped_content(chunker.load_scraped_content(inputs[0]))
+    deduplicator = ChunkDeduplicator(threshold=config['dedup_threshold'])
+    chunks = deduplicator.deduplicate(chunks)
+    chunker.save_chunks(chunks, outputs[0])
+    with open(outputs[1], 'w', encoding='utf-8') as f:
+        json.dump(deduplicator.report(), f, indent=2)
+    return {'chunks': len(chunks)}
+
+
+def _load_chunks(path: str) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def tfidf_stage(inputs, outputs, config):
+    from src.core.lightweight_vector_store import LightweightVectorStore
+
+    store = LightweightVectorStore(use_openai=False)
+    store.vectorizer.set_params(
+        max_features=config['max_features'],
+        ngram_range=tuple(config['ngram_range']),
+        stop_words=config['stop_words']
+    )
+    chunks = _load_chunks(inputs[0])
+    store.build_index(chunks)
+    if not store.save_index(config['base_path']):
+        raise RuntimeError("could not save the TF-IDF store")
+    return {'chunks': len(chunks)}
+
+
+def faiss_stage(inputs, outputs, config):
+    from src.core.vector_store import VectorStore
+
+    store = VectorStore(use_openai=False, model_name=config['model_name'])
+    chunks = _load_chunks(inputs[0])
+    store.create_index(chunks)
+    store.save_index(config['base_filename'])
+    return {'chunks': len(chunks)}
+
+
+def search_index_stage(inputs, outputs, config):
+    from src.core.simple_vector_store import SimpleVectorStore, file_digest
+
+    store = SimpleVectorStore()
+    store.add_chunks(_load_chunks(inputs[0]))
+    index = store.freeze()
+    index.save(outputs[0], source_digest=file_digest(inputs[0]))
+    return index.stats()
+
+
+def passage_index_stage(inputs, outputs, config):
+    from src.core.passage_index import PassageIndex
+    from src.core.simple_vector_store import SimpleVectorStore, file_digest
+
+    store = SimpleVectorStore()
+    store.add_chunks(_load_chunks(inputs[0]))
+    index = PassageIndex(store.chunks, store.preprocess_text)
+    index.save(outputs[0], source_digest=file_digest(inputs[0]))
+    return index.stats()
+
+
+def standalone_index_stage(inputs, outputs, config):
+    from src.core.flat_index import FlatIndex
+    import standalone_index
+
+    # The standalone app has its own (identical) tokenizer and artifact reader
+    chunks = standalone_index.DEFAULT_CHUNKS
+    preprocess = standalone_index.SimpleVectorStore().preprocess_text
+    index = FlatIndex(chunks, [preprocess(chunk.get('content', '')) for chunk in chunks])
+    index.save(outputs[0], source_digest=standalone_index.chunks_digest(chunks))
+    return index.stats()
+
+
+def default_stages() -> List[Stage]:
+    return [
+        Stage(
+            'scrape', scrape_stage,
+            inputs=[],
+            outputs=['data/scraped_content.json'],
+            sources=[f'{_DATA_DIR}/website_scraper.py', f'{_DATA_DIR}/html_extractor.py'],
+            requires=['bs4', 'requests'],
+            always_run=True
+        ),
+        Stage(
+            'chunk', chunk_stage,
+            inputs=['data/scraped_content.json'],
+            outputs=['data/text_chunks.json', 'data/dedup_report.json'],
+            config={'chunk_size': 400, 'overlap': 50, 'dedup_threshold': 0.8},
+            sources=[f'{_DATA_DIR}/text_chunker.py', f'{_DATA_DIR}/chunk_dedup.py']
+        ),
+        Stage(
+            'tfidf_store', tfidf_stage,
+            inputs=['data/text_chunks.json'],
+            outputs=['data/vector_store_chunks.bin', 'data/vector_store_embeddings.pkl',
+                     'data/vector_store_vectorizer.pkl', 'data/vector_store_metadata.json'],
+            config={'base_path': 'data/vector_store', 'max_features': 1000,
+                    'ngram_range': [1, 2], 'stop_words': 'english'},
+            sources=[f'{_CORE_DIR}/lightweight_vector_store.py', f'{_CORE_DIR}/chunk_store.py'],
+            requires=['sklearn']
+        ),
+        Stage(
+            # Separate file names: the TF-IDF store already owns data/vector_store_*
+            'faiss_store', faiss_stage,
+            inputs=['data/text_chunks.json'],
+            outputs=['data/faiss_store.faiss', 'data/faiss_store_metadata.json',
+                     'data/faiss_store_embeddings.pkl', 'data/faiss_store_chunks.bin'],
+            config={'base_filename': 'faiss_store', 'model_name': 'all-MiniLM-L6-v2'},
+            sources=[f'{_CORE_DIR}/vector_store.py', f'{_CORE_DIR}/chunk_store.py'],
+            requires=['faiss', 'sentence_transformers']
+        ),
+        Stage(
+            'search_index', search_index_stage,
+            inputs=['data/text_chunks.json'],
+            outputs=['data/search_index.bin'],
+            sources=[f'{_CORE_DIR}/simple_vector_store.py', f'{_CORE_DIR}/flat_index.py',
+                     f'{_CORE_DIR}/chunk_store.py']
+        ),
+        Stage(
+            'passage_index', passage_index_stage,
+            inputs=['data/text_chunks.json'],
+            outputs=['data/passage_index.bin'],
+            sources=[f'{_CORE_DIR}/simple_vector_store.py', f'{_CORE_DIR}/passage_index.py',
+                     f'{_CORE_DIR}/chunk_store.py']
+        ),
+        Stage(
+            'standalone_index', standalone_index_stage,
+            inputs=['standalone_index.py'],
+            outputs=['data/standalone_index.bin'],
+            sources=[f'{_CORE_DIR}/flat_index.py', f'{_CORE_DIR}/chunk_store.py'],
+            requires=['flask']
+        )
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fingerprinted build of the chatbot data files")
+    parser.add_argument('--stages', nargs='+', metavar='STAGE',
+                        help="build only these stages (and what they depend on)")
+    parser.add_argument('--scrape', action='store_true', help="re-crawl the website first")
+    parser.add_argument('--force', action='store_true', help="rebuild even when up to date")
+    parser.add_argument('--dry-run', action='store_true', help="only report what would be rebuilt")
+    parser.add_argument('--jobs', type=int, default=2, help="stages built in parallel")
+    args = parser.parse_args()
+
+    pipeline = BuildPipeline(default_stages(), jobs=args.jobs)
+    results = pipeline.run(
+        targets=args.stages,
+        force=args.force,
+        dry_run=args.dry_run,
+        skip=None if args.scrape else ['scrape']
+    )
+    if 'failed' in results.values():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
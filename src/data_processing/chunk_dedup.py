@@ -0,0 +1,198 @@
+"""
+Near-Duplicate Chunk Detection
+==============================
+
+Collapses near-identical chunks (shared calls to action, repeated heading
+blocks, pages quoting each other) before the index is built.
+
+Chunks are shingled into word n-grams and summarised with MinHash
+signatures. Locality-sensitive hashing over signature bands finds candidate
+pairs without comparing every chunk to every other, and candidates are then
+verified on their exact shingle sets. A chunk is a duplicate of an earlier
+canonical chunk when their Jaccard similarity, or the fraction of the
+chunk's shingles contained in the canonical one, reaches the threshold.
+The canonical chunk keeps the source URLs of everything merged into it.
+
+Heading chunks are never merged: pages built from the same template share
+most of their heading block, yet each one is how its own page is found.
+"""
+
+import hashlib
+import random
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+# numpy only speeds up signatures; the pure Python path gives identical values
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+_MASK64 = (1 << 64) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_RE = re.compile(r'\w+')
+
+
+def _chunk_text(chunk: Dict) -> str:
+    return chunk.get('text', chunk.get('content', ''))
+
+
+def _is_headings(chunk: Dict) -> bool:
+    return (chunk.get('source') or {}).get('content_type') == 'headings'
+
+
+class ChunkDeduplicator:
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, bands: int = 32,
+                 shingle_size: int = 3, use_containment: bool = True, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.use_containment = use_containment
+
+        # Multiply-shift hash family: h(x) = ((a * x + b) mod 2^64) >> 32, a odd
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.getrandbits(64) | 1, rng.getrandbits(64))
+            for _ in range(num_perm)
+        ]
+        if NUMPY_AVAILABLE:
+            self._a = np.array([a for a, _ in self._perms], dtype=np.uint64)[:, None]
+            self._b = np.array([b for _, b in self._perms], dtype=np.uint64)[:, None]
+        self.reset()
+
+    def reset(self):
+        """Forget all canonical chunks seen so far"""
+        self._buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(self.bands)]
+        self._canonical: List[Dict] = []
+        self._shingles: List[Set[int]] = []
+        self.stats = {
+            'input_chunks': 0,
+            'output_chunks': 0,
+            'input_words': 0,
+            'output_words': 0,
+            'input_chars': 0,
+            'output_chars': 0,
+            'candidate_pairs': 0,
+            'merged_chunks': 0
+        }
+
+    def shingles(self, text: str) -> Set[int]:
+        """Hashed word n-grams of a text"""
+        words = _WORD_RE.findall(text.lower())
+        k = self.shingle_size
+        if len(words) < k:
+            grams = [' '.join(words)] if words else []
+        else:
+            grams = [' '.join(words[i:i + k]) for i in range(len(words) - k + 1)]
+        return {
+            int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest(), 'little')
+            for gram in grams
+        }
+
+    def signature(self, shingles: Set[int]) -> List[int]:
+        """MinHash signature: the minimum of each permutation over the shingles"""
+        if not shingles:
+            return [_MAX_HASH] * self.num_perm
+        if NUMPY_AVAILABLE:
+            values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))[None, :]
+            with np.errstate(over='ignore'):
+                hashed = (self._a * values + self._b) >> np.uint64(32)
+            return hashed.min(axis=1).tolist()
+        return [
+            min((((a * s + b) & _MASK64) >> 32) for s in shingles)
+            for a, b in self._perms
+        ]
+
+    def _similarity(self, shingles: Set[int], canonical: Set[int]) -> float:
+        overlap = len(shingles & canonical)
+        if not overlap:
+            return 0.0
+        similarity = overlap / len(shingles | canonical)
+        if self.use_containment:
+            similarity = max(similarity, overlap / len(shingles))
+        return similarity
+
+    def add(self, chunk: Dict) -> Optional[Dict]:
+        """Process one chunk
+
+        Returns the chunk itself when it is new (it becomes canonical), or
+        None when it was merged into an existing canonical chunk.
+        """
+        text = _chunk_text(chunk)
+        words = len(text.split())
+        self.stats['input_chunks'] += 1
+        self.stats['input_words'] += words
+        self.stats['input_chars'] += len(text)
+        if _is_headings(chunk):
+            self._keep(words, text)
+            return chunk
+
+        shingles = self.shingles(text)
+        signature = self.signature(shingles)
+        band_keys = [
+            tuple(signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+        # Candidate canonical chunks share at least one band with this one
+        candidates = set()
+        for band, key in enumerate(band_keys):
+            candidates.update(self._buckets[band].get(key, ()))
+        self.stats['candidate_pairs'] += len(candidates)
+
+        best_index, best_similarity = None, 0.0
+        for index in candidates:
+            similarity = self._similarity(shingles, self._shingles[index])
+            if similarity > best_similarity:
+                best_index, best_similarity = index, similarity
+
+        if best_index is not None and best_similarity >= self.threshold:
+            self._merge(self._canonical[best_index], chunk)
+            return None
+
+        index = len(self._canonical)
+        self._canonical.append(chunk)
+        self._shingles.append(shingles)
+        for band, key in enumerate(band_keys):
+            self._buckets[band].setdefault(key, []).append(index)
+
+        self._keep(words, text)
+        return chunk
+
+    def _keep(self, words: int, text: str):
+        self.stats['output_chunks'] += 1
+        self.stats['output_words'] += words
+        self.stats['output_chars'] += len(text)
+
+    def _merge(self, canonical: Dict, duplicate: Dict):
+        """Record the duplicate's sources on the canonical chunk"""
+        source_urls = canonical.setdefault('source_urls', [canonical['source']['url']])
+        for url in duplicate.get('source_urls', [duplicate['source']['url']]):
+            if url not in source_urls:
+                source_urls.append(url)
+        if 'global_chunk_id' in duplicate:
+            canonical.setdefault('duplicate_chunk_ids', []).append(duplicate['global_chunk_id'])
+        self.stats['merged_chunks'] += 1
+
+    def deduplicate(self, chunks: List[Dict]) -> List[Dict]:
+        """Collapse near-duplicates in a list of chunks, keeping the original order"""
+        self.reset()
+        return [chunk for chunk in chunks if self.add(chunk) is not None]
+
+    def report(self) -> Dict:
+        """How much the corpus shrank"""
+        stats = dict(self.stats)
+        stats['threshold'] = self.threshold
+        stats['chunk_reduction_pct'] = _percent_saved(stats['input_chunks'], stats['output_chunks'])
+        stats['word_reduction_pct'] = _percent_saved(stats['input_words'], stats['output_words'])
+        stats['char_reduction_pct'] = _percent_saved(stats['input_chars'], stats['output_chars'])
+        return stats
+
+
+def _percent_saved(before: int, after: int) -> float:
+    return round(100.0 * (before - after) / before, 1) if before else 0.0
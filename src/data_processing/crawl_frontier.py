@@ -0,0 +1,245 @@
+"""
+Crawl Frontier
+==============
+
+Priority-ordered URL frontier for WebsiteScraper:
+- canonicalize_url: one spelling per page (scheme/host case, default ports,
+  fragments, query strings, dot segments and trailing slashes)
+- CrawlFrontier: heap of pending URLs plus a compact seen-set, with depth,
+  priority and size limits and an on-disk checkpoint for resuming a crawl.
+  The checkpoint is the pending heap (bounded by max_size) in a JSON file
+  plus an append-only file of seen-set digests, so a checkpoint only
+  writes the digests added since the last one
+- fetch_sitemap_urls: seed URLs (and their priorities) from sitemap.xml
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import posixpath
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit, urlunsplit, urljoin
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+KEY_BYTES = 8
+
+
+def canonicalize_url(url: str, keep_query: bool = False) -> str:
+    """Normalize a URL so every page has exactly one spelling"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+
+    # Drop default ports, keep explicit non-default ones
+    port = parts.port
+    netloc = host
+    if port and DEFAULT_PORTS.get(scheme) != port:
+        netloc = f"{host}:{port}"
+
+    # Resolve dot segments and duplicate slashes
+    path = parts.path or '/'
+    path = posixpath.normpath(path)
+    if path in ('.', '//'):
+        path = '/'
+    if not path.startswith('/'):
+        path = '/' + path
+    path = path.replace('//', '/')
+
+    # Directory-like paths always end with a slash: /careers == /careers/
+    last_segment = path.rsplit('/', 1)[-1]
+    if last_segment and '.' not in last_segment:
+        path += '/'
+
+    query = parts.query if keep_query else ''
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def _url_key(url: str) -> bytes:
+    """8-byte digest used in the seen-set instead of the full URL string"""
+    return hashlib.blake2b(url.encode('utf-8'), digest_size=KEY_BYTES).digest()
+
+
+class CrawlFrontier:
+    def __init__(self, max_depth: int = 5, max_size: int = 100000,
+                 max_priority: Optional[float] = None,
+                 checkpoint_file: Optional[str] = None):
+        self.max_depth = max_depth
+        self.max_size = max_size  # Upper bound on pending URLs held in memory
+        self.max_priority = max_priority  # URLs scored above this are never queued
+        self.checkpoint_file = checkpoint_file
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._seen: Set[bytes] = set()
+        self._counter = 0
+        self._unsaved: List[bytes] = []  # Seen keys not in the checkpoint's seen file yet
+        self._seen_file_ready = False  # False until the seen file holds this frontier's keys
+        self.stats = {'added': 0, 'duplicates': 0, 'too_deep': 0, 'low_priority': 0, 'dropped': 0}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def priority_for(self, depth: int, boost: float = 0.0) -> float:
+        """Lower values are crawled first; shallow pages and sitemap boosts win"""
+        return depth - boost
+
+    def add(self, url: str, depth: int = 0, boost: float = 0.0) -> bool:
+        """Queue a URL if it is new and within the depth, priority and size limits"""
+        url = canonicalize_url(url)
+        key = _url_key(url)
+        if key in self._seen:
+            self.stats['duplicates'] += 1
+            return False
+        if depth > self.max_depth:
+            self.stats['too_deep'] += 1
+            return False
+
+        priority = self.priority_for(depth, boost)
+        if self.max_priority is not None and priority > self.max_priority:
+            self.stats['low_priority'] += 1
+            return False
+        if len(self._heap) >= self.max_size:
+            # Not marked as seen, so the URL can still be queued once there is room
+            self.stats['dropped'] += 1
+            return False
+
+        self._seen.add(key)
+        if self.checkpoint_file:
+            self._unsaved.append(key)
+        self._counter += 1
+        heapq.heappush(self._heap, (priority, self._counter, url, depth))
+        self.stats['added'] += 1
+        return True
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """Next (url, depth) to crawl, or None when the frontier is empty"""
+        if not self._heap:
+            return None
+        _, _, url, depth = heapq.heappop(self._heap)
+        return url, depth
+
+    def is_seen(self, url: str) -> bool:
+        return _url_key(canonicalize_url(url)) in self._seen
+
+    @property
+    def _seen_file(self) -> str:
+        return f"{self.checkpoint_file}.seen"
+
+    def save_checkpoint(self, extra: Optional[Dict] = None):
+        """Write pending URLs and the new seen-set keys to disk
+
+        Keys are appended to the seen file first; the JSON file, replaced
+        atomically, records how many bytes of it belong to the checkpoint.
+        """
+        if not self.checkpoint_file:
+            return
+        if self._seen_file_ready:
+            with open(self._seen_file, 'ab') as f:
+                f.write(b''.join(self._unsaved))
+                seen_bytes = f.tell()
+        else:
+            with open(self._seen_file, 'wb') as f:
+                f.write(b''.join(self._seen))
+                seen_bytes = f.tell()
+            self._seen_file_ready = True
+        self._unsaved = []
+        checkpoint = {
+            'pending': self._heap,
+            'seen_bytes': seen_bytes,
+            'counter': self._counter,
+            'stats': self.stats,
+            'extra': extra or {}
+        }
+        tmp_file = f"{self.checkpoint_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_file, self.checkpoint_file)
+
+    def load_checkpoint(self) -> Optional[Dict]:
+        """Restore a previous crawl; returns the extra data saved with it"""
+        if not self.checkpoint_file or not os.path.exists(self.checkpoint_file):
+            return None
+        try:
+            with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            # Keys appended after the checkpoint was written are not part of it
+            with open(self._seen_file, 'r+b') as f:
+                f.truncate(checkpoint['seen_bytes'])
+                keys = f.read()
+        except Exception as e:
+            print(f"Error loading crawl checkpoint: {e}")
+            return None
+
+        self._heap = [tuple(entry) for entry in checkpoint['pending']]
+        heapq.heapify(self._heap)
+        self._seen = {keys[i:i + KEY_BYTES] for i in range(0, len(keys), KEY_BYTES)}
+        self._unsaved = []
+        self._seen_file_ready = True
+        self._counter = checkpoint['counter']
+        self.stats.update(checkpoint.get('stats', {}))
+        print(f"Resumed crawl checkpoint: {len(self._heap)} pending, {len(self._seen)} seen")
+        return checkpoint.get('extra', {})
+
+    def clear_checkpoint(self):
+        """Remove the checkpoint once the crawl has finished"""
+        if not self.checkpoint_file:
+            return
+        for path in (self.checkpoint_file, self._seen_file):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def fetch_sitemap_urls(session, base_url: str, max_urls: int = 50000,
+                       max_sitemaps: int = 20) -> List[Tuple[str, float]]:
+    """Collect (url, priority) pairs from the site's sitemap(s)
+
+    Sitemap locations come from robots.txt, falling back to /sitemap.xml.
+    Sitemap indexes are followed up to max_sitemaps documents.
+    """
+    sitemaps = []
+    try:
+        robots = session.get(urljoin(base_url, '/robots.txt'), timeout=10)
+        if robots.status_code == 200:
+            for line in robots.text.splitlines():
+                if line.lower().startswith('sitemap:'):
+                    sitemaps.append(line.split(':', 1)[1].strip())
+    except Exception as e:
+        print(f"Could not read robots.txt: {e}")
+    if not sitemaps:
+        sitemaps.append(urljoin(base_url, '/sitemap.xml'))
+
+    urls = []
+    fetched = 0
+    while sitemaps and fetched < max_sitemaps and len(urls) < max_urls:
+        sitemap_url = sitemaps.pop(0)
+        fetched += 1
+        try:
+            response = session.get(sitemap_url, timeout=10)
+            if response.status_code != 200:
+                continue
+            root = ET.fromstring(response.content)
+        except Exception as e:
+            print(f"Could not read sitemap {sitemap_url}: {e}")
+            continue
+
+        for element in root:
+            tag = element.tag.rsplit('}', 1)[-1]
+            loc = priority = None
+            for child in element:
+                child_tag = child.tag.rsplit('}', 1)[-1]
+                if child_tag == 'loc':
+                    loc = (child.text or '').strip()
+                elif child_tag == 'priority':
+                    try:
+                        priority = float(child.text)
+                    except (TypeError, ValueError):
+                        priority = None
+            if not loc:
+                continue
+            if tag == 'sitemap':
+                sitemaps.append(loc)
+            elif tag == 'url' and len(urls) < max_urls:
+                urls.append((loc, priority if priority is not None else 0.5))
+
+    print(f"Found {len(urls)} URLs in sitemap")
+    return urls
@@ -0,0 +1,183 @@
+"""
+Crawl State Store
+=================
+
+Remembers what every URL looked like on the previous crawl so the next one
+can send conditional GETs and report what actually changed:
+- ETag / Last-Modified validators returned by the server
+- a hash of the extracted page content
+- the internal links found on the page (so a 304 can still feed the crawler)
+
+Each crawl produces a change set (added, changed, removed, unchanged, failed
+URLs) that the chunking and indexing steps read to decide what to redo. A
+step is only skipped when the change set is empty and its output is also
+newer than its input, so an input rewritten outside a crawl is not missed.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional, Set
+
+
+class CrawlStateStore:
+    def __init__(self, state_file: str = 'data/crawl_state.json'):
+        self.state_file = state_file
+        self.entries: Dict[str, Dict] = {}
+        self.changes: Dict[str, List[str]] = {
+            'added': [],
+            'changed': [],
+            'unchanged': [],
+            'failed': []
+        }
+        self.seen_urls: Set[str] = set()
+
+    def load(self) -> bool:
+        """Load the state left by the previous crawl"""
+        if not os.path.exists(self.state_file):
+            return False
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+            return True
+        except Exception as e:
+            print(f"Error loading crawl state: {e}")
+            self.entries = {}
+            return False
+
+    def save(self):
+        """Persist the state for the next crawl, dropping removed URLs"""
+        for url in self.removed_urls():
+            self.entries.pop(url, None)
+
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.state_file)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Validators to send so the server can answer 304 Not Modified"""
+        entry = self.entries.get(url)
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def known_links(self, url: str) -> List[str]:
+        """Links recorded for a page, used when the server answers 304"""
+        return self.entries.get(url, {}).get('links', [])
+
+    @staticmethod
+    def content_hash(content: Dict) -> str:
+        """Stable hash of the extracted page content"""
+        payload = json.dumps(
+            {key: content.get(key) for key in ('title', 'description', 'content', 'headings')},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def record_not_modified(self, url: str):
+        """Record a 304 response: the page is unchanged and was not parsed"""
+        self.seen_urls.add(url)
+        entry = self.entries.setdefault(url, {})
+        entry['last_checked'] = time.time()
+        self.changes['unchanged'].append(url)
+
+    def record_page(self, url: str, response_headers, content: Dict,
+                    links: Optional[List[str]] = None) -> str:
+        """Record a freshly fetched page and classify it as added, changed or unchanged"""
+        self.seen_urls.add(url)
+        new_hash = self.content_hash(content)
+        previous = self.entries.get(url)
+
+        if previous is None or not previous.get('content_hash'):
+            change = 'added'
+        elif previous['content_hash'] != new_hash:
+            change = 'changed'
+        else:
+            change = 'unchanged'
+
+        entry = {
+            'etag': response_headers.get('ETag'),
+            'last_modified': response_headers.get('Last-Modified'),
+            'content_hash': new_hash,
+            'last_checked': time.time()
+        }
+        if links is not None:
+            entry['links'] = links
+        self.entries[url] = entry
+        self.changes[change].append(url)
+        return change
+
+    def record_failure(self, url: str, status_code: Optional[int] = None):
+        """Record a failed fetch
+        
+        404/410 mean the page is gone and it is reported as removed; any other
+        failure keeps the previous state so a transient error does not drop it.
+        """
+        if status_code in (404, 410):
+            return
+        self.seen_urls.add(url)
+        self.changes['failed'].append(url)
+
+    def removed_urls(self) -> List[str]:
+        """URLs known from earlier crawls that were not reached in this one"""
+        return sorted(url for url in self.entries if url not in self.seen_urls)
+
+    def change_set(self) -> Dict:
+        """Summary of this crawl for the downstream chunking and indexing steps"""
+        return {
+            'generated_at': time.time(),
+            'added': list(self.changes['added']),
+            'changed': list(self.changes['changed']),
+            'removed': self.removed_urls(),
+            'unchanged': list(self.changes['unchanged']),
+            'failed': list(self.changes['failed'])
+        }
+
+    def save_change_set(self, filename: str = 'data/crawl_changes.json') -> Dict:
+        """Write the change set to disk and return it"""
+        change_set = self.change_set()
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump(change_set, f, indent=2, ensure_ascii=False)
+        print(f"Change set saved to {filename}: "
+              f"{len(change_set['added'])} added, {len(change_set['changed'])} changed, "
+              f"{len(change_set['removed'])} removed, {len(change_set['unchanged'])} unchanged")
+        return change_set
+
+
+def load_change_set(filename: str = 'data/crawl_changes.json') -> Optional[Dict]:
+    """Load the change set written by the last crawl, if any"""
+    if not os.path.exists(filename):
+        return None
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error loading change set: {e}")
+        return None
+
+
+def has_changes(change_set: Optional[Dict]) -> bool:
+    """True when the crawl added, changed or removed at least one page"""
+    if change_set is None:
+        return True
+    return bool(change_set.get('added') or change_set.get('changed') or change_set.get('removed'))
+
+
+def is_up_to_date(output: str, *sources: str) -> bool:
+    """True when output exists and is at least as new as every existing source file"""
+    if not os.path.exists(output):
+        return False
+    built = os.path.getmtime(output)
+    return all(os.path.getmtime(source) <= built for source in sources if os.path.exists(source))
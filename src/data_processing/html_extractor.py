@@ -0,0 +1,368 @@
+"""
+HTML Extraction
+===============
+
+Single-pass page extraction for the scrapers. Title, meta description,
+headings, main content and links are collected from one stream of parser
+events, without building a document tree or walking it several times.
+
+Parser backends:
+- lxml: libxml2's C parser driven through a target interface (fastest);
+  on malformed pages its error recovery can differ from html.parser, e.g.
+  text outside <body> is moved into an implied body
+- html.parser: the standard library parser, no extra dependency; output
+  matches the bs4 backend exactly
+- bs4: the original BeautifulSoup multi-pass extraction, kept as the
+  reference implementation for benchmarks
+
+ExtractionPool runs extraction in worker processes so CPU-bound parsing
+does not hold up network I/O.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, Future
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Union
+
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# Main content areas, tried in order; the first one present wins
+CONTENT_SELECTORS = [
+    'main', 'article', '.content', '#content',
+    '.main-content', '.page-content', '.post-content',
+    '.entry-content', '.site-content'
+]
+
+# Elements dropped before extraction, together with everything inside them
+EXCLUDED_TAGS = frozenset(['script', 'style', 'nav', 'footer', 'header'])
+
+HEADING_TAGS = frozenset(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+
+# Elements that never have content (closed as soon as they are opened)
+VOID_TAGS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen',
+    'link', 'menuitem', 'meta', 'param', 'source', 'track', 'wbr',
+    'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex',
+    'nextid', 'spacer'
+])
+
+DEFAULT_PARSER = 'lxml' if LXML_AVAILABLE else 'html.parser'
+
+
+class _ExtractionHandler:
+    """Parser event sink that collects everything in one pass
+
+    Every text node outside excluded elements is appended to one list; open
+    elements of interest (title, body, headings, content candidates) only
+    remember the [start, end) range of text nodes they cover.
+    """
+
+    def __init__(self, selectors: List[str]):
+        self.texts: List[str] = []
+        self._pending: List[str] = []
+        self._stack: List[list] = []  # [tag, excluded, ranges opened by this element]
+        self._excluded_depth = 0
+
+        self._by_tag: Dict[str, int] = {}
+        self._by_class: Dict[str, int] = {}
+        self._by_id: Dict[str, int] = {}
+        for i, selector in enumerate(selectors):
+            if selector.startswith('.'):
+                self._by_class.setdefault(selector[1:], i)
+            elif selector.startswith('#'):
+                self._by_id.setdefault(selector[1:], i)
+            else:
+                self._by_tag.setdefault(selector, i)
+        self.candidates: List[Optional[list]] = [None] * len(selectors)
+
+        self.title: Optional[list] = None
+        self.body: Optional[list] = None
+        self.description: Optional[str] = None
+        self.headings: List[list] = []
+        self.links: List[str] = []
+
+    def _flush(self):
+        if self._pending:
+            if not self._excluded_depth:
+                self.texts.append(''.join(self._pending))
+            self._pending = []
+
+    def _open_range(self, ranges: List[list]) -> list:
+        text_range = [len(self.texts), None]
+        ranges.append(text_range)
+        return text_range
+
+    # Parser events
+
+    def start(self, tag: str, attrs):
+        self._flush()
+        tag = tag.lower()
+        excluded = tag in EXCLUDED_TAGS
+        ranges: List[list] = []
+
+        if not self._excluded_depth and not excluded:
+            if tag == 'title':
+                if self.title is None:
+                    self.title = self._open_range(ranges)
+            elif tag == 'body':
+                if self.body is None:
+                    self.body = self._open_range(ranges)
+            elif tag in HEADING_TAGS:
+                self.headings.append(self._open_range(ranges))
+            elif tag == 'meta':
+                if self.description is None and attrs.get('name') == 'description':
+                    self.description = attrs.get('content') or ''
+            elif tag == 'a':
+                href = attrs.get('href')
+                if href is not None:
+                    self.links.append(href)
+
+            index = self._by_tag.get(tag)
+            if index is not None and self.candidates[index] is None:
+                self.candidates[index] = self._open_range(ranges)
+            if self._by_class:
+                for class_name in (attrs.get('class') or '').split():
+                    index = self._by_class.get(class_name)
+                    if index is not None and self.candidates[index] is None:
+                        self.candidates[index] = self._open_range(ranges)
+            if self._by_id:
+                index = self._by_id.get(attrs.get('id'))
+                if index is not None and self.candidates[index] is None:
+                    self.candidates[index] = self._open_range(ranges)
+
+        if excluded:
+            self._excluded_depth += 1
+        self._stack.append([tag, excluded, ranges])
+        if tag in VOID_TAGS:
+            self.end(tag)
+
+    def end(self, tag: str):
+        tag = tag.lower()
+        # Unmatched end tags are ignored; a matched one closes everything above it
+        for position in range(len(self._stack) - 1, -1, -1):
+            if self._stack[position][0] == tag:
+                break
+        else:
+            return
+        self._flush()
+        while len(self._stack) > position:
+            self._close(self._stack.pop())
+
+    def _close(self, element: list):
+        _, excluded, ranges = element
+        for text_range in ranges:
+            text_range[1] = len(self.texts)
+        if excluded:
+            self._excluded_depth -= 1
+
+    def data(self, text: str):
+        if not self._excluded_depth:
+            self._pending.append(text)
+
+    def comment(self, text: str):
+        self._flush()
+
+    def close(self) -> Dict:
+        self._flush()
+        while self._stack:
+            self._close(self._stack.pop())
+        return self.result()
+
+    # Result assembly
+
+    def _joined(self, text_range: list) -> str:
+        """Same as BeautifulSoup's get_text(separator=' ', strip=True)"""
+        texts = self.texts[text_range[0]:text_range[1]]
+        return ' '.join(stripped for stripped in (t.strip() for t in texts) if stripped)
+
+    def _raw(self, text_range: list) -> str:
+        """Same as BeautifulSoup's get_text().strip()"""
+        return ''.join(self.texts[text_range[0]:text_range[1]]).strip()
+
+    def result(self) -> Dict:
+        main_content = ""
+        for candidate in self.candidates:
+            if candidate is not None:
+                main_content = self._joined(candidate)
+                break
+        else:
+            if self.body is not None:
+                main_content = self._joined(self.body)
+
+        return {
+            'title': self._raw(self.title) if self.title else "",
+            'description': self.description or "",
+            'content': main_content,
+            'headings': [self._raw(heading) for heading in self.headings],
+            'links': self.links
+        }
+
+
+class _StdlibParser(HTMLParser):
+    """Feeds html.parser events into an _ExtractionHandler"""
+
+    def __init__(self, handler: _ExtractionHandler):
+        super().__init__(convert_charrefs=True)
+        self.handler = handler
+
+    def handle_starttag(self, tag, attrs):
+        self.handler.start(tag, {name: value or '' for name, value in attrs})
+
+    def handle_startendtag(self, tag, attrs):
+        self.handler.start(tag, {name: value or '' for name, value in attrs})
+        if tag not in VOID_TAGS:
+            self.handler.end(tag)
+
+    def handle_endtag(self, tag):
+        self.handler.end(tag)
+
+    def handle_data(self, data):
+        self.handler.data(data)
+
+    def handle_comment(self, data):
+        self.handler.comment(data)
+
+
+class _LxmlTarget:
+    """lxml parser target wrapping an _ExtractionHandler"""
+
+    def __init__(self, handler: _ExtractionHandler):
+        self.handler = handler
+
+    def start(self, tag, attrib):
+        self.handler.start(tag, attrib)
+
+    def end(self, tag):
+        self.handler.end(tag)
+
+    def data(self, text):
+        self.handler.data(text)
+
+    def comment(self, text):
+        self.handler.comment(text)
+
+    def close(self):
+        return self.handler.close()
+
+
+def decode_html(html: Union[bytes, str]) -> str:
+    """Decode raw page bytes (UTF-8, falling back to Windows-1252)"""
+    if isinstance(html, str):
+        return html
+    try:
+        return html.decode('utf-8')
+    except UnicodeDecodeError:
+        return html.decode('cp1252', errors='replace')
+
+
+def extract_from_soup(soup, selectors: List[str] = CONTENT_SELECTORS) -> Dict:
+    """Original multi-pass BeautifulSoup extraction (mutates the soup)"""
+    # Remove script and style elements
+    for script in soup(["script", "style", "nav", "footer", "header"]):
+        script.decompose()
+
+    # Extract title
+    title = soup.find('title')
+    title_text = title.get_text().strip() if title else ""
+
+    # Try to find main content areas, otherwise extract from body
+    main_content = ""
+    content_found = False
+    for selector in selectors:
+        content_area = soup.select_one(selector)
+        if content_area:
+            main_content = content_area.get_text(separator=' ', strip=True)
+            content_found = True
+            break
+    if not content_found:
+        body = soup.find('body')
+        if body:
+            main_content = body.get_text(separator=' ', strip=True)
+
+    # Extract meta description
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    description = meta_desc.get('content', '') if meta_desc else ""
+
+    # Extract headings for structure
+    headings = [h.get_text().strip() for h in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])]
+
+    return {
+        'title': title_text,
+        'description': description,
+        'content': main_content,
+        'headings': headings,
+        'links': [a['href'] for a in soup.find_all('a', href=True)]
+    }
+
+
+def extract_page(html: Union[bytes, str], parser: str = DEFAULT_PARSER,
+                 selectors: List[str] = CONTENT_SELECTORS) -> Dict:
+    """Extract title, description, headings, main content and links from a page"""
+    text = decode_html(html)
+
+    if parser == 'bs4':
+        from bs4 import BeautifulSoup
+        return extract_from_soup(BeautifulSoup(text, 'html.parser'), selectors)
+
+    handler = _ExtractionHandler(selectors)
+    if parser == 'lxml':
+        if not LXML_AVAILABLE:
+            raise ValueError("lxml parser requested but lxml is not installed")
+        lxml_parser = etree.HTMLParser(target=_LxmlTarget(handler))
+        lxml_parser.feed(text)
+        return lxml_parser.close()
+    if parser == 'html.parser':
+        stdlib_parser = _StdlibParser(handler)
+        stdlib_parser.feed(text)
+        stdlib_parser.close()
+        return handler.close()
+
+    raise ValueError(f"Unknown parser backend: {parser}")
+
+
+def _extract_worker(args) -> Dict:
+    """Process pool entry point"""
+    html, parser, selectors = args
+    return extract_page(html, parser, selectors)
+
+
+class ExtractionPool:
+    """Runs extraction in worker processes, or inline when workers is 0"""
+
+    def __init__(self, workers: int = 0, parser: str = DEFAULT_PARSER,
+                 selectors: List[str] = CONTENT_SELECTORS):
+        self.workers = workers
+        self.parser = parser
+        self.selectors = selectors
+        self._executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else None
+
+    def submit(self, html: Union[bytes, str]) -> Future:
+        if self._executor is not None:
+            return self._executor.submit(_extract_worker, (html, self.parser, self.selectors))
+        future = Future()
+        try:
+            future.set_result(extract_page(html, self.parser, self.selectors))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def map(self, pages: List[Union[bytes, str]], chunksize: int = 8) -> List[Dict]:
+        """Extract many pages, preserving order"""
+        if self._executor is None:
+            return [extract_page(html, self.parser, self.selectors) for html in pages]
+        jobs = [(html, self.parser, self.selectors) for html in pages]
+        return list(self._executor.map(_extract_worker, jobs, chunksize=chunksize))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
@@ -0,0 +1,79 @@
+"""
+JSONL Storage
+=============
+
+Compressed JSON Lines files for intermediate pipeline data. Records are
+written and read one at a time, so no stage has to hold a whole file in
+memory. Paths ending in .gz are gzip-compressed; anything else is plain
+JSONL. Plain .json files (the older whole-file format) can still be read.
+"""
+
+import gzip
+import json
+import os
+from typing import Dict, Iterable, Iterator
+
+
+def _open(path: str, mode: str, compressed: bool = None):
+    if compressed is None:
+        compressed = path.endswith('.gz')
+    if compressed:
+        return gzip.open(path, mode + 't', encoding='utf-8', compresslevel=6)
+    return open(path, mode, encoding='utf-8')
+
+
+class JsonlWriter:
+    """Appends records to a (compressed) JSONL file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Written to a temporary file and moved into place on close
+        self._tmp_path = f"{path}.tmp"
+        self._file = _open(self._tmp_path, 'w', compressed=path.endswith('.gz'))
+
+    def write(self, record: Dict):
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write('\n')
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.replace(self._tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Keep the previous file intact when a stage fails
+            self._file.close()
+            self._file = None
+            os.remove(self._tmp_path)
+
+
+def write_jsonl(path: str, records: Iterable[Dict]) -> int:
+    """Write all records from an iterable; returns how many were written"""
+    with JsonlWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+    return writer.count
+
+
+def read_jsonl(path: str) -> Iterator[Dict]:
+    """Yield records one by one (whole-file .json lists are also accepted)"""
+    if path.endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+        return
+    with _open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -5,7 +5,16 @@ Rebuild vector store using lightweight dependencies
 
 import json
 import os
-from lightweight_vector_store import LightweightVectorStore
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from src.core.lightweight_vector_store import LightweightVectorStore
+
+try:
+    from .crawl_state import load_change_set, has_changes, is_up_to_date
+except ImportError:
+    from crawl_state import load_change_set, has_changes, is_up_to_date
 
 def main():
     print("Rebuilding vector store with lightweight dependencies...")
@@ -21,6 +30,13 @@ def main():
     
     print(f"Loaded {len(chunks)} text chunks")
     
+    # Skip indexing when the last crawl found no changes and the store is
+    # newer than the chunks
+    if not has_changes(load_change_set("data/crawl_changes.json")) and \
+            is_up_to_date("data/vector_store_embeddings.pkl", chunks_file):
+        print("No content changes since the last crawl - vector store is up to date.")
+        return
+    
     # Create lightweight vector store
     openai_key = os.getenv('OPENAI_API_KEY')
     use_openai = bool(openai_key)
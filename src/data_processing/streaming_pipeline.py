@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Streaming Ingestion Pipeline
+============================
+
+Runs scrape -> chunk -> index as concurrent stages connected by bounded
+queues, instead of passing whole lists between scripts through
+scraped_content.json and text_chunks.json:
+
+    pages (generator) --queue--> TextChunker.iter_chunks --queue--> index builder
+          |                                |
+          v                                v
+    data/scraped_content.jsonl.gz   data/text_chunks.jsonl.gz
+
+Each stage holds at most `queue_size` items in flight, so memory used by
+the pipeline itself does not grow with the corpus (the index being built
+naturally does), and the first chunks are indexed while the crawl is still
+running. Intermediate files are compressed JSONL that can be read back
+incrementally with jsonl_io.read_jsonl.
+
+Usage:
+    python src/data_processing/streaming_pipeline.py [--index simple|lightweight|faiss|none]
+    python src/data_processing/streaming_pipeline.py --crawl https://realestateiot.com/
+    python src/data_processing/streaming_pipeline.py --source-file data/scraped_content.json
+"""
+
+import argparse
+import os
+import queue
+import resource
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+try:
+    from .jsonl_io import JsonlWriter, read_jsonl
+    from .text_chunker import TextChunker
+    from .chunk_dedup import ChunkDeduplicator
+except ImportError:
+    from jsonl_io import JsonlWriter, read_jsonl
+    from text_chunker import TextChunker
+    from chunk_dedup import ChunkDeduplicator
+
+_END = object()
+
+
+class _StageError:
+    """Carries an exception from a stage thread to the consumer"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _drain(q: queue.Queue) -> Iterator:
+    """Yield items from a queue until the producing stage finishes"""
+    while True:
+        item = q.get()
+        if item is _END:
+            return
+        if isinstance(item, _StageError):
+            raise item.error
+        yield item
+
+
+def _run_stage(items: Iterable, out: queue.Queue, on_done: Optional[Callable] = None):
+    """Thread body: push every item into a bounded queue (blocking when it is full)"""
+    try:
+        for item in items:
+            out.put(item)
+        if on_done:
+            on_done()
+        out.put(_END)
+    except BaseException as e:
+        out.put(_StageError(e))
+
+
+class StreamingPipeline:
+    def __init__(self, chunker: Optional[TextChunker] = None,
+                 deduplicator: Optional[ChunkDeduplicator] = None,
+                 pages_file: str = 'data/scraped_content.jsonl.gz',
+                 chunks_file: str = 'data/text_chunks.jsonl.gz',
+                 queue_size: int = 16):
+        self.chunker = chunker or TextChunker(chunk_size=400, overlap=50)
+        self.deduplicator = deduplicator
+        self.pages_file = pages_file
+        self.chunks_file = chunks_file
+        self.queue_size = queue_size
+        self.stats = {}
+
+    def run(self, pages: Iterable[Dict], index_builder: Callable[[Iterator[Dict]], object]) -> Dict:
+        """Stream pages through chunking into index_builder, which consumes a chunk iterator"""
+        started = time.perf_counter()
+        self.stats = {
+            'pages': 0,
+            'chunks': 0,
+            'duplicates_dropped': 0,
+            'crawl_finished_s': None,
+            'first_chunk_indexed_s': None
+        }
+        page_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        chunk_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        def crawl_done():
+            self.stats['crawl_finished_s'] = time.perf_counter() - started
+
+        with JsonlWriter(self.pages_file) as pages_writer, JsonlWriter(self.chunks_file) as chunks_writer:
+
+            def page_stream():
+                for page in pages:
+                    pages_writer.write(page)
+                    self.stats['pages'] += 1
+                    yield page
+
+            def chunk_stream():
+                for chunk in self.chunker.iter_chunks(_drain(page_queue)):
+                    # Duplicates are dropped here; merges into an already written
+                    # canonical chunk only reach the in-memory index
+                    if self.deduplicator and self.deduplicator.add(chunk) is None:
+                        self.stats['duplicates_dropped'] += 1
+                        continue
+                    chunks_writer.write(chunk)
+                    self.stats['chunks'] += 1
+                    yield chunk
+
+            def indexed_chunks():
+                for chunk in _drain(chunk_queue):
+                    if self.stats['first_chunk_indexed_s'] is None:
+                        self.stats['first_chunk_indexed_s'] = time.perf_counter() - started
+                    yield chunk
+
+            stages = [
+                threading.Thread(target=_run_stage, args=(page_stream(), page_queue, crawl_done),
+                                 name='pipeline-scrape', daemon=True),
+                threading.Thread(target=_run_stage, args=(chunk_stream(), chunk_queue),
+                                 name='pipeline-chunk', daemon=True)
+            ]
+            for stage in stages:
+                stage.start()
+            index_builder(indexed_chunks())
+            for stage in stages:
+                stage.join()
+
+        self.stats['total_s'] = time.perf_counter() - started
+        # ru_maxrss is reported in kilobytes on Linux
+        self.stats['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        if self.deduplicator:
+            self.stats['dedup'] = self.deduplicator.report()
+        return self.stats
+
+
+def _index_builder(kind: str):
+    """Return (builder, save) callables for the chosen vector store"""
+    # The stores live in the src.core package (they use relative imports)
+    repo_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+    if repo_root not in sys.path:
+        sys.path.insert(0, repo_root)
+
+    if kind == 'simple':
+        from src.core.simple_vector_store import SimpleVectorStore
+        store = SimpleVectorStore()
+
+        def build(chunks):
+            for chunk in chunks:
+                store.add_chunk(chunk)
+        # SimpleVectorStore.load_index reads text_chunks.jsonl.gz directly
+        return build, lambda: None
+
+    if kind == 'lightweight':
+        from src.core.lightweight_vector_store import LightweightVectorStore
+        openai_key = os.getenv('OPENAI_API_KEY')
+        store = LightweightVectorStore(use_openai=bool(openai_key), openai_api_key=openai_key)
+        return store.build_index_streaming, lambda: store.save_index("data/vector_store")
+
+    if kind == 'faiss':
+        from src.core.vector_store import VectorStore
+        store = VectorStore(use_openai=False)
+        return store.create_index_streaming, store.save_index
+
+    def consume(chunks):
+        for _ in chunks:
+            pass
+    return consume, lambda: None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming scrape -> chunk -> index pipeline")
+    parser.add_argument('--index', choices=['simple', 'lightweight', 'faiss', 'none'], default='simple')
+    parser.add_argument('--crawl', metavar='BASE_URL', help="crawl a site instead of the fixed URL list")
+    parser.add_argument('--source-file', help="re-run from saved pages (.json or .jsonl[.gz]) without scraping")
+    parser.add_argument('--queue-size', type=int, default=16)
+    parser.add_argument('--dedup', type=float, metavar='THRESHOLD', help="drop near-duplicate chunks")
+    args = parser.parse_args()
+
+    os.makedirs('data', exist_ok=True)
+    if args.source_file:
+        pages = read_jsonl(args.source_file)
+        pages_file = 'data/scraped_content.replay.jsonl.gz'
+    elif args.crawl:
+        from website_scraper import WebsiteScraper
+        pages = WebsiteScraper(args.crawl, max_pages=100000).iter_pages()
+        pages_file = 'data/scraped_content.jsonl.gz'
+    else:
+        from website_scraper import REAL_ESTATE_IOT_URLS, iter_specific_urls
+        pages = iter_specific_urls(REAL_ESTATE_IOT_URLS)
+        pages_file = 'data/scraped_content.jsonl.gz'
+
+    deduplicator = ChunkDeduplicator(threshold=args.dedup) if args.dedup else None
+    pipeline = StreamingPipeline(deduplicator=deduplicator, pages_file=pages_file,
+                                 queue_size=args.queue_size)
+    build, save = _index_builder(args.index)
+    stats = pipeline.run(pages, build)
+    save()
+
+    print("\nStreaming pipeline completed!")
+    print(f"Pages: {stats['pages']}, chunks indexed: {stats['chunks']}, "
+          f"duplicates dropped: {stats['duplicates_dropped']}")
+    if stats['first_chunk_indexed_s'] is not None:
+        print(f"First chunk indexed after {stats['first_chunk_indexed_s']:.2f}s, "
+              f"crawl finished after {stats['crawl_finished_s']:.2f}s")
+    print(f"Total time: {stats['total_s']:.2f}s, peak RSS: {stats['peak_rss_mb']:.1f} MB")
+    print(f"Pages written to {pipeline.pages_file}, chunks to {pipeline.chunks_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,19 @@
 import json
 import re
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator
 import nltk
 from nltk.tokenize import sent_tokenize, word_tokenize
 import os
 
+try:
+    from .crawl_state import load_change_set, has_changes, is_up_to_date
+    from .chunk_dedup import ChunkDeduplicator
+    from .jsonl_io import read_jsonl
+except ImportError:
+    from crawl_state import load_change_set, has_changes, is_up_to_date
+    from chunk_dedup import ChunkDeduplicator
+    from jsonl_io import read_jsonl
+
 # Download required NLTK data
 try:
     nltk.data.find('tokenizers/punkt')
@@ -96,39 +105,89 @@ class TextChunker:
         
         return chunks
     
+    def chunk_page(self, page: Dict) -> List[Dict]:
+        """Create chunks for one scraped page (without global chunk IDs)"""
+        if page['status'] != 'success':
+            return []
+        
+        content = page['content']
+        source_info = {
+            'url': page['url'],
+            'title': content['title'],
+            'description': content['description'],
+            'headings': content['headings']
+        }
+        
+        # Create chunks from main content
+        chunks = []
+        if content['content']:
+            chunks.extend(self.create_chunks_from_text(content['content'], source_info))
+        
+        # Create chunks from headings if they contain substantial content
+        headings_text = ' '.join(content['headings'])
+        if headings_text and len(headings_text.split()) > 10:
+            heading_source = source_info.copy()
+            heading_source['content_type'] = 'headings'
+            chunks.extend(self.create_chunks_from_text(headings_text, heading_source))
+        
+        return chunks
+    
+    def iter_chunks(self, pages: Iterable[Dict], start_id: int = 0) -> Iterator[Dict]:
+        """Chunk pages as they arrive, adding running global chunk IDs"""
+        global_chunk_id = start_id
+        for page in pages:
+            for chunk in self.chunk_page(page):
+                chunk['global_chunk_id'] = global_chunk_id
+                global_chunk_id += 1
+                yield chunk
+    
     def chunk_scraped_content(self, scraped_content: List[Dict]) -> List[Dict]:
         """Process all scraped content and create chunks"""
-        all_chunks = []
+        return list(self.iter_chunks(scraped_content))
+    
+    def chunk_incremental(self, scraped_content: List[Dict], previous_chunks: List[Dict],
+                          change_set: Dict) -> List[Dict]:
+        """Re-chunk only added/changed pages, reusing the chunks of unchanged pages
+        
+        Previous chunks may have been deduplicated: a page is only reused when
+        every chunk that lists it in source_urls also comes from a reusable page,
+        otherwise the text merged away from it could be lost.
+        """
+        reusable_urls = set(change_set.get('unchanged', [])) | set(change_set.get('failed', []))
+        previous_by_url = {}
+        listed_by = {}
+        for chunk in previous_chunks:
+            url = chunk['source']['url']
+            previous_by_url.setdefault(url, []).append(chunk)
+            for source_url in chunk.get('source_urls', [url]):
+                listed_by.setdefault(source_url, set()).add(url)
+        reusable_urls = {
+            url for url in reusable_urls
+            if url in previous_by_url and listed_by.get(url, set()) <= reusable_urls
+        }
         
+        all_chunks = []
+        rechunked = 0
         for page in scraped_content:
-            if page['status'] != 'success':
-                continue
-            
-            content = page['content']
-            source_info = {
-                'url': page['url'],
-                'title': content['title'],
-                'description': content['description'],
-                'headings': content['headings']
-            }
-            
-            # Create chunks from main content
-            if content['content']:
-                chunks = self.create_chunks_from_text(content['content'], source_info)
-                all_chunks.extend(chunks)
-            
-            # Create chunks from headings if they contain substantial content
-            headings_text = ' '.join(content['headings'])
-            if headings_text and len(headings_text.split()) > 10:
-                heading_source = source_info.copy()
-                heading_source['content_type'] = 'headings'
-                heading_chunks = self.create_chunks_from_text(headings_text, heading_source)
-                all_chunks.extend(heading_chunks)
+            url = page['url']
+            if url in reusable_urls:
+                for chunk in previous_by_url[url]:
+                    # Drop the old dedup annotations; deduplication runs again afterwards
+                    chunk = dict(chunk)
+                    chunk.pop('duplicate_chunk_ids', None)
+                    source_urls = [u for u in chunk.pop('source_urls', [url]) if u in reusable_urls]
+                    if len(source_urls) > 1:
+                        chunk['source_urls'] = source_urls
+                    all_chunks.append(chunk)
+            else:
+                all_chunks.extend(self.chunk_page(page))
+                rechunked += 1
         
-        # Add global chunk IDs
+        # Re-number global chunk IDs across reused and new chunks
         for i, chunk in enumerate(all_chunks):
             chunk['global_chunk_id'] = i
         
+        print(f"Re-chunked {rechunked} pages, reused chunks for {len(scraped_content) - rechunked} pages")
         return all_chunks
     
     def save_chunks(self, chunks: List[Dict], filename: str = 'text_chunks.json'):
@@ -138,7 +197,9 @@ class TextChunker:
         print(f"Chunks saved to {filename}")
     
     def load_scraped_content(self, filename: str = 'data/scraped_content.json') -> List[Dict]:
-        """Load scraped content from JSON file"""
+        """Load scraped content from a JSON or (compressed) JSONL file"""
+        if not filename.endswith('.json'):
+            return list(read_jsonl(filename))
         with open(filename, 'r', encoding='utf-8') as f:
             return json.load(f)
 
@@ -154,14 +215,36 @@ def main():
         print("Scraped content not found. Please run website_scraper.py first.")
         return
     
-    # Create chunks
-    chunks = chunker.chunk_scraped_content(scraped_content)
+    # Skip chunking entirely when the last crawl found no changes and the
+    # chunks are newer than the scraped content
+    chunks_file = 'data/text_chunks.json'
+    change_set = load_change_set('data/crawl_changes.json')
+    if not has_changes(change_set) and is_up_to_date(chunks_file, 'data/scraped_content.json'):
+        print("No content changes since the last crawl - chunks are up to date.")
+        return
+    
+    # Create chunks, reusing the previous ones for unchanged pages
+    if change_set is not None and has_changes(change_set) and os.path.exists(chunks_file):
+        with open(chunks_file, 'r', encoding='utf-8') as f:
+            previous_chunks = json.load(f)
+        chunks = chunker.chunk_incremental(scraped_content, previous_chunks, change_set)
+    else:
+        chunks = chunker.chunk_scraped_content(scraped_content)
     
     print(f"\nChunking completed!")
     print(f"Total chunks created: {len(chunks)}")
     
+    # Collapse near-duplicate chunks (shared boilerplate, repeated heading blocks)
+    deduplicator = ChunkDeduplicator(threshold=0.8)
+    chunks = deduplicator.deduplicate(chunks)
+    report = deduplicator.report()
+    with open('data/dedup_report.json', 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Deduplication: {report['input_chunks']} -> {report['output_chunks']} chunks "
+          f"({report['chunk_reduction_pct']}% fewer chunks, {report['word_reduction_pct']}% fewer words)")
+    
     # Save chunks
-    chunker.save_chunks(chunks, 'data/text_chunks.json')
+    chunker.save_chunks(chunks, chunks_file)
     
     # Print summary statistics
     word_counts = [chunk['word_count'] for chunk in chunks]
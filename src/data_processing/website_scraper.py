@@ -4,14 +4,44 @@ import json
 import time
 from urllib.parse import urljoin, urlparse
 import os
-from typing import List, Dict, Set
+from collections import deque
+from typing import List, Dict, Optional, Iterator
+
+try:
+    from .crawl_state import CrawlStateStore, has_changes
+    from .crawl_frontier import CrawlFrontier, canonicalize_url, fetch_sitemap_urls
+    from .html_extractor import DEFAULT_PARSER, ExtractionPool, extract_from_soup, extract_page
+except ImportError:
+    from crawl_state import CrawlStateStore, has_changes
+    from crawl_frontier import CrawlFrontier, canonicalize_url, fetch_sitemap_urls
+    from html_extractor import DEFAULT_PARSER, ExtractionPool, extract_from_soup, extract_page
 
 class WebsiteScraper:
-    def __init__(self, base_url: str, max_pages: int = 50):
-        self.base_url = base_url
+    def __init__(self, base_url: str, max_pages: int = 50,
+                 state: Optional[CrawlStateStore] = None,
+                 previous_content: Optional[Dict[str, Dict]] = None,
+                 max_depth: int = 5,
+                 max_frontier_size: int = 100000,
+                 use_sitemap: bool = True,
+                 checkpoint_file: Optional[str] = None,
+                 checkpoint_every: int = 25,
+                 parser: str = DEFAULT_PARSER):
+        self.base_url = canonicalize_url(base_url)
         self.max_pages = max_pages
-        self.visited_urls: Set[str] = set()
+        self.pages_visited = 0  # The frontier's seen-set knows which URLs
         self.scraped_content: List[Dict] = []
+        # Crawl state for conditional GETs; previous_content maps URL -> last scraped record
+        self.state = state
+        self.previous_content = previous_content or {}
+        # Frontier with seen-set, depth/size limits and an optional resume checkpoint
+        self.frontier = CrawlFrontier(
+            max_depth=max_depth,
+            max_size=max_frontier_size,
+            checkpoint_file=checkpoint_file
+        )
+        self.use_sitemap = use_sitemap
+        self.checkpoint_every = checkpoint_every
+        self.parser = parser
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -24,65 +54,27 @@ class WebsiteScraper:
         return parsed_url.netloc == parsed_base.netloc
     
     def extract_text_content(self, soup: BeautifulSoup) -> Dict[str, str]:
-        """Extract meaningful text content from the page"""
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
-        
-        # Extract title
-        title = soup.find('title')
-        title_text = title.get_text().strip() if title else ""
-        
-        # Extract main content
-        main_content = ""
-        
-        # Try to find main content areas
-        content_selectors = [
-            'main', 'article', '.content', '#content', 
-            '.main-content', '.page-content', '.post-content'
-        ]
-        
-        content_found = False
-        for selector in content_selectors:
-            content_area = soup.select_one(selector)
-            if content_area:
-                main_content = content_area.get_text(separator=' ', strip=True)
-                content_found = True
-                break
-        
-        # If no main content area found, extract from body
-        if not content_found:
-            body = soup.find('body')
-            if body:
-                main_content = body.get_text(separator=' ', strip=True)
-        
-        # Extract meta description
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        description = meta_desc.get('content', '') if meta_desc else ""
-        
-        # Extract headings for structure
-        headings = []
-        for h in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-            headings.append(h.get_text().strip())
-        
-        return {
-            'title': title_text,
-            'description': description,
-            'content': main_content,
-            'headings': headings
-        }
+        """Extract meaningful text content from an already parsed page"""
+        content = extract_from_soup(soup)
+        content.pop('links')
+        return content
     
     def get_page_links(self, soup: BeautifulSoup, current_url: str) -> List[str]:
         """Extract all internal links from the page"""
+        return self.filter_links([link['href'] for link in soup.find_all('a', href=True)], current_url)
+    
+    def filter_links(self, hrefs: List[str], current_url: str) -> List[str]:
+        """Resolve hrefs and keep new internal links"""
         links = []
-        for link in soup.find_all('a', href=True):
-            href = link['href']
+        for href in hrefs:
             full_url = urljoin(current_url, href)
+            if not full_url.startswith(('http://', 'https://')):
+                continue
             
-            # Clean URL (remove fragments and query params for deduplication)
-            clean_url = full_url.split('#')[0].split('?')[0]
+            # Canonicalize (case, default ports, fragments, query params, trailing slash)
+            clean_url = canonicalize_url(full_url)
             
-            if self.is_valid_url(clean_url) and clean_url not in self.visited_urls:
+            if self.is_valid_url(clean_url) and not self.frontier.is_seen(clean_url):
                 links.append(clean_url)
         
         return links
@@ -91,14 +83,29 @@ class WebsiteScraper:
         """Scrape a single page"""
         try:
             print(f"Scraping: {url}")
-            response = self.session.get(url, timeout=10)
+            headers = {}
+            if self.state and url in self.previous_content:
+                headers = self.state.conditional_headers(url)
+            response = self.session.get(url, timeout=10, headers=headers)
+            
+            # Not modified - skip parsing and reuse the previous record
+            if response.status_code == 304:
+                self.state.record_not_modified(url)
+                return {
+                    'url': url,
+                    'status': 'not_modified',
+                    'links': self.state.known_links(url),
+                    'scraped_at': time.time()
+                }
+            
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            content = self.extract_text_content(soup)
+            # Single-pass extraction; links are collected in the same pass
+            content = extract_page(response.content, self.parser)
+            links = self.filter_links(content.pop('links'), url)
             
-            # Get links for further crawling
-            links = self.get_page_links(soup, url)
+            if self.state:
+                self.state.record_page(url, response.headers, content, links)
             
             return {
                 'url': url,
@@ -110,6 +117,8 @@ class WebsiteScraper:
             
         except Exception as e:
             print(f"Error scraping {url}: {str(e)}")
+            if self.state:
+                self.state.record_failure(url, getattr(getattr(e, 'response', None), 'status_code', None))
             return {
                 'url': url,
                 'status': 'error',
@@ -119,29 +128,81 @@ class WebsiteScraper:
     
     def scrape_website(self) -> List[Dict]:
         """Scrape the entire website"""
-        urls_to_visit = [self.base_url]
+        for record in self.iter_pages():
+            self.scraped_content.append(record)
+        return self.scraped_content
+    
+    def iter_pages(self) -> Iterator[Dict]:
+        """Crawl the website, yielding each successfully scraped page as soon as it is ready
         
-        while urls_to_visit and len(self.visited_urls) < self.max_pages:
-            current_url = urls_to_visit.pop(0)
-            
-            if current_url in self.visited_urls:
-                continue
-            
-            self.visited_urls.add(current_url)
-            result = self.scrape_page(current_url)
-            
-            if result['status'] == 'success':
-                self.scraped_content.append(result)
+        With a checkpoint file, scraped pages are also appended to
+        <checkpoint>.pages.jsonl, and every checkpoint records how far that
+        file had got; a resumed crawl drops the pages written after the
+        last checkpoint (their URLs are still pending) and replays the rest.
+        """
+        pages_file = f"{self.frontier.checkpoint_file}.pages.jsonl" if self.frontier.checkpoint_file else None
+        resumed = self.frontier.load_checkpoint()
+        self.pages_visited = 0
+        
+        if resumed is not None:
+            # Pick up the pages scraped before the last checkpoint
+            self.pages_visited = resumed.get('pages_visited', 0)
+            if pages_file and os.path.exists(pages_file):
+                with open(pages_file, 'r+b') as f:
+                    f.truncate(resumed.get('pages_bytes', 0))
+                    for line in f:
+                        if line.strip():
+                            yield json.loads(line)
+        else:
+            self.frontier.add(self.base_url, depth=0)
+            if self.use_sitemap:
+                for url, priority in fetch_sitemap_urls(self.session, self.base_url):
+                    if self.is_valid_url(canonicalize_url(url)):
+                        self.frontier.add(url, depth=1, boost=priority)
+            if pages_file and os.path.exists(pages_file):
+                os.remove(pages_file)
+        
+        pages = open(pages_file, 'ab') if pages_file else None
+        try:
+            while len(self.frontier) and self.pages_visited < self.max_pages:
+                current_url, depth = self.frontier.pop()
                 
-                # Add new links to visit
-                for link in result['links']:
-                    if link not in self.visited_urls and link not in urls_to_visit:
-                        urls_to_visit.append(link)
-            
-            # Be respectful - add delay between requests
-            time.sleep(1)
+                self.pages_visited += 1
+                result = self.scrape_page(current_url)
+                
+                if result['status'] in ('success', 'not_modified'):
+                    if result['status'] == 'not_modified':
+                        # Reuse the previous record; links come from the crawl state
+                        record = self.previous_content[current_url]
+                    else:
+                        record = result
+                    if pages:
+                        pages.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+                    
+                    # Add new links to visit (the frontier drops duplicates)
+                    for link in result['links']:
+                        self.frontier.add(link, depth=depth + 1)
+                    yield record
+                
+                if self.checkpoint_every and self.pages_visited % self.checkpoint_every == 0:
+                    if pages:
+                        pages.flush()
+                    self.frontier.save_checkpoint({
+                        'pages_visited': self.pages_visited,
+                        'pages_bytes': pages.tell() if pages else 0
+                    })
+                
+                # Be respectful - add delay between requests
+                time.sleep(1)
+        finally:
+            if pages:
+                pages.close()
         
-        return self.scraped_content
+        # Finished - the next run starts a fresh crawl
+        self.frontier.clear_checkpoint()
+        if pages_file and os.path.exists(pages_file):
+            os.remove(pages_file)
+        print(f"Frontier stats: {self.frontier.stats}")
     
     def save_content(self, filename: str = 'scraped_content.json'):
         """Save scraped content to JSON file"""
@@ -149,137 +210,195 @@ class WebsiteScraper:
             json.dump(self.scraped_content, f, indent=2, ensure_ascii=False)
         print(f"Content saved to {filename}")
 
-def scrape_specific_urls(urls_list):
-    """Scrape specific URLs instead of crawling"""
-    scraped_content = []
+def scrape_specific_urls(urls_list, state: Optional[CrawlStateStore] = None,
+                         previous_content: Optional[Dict[str, Dict]] = None,
+                         parser: str = DEFAULT_PARSER,
+                         workers: int = 2,
+                         html_dir: Optional[str] = None):
+    """Scrape specific URLs instead of crawling (see iter_specific_urls)"""
+    return list(iter_specific_urls(urls_list, state, previous_content, parser, workers, html_dir))
+
+def iter_specific_urls(urls_list, state: Optional[CrawlStateStore] = None,
+                       previous_content: Optional[Dict[str, Dict]] = None,
+                       parser: str = DEFAULT_PARSER,
+                       workers: int = 2,
+                       html_dir: Optional[str] = None) -> Iterator[Dict]:
+    """Scrape specific URLs, yielding one record per URL in order
+    
+    Pages are fetched in this process and parsed in a pool of `workers`
+    processes, so parsing overlaps with network I/O and the request delay;
+    each record is yielded as soon as it and all records before it are ready.
+    With a crawl state store, pages found in previous_content are fetched with
+    conditional headers and reused as-is when the server answers 304.
+    Raw pages are written to html_dir when given (used by the extraction benchmark).
+    """
+    previous_content = previous_content or {}
+    pending = deque()  # (url, response headers, parse future) or a finished record
     session = requests.Session()
     session.headers.update({
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     })
+    if html_dir:
+        os.makedirs(html_dir, exist_ok=True)
     
-    for i, url in enumerate(urls_list, 1):
-        print(f"Scraping {i}/{len(urls_list)}: {url}")
-        
+    def finish(entry) -> Dict:
+        if isinstance(entry, dict):
+            return entry
+        url, response_headers, future = entry
         try:
-            response = session.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
-            
-            # Extract title
-            title = soup.find('title')
-            title_text = title.get_text().strip() if title else ""
-            
-            # Extract main content
-            main_content = ""
-            
-            # Try to find main content areas
-            content_selectors = [
-                'main', 'article', '.content', '#content', 
-                '.main-content', '.page-content', '.post-content',
-                '.entry-content', '.site-content'
-            ]
-            
-            content_found = False
-            for selector in content_selectors:
-                content_area = soup.select_one(selector)
-                if content_area:
-                    main_content = content_area.get_text(separator=' ', strip=True)
-                    content_found = True
-                    break
-            
-            # If no main content area found, extract from body
-            if not content_found:
-                body = soup.find('body')
-                if body:
-                    main_content = body.get_text(separator=' ', strip=True)
-            
-            # Extract meta description
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            description = meta_desc.get('content', '') if meta_desc else ""
-            
-            # Extract headings for structure
-            headings = []
-            for h in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-                headings.append(h.get_text().strip())
-            
-            scraped_content.append({
-                'url': url,
-                'status': 'success',
-                'content': {
-                    'title': title_text,
-                    'description': description,
-                    'content': main_content,
-                    'headings': headings
-                },
-                'scraped_at': time.time()
-            })
-            
-            print(f"✓ Successfully scraped: {title_text}")
-            
+            content = future.result()
+            content.pop('links', None)
         except Exception as e:
-            print(f"✗ Error scraping {url}: {str(e)}")
-            scraped_content.append({
+            print(f"✗ Error parsing {url}: {str(e)}")
+            if state:
+                state.record_failure(url)
+            return {
                 'url': url,
                 'status': 'error',
                 'error': str(e),
                 'scraped_at': time.time()
-            })
+            }
         
-        # Be respectful - add delay between requests
-        time.sleep(1)
+        change = state.record_page(url, response_headers, content) if state else 'added'
+        if change == 'unchanged' and url in previous_content:
+            # Same extracted content - keep the previous record untouched
+            print(f"= Unchanged: {content['title']}")
+            return previous_content[url]
+        print(f"✓ Successfully scraped: {content['title']}")
+        return {
+            'url': url,
+            'status': 'success',
+            'content': content,
+            'scraped_at': time.time()
+        }
     
-    return scraped_content
+    with ExtractionPool(workers=workers, parser=parser) as pool:
+        for i, url in enumerate(urls_list, 1):
+            print(f"Scraping {i}/{len(urls_list)}: {url}")
+            
+            try:
+                headers = {}
+                if state and url in previous_content:
+                    headers = state.conditional_headers(url)
+                response = session.get(url, timeout=10, headers=headers)
+                
+                # Not modified - skip parsing and reuse the previous record
+                if response.status_code == 304:
+                    state.record_not_modified(url)
+                    pending.append(previous_content[url])
+                    print(f"= Not modified: {url}")
+                else:
+                    response.raise_for_status()
+                    if html_dir:
+                        with open(os.path.join(html_dir, page_filename(url)), 'wb') as f:
+                            f.write(response.content)
+                    pending.append((url, response.headers, pool.submit(response.content)))
+                
+            except Exception as e:
+                print(f"✗ Error scraping {url}: {str(e)}")
+                if state:
+                    state.record_failure(url, getattr(getattr(e, 'response', None), 'status_code', None))
+                pending.append({
+                    'url': url,
+                    'status': 'error',
+                    'error': str(e),
+                    'scraped_at': time.time()
+                })
+            
+            # Hand over every record whose parse has already finished
+            while pending and (isinstance(pending[0], dict) or pending[0][2].done()):
+                yield finish(pending.popleft())
+            
+            # Be respectful - add delay between requests
+            time.sleep(1)
+        
+        while pending:
+            yield finish(pending.popleft())
 
-def main():
-    # All Real Estate IoT website URLs
-    urls_to_scrape = [
-        "https://realestateiot.com/",
-        "https://realestateiot.com/iot-efficiency-automation/",
-        "https://realestateiot.com/iot-efficiency-automation/smart-access-control-systems/",
-        "https://realestateiot.com/iot-efficiency-automation/smart-parking-management/",
-        "https://realestateiot.com/iot-efficiency-automation/hvac-automation/",
-        "https://realestateiot.com/iot-efficiency-automation/lighting-automation/",
-        "https://realestateiot.com/iot-efficiency-automation/occupancy-space-utilization-sensors/",
-        "https://realestateiot.com/iot-safety-security/",
-        "https://realestateiot.com/iot-safety-security/surveillance-cctv-integration/",
-        "https://realestateiot.com/iot-safety-security/intrusion-detection-alarms/",
-        "https://realestateiot.com/iot-safety-security/environmental-health-monitoring/",
-        "https://realestateiot.com/iot-safety-security/remote-lockdown-emergency-response/",
-        "https://realestateiot.com/iot-safety-security/fire-safety-emergency-systems/",
-        "https://realestateiot.com/iot-sustainability-monitoring/",
-        "https://realestateiot.com/iot-sustainability-monitoring/energy-monitoring-systems/",
-        "https://realestateiot.com/iot-sustainability-monitoring/water-management-systems/",
-        "https://realestateiot.com/iot-sustainability-monitoring/air-quality-monitoring/",
-        "https://realestateiot.com/iot-sustainability-monitoring/solar-energy-monitoring/",
-        "https://realestateiot.com/iot-sustainability-monitoring/waste-management-systems/",
-        "https://realestateiot.com/iot-sustainability-monitoring/sustainable-asset-tracking/",
-        "https://realestateiot.com/careers/",
-        "https://realestateiot.com/careers/internships/",
-        "https://realestateiot.com/careers/internships-for-masters-mba/",
-        "https://realestateiot.com/careers/ai-enhanced-internship-opportunities/",
-        "https://realestateiot.com/about-us/",
-        "https://realestateiot.com/contact-us/",
-        "https://gaorfid.com/teksummit/",
-        "https://gaotek.com/teksummit/"
-    ]
+def page_filename(url: str) -> str:
+    """File name used when saving a raw page"""
+    parsed = urlparse(url)
+    slug = parsed.path.strip('/').replace('/', '_') or 'index'
+    return f"{parsed.netloc}_{slug}.html"
+
+# All Real Estate IoT website URLs
+REAL_ESTATE_IOT_URLS = [
+    "https://realestateiot.com/",
+    "https://realestateiot.com/iot-efficiency-automation/",
+    "https://realestateiot.com/iot-efficiency-automation/smart-access-control-systems/",
+    "https://realestateiot.com/iot-efficiency-automation/smart-parking-management/",
+    "https://realestateiot.com/iot-efficiency-automation/hvac-automation/",
+    "https://realestateiot.com/iot-efficiency-automation/lighting-automation/",
+    "https://realestateiot.com/iot-efficiency-automation/occupancy-space-utilization-sensors/",
+    "https://realestateiot.com/iot-safety-security/",
+    "https://realestateiot.com/iot-safety-security/surveillance-cctv-integration/",
+    "https://realestateiot.com/iot-safety-security/intrusion-detection-alarms/",
+    "https://realestateiot.com/iot-safety-security/environmental-health-monitoring/",
+    "https://realestateiot.com/iot-safety-security/remote-lockdown-emergency-response/",
+    "https://realestateiot.com/iot-safety-security/fire-safety-emergency-systems/",
+    "https://realestateiot.com/iot-sustainability-monitoring/",
+    "https://realestateiot.com/iot-sustainability-monitoring/energy-monitoring-systems/",
+    "https://realestateiot.com/iot-sustainability-monitoring/water-management-systems/",
+    "https://realestateiot.com/iot-sustainability-monitoring/air-quality-monitoring/",
+    "https://realestateiot.com/iot-sustainability-monitoring/solar-energy-monitoring/",
+    "https://realestateiot.com/iot-sustainability-monitoring/waste-management-systems/",
+    "https://realestateiot.com/iot-sustainability-monitoring/sustainable-asset-tracking/",
+    "https://realestateiot.com/careers/",
+    "https://realestateiot.com/careers/internships/",
+    "https://realestateiot.com/careers/internships-for-masters-mba/",
+    "https://realestateiot.com/careers/ai-enhanced-internship-opportunities/",
+    "https://realestateiot.com/about-us/",
+    "https://realestateiot.com/contact-us/",
+    "https://gaorfid.com/teksummit/",
+    "https://gaotek.com/teksummit/"
+]
+
+def load_previous_content(filename: str = 'data/scraped_content.json') -> Dict[str, Dict]:
+    """Load the previous crawl output keyed by URL (successful pages only)"""
+    if not os.path.exists(filename):
+        return {}
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            return {item['url']: item for item in json.load(f) if item.get('status') == 'success'}
+    except Exception as e:
+        print(f"Error loading previous content: {e}")
+        return {}
+
+def main(html_dir: Optional[str] = None):
+    """Scrape the site into data/scraped_content.json; raw pages go to html_dir when given"""
+    urls_to_scrape = REAL_ESTATE_IOT_URLS
     
     print(f"Starting to scrape {len(urls_to_scrape)} URLs from Real Estate IoT website...")
     
+    # Load the previous crawl so unchanged pages can be skipped
+    state = CrawlStateStore('data/crawl_state.json')
+    state.load()
+    previous_content = load_previous_content('data/scraped_content.json')
+    
     # Scrape all specified URLs
-    content = scrape_specific_urls(urls_to_scrape)
+    content = scrape_specific_urls(urls_to_scrape, state=state, previous_content=previous_content,
+                                   html_dir=html_dir)
+    
+    change_set = state.save_change_set('data/crawl_changes.json')
+    state.save()
+    
+    # Keep the last good copy of pages that failed transiently this time
+    failed_urls = set(change_set['failed'])
+    content = [
+        previous_content.get(item['url'], item) if item['url'] in failed_urls else item
+        for item in content
+    ]
     
     print(f"\nScraping completed!")
     print(f"Total pages scraped: {len(content)}")
     
-    # Save the content
-    with open('data/scraped_content.json', 'w', encoding='utf-8') as f:
-        json.dump(content, f, indent=2, ensure_ascii=False)
-    print(f"Content saved to data/scraped_content.json")
+    # Save the content only when something changed
+    if has_changes(change_set) or not previous_content:
+        with open('data/scraped_content.json', 'w', encoding='utf-8') as f:
+            json.dump(content, f, indent=2, ensure_ascii=False)
+        print(f"Content saved to data/scraped_content.json")
+    else:
+        print("No content changes - data/scraped_content.json left untouched")
     
     # Print summary
     successful = 0
@@ -295,6 +414,13 @@ def main():
     print(f"\nSummary: {successful} successful, {failed} failed")
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Scrape the Real Estate IoT website")
+    parser.add_argument('--save-html', nargs='?', const='data/pages', metavar='DIR',
+                        help="also save the raw pages (default DIR: data/pages, read by the extraction benchmark)")
+    args = parser.parse_args()
+    
     # Create data directory
     os.makedirs('data', exist_ok=True)
-    main()
\ No newline at end of file
+    main(html_dir=args.save_html)
\ No newline at end of file
@@ -4,6 +4,8 @@ Web Interface Module
 
 This module contains the web interface components:
 - web_interface: Flask web application and API endpoints
+- asgi_app: ASGI entry point serving the chat API with the async engine
+- admission: admission control, rate limiting and load shedding
 - templates: HTML templates for the user interface
 - static: Static assets (CSS, JS, images)
 """
\ No newline at end of file
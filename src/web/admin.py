@@ -0,0 +1,41 @@
+"""
+Admin Endpoint Access
+=====================
+
+Diagnostic endpoints (/admin/...) are disabled unless CHATBOT_ADMIN_TOKEN
+is set; requests then have to present the token, either as
+'Authorization: Bearer <token>' or in an X-Admin-Token header. Disabled
+endpoints answer 404, so they do not show up in scans.
+"""
+
+import functools
+import hmac
+import os
+
+from flask import jsonify, request
+
+ADMIN_TOKEN = os.getenv('CHATBOT_ADMIN_TOKEN', '')
+
+
+def _presented_token() -> str:
+    authorization = request.headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        return authorization[len('Bearer '):].strip()
+    return request.headers.get('X-Admin-Token', '')
+
+
+def is_admin() -> bool:
+    """Whether the current request presents the configured admin token"""
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(_presented_token().encode(), ADMIN_TOKEN.encode())
+
+
+def admin_required(view):
+    """Flask view decorator: 404 without a configured token, 403 on a wrong one"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({'status': 'error', 'error': 'not found'}), 404
+        if not is_admin():
+            return jsonify({'status': 'error', 'error': 'forbidden'}), 403
+        return view(*args, **kwargs)
+    return wrapper
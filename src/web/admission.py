@@ -0,0 +1,235 @@
+"""
+Admission Control
+=================
+
+Protects /api/chat from overload. A request has to pass, in order:
+- query limits: length in characters and number of terms
+- a per-client token bucket (429 with Retry-After when empty)
+- a bounded in-flight limit with a short wait queue (503 with
+  Retry-After when the queue is full or the wait times out)
+
+Admitted requests get a Deadline that started when they arrived, so time
+spent queueing counts against the request timeout. Limits are per
+process; under a pre-fork server every worker has its own.
+
+Settings can be overridden with environment variables, e.g.
+CHATBOT_MAX_IN_FLIGHT=8 or CHATBOT_RATE_LIMIT=2.
+
+Clients are told apart by their address. X-Forwarded-For is only used
+when the app runs behind CHATBOT_TRUSTED_PROXIES reverse proxies (each
+appending the address it got the request from); otherwise a client
+could send a made-up address with every request and never run out of
+tokens.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from src.core.deadline import Deadline
+
+
+class Rejected(Exception):
+    """Request turned away before doing any work"""
+
+    def __init__(self, status: int, reason: str, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+        self.message = message
+        self.retry_after = retry_after
+
+    def headers(self) -> Dict[str, str]:
+        if self.retry_after is None:
+            return {}
+        return {'Retry-After': str(max(1, math.ceil(self.retry_after)))}
+
+
+class TokenBucketLimiter:
+    """Per-client token buckets; the least recently seen clients are evicted"""
+
+    def __init__(self, rate: float = 2.0, burst: float = 10.0, max_clients: int = 10000):
+        self.rate = rate  # Tokens added per second
+        self.burst = burst  # Bucket size
+        self.max_clients = max_clients
+        self._buckets: 'OrderedDict[str, list]' = OrderedDict()  # client -> [tokens, last update]
+        self._lock = threading.Lock()
+
+    def acquire(self, client_id: str) -> float:
+        """Take one token; returns 0 on success, else seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.pop(client_id, None)
+            if bucket is None:
+                bucket = [self.burst, now]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            self._buckets[client_id] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return 0.0
+            return (1.0 - bucket[0]) / self.rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def _env(name: str, default, cast=float):
+    value = os.getenv(name)
+    return cast(value) if value not in (None, '') else default
+
+
+def trusted_proxies() -> int:
+    """Number of reverse proxies in front of the app (CHATBOT_TRUSTED_PROXIES, default 0)"""
+    return _env('CHATBOT_TRUSTED_PROXIES', 0, int)
+
+
+def client_address(peer: Optional[str], forwarded_for: Optional[str], proxies: int) -> str:
+    """Address the outermost trusted proxy got the request from, else the peer's
+
+    The same rule as werkzeug's ProxyFix(x_for=proxies): with no trusted
+    proxies, or fewer forwarded hops than proxies, the header is ignored.
+    """
+    if proxies > 0 and forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(',')]
+        if len(hops) >= proxies and hops[-proxies]:
+            return hops[-proxies]
+    return peer or 'unknown'
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight: int = 8, max_queue: int = 16, queue_timeout: float = 0.5,
+                 rate: float = 2.0, burst: float = 10.0, max_query_chars: int = 1000,
+                 max_query_terms: int = 64, request_timeout: float = 10.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout  # Longest wait for a free slot
+        self.max_query_chars = max_query_chars
+        self.max_query_terms = max_query_terms
+        self.request_timeout = request_timeout
+        self.limiter = TokenBucketLimiter(rate=rate, burst=burst)
+
+        self._condition = threading.Condition()
+        self.in_flight = 0
+        self.queued = 0
+        self.counters = {
+            'admitted': 0,
+            'completed': 0,
+            'rejected_query': 0,
+            'rate_limited': 0,
+            'shed_queue_full': 0,
+            'shed_queue_timeout': 0,
+            'deadline_exceeded': 0
+        }
+
+    @classmethod
+    def from_env(cls, max_in_flight: int = 8) -> 'AdmissionController':
+        return cls(
+            max_in_flight=_env('CHATBOT_MAX_IN_FLIGHT', max_in_flight, int),
+            max_queue=_env('CHATBOT_MAX_QUEUE', 16, int),
+            queue_timeout=_env('CHATBOT_QUEUE_TIMEOUT', 0.5),
+            rate=_env('CHATBOT_RATE_LIMIT', 2.0),
+            burst=_env('CHATBOT_RATE_BURST', 10.0),
+            max_query_chars=_env('CHATBOT_MAX_QUERY_CHARS', 1000, int),
+            max_query_terms=_env('CHATBOT_MAX_QUERY_TERMS', 64, int),
+            request_timeout=_env('CHATBOT_REQUEST_TIMEOUT', 10.0)
+        )
+
+    def _count(self, counter: str):
+        with self._condition:
+            self.counters[counter] += 1
+
+    def check_query(self, query: str):
+        """Reject queries that are too long to search cheaply"""
+        if len(query) > self.max_query_chars or len(query.split()) > self.max_query_terms:
+            self._count('rejected_query')
+            raise Rejected(
+                413, 'query_too_long',
+                f"Please shorten your question to at most {self.max_query_terms} words "
+                f"and {self.max_query_chars} characters."
+            )
+
+    def record_deadline_exceeded(self):
+        self._count('deadline_exceeded')
+
+    def _precheck(self, client_id: str, query: str) -> Deadline:
+        """Query limits and rate limit; returns the request Deadline"""
+        deadline = Deadline(self.request_timeout)
+        self.check_query(query)
+
+        retry_after = self.limiter.acquire(client_id)
+        if retry_after:
+            self._count('rate_limited')
+            raise Rejected(429, 'rate_limited',
+                           "You are sending messages too quickly. Please wait a moment.", retry_after)
+        return deadline
+
+    def _overloaded(self, counter: str) -> Rejected:
+        self.counters[counter] += 1
+        return Rejected(503, 'overloaded', "The chatbot is busy right now. Please try again shortly.", 1)
+
+    @contextmanager
+    def admit(self, client_id: str, query: str):
+        """Hold an in-flight slot for the duration of the block; yields the request Deadline"""
+        deadline = self._precheck(client_id, query)
+        deadline.mark('queue')
+
+        with self._condition:
+            if self.in_flight >= self.max_in_flight:
+                if self.queued >= self.max_queue:
+                    raise self._overloaded('shed_queue_full')
+                self.queued += 1
+                try:
+                    got_slot = self._condition.wait_for(
+                        lambda: self.in_flight < self.max_in_flight,
+                        timeout=min(self.queue_timeout, deadline.remaining())
+                    )
+                finally:
+                    self.queued -= 1
+                if not got_slot:
+                    raise self._overloaded('shed_queue_timeout')
+            self.in_flight += 1
+            self.counters['admitted'] += 1
+        # Response cache lookup and waiting on a coalesced request, until retrieval starts
+        deadline.mark('lookup')
+
+        try:
+            yield deadline
+        finally:
+            self.release()
+
+    def try_admit(self, client_id: str, query: str) -> Deadline:
+        """Non-blocking admission for event-loop servers (no wait queue); call release() after"""
+        deadline = self._precheck(client_id, query)
+        with self._condition:
+            if self.in_flight >= self.max_in_flight:
+                raise self._overloaded('shed_queue_full')
+            self.in_flight += 1
+            self.counters['admitted'] += 1
+        deadline.mark('lookup')
+        return deadline
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self.counters['completed'] += 1
+            self._condition.notify()
+
+    def metrics(self) -> Dict:
+        with self._condition:
+            return dict(
+                self.counters,
+                in_flight=self.in_flight,
+                queue_depth=self.queued,
+                max_in_flight=self.max_in_flight,
+                max_queue=self.max_queue,
+                tracked_clients=len(self.limiter)
+            )
@@ -0,0 +1,280 @@
+"""
+ASGI Entry Point
+================
+
+Serves /api/chat, /api/starters and /api/status from one event loop
+using ChatbotEngine.achat: retrieval runs on an executor thread and LLM
+calls are awaited, so a waiting chat costs a coroutine instead of a
+thread. Written against the bare ASGI interface, without a framework:
+
+    pip install uvicorn
+    uvicorn src.web.asgi_app:app
+
+Admission control is non-blocking here: query limits and per-client
+rate limits as in the Flask app, and an in-flight cap sized for
+coroutines (CHATBOT_MAX_IN_FLIGHT, default 2000) beyond which requests
+are shed with 503 instead of queued. Request bodies are capped at
+CHATBOT_MAX_BODY_BYTES (413 beyond), and clients are told apart as in
+the Flask app: X-Forwarded-For only counts behind trusted proxies.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from typing import Dict, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from src.core.chatbot_engine import ChatbotEngine
+from src.core.deadline import DeadlineExceeded
+from src.core.memory_report import process_memory
+from src.core.prewarm import AnswerPrewarmer
+from src.core.readiness import Readiness
+from src.core.structured_logging import configure_logging, get_logger, new_request_id, request_id_var
+from src.web.admission import AdmissionController, Rejected, client_address, trusted_proxies
+
+FALLBACK_STARTERS = [
+    "What is Real Estate IoT and what do you do?",
+    "What IoT solutions do you offer for buildings?",
+    "What career opportunities are available?",
+    "How can I contact Real Estate IoT?"
+]
+
+admission = AdmissionController.from_env(max_in_flight=2000)
+TRUSTED_PROXIES = trusted_proxies()
+MAX_BODY_BYTES = int(os.getenv('CHATBOT_MAX_BODY_BYTES', '65536'))
+chatbot: Optional[ChatbotEngine] = None
+readiness = Readiness(['engine', 'index', 'primary_store', 'warm_up', 'precompute'])
+prewarmer: Optional[AnswerPrewarmer] = None
+_init_lock: Optional[asyncio.Lock] = None
+
+
+configure_logging()
+logger = get_logger('asgi')
+ACCESS_LOG_SAMPLE = float(os.getenv('CHATBOT_ACCESS_LOG_SAMPLE', '1.0'))
+
+
+def create_engine() -> ChatbotEngine:
+    """Build the engine one readiness phase at a time, as init_chatbot in web_interface.py
+
+    The engine is published once its word-overlap index is loaded, so chats
+    are answered while the primary store loads.
+    """
+    global chatbot, prewarmer
+    with readiness.phase('engine'):
+        openai_key = os.getenv('OPENAI_API_KEY')
+        engine = ChatbotEngine(
+            openai_api_key=openai_key,
+            use_openai_embeddings=False,
+            model_name="gpt-3.5-turbo" if openai_key else "free",
+            generation_mode=os.getenv('CHATBOT_GENERATION_MODE', 'template'),
+            llm_slo=float(os.getenv('CHATBOT_LLM_SLO', '2.0')),
+            load=False
+        )
+
+    with readiness.phase('index'):
+        engine.load_index()
+        engine.vector_store.freeze()
+        chatbot = engine
+        readiness.ready('index', **engine.vector_store.index_stats())
+
+    with readiness.phase('primary_store'):
+        engine.load_primary_store()
+        readiness.ready('primary_store', type=type(engine.primary_store).__name__)
+
+    with readiness.phase('warm_up'):
+        engine.warm_up()
+
+    with readiness.phase('precompute'):
+        warmer = AnswerPrewarmer(engine, engine.get_conversation_starter(), query_log=os.getenv('CHATBOT_QUERY_LOG'),
+                                 top_n=int(os.getenv('CHATBOT_PREWARM_TOP', '50')))
+        result = warmer.run()
+        prewarmer = warmer
+        readiness.ready('precompute', queries=result['queries'], computed=result['computed'])
+    return engine
+
+
+async def get_engine() -> Optional[ChatbotEngine]:
+    """Build the engine once, off the event loop"""
+    global chatbot, _init_lock
+    if chatbot is None:
+        if _init_lock is None:
+            _init_lock = asyncio.Lock()
+        async with _init_lock:
+            if chatbot is None:
+                try:
+                    chatbot = await asyncio.get_running_loop().run_in_executor(None, create_engine)
+                    print("Chatbot initialized successfully")
+                except Exception as e:
+                    print(f"Error initializing chatbot: {e}")
+    return chatbot
+
+
+async def _read_body(receive, limit: int) -> Optional[bytes]:
+    """The request body, or None as soon as it is longer than limit bytes"""
+    body = bytearray()
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if len(body) > limit:
+            return None
+        if not message.get('more_body'):
+            return bytes(body)
+
+
+async def _send_json(send, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None):
+    body = json.dumps(payload, default=str).encode('utf-8')
+    raw_headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.lower().encode('latin-1'), value.encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def _client_id(scope) -> str:
+    """Client address for rate limiting (as forwarded by trusted proxies)"""
+    client = scope.get('client')
+    forwarded = [value.decode('latin-1') for name, value in scope.get('headers', []) if name == b'x-forwarded-for']
+    return client_address(client[0] if client else None, ','.join(forwarded), TRUSTED_PROXIES)
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get('headers', []):
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def _log_chat(status: int, deadline=None, **fields):
+    if deadline is not None:
+        fields['timings_ms'] = {stage: round(ms, 2) for stage, ms in deadline.timings().items()}
+    logger.info("chat", extra=dict(fields, event='chat.request', status=status, sample=ACCESS_LOG_SAMPLE))
+
+
+async def chat_api(scope, receive, send):
+    """Chat API endpoint"""
+    # Each request runs in its own task, so the context variable is per request
+    request_id = new_request_id(_header(scope, b'x-request-id'))
+    request_id_var.set(request_id)
+    declared = _header(scope, b'content-length')
+    if declared and declared.isdigit() and int(declared) > MAX_BODY_BYTES:
+        body = None
+    else:
+        body = await _read_body(receive, MAX_BODY_BYTES)
+    if body is None:
+        await _send_json(send, 413, {'response': 'Your message is too long.', 'status': 'error',
+                                     'reason': 'body_too_large'})
+        return
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        data = {}
+    if not isinstance(data, dict):
+        await _send_json(send, 400, {'response': 'Expected a JSON object.', 'status': 'error'})
+        return
+    query = str(data.get('message', '')).strip()
+    if not query:
+        await _send_json(send, 400, {'response': 'Please enter a message.', 'status': 'error'})
+        return
+
+    engine = await get_engine()
+    if not engine:
+        await _send_json(send, 200, {
+            'response': 'I apologize, but the chatbot service is currently initializing. Please try again in a moment.',
+            'status': 'error'
+        })
+        return
+
+    try:
+        deadline = admission.try_admit(_client_id(scope), query)
+    except Rejected as e:
+        _log_chat(e.status, reason=e.reason)
+        await _send_json(send, e.status, {'response': e.message, 'status': 'error', 'reason': e.reason},
+                         dict(e.headers(), **{'X-Request-Id': request_id}))
+        return
+
+    try:
+        response = await engine.achat(query, include_sources=True, deadline=deadline)
+    except DeadlineExceeded as e:
+        admission.record_deadline_exceeded()
+        _log_chat(503, deadline, reason='deadline_exceeded', stage=e.stage)
+        await _send_json(send, 503, {
+            'response': 'I apologize, but answering took too long. Please try again.',
+            'status': 'error',
+            'reason': 'deadline_exceeded'
+        }, {'Retry-After': '1', 'X-Request-Id': request_id})
+        return
+    except Exception as e:
+        logger.error("Chat API error: %s", e, extra={'event': 'chat_api.error'})
+        await _send_json(send, 500, {
+            'response': 'I apologize, but I encountered an error. Please try again.',
+            'status': 'error',
+            'error': str(e)
+        })
+        return
+    finally:
+        admission.release()
+
+    # Precomputed answers are redone in the background when the index version changed
+    if prewarmer:
+        prewarmer.maybe_refresh()
+
+    if 'response' not in response:
+        response['response'] = "I apologize, but I couldn't generate a proper response. Please try again."
+    _log_chat(200, deadline, tier=response.get('tier'), cached=response.get('cached', False),
+              answer_status=response.get('status'))
+    await _send_json(send, 200, response, {'Server-Timing': deadline.server_timing(), 'X-Request-Id': request_id})
+
+
+async def get_starters(scope, receive, send):
+    """Get conversation starters"""
+    engine = await get_engine()
+    starters = engine.get_conversation_starter() if engine else FALLBACK_STARTERS
+    await _send_json(send, 200, {'starters': starters})
+
+
+async def get_status(scope, receive, send):
+    """Get chatbot status, with the same per-component readiness as the Flask app"""
+    engine = chatbot
+    await _send_json(send, 200, {
+        'status': readiness.status(serving=engine is not None),
+        'readiness': readiness.snapshot(),
+        'model': engine.model_name if engine else 'not initialized',
+        'vector_store_loaded': bool(engine and engine.vector_store),
+        'index': engine.vector_store.index_stats() if engine else None,
+        'in_flight': admission.in_flight,
+        'memory': process_memory()
+    })
+
+
+ROUTES = {
+    ('POST', '/api/chat'): chat_api,
+    ('GET', '/api/starters'): get_starters,
+    ('GET', '/api/status'): get_status
+}
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await get_engine()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI application"""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    handler = ROUTES.get((scope['method'], scope['path']))
+    if handler is None:
+        await _send_json(send, 404, {'error': 'Not found'})
+        return
+    await handler(scope, receive, send)
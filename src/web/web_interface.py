@@ -1,34 +1,189 @@
-from flask import Flask, render_template, request, jsonify, render_template_string
+from flask import Flask, Response, g, render_template, request, jsonify, render_template_string
+from werkzeug.middleware.proxy_fix import ProxyFix
 import sys
 import os
+import threading
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
-from src.core.chatbot_engine import ChatbotEngine
+from src.core.memory_report import process_memory, memory_breakdown
+from src.core.allocation_tracker import AllocationTracker, GROUP_BY
+from src.core.profiling import MODES as PROFILE_MODES, RequestProfiler, export as export_profile
+from src.core.structured_logging import (configure_logging, get_logger, logging_stats,
+                                         new_request_id, request_id_var)
+from src.core.deadline import DeadlineExceeded
+from src.core.readiness import Readiness
+from src.core.prewarm import AnswerPrewarmer
+from src.web.admission import AdmissionController, Rejected, trusted_proxies
+from src.web.admin import admin_required, is_admin
 import json
 
 # Set template folder path
 template_dir = os.path.join(os.path.dirname(__file__), 'templates')
 app = Flask(__name__, template_folder=template_dir)
 
-# Initialize chatbot
+# Behind CHATBOT_TRUSTED_PROXIES reverse proxies, remote_addr is the client
+# address they forwarded; without any, X-Forwarded-For is ignored
+if trusted_proxies():
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies())
+
+# JSON log lines written by a background thread; one chat.request record
+# per chat (sampled with CHATBOT_ACCESS_LOG_SAMPLE, queries only with
+# CHATBOT_LOG_QUERIES=1)
+configure_logging()
+logger = get_logger('web')
+ACCESS_LOG_SAMPLE = float(os.getenv('CHATBOT_ACCESS_LOG_SAMPLE', '1.0'))
+LOG_QUERIES = os.getenv('CHATBOT_LOG_QUERIES') == '1'
+
+# Initialize chatbot (in phases on a background thread, see init_chatbot)
 chatbot = None
+readiness = Readiness(['engine', 'index', 'primary_store', 'warm_up', 'precompute'])
+prewarmer = None
+_init_thread = None
+_init_lock = threading.Lock()
+
+# Buttons of the inline fallback page; index.html shows the engine's starters
+FALLBACK_PAGE_STARTERS = [
+    "What IoT solutions does GaoTech offer?",
+    "Tell me about smart building technologies",
+    "How can GaoTech help with property management?"
+]
+
+# How long a chat request waits for the search index before it gets a fallback answer
+INIT_WAIT = float(os.getenv('CHATBOT_INIT_WAIT', '1.0'))
+
+WARMING_UP_ANSWER = (
+    "Thanks for your question! I'm still loading the GaoTech knowledge base. In short, "
+    "GaoTech provides Real Estate IoT solutions and smart building technologies: smart sensors, "
+    "automated systems, energy management and property management solutions. "
+    "Please ask again in a few seconds for a detailed answer."
+)
+
+# In-flight limit, wait queue, per-client rate limits and request deadlines
+admission = AdmissionController.from_env()
+
+# tracemalloc, started by /admin/tracemalloc/start or at import with
+# CHATBOT_TRACEMALLOC=<frames per allocation>
+allocations = AllocationTracker()
+if os.getenv('CHATBOT_TRACEMALLOC'):
+    allocations.start(int(os.getenv('CHATBOT_TRACEMALLOC')))
+
+# Request profiles: asked for with an X-Profile header (admins only), for all
+# requests via /admin/profiling, or automatically past CHATBOT_PROFILE_SLOW_MS
+profiler = RequestProfiler.from_env()
+
+def client_id() -> str:
+    """Client address for rate limiting (as forwarded by trusted proxies, see ProxyFix above)"""
+    return request.remote_addr or 'unknown'
 
 def init_chatbot():
-    """Initialize the chatbot engine"""
-    global chatbot
+    """Initialize the chatbot engine, one readiness phase at a time
+    
+    The engine is published as soon as its word-overlap index is loaded, so
+    chats are answered (from the cheap retriever) while the primary store
+    loads; the warm-up then pays the one-time costs before real queries do.
+    """
+    global chatbot, prewarmer
     
     try:
-        # Get OpenAI API key from environment variable if available
-        openai_key = os.getenv('OPENAI_API_KEY')
-        
-        chatbot = ChatbotEngine(
-            openai_api_key=openai_key,
-            use_openai_embeddings=False,  # Use free embeddings by default
-            model_name="gpt-3.5-turbo" if openai_key else "free"
-        )
+        with readiness.phase('engine'):
+            from src.core.chatbot_engine import ChatbotEngine
+            
+            # Get OpenAI API key from environment variable if available
+            openai_key = os.getenv('OPENAI_API_KEY')
+            
+            engine = ChatbotEngine(
+                openai_api_key=openai_key,
+                use_openai_embeddings=False,  # Use free embeddings by default
+                model_name="gpt-3.5-turbo" if openai_key else "free",
+                vector_store_type=os.getenv('CHATBOT_VECTOR_STORE', 'simple'),
+                generation_mode=os.getenv('CHATBOT_GENERATION_MODE', 'template'),
+                llm_slo=float(os.getenv('CHATBOT_LLM_SLO', '2.0')),
+                profiler=profiler,
+                load=False
+            )
+            # Requests waiting for admission count as load
+            engine.degradation.queue_depth_source = lambda: admission.queued
+        
+        with readiness.phase('index'):
+            engine.load_index()
+            # Flat read-only index: shared copy-on-write by pre-forked workers
+            engine.vector_store.freeze()
+            chatbot = engine
+            readiness.ready('index', **engine.vector_store.index_stats())
+        
+        with readiness.phase('primary_store'):
+            engine.load_primary_store()
+            readiness.ready('primary_store', type=type(engine.primary_store).__name__)
+        
+        with readiness.phase('warm_up'):
+            engine.warm_up()
+        
+        # Starter questions and the most frequent logged queries are answered
+        # now and pinned in the response cache
+        with readiness.phase('precompute'):
+            warmer = AnswerPrewarmer(
+                engine,
+                engine.get_conversation_starter() + FALLBACK_PAGE_STARTERS,
+                query_log=os.getenv('CHATBOT_QUERY_LOG'),
+                top_n=int(os.getenv('CHATBOT_PREWARM_TOP', '50'))
+            )
+            result = warmer.run()
+            prewarmer = warmer
+            readiness.ready('precompute', queries=result['queries'], computed=result['computed'])
         print("Chatbot initialized successfully")
     except Exception as e:
         print(f"Error initializing chatbot: {e}")
-        chatbot = None
+
+def start_init() -> threading.Thread:
+    """Start init_chatbot on a background thread (once)"""
+    global _init_thread
+    with _init_lock:
+        if _init_thread is None:
+            _init_thread = threading.Thread(target=init_chatbot, name='chatbot-init', daemon=True)
+            _init_thread.start()
+    return _init_thread
+
+def wait_for_init(timeout: float = None):
+    """Block until initialization has finished (pre-fork servers call this before forking)"""
+    start_init().join(timeout)
+
+def get_chatbot(wait: float = 0):
+    """The chatbot engine once its index is loaded, else None
+    
+    Never blocks longer than `wait` seconds, so health checks and fallback
+    answers are served while the engine is still loading.
+    """
+    if chatbot is None and wait > 0:
+        readiness.wait('index', timeout=wait)
+    return chatbot
+
+def warming_up_response() -> dict:
+    """Cheap answer for chats that arrive before the index is loaded"""
+    return {
+        'response': WARMING_UP_ANSWER,
+        'model': 'fallback',
+        'status': 'success',
+        'tier': 'warming_up',
+        'readiness': readiness.snapshot()['components']
+    }
+
+@app.before_request
+def assign_request_id():
+    g.request_id = new_request_id(request.headers.get('X-Request-Id'))
+    request_id_var.set(g.request_id)
+
+@app.after_request
+def add_request_id(response):
+    if 'request_id' in g:
+        response.headers['X-Request-Id'] = g.request_id
+    return response
+
+def log_chat(query: str, status: int, deadline=None, **fields):
+    """The chat.request access record, with the stage timings when there are any"""
+    if deadline is not None:
+        fields['timings_ms'] = {stage: round(ms, 2) for stage, ms in deadline.timings().items()}
+    if LOG_QUERIES:
+        fields['query'] = query
+    logger.info("chat", extra=dict(fields, event='chat.request', status=status, sample=ACCESS_LOG_SAMPLE))
 
 @app.route('/')
 def index():
@@ -36,7 +191,7 @@ def index():
     try:
         return render_template('index.html')
     except Exception as e:
-        print(f"Template error: {e}")
+        logger.warning("Template error: %s", e, extra={'event': 'template.error'})
         # Fallback to inline HTML
         return render_template_string("""
 <!DOCTYPE html>
@@ -136,14 +291,42 @@ def chat_api():
             }), 400
         
         # Check if chatbot is initialized
+        chatbot = get_chatbot(wait=INIT_WAIT)
         if not chatbot:
-            return jsonify({
-                'response': 'I apologize, but the chatbot service is currently initializing. Please try again in a moment.',
-                'status': 'error'
-            })
+            if readiness.failed():
+                return jsonify({
+                    'response': 'I apologize, but the chatbot service failed to start. Please try again later.',
+                    'status': 'error'
+                }), 503
+            return jsonify(warming_up_response())
+        
+        profile = request.headers.get('X-Profile')
+        if profile and (profile not in PROFILE_MODES or not is_admin()):
+            profile = None
         
         # Get response from chatbot
-        response = chatbot.chat(query, include_sources=True)
+        try:
+            with admission.admit(client_id(), query) as deadline:
+                response = chatbot.chat(query, include_sources=True, deadline=deadline, profile=profile)
+        except Rejected as e:
+            log_chat(query, e.status, reason=e.reason)
+            return jsonify({
+                'response': e.message,
+                'status': 'error',
+                'reason': e.reason
+            }), e.status, e.headers()
+        except DeadlineExceeded as e:
+            admission.record_deadline_exceeded()
+            log_chat(query, 503, deadline, reason='deadline_exceeded', stage=e.stage)
+            return jsonify({
+                'response': 'I apologize, but answering took too long. Please try again.',
+                'status': 'error',
+                'reason': 'deadline_exceeded'
+            }), 503, {'Retry-After': '1'}
+        
+        # Precomputed answers are redone in the background when the index version changed
+        if prewarmer:
+            prewarmer.maybe_refresh()
         
         # Ensure response has the right format
         if 'answer' in response and 'response' not in response:
@@ -153,10 +336,15 @@ def chat_api():
         if 'response' not in response:
             response['response'] = "I apologize, but I couldn't generate a proper response. Please try again."
         
-        return jsonify(response)
+        log_chat(query, 200, deadline, tier=response.get('tier'), cached=response.get('cached', False),
+                 answer_status=response.get('status'))
+        headers = {'Server-Timing': deadline.server_timing()}
+        if 'profile_id' in response:
+            headers['X-Profile-Id'] = str(response['profile_id'])
+        return jsonify(response), 200, headers
         
     except Exception as e:
-        print(f"Chat API error: {e}")
+        logger.error("Chat API error: %s", e, extra={'event': 'chat_api.error'})
         return jsonify({
             'response': 'I apologize, but I encountered an error. Please try again.',
             'status': 'error',
@@ -169,6 +357,7 @@ def debug_chat():
     try:
         data = request.get_json()
         query = data.get('message', 'test')
+        chatbot = get_chatbot()
         
         debug_info = {
             'chatbot_initialized': chatbot is not None,
@@ -200,6 +389,7 @@ def debug_chat():
 def get_starters():
     """Get conversation starters"""
     try:
+        chatbot = get_chatbot()
         if chatbot:
             starters = chatbot.get_conversation_starter()
             return jsonify({'starters': starters})
@@ -215,14 +405,127 @@ def get_starters():
     except Exception as e:
         return jsonify({'error': str(e), 'starters': []}), 500
 
+@app.route('/api/metrics')
+def get_metrics():
+    """Admission control, degradation, cache, coalescing, navigation and generation counters"""
+    metrics = {'admission': admission.metrics(), 'logging': logging_stats()}
+    if chatbot:
+        metrics['degradation'] = chatbot.degradation.stats()
+        metrics['response_cache'] = chatbot.response_cache.stats()
+        metrics['coalescing'] = chatbot.single_flight.stats()
+        metrics['navigation'] = chatbot.navigation.stats()
+        metrics['prewarm'] = prewarmer.stats() if prewarmer else None
+        metrics['generation'] = dict(chatbot.generation_stats, mode=chatbot.generation_mode,
+                                     circuit_breaker=chatbot.circuit_breaker.stats())
+    return jsonify(metrics)
+
+@app.route('/admin/memory')
+@admin_required
+def admin_memory():
+    """Process memory and the estimated size of each engine component"""
+    if not chatbot:
+        return jsonify({'process': process_memory(), 'components': {}, 'readiness': readiness.snapshot()})
+    return jsonify(memory_breakdown(chatbot))
+
+@app.route('/admin/tracemalloc')
+@admin_required
+def admin_tracemalloc_status():
+    return jsonify(allocations.status())
+
+@app.route('/admin/tracemalloc/start', methods=['POST'])
+@admin_required
+def admin_tracemalloc_start():
+    data = request.get_json(silent=True) or {}
+    allocations.start(int(data.get('frames', 1)))
+    return jsonify(allocations.status())
+
+@app.route('/admin/tracemalloc/stop', methods=['POST'])
+@admin_required
+def admin_tracemalloc_stop():
+    allocations.stop()
+    return jsonify(allocations.status())
+
+def _allocation_args():
+    group_by = request.args.get('group_by', 'lineno')
+    if group_by not in GROUP_BY:
+        raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+    return group_by, int(request.args.get('limit', 20))
+
+@app.route('/admin/tracemalloc/snapshot', methods=['POST'])
+@admin_required
+def admin_tracemalloc_snapshot():
+    """Keep a snapshot (id in the response) and show its largest allocation sites"""
+    try:
+        group_by, limit = _allocation_args()
+        data = request.get_json(silent=True) or {}
+        snapshot_id = allocations.snapshot(str(data.get('label', '')))
+        return jsonify({'id': snapshot_id, 'top': allocations.top(snapshot_id, group_by, limit)})
+    except (RuntimeError, ValueError) as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+
+@app.route('/admin/tracemalloc/diff')
+@admin_required
+def admin_tracemalloc_diff():
+    """Growth per allocation site from snapshot ?from= to snapshot ?to= (default: now)"""
+    try:
+        group_by, limit = _allocation_args()
+        from_id = int(request.args['from'])
+        to_id = int(request.args['to']) if request.args.get('to') else None
+        return jsonify({'from': from_id, 'to': to_id or 'now',
+                        'diff': allocations.diff(from_id, to_id, group_by, limit)})
+    except KeyError as e:
+        return jsonify({'status': 'error', 'error': f"missing or unknown snapshot: {e}"}), 404
+    except (RuntimeError, ValueError) as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+
+@app.route('/admin/profiling', methods=['GET', 'POST'])
+@admin_required
+def admin_profiling():
+    """Profiler settings; POST {"mode": "cprofile"|"sample"|null, "slow_ms": number|null}"""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        slow_ms = data.get('slow_ms')
+        try:
+            profiler.configure(data.get('mode'), float(slow_ms) / 1000 if slow_ms is not None else None)
+        except ValueError as e:
+            return jsonify({'status': 'error', 'error': str(e)}), 400
+    return jsonify(profiler.status())
+
+@app.route('/admin/profiles')
+@admin_required
+def admin_profiles():
+    return jsonify({'profiles': profiler.list()})
+
+@app.route('/admin/profiles/<int:profile_id>')
+@admin_required
+def admin_profile_download(profile_id):
+    """?format=pstats (cprofile), collapsed (sample) or text"""
+    profile = profiler.get(profile_id)
+    if profile is None:
+        return jsonify({'status': 'error', 'error': f"no profile {profile_id}"}), 404
+    fmt = request.args.get('format', 'pstats' if profile['kind'] == 'cprofile' else 'collapsed')
+    try:
+        body = export_profile(profile, fmt)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+    if fmt == 'pstats':
+        return Response(body, mimetype='application/octet-stream', headers={
+            'Content-Disposition': f'attachment; filename=profile-{profile_id}.pstats'
+        })
+    return Response(body, mimetype='text/plain')
+
 @app.route('/api/status')
 def get_status():
     """Get chatbot status"""
     try:
+        chatbot = get_chatbot()
         return jsonify({
-            'status': 'ready' if chatbot else 'error',
+            'status': readiness.status(serving=chatbot is not None),
+            'readiness': readiness.snapshot(),
             'model': chatbot.model_name if chatbot else 'not initialized',
-            'vector_store_loaded': bool(chatbot and hasattr(chatbot, 'vector_store') and chatbot.vector_store)
+            'vector_store_loaded': bool(chatbot and hasattr(chatbot, 'vector_store') and chatbot.vector_store),
+            'index': chatbot.vector_store.index_stats() if chatbot else None,
+            'memory': process_memory()
         })
     except Exception as e:
         return jsonify({
@@ -232,14 +535,14 @@ def get_status():
             'vector_store_loaded': False
         })
 
-# Initialize chatbot when module is imported (for gunicorn)
 try:
     os.makedirs('templates', exist_ok=True)
     os.makedirs('static', exist_ok=True)
 except:
     pass
 
-init_chatbot()
+# Load in the background so the app answers health checks right away
+start_init()
 
 if __name__ == '__main__':
     print("Starting Real Estate IoT Chatbot Web Interface...")
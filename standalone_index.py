@@ -4,21 +4,44 @@ Standalone GaoTech Chatbot
 =========================
 
 Self-contained version with all functionality in one file.
+
+Built for serverless cold starts: importing the module only defines the
+app, and the chatbot is created by the first request that needs it. Its
+search index is read from data/standalone_index.bin, prebuilt by
+
+    python src/data_processing/build_pipeline.py --stages standalone_index
+
+and is only rebuilt from DEFAULT_CHUNKS when that file is missing or was
+built from different content.
 """
 
-from flask import Flask, render_template_string, request, jsonify
+from flask import Flask, request, jsonify
 import os
 import re
+import struct
+import sys
+import threading
+from array import array
 from collections import Counter
 import json
+import hashlib
 
 app = Flask(__name__)
 
+INDEX_ARTIFACT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'standalone_index.bin')
+
+
+def chunks_digest(chunks):
+    """Identifies the content an index artifact was built from"""
+    return hashlib.sha256(json.dumps(chunks, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
 # Simple vector store class
 class SimpleVectorStore:
     def __init__(self):
         self.chunks = []
         self.processed_chunks = []
+        self.vocab = None  # Set when a prebuilt index is loaded
         
     def preprocess_text(self, text):
         text = re.sub(r'[^a-zA-Z0-9\s]', ' ', text.lower())
@@ -39,6 +62,7 @@ class SimpleVectorStore:
     def add_chunks(self, chunks):
         self.chunks = chunks
         self.processed_chunks = []
+        self.vocab = None
         
         for chunk in chunks:
             processed_text = self.preprocess_text(chunk.get('content', ''))
@@ -47,13 +71,87 @@ class SimpleVectorStore:
                 'original': chunk
             })
     
+    def load_artifact(self, path, source_digest):
+        """Load a prebuilt index (src/core/flat_index.py format); False if missing or stale"""
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return False
+        if data[:8] != b'FLATIDX2':
+            return False
+        header_length, = struct.unpack('<I', data[8:12])
+        header = json.loads(data[12:12 + header_length].decode('utf-8'))
+        if header['source_digest'] != source_digest or header['byteorder'] != sys.byteorder:
+            return False
+        
+        position = 12 + header_length
+        for name, typecode, itemsize, length in header['arrays']:
+            values = array(typecode)
+            if values.itemsize != itemsize:
+                return False
+            values.frombytes(data[position:position + itemsize * length])
+            setattr(self, name, values)
+            position += itemsize * length
+        
+        # The chunks follow as a columnar chunk store (src/core/chunk_store.py)
+        if data[position:position + 8] != b'CHUNKST1':
+            return False
+        store_header_length, = struct.unpack('<I', data[position + 8:position + 12])
+        position += 12
+        store_header = json.loads(data[position:position + store_header_length].decode('utf-8'))
+        position += store_header_length
+        for name, typecode, itemsize, length in store_header['arrays']:
+            if name in ('text_offsets', 'source_ids'):
+                values = array(typecode)
+                if values.itemsize != itemsize:
+                    return False
+                values.frombytes(data[position:position + itemsize * length])
+                setattr(self, name, values)
+            position += itemsize * length
+        self.texts = data[position:position + store_header['text_bytes']]
+        self.sources = store_header['sources']
+        self.vocab = {word: term_id for term_id, word in enumerate(header['vocab'])}
+        self.chunks = []
+        self.processed_chunks = []
+        return True
+    
+    def _search_artifact(self, query_words, top_k):
+        """Same scores as the word-by-word comparison, from the postings of the query words"""
+        query_counter = Counter(query_words)
+        overlap = {}
+        for word, query_count in query_counter.items():
+            term_id = self.vocab.get(word)
+            if term_id is None:
+                continue
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            for idx, count in zip(self.postings[start:end], self.term_freqs[start:end]):
+                overlap[idx] = overlap.get(idx, 0) + min(query_count, count)
+        
+        similarities = sorted(
+            ((shared / (len(query_words) + self.chunk_lengths[idx] - shared), idx)
+             for idx, shared in overlap.items()),
+            reverse=True
+        )
+        results = []
+        for similarity, idx in similarities[:top_k]:
+            start, end = self.text_offsets[idx], self.text_offsets[idx + 1]
+            results.append({
+                'content': self.texts[start:end].decode('utf-8'),
+                'source': dict(self.sources[self.source_ids[idx]]),
+                'similarity': similarity
+            })
+        return results
+    
     def search(self, query, top_k=5):
-        if not self.processed_chunks:
+        if self.vocab is None and not self.processed_chunks:
             return []
         
         query_words = self.preprocess_text(query)
         if not query_words:
             return []
+        if self.vocab is not None:
+            return self._search_artifact(query_words, top_k)
         
         similarities = []
         for i, processed_chunk in enumerate(self.processed_chunks):
@@ -71,46 +169,81 @@ class SimpleVectorStore:
         
         return results
 
+# Knowledge base searched by the chatbot
+DEFAULT_CHUNKS = [
+    {
+        "content": "GaoTech is a leading provider of Real Estate IoT solutions and smart building technologies. We specialize in transforming traditional buildings into intelligent, connected spaces.",
+        "source": {"title": "About GaoTech", "url": "https://gaotech.com/about"}
+    },
+    {
+        "content": "GaoTech's comprehensive IoT solutions transform buildings into intelligent, connected environments. Our offerings include: Smart Environmental Sensors for real-time monitoring of temperature, humidity, air quality, and occupancy levels; Automated Lighting Systems with motion detection, daylight harvesting, and energy-efficient LED controls; Intelligent HVAC Control featuring zone-based climate management, predictive scheduling, and energy optimization; Advanced Security Monitoring with smart cameras, access control, intrusion detection, and mobile alerts; Energy Management Systems providing detailed consumption analytics, peak demand management, and automated load balancing; Water Management Solutions including leak detection, usage monitoring, and conservation automation. All systems integrate seamlessly through our centralized IoT platform, providing building owners with complete visibility and control while reducing operational costs by up to 35%.",
+        "source": {"title": "IoT Solutions", "url": "https://gaotech.com/iot-solutions"}
+    },
+    {
+        "content": "GaoTech's smart building technologies create intelligent, responsive environments that adapt to occupant needs while maximizing efficiency. Our comprehensive smart building solutions include: Automated Lighting Control with occupancy sensors, daylight harvesting, and circadian rhythm optimization; Intelligent HVAC Systems featuring predictive climate control, zone-based management, and air quality monitoring; Energy Optimization through real-time consumption tracking, demand response automation, and renewable energy integration; Advanced Security Integration combining access control, video surveillance, intrusion detection, and emergency response systems; Real-time Monitoring Dashboards providing building managers with comprehensive insights into all building systems; Space Utilization Analytics to optimize office layouts and resource allocation; Predictive Maintenance Systems that identify potential issues before they become costly problems. Our smart building platform integrates all these technologies into a unified ecosystem, typically resulting in 25-40% energy savings and significantly improved occupant comfort and productivity.",
+        "source": {"title": "Smart Buildings", "url": "https://gaotech.com/smart-buildings"}
+    },
+    {
+        "content": "GaoTech provides comprehensive real estate technology services designed to revolutionize property management. Our services include: Advanced Property Management Systems that streamline operations and automate routine tasks; Tenant Engagement Platforms featuring mobile apps, digital communication tools, and service request portals; Maintenance Automation with predictive maintenance scheduling, work order management, and vendor coordination; Building Performance Analytics offering real-time dashboards, energy usage reports, and operational insights; Smart Building Integration connecting all systems for centralized control; and 24/7 Technical Support ensuring your systems run smoothly. Our solutions are designed to increase operational efficiency by up to 40% while improving tenant satisfaction and reducing costs.",
+        "source": {"title": "Property Management Services", "url": "https://gaotech.com/services"}
+    },
+    {
+        "content": "GaoTech's energy management solutions help reduce building operating costs by up to 30% through intelligent monitoring, automated controls, and predictive maintenance.",
+        "source": {"title": "Energy Management", "url": "https://gaotech.com/energy"}
+    },
+    {
+        "content": "Our property management platform integrates with existing building systems to provide centralized control, automated reporting, and enhanced tenant experiences.",
+        "source": {"title": "Property Management", "url": "https://gaotech.com/property-management"}
+    },
+    {
+        "content": "Contact GaoTech for more information about our smart building solutions and IoT implementations. We offer free consultations and custom solution design.",
+        "source": {"title": "Contact", "url": "https://gaotech.com/contact"}
+    }
+]
+
+
+# Conversation starters (the first four are the buttons on the page)
+STARTERS = [
+    "What IoT solutions does GaoTech offer?",
+    "Tell me about smart building technologies",
+    "How can GaoTech help with energy management?",
+    "What property management services do you provide?",
+    "How much can I save with GaoTech solutions?",
+    "How do I get started with GaoTech?"
+]
+
+
+def normalize_query(query):
+    """Case, punctuation and whitespace insensitive form of a query"""
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', query.lower()).split())
+
+
 # Simple chatbot engine
 class SimpleChatbotEngine:
     def __init__(self):
         self.vector_store = SimpleVectorStore()
         self._load_default_content()
+        # Starter buttons make up most clicks: answer them once, up front
+        self.starter_answers = {}
+        for starter in STARTERS:
+            self.starter_answers[normalize_query(starter)] = self._answer(starter)
         
     def _load_default_content(self):
-        default_chunks = [
-            {
-                "content": "GaoTech is a leading provider of Real Estate IoT solutions and smart building technologies. We specialize in transforming traditional buildings into intelligent, connected spaces.",
-                "source": {"title": "About GaoTech", "url": "https://gaotech.com/about"}
-            },
-            {
-                "content": "GaoTech's comprehensive IoT solutions transform buildings into intelligent, connected environments. Our offerings include: Smart Environmental Sensors for real-time monitoring of temperature, humidity, air quality, and occupancy levels; Automated Lighting Systems with motion detection, daylight harvesting, and energy-efficient LED controls; Intelligent HVAC Control featuring zone-based climate management, predictive scheduling, and energy optimization; Advanced Security Monitoring with smart cameras, access control, intrusion detection, and mobile alerts; Energy Management Systems providing detailed consumption analytics, peak demand management, and automated load balancing; Water Management Solutions including leak detection, usage monitoring, and conservation automation. All systems integrate seamlessly through our centralized IoT platform, providing building owners with complete visibility and control while reducing operational costs by up to 35%.",
-                "source": {"title": "IoT Solutions", "url": "https://gaotech.com/iot-solutions"}
-            },
-            {
-                "content": "GaoTech's smart building technologies create intelligent, responsive environments that adapt to occupant needs while maximizing efficiency. Our comprehensive smart building solutions include: Automated Lighting Control with occupancy sensors, daylight harvesting, and circadian rhythm optimization; Intelligent HVAC Systems featuring predictive climate control, zone-based management, and air quality monitoring; Energy Optimization through real-time consumption tracking, demand response automation, and renewable energy integration; Advanced Security Integration combining access control, video surveillance, intrusion detection, and emergency response systems; Real-time Monitoring Dashboards providing building managers with comprehensive insights into all building systems; Space Utilization Analytics to optimize office layouts and resource allocation; Predictive Maintenance Systems that identify potential issues before they become costly problems. Our smart building platform integrates all these technologies into a unified ecosystem, typically resulting in 25-40% energy savings and significantly improved occupant comfort and productivity.",
-                "source": {"title": "Smart Buildings", "url": "https://gaotech.com/smart-buildings"}
-            },
-            {
-                "content": "GaoTech provides comprehensive real estate technology services designed to revolutionize property management. Our services include: Advanced Property Management Systems that streamline operations and automate routine tasks; Tenant Engagement Platforms featuring mobile apps, digital communication tools, and service request portals; Maintenance Automation with predictive maintenance scheduling, work order management, and vendor coordination; Building Performance Analytics offering real-time dashboards, energy usage reports, and operational insights; Smart Building Integration connecting all systems for centralized control; and 24/7 Technical Support ensuring your systems run smoothly. Our solutions are designed to increase operational efficiency by up to 40% while improving tenant satisfaction and reducing costs.",
-                "source": {"title": "Property Management Services", "url": "https://gaotech.com/services"}
-            },
-            {
-                "content": "GaoTech's energy management solutions help reduce building operating costs by up to 30% through intelligent monitoring, automated controls, and predictive maintenance.",
-                "source": {"title": "Energy Management", "url": "https://gaotech.com/energy"}
-            },
-            {
-                "content": "Our property management platform integrates with existing building systems to provide centralized control, automated reporting, and enhanced tenant experiences.",
-                "source": {"title": "Property Management", "url": "https://gaotech.com/property-management"}
-            },
-            {
-                "content": "Contact GaoTech for more information about our smart building solutions and IoT implementations. We offer free consultations and custom solution design.",
-                "source": {"title": "Contact", "url": "https://gaotech.com/contact"}
-            }
-        ]
-        self.vector_store.add_chunks(default_chunks)
+        if os.getenv('CHATBOT_INDEX_ARTIFACT', '1') != '0' and \
+                self.vector_store.load_artifact(INDEX_ARTIFACT, chunks_digest(DEFAULT_CHUNKS)):
+            return
+        self.vector_store.add_chunks(DEFAULT_CHUNKS)
     
     def chat(self, query, include_sources=True):
+        result = self.starter_answers.get(normalize_query(query))
+        if result is None:
+            result = self._answer(query)
+        result = dict(result)
+        if not include_sources:
+            result.pop('sources', None)
+        return result
+    
+    def _answer(self, query):
         try:
             # Get relevant context
             context_chunks = self.vector_store.search(query, top_k=3)
@@ -130,15 +263,11 @@ class SimpleChatbotEngine:
                 elif 'how' in query_lower:
                     response += " Our expert team will work with you to design and implement the perfect solution for your building."
                 
-                result = {
+                return {
                     'response': response,
-                    'status': 'success'
+                    'status': 'success',
+                    'sources': [chunk['source'] for chunk in context_chunks[:2]]
                 }
-                
-                if include_sources:
-                    result['sources'] = [chunk['source'] for chunk in context_chunks[:2]]
-                
-                return result
             else:
                 # Fallback response
                 return {
@@ -153,8 +282,17 @@ class SimpleChatbotEngine:
                 'error': str(e)
             }
 
-# Initialize chatbot
-chatbot = SimpleChatbotEngine()
+# Initialize chatbot (on first use, so importing the module stays cheap)
+chatbot = None
+_chatbot_lock = threading.Lock()
+
+def get_chatbot():
+    global chatbot
+    if chatbot is None:
+        with _chatbot_lock:
+            if chatbot is None:
+                chatbot = SimpleChatbotEngine()
+    return chatbot
 
 # HTML template
 HTML_TEMPLATE = """
@@ -378,7 +516,8 @@ HTML_TEMPLATE = """
 @app.route('/')
 def home():
     """Main chat interface"""
-    return render_template_string(HTML_TEMPLATE)
+    # The page has no template variables, so it is served as is
+    return HTML_TEMPLATE
 
 @app.route('/api/chat', methods=['POST'])
 def chat_api():
@@ -394,7 +533,7 @@ def chat_api():
             }), 400
         
         # Get response from chatbot
-        response = chatbot.chat(query, include_sources=True)
+        response = get_chatbot().chat(query, include_sources=True)
         return jsonify(response)
         
     except Exception as e:
@@ -417,16 +556,7 @@ def status():
 @app.route('/api/starters')
 def starters():
     """Conversation starters"""
-    return jsonify({
-        "starters": [
-            "What IoT solutions does GaoTech offer?",
-            "Tell me about smart building technologies",
-            "How can GaoTech help with energy management?",
-            "What property management services do you provide?",
-            "How much can I save with GaoTech solutions?",
-            "How do I get started with GaoTech?"
-        ]
-    })
+    return jsonify({"starters": STARTERS})
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
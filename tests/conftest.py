@@ -0,0 +1,49 @@
+"""Fixtures shared by the test modules"""
+
+import time
+
+import pytest
+
+
+class FakeClock:
+    """Stand-in for a module's `time`: monotonic() returns `now`, which only the test advances"""
+
+    def __init__(self, monkeypatch):
+        self.now = 1000.0
+        self._monkeypatch = monkeypatch
+
+    def monotonic(self):
+        return self.now
+
+    def install(self, *modules) -> 'FakeClock':
+        """Replace `time` in the given modules for the duration of the test"""
+        for module in modules:
+            self._monkeypatch.setattr(module, 'time', self)
+        return self
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A FakeClock; modules read it once it is installed, e.g. clock.install(admission)"""
+    return FakeClock(monkeypatch)
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def wait_until():
+    """Poll until predicate() is true, failing the test after `timeout` seconds"""
+    return _wait_until
+
+
+@pytest.fixture(scope='module')
+def web():
+    """The Flask app module, once its engine is initialized"""
+    from src.web import web_interface
+    web_interface.wait_for_init(60)
+    return web_interface
@@ -0,0 +1,171 @@
+import threading
+import time
+
+import pytest
+
+from src.web import admission
+from src.web.admission import AdmissionController, Rejected, TokenBucketLimiter, client_address
+
+
+@pytest.fixture
+def clock(clock):
+    return clock.install(admission)
+
+
+def test_token_bucket_refills_at_the_rate(clock):
+    limiter = TokenBucketLimiter(rate=2.0, burst=3.0)
+    assert [limiter.acquire('a') for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire('a') == pytest.approx(0.5)
+    assert limiter.acquire('b') == 0.0  # Buckets are per client
+
+    clock.now += 0.25
+    assert limiter.acquire('a') == pytest.approx(0.25)
+    clock.now += 0.25
+    assert limiter.acquire('a') == 0.0
+
+    # Refills stop at the burst size
+    clock.now += 60
+    assert [limiter.acquire('a') for _ in range(4)][-1] > 0
+
+
+def test_token_bucket_evicts_least_recently_seen_clients(clock):
+    limiter = TokenBucketLimiter(rate=1.0, burst=1.0, max_clients=2)
+    limiter.acquire('a')
+    limiter.acquire('b')
+    limiter.acquire('a')  # 'a' is now the most recent
+    limiter.acquire('c')
+    assert len(limiter) == 2
+    assert limiter.acquire('b') == 0.0  # Forgotten, so it starts with a full bucket
+    assert limiter.acquire('c') > 0
+
+
+def test_query_limits():
+    controller = AdmissionController(max_query_chars=20, max_query_terms=3)
+    controller.check_query('short question')
+    for query in ('one two three four', 'x' * 21):
+        with pytest.raises(Rejected) as rejected:
+            controller.check_query(query)
+        assert rejected.value.status == 413 and rejected.value.reason == 'query_too_long'
+    assert controller.counters['rejected_query'] == 2
+
+
+def test_rate_limited_requests_get_retry_after(clock):
+    controller = AdmissionController(rate=0.5, burst=1)
+    with controller.admit('client', 'hello'):
+        pass
+    with pytest.raises(Rejected) as rejected:
+        with controller.admit('client', 'hello'):
+            pass
+    assert rejected.value.status == 429
+    assert rejected.value.headers() == {'Retry-After': '2'}
+    assert controller.metrics()['rate_limited'] == 1
+    assert controller.metrics()['in_flight'] == 0
+
+
+def hold_slot(controller, client, entered, release):
+    with controller.admit(client, 'query'):
+        entered.set()
+        release.wait(5)
+
+
+def test_queue_waits_for_a_slot_and_sheds_when_full(wait_until):
+    controller = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=5, burst=100)
+    entered, release = threading.Event(), threading.Event()
+    holder = threading.Thread(target=hold_slot, args=(controller, 'a', entered, release))
+    holder.start()
+    entered.wait(5)
+
+    queued_entered = threading.Event()
+    queued = threading.Thread(target=hold_slot, args=(controller, 'b', queued_entered, release))
+    queued.start()
+    wait_until(lambda: controller.metrics()['queue_depth'] == 1)
+
+    with pytest.raises(Rejected) as rejected:
+        with controller.admit('c', 'query'):
+            pass
+    assert rejected.value.status == 503 and rejected.value.retry_after == 1
+    assert controller.counters['shed_queue_full'] == 1
+
+    release.set()
+    assert queued_entered.wait(5)  # The queued request got the freed slot
+    holder.join(5)
+    queued.join(5)
+    metrics = controller.metrics()
+    assert (metrics['admitted'], metrics['completed'], metrics['in_flight'], metrics['queue_depth']) == (2, 2, 0, 0)
+
+
+def test_queue_wait_is_bounded_by_timeout_and_deadline():
+    for settings in ({'queue_timeout': 0.05}, {'queue_timeout': 10, 'request_timeout': 0.05}):
+        controller = AdmissionController(max_in_flight=1, burst=100, **settings)
+        entered, release = threading.Event(), threading.Event()
+        holder = threading.Thread(target=hold_slot, args=(controller, 'a', entered, release))
+        holder.start()
+        entered.wait(5)
+
+        started = time.monotonic()
+        with pytest.raises(Rejected) as rejected:
+            with controller.admit('b', 'query'):
+                pass
+        assert rejected.value.status == 503
+        assert time.monotonic() - started < 1
+        assert controller.counters['shed_queue_timeout'] == 1
+        release.set()
+        holder.join(5)
+
+
+def test_admitted_deadline_started_on_arrival():
+    controller = AdmissionController(request_timeout=10)
+    with controller.admit('a', 'query') as deadline:
+        assert [stage for stage, _ in deadline.marks] == ['queue', 'lookup']
+        assert 9 < deadline.remaining() <= 10
+
+
+def test_try_admit_never_queues():
+    controller = AdmissionController(max_in_flight=1, burst=100)
+    controller.try_admit('a', 'query')
+    with pytest.raises(Rejected) as rejected:
+        controller.try_admit('b', 'query')
+    assert rejected.value.status == 503
+    controller.release()
+    controller.try_admit('b', 'query')
+    assert controller.metrics()['in_flight'] == 1
+
+
+def test_client_address_trusts_only_configured_proxies():
+    assert client_address('10.0.0.1', '1.2.3.4', 0) == '10.0.0.1'
+    assert client_address('10.0.0.1', 'spoofed, 1.2.3.4', 1) == '1.2.3.4'
+    assert client_address('10.0.0.1', 'spoofed, 1.2.3.4, 10.0.0.2', 2) == '1.2.3.4'
+    assert client_address('10.0.0.1', '1.2.3.4', 2) == '10.0.0.1'  # Fewer hops than proxies
+    assert client_address(None, None, 1) == 'unknown'
+
+
+def test_settings_from_environment(monkeypatch):
+    monkeypatch.setenv('CHATBOT_MAX_IN_FLIGHT', '3')
+    monkeypatch.setenv('CHATBOT_RATE_LIMIT', '0.5')
+    monkeypatch.setenv('CHATBOT_TRUSTED_PROXIES', '2')
+    controller = AdmissionController.from_env()
+    assert controller.max_in_flight == 3 and controller.limiter.rate == 0.5
+    assert admission.trusted_proxies() == 2
+
+
+def chat_statuses(web, forwarded_for):
+    client = web.app.test_client()
+    return [
+        client.post('/api/chat', json={'message': 'What is IoT?'},
+                    headers={'X-Forwarded-For': address}, environ_base={'REMOTE_ADDR': '10.0.0.1'}).status_code
+        for address in forwarded_for
+    ]
+
+
+def test_flask_app_ignores_forwarded_for_without_trusted_proxies(web, monkeypatch):
+    monkeypatch.setattr(web, 'admission', AdmissionController(rate=0.001, burst=2))
+    # A client making up a new address per request still shares one bucket
+    assert chat_statuses(web, ['1.1.1.1', '2.2.2.2', '3.3.3.3']) == [200, 200, 429]
+
+
+def test_flask_app_behind_a_trusted_proxy(web, monkeypatch):
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    monkeypatch.setattr(web, 'admission', AdmissionController(rate=0.001, burst=1))
+    # What the app installs when CHATBOT_TRUSTED_PROXIES=1
+    monkeypatch.setattr(web.app, 'wsgi_app', ProxyFix(web.app.wsgi_app, x_for=1))
+    assert chat_statuses(web, ['1.1.1.1', '2.2.2.2', '2.2.2.2']) == [200, 200, 429]
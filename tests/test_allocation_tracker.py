@@ -0,0 +1,73 @@
+import tracemalloc
+
+import pytest
+
+from src.core.allocation_tracker import AllocationTracker
+
+
+@pytest.fixture
+def tracker():
+    tracker = AllocationTracker(max_snapshots=2)
+    tracker.start(frames=2)
+    yield tracker
+    tracker.stop()
+
+
+def allocate():
+    return [bytearray(1024) for _ in range(2000)]
+
+
+def test_snapshot_diff_cycle(tracker):
+    first = tracker.snapshot('before')
+    kept = allocate()
+    second = tracker.snapshot('after')
+
+    grown = tracker.diff(first, second, limit=5)
+    assert grown[0]['location'][0].startswith(__file__)
+    assert grown[0]['size_diff_kb'] >= 2000
+    assert grown[0]['count_diff'] >= 2000
+
+    top = tracker.top(second, limit=3)
+    assert top[0]['location'][0].startswith(__file__)
+    assert 'size_diff_kb' not in top[0]
+    assert len(tracker.top(second, group_by='traceback', limit=1)[0]['location']) == 2
+
+    # Against a fresh snapshot once the memory is released
+    del kept
+    assert tracker.diff(second, limit=1)[0]['size_diff_kb'] <= -2000
+
+
+def test_only_the_last_snapshots_are_kept(tracker):
+    ids = [tracker.snapshot(f"s{i}") for i in range(3)]
+    status = tracker.status()
+    assert status['tracing'] and status['frames'] == 2
+    assert [(s['id'], s['label']) for s in status['snapshots']] == [(ids[1], 's1'), (ids[2], 's2')]
+    with pytest.raises(KeyError):
+        tracker.diff(ids[0])
+
+
+def test_stop_drops_the_snapshots():
+    tracker = AllocationTracker()
+    tracker.start()
+    tracker.snapshot()
+    tracker.stop()
+    assert not tracemalloc.is_tracing()
+    status = tracker.status()
+    assert (status['tracing'], status['snapshots'], status['traced_mb']) == (False, [], 0)
+    for call in (tracker.snapshot, tracker.top, lambda: tracker.top(1), lambda: tracker.diff(1)):
+        with pytest.raises(RuntimeError, match='not tracing'):
+            call()
+
+
+def test_kept_snapshots_need_tracing_too():
+    tracker = AllocationTracker()
+    tracker.start()
+    snapshot_id = tracker.snapshot()
+    tracemalloc.stop()  # Stopped behind the tracker's back: the snapshot is still kept
+    try:
+        with pytest.raises(RuntimeError, match='not tracing'):
+            tracker.top(snapshot_id)
+        with pytest.raises(RuntimeError, match='not tracing'):
+            tracker.diff(snapshot_id, snapshot_id)
+    finally:
+        tracker.stop()
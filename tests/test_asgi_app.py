@@ -0,0 +1,138 @@
+import asyncio
+import json
+
+from src.core.readiness import Readiness
+from src.web import asgi_app
+
+
+def get(path):
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi_app.app({'type': 'http', 'method': 'GET', 'path': path, 'headers': []}, receive, send))
+    return json.loads(sent[1]['body'])
+
+
+def call(body_parts, headers=()):
+    """POST /api/chat with the body split into ASGI messages; returns (status, payload)"""
+    scope = {'type': 'http', 'method': 'POST', 'path': '/api/chat', 'client': ('10.0.0.1', 5000),
+             'headers': [(name.encode(), value.encode()) for name, value in headers]}
+    messages = [{'type': 'http.request', 'body': part, 'more_body': i < len(body_parts) - 1}
+                for i, part in enumerate(body_parts)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi_app.app(scope, receive, send))
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+
+def test_non_object_json_is_rejected():
+    for body in (b'[1, 2]', b'"hello"', b'null', b'42'):
+        assert call([body]) == (400, {'response': 'Expected a JSON object.', 'status': 'error'})
+    assert call([b'{"message": "  "}'])[0] == 400
+
+
+def test_body_size_cap(monkeypatch):
+    monkeypatch.setattr(asgi_app, 'MAX_BODY_BYTES', 32)
+    message = json.dumps({'message': 'x' * 40}).encode()
+
+    # Declared too long: rejected before reading the body
+    status, payload = call([message], headers=[('content-length', str(len(message)))])
+    assert status == 413 and payload['reason'] == 'body_too_large'
+
+    # Streamed without a length: rejected once the limit is passed
+    assert call([message[:20], message[20:], b'never read'])[0] == 413
+
+
+def test_client_id_uses_forwarded_for_only_behind_trusted_proxies(monkeypatch):
+    scope = {'client': ('10.0.0.1', 5000),
+             'headers': [(b'x-forwarded-for', b'6.6.6.6, 1.2.3.4'), (b'x-forwarded-for', b'10.0.0.2')]}
+    monkeypatch.setattr(asgi_app, 'TRUSTED_PROXIES', 0)
+    assert asgi_app._client_id(scope) == '10.0.0.1'
+    monkeypatch.setattr(asgi_app, 'TRUSTED_PROXIES', 2)
+    assert asgi_app._client_id(scope) == '1.2.3.4'
+
+
+def test_chat_checks_the_prewarmer_for_a_new_index_version(monkeypatch):
+    class Engine:
+        async def achat(self, query, include_sources=True, deadline=None):
+            return {'response': f"answer to {query}", 'status': 'success'}
+
+    class Prewarmer:
+        checks = 0
+
+        def maybe_refresh(self):
+            self.checks += 1
+            return False
+
+    prewarmer = Prewarmer()
+    monkeypatch.setattr(asgi_app, 'chatbot', Engine())
+    monkeypatch.setattr(asgi_app, 'prewarmer', prewarmer)
+    status, payload = call([b'{"message": "hvac"}'])
+    assert (status, payload['response']) == (200, 'answer to hvac')
+    assert prewarmer.checks == 1
+
+
+def test_create_engine_keeps_the_prewarmer(monkeypatch):
+    monkeypatch.setattr(asgi_app, 'prewarmer', None)
+    monkeypatch.setattr(asgi_app, 'chatbot', None)
+    monkeypatch.setattr(asgi_app, 'readiness', Readiness(list(asgi_app.readiness.components)))
+    engine = asgi_app.create_engine()
+    assert asgi_app.chatbot is engine and asgi_app.readiness.is_ready()
+    assert asgi_app.prewarmer.engine is engine
+    assert asgi_app.prewarmer.index_version == engine.index_version
+
+
+class Engine:
+    class vector_store:
+        @staticmethod
+        def index_stats():
+            return {'chunks': 3, 'frozen': True}
+
+    model_name = 'free'
+
+
+def loading(*done):
+    """Readiness with the `done` phases ready and the next one loading"""
+    readiness = Readiness(['engine', 'index', 'primary_store', 'warm_up', 'precompute'])
+    for name in done:
+        readiness.start(name)
+        readiness.ready(name, **(Engine.vector_store.index_stats() if name == 'index' else {}))
+    readiness.start(list(readiness.components)[len(done)])
+    return readiness
+
+
+def without_timings(status):
+    status['readiness'].pop('uptime_seconds')
+    for component in status['readiness']['components'].values():
+        component.pop('seconds', None)
+    return status
+
+
+def test_status_endpoints_report_the_same_readiness_during_init(web, monkeypatch):
+    for readiness, engine, expected in [(loading(), None, 'initializing'),
+                                        (loading('engine', 'index'), Engine(), 'warming_up')]:
+        for module in (asgi_app, web):
+            monkeypatch.setattr(module, 'readiness', readiness)
+            monkeypatch.setattr(module, 'chatbot', engine)
+        asgi_status = without_timings(get('/api/status'))
+        flask_status = without_timings(web.app.test_client().get('/api/status').get_json())
+        assert asgi_status['status'] == flask_status['status'] == expected
+        assert asgi_status['readiness'] == flask_status['readiness']
+        for name in ('model', 'vector_store_loaded', 'index'):
+            assert asgi_status[name] == flask_status[name]
+
+    components = asgi_status['readiness']['components']
+    assert components['index'] == {'state': 'ready', 'chunks': 3, 'frozen': True}
+    assert components['primary_store'] == {'state': 'loading'}
+    assert components['precompute'] == {'state': 'pending'}
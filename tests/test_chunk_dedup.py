@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+from src.data_processing import chunk_dedup
+from src.data_processing.chunk_dedup import ChunkDeduplicator
+
+
+def words(count, seed):
+    rng = random.Random(seed)
+    return [f'w{rng.randrange(100000)}' for _ in range(count)]
+
+
+def chunk(text, url, chunk_id=None):
+    result = {'text': text, 'source': {'url': url}}
+    if chunk_id is not None:
+        result['global_chunk_id'] = chunk_id
+    return result
+
+
+def test_signature_agreement_estimates_jaccard():
+    dedup = ChunkDeduplicator(num_perm=256, bands=32)
+    shared = set(range(600))
+    first, second = shared | set(range(1000, 1200)), shared | set(range(2000, 2200))
+    jaccard = len(first & second) / len(first | second)
+    agreement = sum(a == b for a, b in zip(dedup.signature(first), dedup.signature(second))) / 256
+    assert abs(agreement - jaccard) < 0.1
+
+
+def test_numpy_and_python_signatures_match(monkeypatch):
+    if not chunk_dedup.NUMPY_AVAILABLE:
+        pytest.skip("numpy not installed")
+    dedup = ChunkDeduplicator()
+    shingles = dedup.shingles(' '.join(words(50, seed=1)))
+    with_numpy = dedup.signature(shingles)
+    monkeypatch.setattr(chunk_dedup, 'NUMPY_AVAILABLE', False)
+    assert dedup.signature(shingles) == with_numpy
+
+
+def test_near_duplicates_merge_and_distinct_chunks_stay():
+    text = words(100, seed=2)
+    edited = list(text)
+    edited[50] = 'changed'
+    chunks = [
+        chunk(' '.join(text), 'https://example.com/a/', 0),
+        chunk(' '.join(words(100, seed=3)), 'https://example.com/b/', 1),
+        chunk(' '.join(edited), 'https://example.com/c/', 2),
+    ]
+    dedup = ChunkDeduplicator(threshold=0.8)
+    kept = dedup.deduplicate(chunks)
+    assert [c['global_chunk_id'] for c in kept] == [0, 1]
+    assert kept[0]['source_urls'] == ['https://example.com/a/', 'https://example.com/c/']
+    assert kept[0]['duplicate_chunk_ids'] == [2]
+    assert 'source_urls' not in kept[1]
+
+    report = dedup.report()
+    assert report['input_chunks'] == 3 and report['output_chunks'] == 2 and report['merged_chunks'] == 1
+    assert report['chunk_reduction_pct'] == 33.3
+
+
+def test_threshold_decides_partial_overlaps():
+    # Two 100-word chunks sharing their first 70 words: Jaccard about 0.5
+    shared = words(70, seed=4)
+    first = ' '.join(shared + words(30, seed=5))
+    second = ' '.join(shared + words(30, seed=6))
+    loose = ChunkDeduplicator(threshold=0.4, use_containment=False)
+    strict = ChunkDeduplicator(threshold=0.8, use_containment=False)
+    assert len(loose.deduplicate([chunk(first, 'a'), chunk(second, 'b')])) == 1
+    assert len(strict.deduplicate([chunk(first, 'a'), chunk(second, 'b')])) == 2
+
+
+def test_containment_merges_a_chunk_quoted_inside_another():
+    # Three quarters of the page: Jaccard about 0.75 (so LSH still finds the
+    # pair), containment 1.0
+    page = words(100, seed=7)
+    quote = ' '.join(page[10:85])
+    chunks = [chunk(' '.join(page), 'page'), chunk(quote, 'quote')]
+    assert len(ChunkDeduplicator(threshold=0.8).deduplicate([dict(c) for c in chunks])) == 1
+    assert len(ChunkDeduplicator(threshold=0.8, use_containment=False).deduplicate(chunks)) == 2
+
+
+def test_deduplicate_resets_between_corpora():
+    dedup = ChunkDeduplicator()
+    text = ' '.join(words(40, seed=8))
+    assert len(dedup.deduplicate([chunk(text, 'a')])) == 1
+    assert len(dedup.deduplicate([chunk(text, 'b')])) == 1
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        ChunkDeduplicator(num_perm=100, bands=32)
+
+
+def test_heading_chunks_are_never_merged():
+    headings = ' '.join(words(30, seed=9))
+    chunks = [chunk(headings, 'https://example.com/a/', 0), chunk(headings, 'https://example.com/b/', 1)]
+    for c in chunks:
+        c['source']['content_type'] = 'headings'
+    kept = ChunkDeduplicator(threshold=0.8).deduplicate(chunks)
+    assert [c['global_chunk_id'] for c in kept] == [0, 1]
+    assert all('source_urls' not in c for c in kept)
@@ -0,0 +1,62 @@
+import pytest
+
+from src.core.chunk_store import ChunkStore
+
+SOURCE = {'url': 'https://example.com/a/', 'title': 'Page A'}
+CHUNKS = [
+    {'text': 'First chunk', 'word_count': 2, 'source': SOURCE, 'chunk_id': 0, 'global_chunk_id': 0},
+    {'text': 'Zweiter Abschnitt – über IoT', 'word_count': 4, 'source': dict(SOURCE), 'chunk_id': 1,
+     'global_chunk_id': 1, 'source_urls': ['https://example.com/a/', 'https://example.com/b/']},
+    {'content': 'Old schema chunk', 'source': {'url': 'https://example.com/c/'}},
+]
+
+
+def test_get_returns_chunks_in_the_normalized_schema():
+    store = ChunkStore.from_chunks(CHUNKS)
+    assert len(store) == 3
+    assert store.get(0) == CHUNKS[0]
+    assert store.get(1) == CHUNKS[1]
+    assert store.get(2) == {'text': 'Old schema chunk', 'source': {'url': 'https://example.com/c/'}}
+    assert list(store.texts()) == ['First chunk', 'Zweiter Abschnitt – über IoT', 'Old schema chunk']
+
+
+def test_identical_sources_are_stored_once():
+    store = ChunkStore.from_chunks(CHUNKS)
+    assert store.stats()['sources'] == 2
+    assert store[0].source is store[1].source
+    # get() copies, so callers cannot change the shared record
+    store.get(0)['source']['title'] = 'changed'
+    assert store[1].source['title'] == 'Page A'
+
+
+def test_views():
+    store = ChunkStore.from_chunks(CHUNKS)
+    view = store[-1]
+    assert view.index == 2
+    assert view.chunk_id is None and view.global_chunk_id is None
+    assert view.word_count == 3  # Counted from the text when not given
+    assert [v.text for v in store] == list(store.texts())
+    assert view.to_dict() == store.get(2)
+    with pytest.raises(IndexError):
+        store[3]
+
+
+def test_dumps_loads_round_trip_at_an_offset():
+    store = ChunkStore.from_chunks(CHUNKS)
+    data = b'prefix' + store.dumps() + b'suffix'
+    loaded, end = ChunkStore.loads(data, len(b'prefix'))
+    assert data[end:] == b'suffix'
+    assert loaded.to_list() == store.to_list()
+
+    # Appending after a load still shares equal sources
+    loaded.append({'text': 'More', 'source': dict(SOURCE)})
+    assert loaded.stats()['sources'] == 2
+    with pytest.raises(ValueError):
+        ChunkStore.loads(b'not a store')
+
+
+def test_save_load_file(tmp_path):
+    store = ChunkStore.from_chunks(CHUNKS)
+    path = str(tmp_path / 'chunks.bin')
+    store.save(path)
+    assert ChunkStore.load(path).to_list() == store.to_list()
@@ -0,0 +1,79 @@
+import pytest
+
+from src.core import circuit_breaker
+from src.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+@pytest.fixture
+def clock(clock):
+    return clock.install(circuit_breaker)
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # Resets the count: failures must be consecutive
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow() and not breaker.allow()
+    assert breaker.stats() == {'successes': 1, 'failures': 5, 'skipped': 2, 'opened': 1,
+                               'state': OPEN, 'consecutive_failures': 3}
+
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 29.9
+    assert not breaker.allow()
+
+    clock.now += 0.1
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # Only one probe at a time
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens_for_a_full_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=10)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+
+    breaker.record_failure()  # One failure is enough while half open
+    assert breaker.state == OPEN
+    clock.now += 9
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+    assert breaker.stats()['opened'] == 2
+
+
+def test_failures_while_open_count_as_one_opening(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    breaker.record_failure()  # A call that was already in flight fails too
+    assert breaker.stats()['opened'] == 1
+
+
+def test_llm_mode_falls_back_to_the_template_when_the_client_raises():
+    from src.core.chatbot_engine import ChatbotEngine
+
+    def client(prompt, timeout):
+        raise ConnectionError("LLM unreachable")
+
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    engine = ChatbotEngine(generation_mode='llm', llm_client=client, circuit_breaker=breaker)
+    query = 'smart access control'
+    result = engine.chat(query)
+    assert result['response'] == engine.generate_answer_free(query, engine.retrieve_context(query))['response']
+    assert breaker.stats()['failures'] == 1
+    assert engine.generation_stats['template_fallbacks'] == 1
@@ -0,0 +1,134 @@
+import os
+
+from src.data_processing.crawl_frontier import KEY_BYTES, CrawlFrontier, canonicalize_url
+
+
+def test_canonicalize_url():
+    assert canonicalize_url('HTTPS://Example.com:443/careers#jobs') == 'https://example.com/careers/'
+    assert canonicalize_url('http://example.com:8080/a/../b//c') == 'http://example.com:8080/b/c/'
+    assert canonicalize_url('https://example.com/doc.pdf?x=1') == 'https://example.com/doc.pdf'
+    assert canonicalize_url('https://example.com/doc.pdf?x=1', keep_query=True) == 'https://example.com/doc.pdf?x=1'
+    assert canonicalize_url('https://example.com') == 'https://example.com/'
+
+
+def test_add_filters_duplicates_depth_and_size():
+    frontier = CrawlFrontier(max_depth=2, max_size=2)
+    assert frontier.add('https://example.com/a', depth=1)
+    assert not frontier.add('https://EXAMPLE.com/a/#top', depth=1)
+    assert not frontier.add('https://example.com/deep', depth=3)
+    assert frontier.add('https://example.com/b', depth=2)
+    assert not frontier.add('https://example.com/c', depth=1)
+    assert frontier.stats == {'added': 2, 'duplicates': 1, 'too_deep': 1, 'low_priority': 0, 'dropped': 1}
+
+    # A URL dropped for lack of room is not marked seen
+    assert not frontier.is_seen('https://example.com/c')
+    frontier.pop()
+    assert frontier.add('https://example.com/c', depth=1)
+
+
+def test_pop_order_prefers_shallow_and_boosted_pages():
+    frontier = CrawlFrontier(max_priority=2)
+    frontier.add('https://example.com/deep/', depth=2)
+    frontier.add('https://example.com/first/', depth=1)
+    frontier.add('https://example.com/boosted/', depth=2, boost=1.5)
+    frontier.add('https://example.com/second/', depth=1)
+    assert not frontier.add('https://example.com/too-low/', depth=3)
+
+    order = [frontier.pop()[0].rsplit('/', 2)[-2] for _ in range(4)]
+    assert order == ['boosted', 'first', 'second', 'deep']
+    assert frontier.pop() is None
+    assert frontier.stats['low_priority'] == 1
+
+
+def test_checkpoint_round_trip(tmp_path):
+    checkpoint = str(tmp_path / 'crawl.json')
+    frontier = CrawlFrontier(checkpoint_file=checkpoint)
+    for i in range(5):
+        frontier.add(f'https://example.com/{i}/', depth=1)
+    crawled = frontier.pop()
+    frontier.save_checkpoint({'pages_visited': 1})
+
+    resumed = CrawlFrontier(checkpoint_file=checkpoint)
+    assert resumed.load_checkpoint() == {'pages_visited': 1}
+    assert len(resumed) == 4
+    assert resumed.is_seen(crawled[0])
+    assert not resumed.add(crawled[0], depth=1)
+    assert [resumed.pop() for _ in range(4)] == [frontier.pop() for _ in range(4)]
+    assert resumed.stats['added'] == 5
+
+
+def test_checkpoint_appends_only_new_keys(tmp_path):
+    checkpoint = str(tmp_path / 'crawl.json')
+    frontier = CrawlFrontier(checkpoint_file=checkpoint)
+    for i in range(3):
+        frontier.add(f'https://example.com/{i}/')
+    frontier.save_checkpoint()
+    assert os.path.getsize(checkpoint + '.seen') == 3 * KEY_BYTES
+
+    frontier.add('https://example.com/3/')
+    frontier.save_checkpoint()
+    assert os.path.getsize(checkpoint + '.seen') == 4 * KEY_BYTES
+    frontier.save_checkpoint()
+    assert os.path.getsize(checkpoint + '.seen') == 4 * KEY_BYTES
+
+
+def test_resume_ignores_keys_written_after_the_checkpoint(tmp_path):
+    checkpoint = str(tmp_path / 'crawl.json')
+    frontier = CrawlFrontier(checkpoint_file=checkpoint)
+    frontier.add('https://example.com/saved/')
+    frontier.save_checkpoint()
+    # A crash between appending keys and replacing the JSON file
+    frontier.add('https://example.com/lost/')
+    with open(checkpoint + '.seen', 'ab') as f:
+        f.write(b''.join(frontier._unsaved))
+
+    resumed = CrawlFrontier(checkpoint_file=checkpoint)
+    resumed.load_checkpoint()
+    assert resumed.is_seen('https://example.com/saved/')
+    assert not resumed.is_seen('https://example.com/lost/')
+    assert os.path.getsize(checkpoint + '.seen') == KEY_BYTES
+
+    # Later checkpoints keep appending to the truncated file
+    resumed.add('https://example.com/lost/')
+    resumed.save_checkpoint()
+    again = CrawlFrontier(checkpoint_file=checkpoint)
+    again.load_checkpoint()
+    assert again.is_seen('https://example.com/lost/')
+
+
+def test_clear_checkpoint(tmp_path):
+    checkpoint = str(tmp_path / 'crawl.json')
+    frontier = CrawlFrontier(checkpoint_file=checkpoint)
+    frontier.add('https://example.com/')
+    frontier.save_checkpoint()
+    frontier.clear_checkpoint()
+    assert not os.path.exists(checkpoint) and not os.path.exists(checkpoint + '.seen')
+    assert CrawlFrontier(checkpoint_file=checkpoint).load_checkpoint() is None
+
+
+def test_interrupted_crawl_resumes_exactly(tmp_path, monkeypatch):
+    from src.data_processing import website_scraper
+    monkeypatch.setattr(website_scraper.time, 'sleep', lambda seconds: None)
+
+    # 13 pages: the home page links to /0/ .. /11/, and each of those to its neighbours
+    base = 'https://example.com/'
+    links = {base: [f'{base}{i}/' for i in range(12)]}
+    for i in range(12):
+        links[f'{base}{i}/'] = [f'{base}{(i + 1) % 12}/', f'{base}{(i + 5) % 12}/']
+
+    def crawler():
+        scraper = website_scraper.WebsiteScraper(base, max_pages=100, use_sitemap=False,
+                                                 checkpoint_file=str(tmp_path / 'crawl.json'),
+                                                 checkpoint_every=3)
+        scraper.scrape_page = lambda url: {'url': url, 'status': 'success', 'links': links[url]}
+        return scraper
+
+    crawl = crawler().iter_pages()
+    first_run = [next(crawl)['url'] for _ in range(8)]
+    crawl.close()  # Killed after 8 pages; the last checkpoint was at 6
+
+    second_run = [page['url'] for page in crawler().iter_pages()]
+    assert second_run[:6] == first_run[:6]
+    assert sorted(second_run) == sorted(links)
+    assert not os.path.exists(tmp_path / 'crawl.json')
+    assert not os.path.exists(tmp_path / 'crawl.json.pages.jsonl')
@@ -0,0 +1,150 @@
+import json
+import os
+import shutil
+
+from src.data_processing import text_chunker
+from src.data_processing.crawl_state import CrawlStateStore, has_changes, is_up_to_date, load_change_set
+
+PAGE = {'title': 'Home', 'description': 'IoT for buildings', 'content': 'Smart sensors.', 'headings': ['Home']}
+HEADERS = {'ETag': '"v1"', 'Last-Modified': 'Mon, 19 Oct 2026 08:00:00 GMT'}
+
+
+def crawled(state_file, pages, *, not_modified=(), failures=()):
+    """One crawl: (url, content) pages, 304 urls and (url, status) failures"""
+    state = CrawlStateStore(str(state_file))
+    state.load()
+    for url, content in pages:
+        state.record_page(url, HEADERS, content, links=[url + 'next/'])
+    for url in not_modified:
+        state.record_not_modified(url)
+    for url, status in failures:
+        state.record_failure(url, status)
+    return state
+
+
+def test_first_crawl_adds_everything(tmp_path):
+    state = crawled(tmp_path / 'state.json', [('https://a/', PAGE), ('https://b/', PAGE)])
+    change_set = state.change_set()
+    assert change_set['added'] == ['https://a/', 'https://b/']
+    assert change_set['changed'] == change_set['removed'] == change_set['unchanged'] == []
+    assert has_changes(change_set)
+
+
+def test_content_hash_classifies_pages(tmp_path):
+    state_file = tmp_path / 'state.json'
+    crawled(state_file, [('https://a/', PAGE), ('https://b/', PAGE), ('https://c/', PAGE)]).save()
+
+    edited = dict(PAGE, content='New sensors.')
+    state = crawled(state_file, [('https://a/', dict(PAGE, links=['ignored'])), ('https://b/', edited),
+                                 ('https://d/', PAGE)])
+    change_set = state.change_set()
+    assert change_set['unchanged'] == ['https://a/']  # Only the extracted content is hashed
+    assert change_set['changed'] == ['https://b/']
+    assert change_set['added'] == ['https://d/']
+    assert change_set['removed'] == ['https://c/']
+
+
+def test_no_changes(tmp_path):
+    state_file = tmp_path / 'state.json'
+    crawled(state_file, [('https://a/', PAGE)]).save()
+    change_set = crawled(state_file, [], not_modified=['https://a/']).change_set()
+    assert change_set['unchanged'] == ['https://a/']
+    assert not has_changes(change_set)
+    # No change set at all (first run, or written by an older crawler): redo everything
+    assert has_changes(None)
+
+
+def test_conditional_get_state(tmp_path):
+    state_file = tmp_path / 'state.json'
+    state = CrawlStateStore(str(state_file))
+    assert state.conditional_headers('https://a/') == {}
+
+    state.record_page('https://a/', HEADERS, PAGE, links=['https://a/next/'])
+    state.record_page('https://b/', {'ETag': '"only-etag"'}, PAGE)
+    state.save()
+
+    reloaded = CrawlStateStore(str(state_file))
+    assert reloaded.load()
+    assert reloaded.conditional_headers('https://a/') == {
+        'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 19 Oct 2026 08:00:00 GMT'
+    }
+    assert reloaded.conditional_headers('https://b/') == {'If-None-Match': '"only-etag"'}
+    # A 304 keeps the validators and the links found on the last full fetch
+    reloaded.record_not_modified('https://a/')
+    assert reloaded.known_links('https://a/') == ['https://a/next/']
+    assert reloaded.conditional_headers('https://a/')['If-None-Match'] == '"v1"'
+
+
+def test_failures(tmp_path):
+    state_file = tmp_path / 'state.json'
+    crawled(state_file, [('https://a/', PAGE), ('https://b/', PAGE)]).save()
+
+    state = crawled(state_file, [], failures=[('https://a/', 500), ('https://b/', 404)])
+    change_set = state.change_set()
+    assert change_set['failed'] == ['https://a/']
+    assert change_set['removed'] == ['https://b/']  # Gone pages are removed
+    state.save()
+
+    # A transient failure keeps the previous state for the next crawl
+    reloaded = CrawlStateStore(str(state_file))
+    reloaded.load()
+    assert set(reloaded.entries) == {'https://a/'}
+    assert reloaded.conditional_headers('https://a/')['If-None-Match'] == '"v1"'
+
+
+def test_change_set_round_trip(tmp_path):
+    state = crawled(tmp_path / 'state.json', [('https://a/', PAGE)])
+    changes_file = str(tmp_path / 'changes.json')
+    saved = state.save_change_set(changes_file)
+    assert load_change_set(changes_file) == saved
+    assert saved['added'] == ['https://a/']
+
+    assert load_change_set(str(tmp_path / 'missing.json')) is None
+    with open(changes_file, 'w') as f:
+        f.write('{not json')
+    assert load_change_set(changes_file) is None
+
+
+def test_corrupt_state_starts_over(tmp_path):
+    state_file = tmp_path / 'state.json'
+    state_file.write_text('[broken')
+    state = CrawlStateStore(str(state_file))
+    assert not state.load()
+    assert state.entries == {}
+
+    state.record_page('https://a/', HEADERS, PAGE)
+    state.save()
+    with open(state_file) as f:
+        assert list(json.load(f)) == ['https://a/']
+
+
+def test_is_up_to_date(tmp_path):
+    source, output = tmp_path / 'source.json', tmp_path / 'output.json'
+    source.write_text('[]')
+    assert not is_up_to_date(str(output), str(source))
+    output.write_text('[]')
+    os.utime(source, (1000, 1000))
+    os.utime(output, (2000, 2000))
+    assert is_up_to_date(str(output), str(source), str(tmp_path / 'missing.json'))
+    os.utime(source, (3000, 3000))
+    assert not is_up_to_date(str(output), str(source))
+
+
+def test_chunker_redoes_chunks_older_than_the_scraped_content(tmp_path, monkeypatch, capsys):
+    data = tmp_path / 'data'
+    data.mkdir()
+    shutil.copy(os.path.join(os.path.dirname(__file__), '..', 'data', 'scraped_content.json'), data)
+    (data / 'crawl_changes.json').write_text(json.dumps(
+        {'added': [], 'changed': [], 'removed': [], 'unchanged': [], 'failed': []}))
+    (data / 'text_chunks.json').write_text('[]')
+    os.utime(data / 'text_chunks.json', (1000, 1000))
+    monkeypatch.chdir(tmp_path)
+
+    # The crawl found no changes, but the scraped content is newer than the chunks
+    text_chunker.main()
+    with open(data / 'text_chunks.json', 'r', encoding='utf-8') as f:
+        assert json.load(f)
+    assert 'up to date' not in capsys.readouterr().out
+
+    text_chunker.main()
+    assert 'chunks are up to date' in capsys.readouterr().out
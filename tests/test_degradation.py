@@ -0,0 +1,134 @@
+import pytest
+
+from src.core import degradation
+from src.core.degradation import TIERS, DegradationController
+
+
+@pytest.fixture
+def clock(clock):
+    return clock.install(degradation)
+
+
+def observe(controller, latency, count=10):
+    for _ in range(count):
+        controller.observe(latency)
+
+
+def tier_name(controller):
+    return controller.current_tier()['name']
+
+
+def test_steps_down_one_tier_per_cooldown_while_slow(clock):
+    controller = DegradationController(latency_target=1.0, cooldown=5.0)
+    names = []
+    for _ in range(len(TIERS)):
+        clock.now += 5.0
+        observe(controller, 2.0)
+        names.append(tier_name(controller))
+    assert names == ['reduced_top_k', 'cheap_retriever', 'template', 'cache_only', 'cache_only']
+    assert controller.stats()['steps_down'] == 4
+
+    tier = controller.current_tier()
+    assert tier == dict(TIERS[-1], level=len(TIERS) - 1)
+
+
+def test_max_tier_caps_the_degradation(clock):
+    controller = DegradationController(cooldown=0.0, max_tier=2)
+    for _ in range(5):
+        observe(controller, 2.0)
+        controller.current_tier()
+    assert controller.tier == 2
+
+
+def test_p90_trigger_needs_enough_samples(clock):
+    controller = DegradationController(latency_target=1.0, min_samples=5, cooldown=0.0)
+    observe(controller, 5.0, count=4)
+    assert tier_name(controller) == 'full'  # Too few samples to judge
+
+    observe(controller, 5.0, count=1)
+    assert tier_name(controller) == 'reduced_top_k'
+
+
+def test_p90_ignores_a_few_outliers(clock):
+    controller = DegradationController(latency_target=1.0, cooldown=0.0)
+    observe(controller, 0.8, count=19)
+    controller.observe(30.0)
+    assert tier_name(controller) == 'full'
+    assert controller.stats()['p90_latency'] == 0.8
+
+
+def test_queue_depth_trigger(clock):
+    depth = [5]
+    controller = DegradationController(queue_high=4, cooldown=0.0)
+    controller.queue_depth_source = lambda: depth[0]
+    assert tier_name(controller) == 'reduced_top_k'  # No latencies needed
+
+    depth[0] = 4
+    assert tier_name(controller) == 'reduced_top_k'  # At the limit is not pressure
+
+    def broken():
+        raise RuntimeError("queue gone")
+    controller.queue_depth_source = broken  # Counts as an empty queue
+    assert tier_name(controller) == 'reduced_top_k'
+
+
+def test_cooldown_holds_the_tier(clock):
+    controller = DegradationController(cooldown=5.0)
+    observe(controller, 2.0)
+    assert tier_name(controller) == 'full'  # Within the cooldown since start-up
+
+    clock.now += 5.0
+    assert tier_name(controller) == 'reduced_top_k'
+
+    # A change clears the latencies: the next decision waits for new ones
+    clock.now += 4.5
+    observe(controller, 2.0)
+    assert tier_name(controller) == 'reduced_top_k'
+    clock.now += 0.5
+    assert tier_name(controller) == 'cheap_retriever'
+    clock.now += 5.0
+    assert tier_name(controller) == 'cheap_retriever'
+
+
+def test_recovers_once_fast_with_an_empty_queue(clock):
+    depth = [0]
+    controller = DegradationController(latency_target=1.0, recover_ratio=0.5, cooldown=5.0, window=10)
+    controller.queue_depth_source = lambda: depth[0]
+    for _ in range(2):
+        clock.now += 5.0
+        observe(controller, 2.0)
+        controller.current_tier()
+    assert controller.tier == 2
+
+    # Below the target but not below target * recover_ratio: stay
+    clock.now += 5.0
+    observe(controller, 0.7)
+    assert tier_name(controller) == 'cheap_retriever'
+
+    # Fast again, but requests are queueing: stay
+    observe(controller, 0.1)
+    depth[0] = 1
+    assert tier_name(controller) == 'cheap_retriever'
+
+    depth[0] = 0
+    assert tier_name(controller) == 'reduced_top_k'
+    clock.now += 5.0
+    observe(controller, 0.1)
+    assert tier_name(controller) == 'full'
+    clock.now += 5.0
+    observe(controller, 0.1)
+    assert tier_name(controller) == 'full'
+
+    stats = controller.stats()
+    assert (stats['steps_down'], stats['steps_up'], stats['tier_name']) == (2, 2, 'full')
+
+
+def test_requests_are_counted_per_tier(clock):
+    controller = DegradationController(cooldown=0.0)
+    controller.current_tier()
+    observe(controller, 2.0)
+    controller.current_tier()
+    controller.current_tier()
+    assert controller.stats()['requests_per_tier'] == {
+        'full': 1, 'reduced_top_k': 2, 'cheap_retriever': 0, 'template': 0, 'cache_only': 0
+    }
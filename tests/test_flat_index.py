@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+from src.core.flat_index import FlatIndex
+from src.core.simple_vector_store import SimpleVectorStore
+
+CHUNKS_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'text_chunks.json')
+QUERIES = [
+    'smart access control', 'hvac automation energy savings', 'internship for mba students',
+    'how do I contact you', 'air quality monitoring sensors', 'fire safety emergency response',
+    'what is iot', 'parking parking parking', 'zzz no such words'
+]
+
+
+@pytest.fixture(scope='module')
+def chunks():
+    with open(CHUNKS_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def store_with(chunks):
+    store = SimpleVectorStore()
+    store.add_chunks(chunks)
+    return store
+
+
+def ranking(results):
+    return [(chunk['global_chunk_id'], round(chunk['similarity'], 12)) for chunk in results]
+
+
+def test_frozen_search_matches_the_scan(chunks):
+    scan = store_with(chunks)
+    frozen = store_with(chunks)
+    frozen.freeze()
+    for query in QUERIES:
+        for top_k in (1, 5, 20):
+            assert ranking(frozen.search(query, top_k)) == ranking(scan.search(query, top_k)), query
+
+
+def test_frozen_results_are_full_chunks(chunks):
+    frozen = store_with(chunks)
+    frozen.freeze()
+    result = frozen.search('smart access control', 1)[0]
+    original = dict(chunks[result['global_chunk_id']])
+    assert {key: value for key, value in result.items() if key != 'similarity'} == original
+    with pytest.raises(RuntimeError):
+        frozen.add_chunk(chunks[0])
+
+
+def test_artifact_round_trip(chunks, tmp_path):
+    scan = store_with(chunks)
+    index = FlatIndex(scan.chunks, scan.chunk_words)
+    path = str(tmp_path / 'index.bin')
+    index.save(path, 'digest-1')
+
+    loaded = FlatIndex.load(path, source_digest='digest-1')
+    assert len(loaded) == len(index) == len(chunks)
+    assert loaded.vocab == index.vocab
+    assert list(loaded.iter_chunks()) == list(index.iter_chunks())
+    for query in QUERIES:
+        words = scan.preprocess_text(query)
+        assert ranking(loaded.search(words, 10)) == ranking(index.search(words, 10))
+
+    assert FlatIndex.load(path, source_digest='other chunks') is None
+    with open(path, 'r+b') as f:
+        f.write(b'XXXXXXXX')
+    with pytest.raises(ValueError):
+        FlatIndex.load(path)
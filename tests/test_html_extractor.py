@@ -0,0 +1,55 @@
+import pytest
+
+from src.data_processing.html_extractor import LXML_AVAILABLE, ExtractionPool, extract_page
+
+PAGES = [
+    # Main content area, with the excluded elements around and inside it
+    b"""<html><head><title> Smart Buildings </title>
+    <meta name="description" content="IoT for real estate"><style>p {color: red}</style></head>
+    <body><header><a href="/">Home</a></header><nav><a href="/about/">About</a></nav>
+    <main><h1>Smart HVAC</h1><p>Sensors <b>cut</b> energy use.</p><script>track()</script>
+    <h2>Lighting</h2><p>Automated &amp; scheduled.</p><a href="/contact/">Contact us</a></main>
+    <footer>&copy; GaoTech</footer></body></html>""",
+    # No content selector matches: the body is used
+    b"""<html><head><title>Careers</title></head><body><div class="jobs"><h3>Internships</h3>
+    <p>Apply<br>today</p><img src="x.png"><a href="/careers/apply/">Apply</a></div></body></html>""",
+    # A later selector in the list, comments and unclosed tags
+    b"""<html><body><div id="sidebar">Side</div><div class="post-content"><!-- hidden -->
+    <p>First paragraph<p>Second paragraph<ul><li>one<li>two</ul></div></body></html>""",
+    # Windows-1252 bytes that are not valid UTF-8
+    b"""<html><head><title>Caf\xe9 \x96 Menu</title></head><body><article>Na\xefve text</article></body></html>""",
+    # Not much of a page at all
+    b"",
+    "<p>Already decoded text, no body tag</p>",
+]
+
+PARSERS = ['html.parser'] + (['lxml'] if LXML_AVAILABLE else [])
+
+
+@pytest.mark.parametrize('parser', PARSERS)
+def test_pool_matches_inline_extraction(parser):
+    inline = [extract_page(html, parser) for html in PAGES]
+    assert inline[0]['content'] and inline[3]['title']  # The fixtures do extract something
+    with ExtractionPool(workers=2, parser=parser) as pool:
+        assert pool.map(PAGES, chunksize=2) == inline
+        assert [future.result() for future in [pool.submit(html) for html in PAGES]] == inline
+
+
+def test_inline_pool_matches_extract_page():
+    with ExtractionPool(workers=0, parser='html.parser') as pool:
+        assert pool.map(PAGES) == [extract_page(html, 'html.parser') for html in PAGES]
+        assert pool.submit(PAGES[1]).result() == extract_page(PAGES[1], 'html.parser')
+
+
+def test_html_parser_backend_matches_bs4():
+    for html in PAGES:
+        assert extract_page(html, 'html.parser') == extract_page(html, 'bs4')
+
+
+def test_errors_reach_the_future():
+    with ExtractionPool(workers=0, parser='no-such-parser') as inline:
+        with pytest.raises(ValueError):
+            inline.submit(PAGES[0]).result()
+    with ExtractionPool(workers=1, parser='no-such-parser') as workers:
+        with pytest.raises(ValueError):
+            workers.submit(PAGES[0]).result()
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from src.core.intent_router import KeywordRouter
+
+CATEGORIES = [
+    ('a', ['he', 'she', 'hers']),
+    ('b', ['his', 'is']),
+    ('c', ['ushe', 'r']),
+    ('d', ['hishers']),
+]
+
+
+def brute_force(categories, text):
+    return [name for name, keywords in categories if any(keyword in text for keyword in keywords)]
+
+
+def test_match_agrees_with_substring_tests():
+    router = KeywordRouter(CATEGORIES)
+    rng = random.Random(0)
+    for _ in range(5000):
+        text = ''.join(rng.choice('hersiu ') for _ in range(rng.randrange(12)))
+        assert router.categories(router.match(text)) == brute_force(CATEGORIES, text), text
+
+
+def test_random_keyword_tables():
+    rng = random.Random(1)
+    for _ in range(50):
+        categories = [(f'c{i}', [''.join(rng.choice('ab') for _ in range(rng.randint(1, 4)))
+                                 for _ in range(rng.randint(1, 3))])
+                      for i in range(rng.randint(1, 8))]
+        router = KeywordRouter(categories)
+        for _ in range(100):
+            text = ''.join(rng.choice('abc') for _ in range(rng.randrange(10)))
+            assert router.categories(router.match(text)) == brute_force(categories, text)
+
+
+def test_keywords_are_case_insensitive_and_texts_lowercased_by_the_caller():
+    router = KeywordRouter([('hvac', ['HVAC']), ('iot', ['Real Estate IoT'])])
+    assert router.categories(router.match('real estate iot hvac')) == ['hvac', 'iot']
+    assert router.match('HVAC') == 0
+
+
+def test_first_follows_priority_within_a_group():
+    router = KeywordRouter(CATEGORIES)
+    mask = router.match('his hers')
+    assert router.first(mask) == 'a'
+    assert router.first(mask, router.mask('b', 'd')) == 'b'
+    assert router.first(mask, router.mask('c')) == 'c'
+    assert router.first(router.match('xyz')) is None
+    with pytest.raises(ValueError):
+        KeywordRouter([('a', ['x']), ('a', ['y'])])
+
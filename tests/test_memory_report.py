@@ -0,0 +1,39 @@
+import sys
+
+import pytest
+
+from src.core.memory_report import deep_sizeof, process_memory, sampled_sizeof
+
+
+def test_deep_sizeof_counts_shared_objects_once():
+    word = 'shared' * 10
+    items = [word, word]
+    assert deep_sizeof(items) == sys.getsizeof(items) + sys.getsizeof(word)
+    assert deep_sizeof({'a': [1, 2]}) == (sys.getsizeof({'a': [1, 2]}) + sys.getsizeof('a') +
+                                         sys.getsizeof([1, 2]) + sys.getsizeof(1) + sys.getsizeof(2))
+
+
+def test_sampled_sizeof_is_exact_when_every_item_is_sampled():
+    items = [f"chunk text {i} " * (1 + i % 7) for i in range(100)]
+    assert sampled_sizeof(items, sample=256) == deep_sizeof(items)
+    mapping = {f"term{i}": [float(i)] * (i % 5) for i in range(100)}
+    assert sampled_sizeof(mapping, sample=256) == deep_sizeof(mapping)
+
+
+def test_sampled_sizeof_estimates_from_a_sample():
+    # Items of similar size: a tenth of them is enough for a close estimate
+    items = [f"{i:06d} " * 20 for i in range(1000)]
+    assert sampled_sizeof(items, sample=100) == pytest.approx(deep_sizeof(items), rel=0.01)
+    mapping = {f"{i:06d}": [float(i)] * 10 for i in range(1000)}
+    assert sampled_sizeof(mapping, sample=100) == pytest.approx(deep_sizeof(mapping), rel=0.01)
+
+    assert sampled_sizeof([]) == sys.getsizeof([])
+    assert sampled_sizeof({}) == sys.getsizeof({})
+
+
+def test_process_memory():
+    memory = process_memory()
+    assert memory['source'] in ('smaps_rollup', 'getrusage')
+    if memory['source'] == 'smaps_rollup':
+        assert memory['rss_mb'] > 0
+        assert memory['shared_mb'] + memory['private_mb'] == pytest.approx(memory['rss_mb'], abs=0.2)
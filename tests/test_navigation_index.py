@@ -0,0 +1,92 @@
+import json
+import os
+
+import pytest
+
+from src.core.chunk_store import ChunkStore
+from src.core.navigation_index import NavigationIndex, normalize
+
+CHUNKS_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'text_chunks.json')
+BOILERPLATE = ('Example Co builds smart systems for every kind of building: offices, warehouses, '
+               'hotels, schools and homes. Our sensors, controllers and dashboards work together to '
+               'save energy, keep people safe and make buildings easier to run, from a single floor '
+               'to a whole portfolio.')
+
+
+def page(url, title, text, description='', headings=()):
+    return {'text': text, 'source': {'url': url, 'title': title, 'description': description,
+                                     'headings': list(headings)}}
+
+
+@pytest.fixture
+def index():
+    return NavigationIndex(ChunkStore.from_chunks([
+        page('https://example.com/', 'Example Co', BOILERPLATE, 'Smart systems for buildings'),
+        page('https://example.com/contact-us/', 'Contact Us - Example Co', 'Write to us.',
+             'Send us a message and we will answer within a day.', ['Product Quality']),
+        page('https://example.com/careers/', 'Careers - Example Co',
+             'Careers at Example Co ' + BOILERPLATE + ' Whether you are starting your career or not, join us.',
+             BOILERPLATE, ['Careers at Example Co']),
+        page('https://example.com/careers/internships/', 'Internships', 'Paid internships for students.'),
+        page('https://example.com/about/', 'Our Story', 'Founded in 2001. ' + BOILERPLATE,
+             'How Example Co started.', ['Head Office']),
+    ]))
+
+
+def test_normalize():
+    assert normalize('How can I get in touch?') == 'contact'
+    assert normalize('Show me the jobs page') == 'career'
+    assert normalize('internships careers') == normalize('Careers / Internships')
+    assert normalize('About us') == 'about'
+    assert normalize('more about internships') == 'internship'
+
+
+def test_titles_and_slugs_find_pages(index):
+    assert index.lookup('contact us')['url'] == 'https://example.com/contact-us/'
+    assert index.lookup('How do I reach you?')['url'] == 'https://example.com/contact-us/'
+    assert index.lookup('jobs')['url'] == 'https://example.com/careers/'
+    assert index.lookup('careers internships')['url'] == 'https://example.com/careers/internships/'
+    assert index.lookup('our story')['url'] == 'https://example.com/about/'
+    assert index.lookup('about')['url'] == 'https://example.com/about/'
+
+
+def test_headings_and_shared_title_parts_are_not_keys(index):
+    assert index.lookup('product quality') is None
+    assert index.lookup('head office') is None
+    assert index.lookup('example co') is None  # Every page's title ends with it
+    assert index.lookup('what smart systems do you build for buildings and offices today') is None
+
+
+def test_one_typo(index):
+    found = index.lookup('carreers')
+    assert found['url'] == 'https://example.com/careers/' and found['near']
+    assert index.lookup('ab0ut') is None  # Short keys only match exactly
+
+
+def test_summaries_skip_boilerplate_descriptions(index):
+    summaries = {page['url']: page['summary'] for page in index.pages}
+    assert summaries['https://example.com/contact-us/'] == 'Send us a message and we will answer within a day.'
+    assert summaries['https://example.com/careers/'].startswith('Whether you are starting your career')
+    assert summaries['https://example.com/careers/internships/'] == 'Paid internships for students.'
+
+
+def test_stats(index):
+    index.lookup('contact')
+    index.lookup('carreers')
+    index.lookup('nothing like a page name')
+    stats = index.stats()
+    assert (stats['pages'], stats['lookups'], stats['hits'], stats['near_hits']) == (5, 3, 2, 1)
+    assert stats['hit_rate'] == 0.667
+
+
+def test_site_pages():
+    with open(CHUNKS_FILE, 'r', encoding='utf-8') as f:
+        index = NavigationIndex(ChunkStore.from_chunks(json.load(f)))
+    assert index.lookup('about')['url'] == 'https://realestateiot.com/about-us/'
+    assert index.lookup('how can I contact you')['url'] == 'https://realestateiot.com/contact-us/'
+    assert index.lookup('internships')['url'] == 'https://realestateiot.com/careers/internships/'
+    for question in ('product quality', 'head office', 'expert support', 'overnight delivery'):
+        assert index.lookup(question) is None, question
+    careers = index.lookup('careers')
+    assert careers['url'] == 'https://realestateiot.com/careers/'
+    assert 'career' in careers['summary'].lower()
@@ -0,0 +1,126 @@
+import json
+import os
+
+import pytest
+
+from src.core.chunk_store import ChunkStore
+from src.core.passage_index import MAX_WORDS, PassageIndex, split_sentences
+from src.core.simple_vector_store import SimpleVectorStore
+
+CHUNKS_FILE = os.path.join(os.path.dirname(__file__), '..', 'data', 'text_chunks.json')
+QUERIES = [
+    'smart access control', 'hvac automation energy savings', 'internship for mba students',
+    'how do I contact you', 'air quality monitoring sensors', 'zzz no such words'
+]
+SOURCE = {'url': 'https://example.com/a/', 'title': 'Page A'}
+SMALL = [
+    {'text': 'Smart parking sensors. Occupancy data helps drivers! Is HVAC included?', 'source': SOURCE,
+     'chunk_id': 0, 'global_chunk_id': 10},
+    {'text': 'Careers at the company. We hire interns for IoT projects.', 'source': SOURCE,
+     'chunk_id': 1, 'global_chunk_id': 11},
+]
+
+
+def tokenize(text):
+    return text.lower().strip('.!?').replace('.', ' ').replace('!', ' ').replace('?', ' ').split()
+
+
+@pytest.fixture(scope='module')
+def chunks():
+    with open(CHUNKS_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope='module')
+def preprocess():
+    return SimpleVectorStore().preprocess_text
+
+
+@pytest.fixture(scope='module')
+def index(chunks, preprocess):
+    return PassageIndex(ChunkStore.from_chunks(chunks), preprocess)
+
+
+def test_split_sentences():
+    text = 'One two three. Four five!  Six?'
+    assert [text[start:end] for start, end in split_sentences(text)] == ['One two three.', 'Four five!', 'Six?']
+    assert split_sentences('') == []
+
+    # Unpunctuated scraped text is cut where a capitalized word follows a lowercase one
+    run_on = 'smart sensors watch every room of the building Energy dashboards show the savings'
+    assert [run_on[start:end] for start, end in split_sentences(run_on)] == [
+        'smart sensors watch every room of the building', 'Energy dashboards show the savings'
+    ]
+    # ... and after MAX_WORDS words at the latest
+    long_text = ' '.join(['word'] * (MAX_WORDS * 2 + 5))
+    assert [len(long_text[start:end].split()) for start, end in split_sentences(long_text)] == \
+        [MAX_WORDS, MAX_WORDS, 5]
+
+
+def test_sentences_map_back_to_their_chunks():
+    index = PassageIndex(ChunkStore.from_chunks(SMALL), tokenize)
+    assert len(index) == 5
+    assert list(index.chunk_sentences) == [0, 3, 5]
+    assert list(index.sentence_chunks) == [0, 0, 0, 1, 1]
+    assert index.passage(1, 1)['text'] == 'Occupancy data helps drivers!'
+    assert index.stats()['chunks'] == 2
+
+    passage = index.passage(3, 4, score=1.5)
+    assert passage == {
+        'text': 'Careers at the company. We hire interns for IoT projects.',
+        'source': SOURCE, 'chunk_index': 1, 'sentences': [0, 1], 'score': 1.5,
+        'chunk_id': 1, 'global_chunk_id': 11
+    }
+
+
+def test_search_windows():
+    index = PassageIndex(ChunkStore.from_chunks(SMALL), tokenize)
+    best = index.search(['hvac'], top_k=1)[0]
+    assert best['text'] == 'Is HVAC included?' and best['score'] > 0
+
+    # Windows never run across chunks, and the results do not overlap
+    results = index.search(['interns', 'careers', 'hvac'], top_k=5, window=2)
+    assert [result['chunk_index'] for result in results] == [1, 0]
+    assert results[0]['text'] == SMALL[1]['text']
+    assert index.search(['hvac'], within=[1]) == []
+    assert index.search([]) == [] and index.search(['nothing']) == []
+
+
+def test_locate_by_global_id_or_text():
+    index = PassageIndex(ChunkStore.from_chunks(SMALL), tokenize)
+    assert index.locate({'global_chunk_id': 11}) == 1
+    assert index.locate({'global_chunk_id': 99}) is None
+    assert index.locate({'text': SMALL[0]['text']}) == 0
+    assert index.locate({'content': SMALL[1]['text']}) == 1
+    assert index.locate({'text': 'not indexed'}) is None
+    assert index.locate({}) is None
+
+
+def test_corpus_passages_come_from_their_chunks(chunks, preprocess, index):
+    assert len(index) > len(chunks)
+    for query in QUERIES:
+        for passage in index.search(preprocess(query), top_k=3, window=2):
+            chunk = chunks[passage['chunk_index']]
+            assert passage['text'] in chunk['text']
+            assert passage['global_chunk_id'] == chunk['global_chunk_id']
+            assert passage['source'] == chunk['source']
+
+
+def test_artifact_round_trip(preprocess, index, tmp_path):
+    path = str(tmp_path / 'passages.bin')
+    index.save(path, 'digest-1')
+
+    loaded = PassageIndex.load(path, index.chunks, source_digest='digest-1')
+    assert len(loaded) == len(index)
+    assert loaded.vocab == index.vocab
+    assert loaded.stats() == index.stats()
+    for query in QUERIES:
+        words = preprocess(query)
+        assert loaded.search(words, top_k=3, window=2) == index.search(words, top_k=3, window=2)
+
+    assert PassageIndex.load(path, index.chunks, source_digest='other chunks') is None
+    assert PassageIndex.load(path, ChunkStore.from_chunks(SMALL), source_digest='digest-1') is None
+    with open(path, 'r+b') as f:
+        f.write(b'XXXXXXXX')
+    with pytest.raises(ValueError):
+        PassageIndex.load(path, index.chunks, source_digest='digest-1')
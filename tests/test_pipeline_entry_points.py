@@ -0,0 +1,64 @@
+"""Smoke test of the data scripts, run the way the README runs them, in a
+copy of the repository so the shipped data files are left alone"""
+
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+REPO = os.path.join(os.path.dirname(__file__), '..')
+
+
+@pytest.fixture(scope='module')
+def workdir(tmp_path_factory):
+    root = tmp_path_factory.mktemp('repo')
+    shutil.copytree(os.path.join(REPO, 'src'), root / 'src', ignore=shutil.ignore_patterns('__pycache__'))
+    shutil.copy(os.path.join(REPO, 'standalone_index.py'), root)
+    os.makedirs(root / 'data')
+    for name in ('scraped_content.json', 'text_chunks.json'):
+        shutil.copy(os.path.join(REPO, 'data', name), root / 'data')
+    return root
+
+
+def run(workdir, script, *args):
+    result = subprocess.run([sys.executable, script, *args], cwd=workdir, capture_output=True, text=True,
+                            timeout=300, env=dict(os.environ, OPENAI_API_KEY=''))
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'Traceback' not in result.stdout + result.stderr, result.stdout + result.stderr
+    return result.stdout
+
+
+def test_build_pipeline(workdir):
+    stages = ['chunk', 'tfidf_store', 'search_index', 'passage_index', 'standalone_index']
+    output = run(workdir, 'src/data_processing/build_pipeline.py', '--stages', *stages, '--force')
+    for name in ('text_chunks.json', 'vector_store_embeddings.pkl', 'search_index.bin',
+                 'passage_index.bin', 'standalone_index.bin'):
+        assert os.path.getsize(workdir / 'data' / name) > 0, output
+    assert 'failed' not in output.lower(), output
+
+    # Nothing to do the second time
+    output = run(workdir, 'src/data_processing/build_pipeline.py', '--stages', *stages)
+    for stage in stages:
+        assert f'{stage:<14} up_to_date' in output, output
+
+
+def test_rebuild_lightweight_store(workdir):
+    # Importable from the package as well as runnable as a script
+    importlib.import_module('src.data_processing.rebuild_lightweight_store')
+    os.remove(workdir / 'data' / 'vector_store_embeddings.pkl')
+    run(workdir, 'src/data_processing/rebuild_lightweight_store.py')
+    assert os.path.getsize(workdir / 'data' / 'vector_store_embeddings.pkl') > 0
+
+
+@pytest.mark.parametrize('index', ['simple', 'lightweight', 'none'])
+def test_streaming_pipeline(workdir, index):
+    output = run(workdir, 'src/data_processing/streaming_pipeline.py',
+                 '--source-file', 'data/scraped_content.json', '--index', index, '--dedup', '0.8')
+    assert 'Streaming pipeline completed!' in output
+    with open(workdir / 'data' / 'scraped_content.json', 'r', encoding='utf-8') as f:
+        pages = len(json.load(f))
+    assert f'Pages: {pages},' in output
@@ -0,0 +1,108 @@
+import json
+import threading
+
+import pytest
+
+from src.core.chatbot_engine import ChatbotEngine
+from src.core.prewarm import AnswerPrewarmer, load_frequent_queries
+from src.core.response_cache import ResponseCache
+
+
+class Engine:
+    """Answers every query with its index version, as precompute_answers would"""
+
+    def __init__(self):
+        self.index_version = 'v1'
+        self.response_cache = ResponseCache()
+        self.runs = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def precompute_answers(self, queries, refresh=False):
+        self.release.wait(5)
+        version = self.index_version
+        for query in queries:
+            self.response_cache.put(query, version, {'response': f"{query} @ {version}"}, pinned=True)
+        self.runs.append(version)
+        return {'index_version': version, 'computed': len(queries), 'skipped': 0, 'failed': 0, 'seconds': 0.0}
+
+
+def write_lines(path, lines):
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+
+def test_frequent_queries_from_a_plain_log(tmp_path):
+    log = write_lines(tmp_path / 'queries.txt', [
+        'How much does it cost?', 'how much does it cost', 'Contact', '', 'HOW MUCH DOES IT COST',
+        'contact!', 'careers'
+    ])
+    # Most frequent first, in the first spelling seen
+    assert load_frequent_queries(log, top_n=2) == ['How much does it cost?', 'Contact']
+    assert load_frequent_queries(str(tmp_path / 'missing.txt')) == []
+    assert load_frequent_queries(None) == []
+
+
+def test_frequent_queries_from_a_structured_log(tmp_path):
+    log = write_lines(tmp_path / 'app.log', [
+        json.dumps({'event': 'chat.request', 'status': 200, 'query': 'hvac'}),
+        json.dumps({'event': 'chat.request', 'status': 200, 'query': 'HVAC'}),
+        json.dumps({'event': 'degradation.tier_change', 'message': 'Degradation tier: full -> reduced_top_k'}),
+        json.dumps({'message': 'parking'}),  # Query logs of other tools have no event
+        '{truncated',
+        'lighting'
+    ])
+    assert load_frequent_queries(log) == ['hvac', 'parking', 'lighting']
+
+
+def test_queries_put_starters_first_without_duplicates(tmp_path):
+    log = write_lines(tmp_path / 'queries.txt', ['contact us', 'hvac', 'hvac', 'Contact us?'])
+    prewarmer = AnswerPrewarmer(Engine(), ['Contact us', 'What is IoT?'], query_log=log)
+    assert prewarmer.queries() == ['Contact us', 'What is IoT?', 'hvac']
+
+
+def test_run_pins_the_answers():
+    engine = Engine()
+    prewarmer = AnswerPrewarmer(engine, ['a', 'b'])
+    result = prewarmer.run()
+    assert (result['queries'], result['computed'], result['dropped']) == (2, 2, 0)
+    assert prewarmer.index_version == 'v1'
+    assert engine.response_cache.get('a', 'v1') == {'response': 'a @ v1'}
+    assert not prewarmer.maybe_refresh()  # Same index version
+
+
+def test_new_index_version_is_refreshed_in_the_background(wait_until):
+    engine = Engine()
+    prewarmer = AnswerPrewarmer(engine, ['a', 'b'])
+    assert not prewarmer.maybe_refresh()  # Nothing to refresh before the first run
+    prewarmer.run()
+
+    engine.index_version = 'v2'
+    engine.release.clear()
+    assert prewarmer.maybe_refresh()
+    assert not prewarmer.maybe_refresh()  # Already refreshing
+    assert prewarmer.stats()['refreshing']
+    engine.release.set()
+    wait_until(lambda: prewarmer.index_version == 'v2' and not prewarmer.stats()['refreshing'])
+
+    assert engine.runs == ['v1', 'v2']
+    assert engine.response_cache.get('a', 'v2') == {'response': 'a @ v2'}
+    assert not engine.response_cache.is_pinned('a', 'v1')  # Old answers are unpinned
+    stats = prewarmer.stats()
+    assert (stats['refreshes'], stats['dropped'], stats['index_version']) == (1, 2, 'v2')
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return ChatbotEngine()
+
+
+def test_starter_answers_are_served_from_the_cache(engine):
+    starters = engine.get_conversation_starter()
+    result = AnswerPrewarmer(engine, starters).run()
+    assert result['computed'] + result['skipped'] == len(starters)
+    for starter in starters:
+        assert engine.response_cache.is_pinned(starter, engine.index_version)
+        assert engine.chat(starter)['cached']
+    # A second run finds them pinned already
+    assert AnswerPrewarmer(engine, starters).run()['skipped'] == len(starters)
@@ -0,0 +1,96 @@
+import marshal
+import time
+
+import pytest
+
+from src.core.profiling import RequestProfiler, StackSampler, export
+
+
+def slow_block(seconds=0.1):
+    time.sleep(seconds)
+
+
+def test_sampler_records_only_after_the_delay():
+    sampler = StackSampler(interval=0.002)
+    handle = sampler.watch(delay=10)
+    slow_block(0.05)
+    assert not sampler.unwatch(handle)
+
+    handle = sampler.watch()
+    slow_block(0.05)
+    samples = sampler.unwatch(handle)
+    assert sum(samples.values()) > 0
+    stack = samples.most_common(1)[0][0]
+    assert stack.endswith('test_profiling.py:slow_block')
+    assert 'test_profiling.py:test_sampler_records_only_after_the_delay' in stack.split(';')
+
+
+def test_fast_requests_are_not_kept_below_the_slow_threshold():
+    profiler = RequestProfiler(slow_threshold=0.5, sample_interval=0.002)
+    with profiler.capture('fast query') as outcome:
+        slow_block(0.01)
+    assert outcome == {} and profiler.list() == []
+
+
+def test_slow_requests_are_sampled_past_the_threshold():
+    profiler = RequestProfiler(slow_threshold=0.02, sample_interval=0.002)
+    with profiler.capture('slow query') as outcome:
+        slow_block(0.1)
+    kept = profiler.get(outcome['id'])
+    assert (kept['kind'], kept['trigger'], kept['query']) == ('sample', 'slow', 'slow query')
+    assert kept['duration_ms'] >= 100
+    assert any(stack.endswith(':slow_block') for stack in kept['data'])
+
+
+def test_nothing_is_captured_when_unarmed():
+    profiler = RequestProfiler()
+    assert not profiler.armed
+    with profiler.capture('query') as outcome:
+        slow_block(0.01)
+    assert outcome == {} and profiler.status()['profiles'] == 0
+
+
+def test_ring_buffer_keeps_the_newest_profiles():
+    profiler = RequestProfiler(max_profiles=2, sample_interval=0.002)
+    ids = []
+    for i in range(3):
+        with profiler.capture(f"query {i}", mode='sample') as outcome:
+            slow_block(0.02)
+        ids.append(outcome['id'])
+    assert [p['id'] for p in profiler.list()] == ids[1:]
+    assert profiler.get(ids[0]) is None
+    assert 'data' not in profiler.list()[0]
+    assert profiler.status()['profiles'] == 2
+
+
+def test_export_formats():
+    profiler = RequestProfiler(sample_interval=0.002)
+    with profiler.capture('cprofile query', mode='cprofile') as outcome:
+        slow_block(0.01)
+    profile = profiler.get(outcome['id'])
+    assert profile['trigger'] == 'request'
+    assert export(profile, 'pstats') == profile['data']
+    assert any(function == 'slow_block' for _, _, function in marshal.loads(export(profile, 'pstats')))
+    assert 'slow_block' in export(profile, 'text').decode()
+    with pytest.raises(ValueError):
+        export(profile, 'collapsed')
+
+    profiler.configure(toggle='sample')
+    with profiler.capture('sampled query') as outcome:
+        slow_block(0.05)
+    profile = profiler.get(outcome['id'])
+    collapsed = export(profile, 'collapsed').decode()
+    assert collapsed == export(profile, 'text').decode()
+    for line in collapsed.splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert int(count) > 0 and ';' in stack
+    with pytest.raises(ValueError):
+        export(profile, 'pstats')
+
+
+def test_configure():
+    profiler = RequestProfiler()
+    profiler.configure(slow_threshold=0.25)
+    assert profiler.armed and profiler.status()['slow_threshold_ms'] == 250
+    with pytest.raises(ValueError):
+        profiler.configure(toggle='perf')
@@ -0,0 +1,102 @@
+import pytest
+
+from src.core import response_cache
+from src.core.response_cache import ResponseCache, normalize_query
+
+
+@pytest.fixture
+def clock(clock):
+    return clock.install(response_cache)
+
+
+def answer(text):
+    return {'response': text, 'status': 'success'}
+
+
+def test_keys_are_normalized_and_versioned(clock):
+    cache = ResponseCache()
+    cache.put('What is IoT?', 'v1', answer('iot'))
+    assert normalize_query('  what   IS iot ') == 'what is iot'
+    assert cache.get('what  is IOT', 'v1') == answer('iot')
+    assert cache.get('What is IoT?', 'v2') is None  # Answers of another index version never match
+
+    # Callers get copies
+    cache.get('What is IoT?', 'v1')['response'] = 'changed'
+    assert cache.get('What is IoT?', 'v1')['response'] == 'iot'
+
+
+def test_entries_expire(clock):
+    cache = ResponseCache(ttl=60)
+    cache.put('q', 'v1', answer('a'))
+    clock.now += 60
+    assert cache.get('q', 'v1') == answer('a')
+    clock.now += 1
+    assert cache.get('q', 'v1') is None
+    assert cache.stats()['expired'] == 1 and len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = ResponseCache(max_entries=2)
+    cache.put('a', 'v1', answer('a'))
+    cache.put('b', 'v1', answer('b'))
+    cache.get('a', 'v1')  # 'b' is now the least recently used
+    cache.put('c', 'v1', answer('c'))
+    assert cache.get('b', 'v1') is None
+    assert cache.get('a', 'v1') and cache.get('c', 'v1')
+    assert cache.stats()['evictions'] == 1
+
+
+def test_better_tier_answers_win(clock):
+    cache = ResponseCache()
+    cache.put('q', 'v1', answer('full'), tier=0)
+    cache.put('q', 'v1', answer('template'), tier=3)
+    assert cache.get('q', 'v1')['response'] == 'full'
+
+    cache.put('r', 'v1', answer('template'), tier=3)
+    assert cache.get('r', 'v1', max_tier=2) is None  # Worse than the caller can compute
+    assert cache.get('r', 'v1', max_tier=3)['response'] == 'template'
+    cache.put('r', 'v1', answer('full'), tier=0)
+    assert cache.get('r', 'v1', max_tier=0)['response'] == 'full'
+
+    # Once expired, a worse answer may replace a better one
+    clock.now += cache.ttl + 1
+    cache.put('q', 'v1', answer('template'), tier=3)
+    assert cache.get('q', 'v1')['response'] == 'template'
+
+
+def test_pinned_entries_neither_expire_nor_get_evicted(clock):
+    cache = ResponseCache(max_entries=2, ttl=60)
+    cache.put('starter', 'v1', answer('pinned'), pinned=True)
+    for name in 'abcde':
+        cache.put(name, 'v1', answer(name))
+    clock.now += 3600
+
+    assert cache.get('starter', 'v1') == answer('pinned')
+    assert cache.is_pinned('starter', 'v1')
+    stats = cache.stats()
+    assert (stats['pinned'], stats['entries'], stats['evictions'], stats['pinned_hits']) == (1, 2, 3, 1)
+
+    # A later answer for a pinned query stays pinned, unless it is of a worse tier
+    cache.put('starter', 'v1', answer('recomputed'))
+    cache.put('starter', 'v1', answer('degraded'), tier=2)
+    assert cache.get('starter', 'v1') == answer('recomputed')
+    assert cache.stats()['pinned'] == 1
+
+
+def test_pinning_takes_over_a_cached_entry(clock):
+    cache = ResponseCache()
+    cache.put('q', 'v1', answer('cached'))
+    cache.put('q', 'v1', answer('pinned'), pinned=True)
+    assert len(cache) == 1
+    assert cache.get('q', 'v1') == answer('pinned')
+
+
+def test_drop_pinned_keeps_one_index_version(clock):
+    cache = ResponseCache()
+    cache.put('a', 'v1', answer('old a'), pinned=True)
+    cache.put('b', 'v1', answer('old b'), pinned=True)
+    cache.put('a', 'v2', answer('new a'), pinned=True)
+    assert cache.drop_pinned(keep_version='v2') == 2
+    assert not cache.is_pinned('a', 'v1') and cache.is_pinned('a', 'v2')
+    assert cache.drop_pinned() == 1
+    assert len(cache) == 0
@@ -0,0 +1,29 @@
+import pytest
+
+from src.benchmarks.retrieval_eval import score
+
+ITEM = {'query': 'q', 'relevant': ['https://example.com/a/', 'https://example.com/b/'],
+        'related': ['https://example.com/c/']}
+
+
+def result(url, *source_urls):
+    chunk = {'source': {'url': url}}
+    if source_urls:
+        chunk['source_urls'] = [url, *source_urls]
+    return chunk
+
+
+def test_only_the_returned_source_counts():
+    # A merged chunk is credited for its own source, not the pages merged into it
+    scores = score(ITEM, [result('https://example.com/c/', 'https://example.com/a/'),
+                          result('https://example.com/b/')], k=5)
+    assert scores['recall'] == 0.5
+    assert scores['mrr'] == 0.5
+
+
+def test_repeated_pages_add_nothing():
+    results = [result('https://example.com/a/'), result('https://example.com/a/'), result('https://example.com/b/')]
+    scores = score(ITEM, results, k=5)
+    assert (scores['recall'], scores['mrr']) == (1.0, 1.0)
+    assert scores['ndcg'] == pytest.approx((2 + 2 / 2) / (2 + 2 / 1.5849625 + 1 / 2))
+    assert score(ITEM, results, k=2)['recall'] == 0.5
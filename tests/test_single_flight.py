@@ -0,0 +1,128 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.core.single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_run_once(wait_until):
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'answer'
+
+    with ThreadPoolExecutor(8) as pool:
+        leader = pool.submit(flight.do, 'q', work)
+        started.wait(5)
+        followers = [pool.submit(flight.do, 'q', work) for _ in range(7)]
+        wait_until(lambda: flight.stats()['coalesced'] == 7)
+        release.set()
+        results = [leader.result(5)] + [f.result(5) for f in followers]
+
+    assert len(calls) == 1
+    assert results[0] == ('answer', False)
+    assert results[1:] == [('answer', True)] * 7
+    assert flight.stats() == {'leaders': 1, 'coalesced': 7, 'failures': 0, 'in_flight': 0}
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == (1, False)
+    assert flight.do('b', lambda: 2) == (2, False)
+    # Nothing is cached once a flight has landed
+    assert flight.do('a', lambda: 3) == (3, False)
+    assert flight.stats()['leaders'] == 3
+
+
+def test_leader_failure_reaches_waiters_and_is_not_remembered(wait_until):
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError('boom')
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(flight.do, 'q', fail)
+        started.wait(5)
+        follower = pool.submit(flight.do, 'q', lambda: 'never')
+        wait_until(lambda: flight.stats()['coalesced'] == 1)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result(5)
+
+    assert flight.stats()['failures'] == 1
+    assert flight.do('q', lambda: 'fresh') == ('fresh', False)
+
+
+def test_waiter_timeout():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return 'late'
+
+    with ThreadPoolExecutor(1) as pool:
+        leader = pool.submit(flight.do, 'q', slow)
+        started.wait(5)
+        with pytest.raises(TimeoutError):
+            flight.do('q', lambda: 'never', timeout=0.01)
+        release.set()
+        assert leader.result(5) == ('late', False)
+
+
+def test_async_callers_join_a_thread_led_flight():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+        return 'answer'
+
+    async def waiters():
+        async def never():
+            raise AssertionError('follower ran the work')
+        tasks = [asyncio.create_task(flight.do_async('q', never)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    with ThreadPoolExecutor(1) as pool:
+        leader = pool.submit(flight.do, 'q', work)
+        started.wait(5)
+        assert asyncio.run(waiters()) == [('answer', True)] * 3
+        assert leader.result(5) == ('answer', False)
+
+
+def test_async_leader():
+    flight = SingleFlight()
+
+    async def run():
+        gate = asyncio.Event()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await gate.wait()
+            return 42
+
+        tasks = [asyncio.create_task(flight.do_async('q', work)) for _ in range(4)]
+        await asyncio.sleep(0)
+        gate.set()
+        return await asyncio.gather(*tasks), calls
+
+    results, calls = asyncio.run(run())
+    assert calls == [1]
+    assert sorted(results) == [(42, False)] + [(42, True)] * 3
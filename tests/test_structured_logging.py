@@ -0,0 +1,117 @@
+import json
+import logging
+import os
+import sys
+
+import pytest
+
+from src.core import structured_logging
+from src.core.structured_logging import EventFilter, JsonFormatter, get_logger, request_id_var
+
+
+@pytest.fixture
+def clock(clock):
+    return clock.install(structured_logging)
+
+
+def record(msg='message %s', args=('one',), **extra):
+    result = logging.LogRecord('chatbot.test', logging.INFO, __file__, 1, msg, args, None)
+    result.__dict__.update(extra)
+    return result
+
+
+def test_json_formatter():
+    token = request_id_var.set('req-1')
+    try:
+        entry = record(event='chat.request', status=200, timings_ms={'retrieve': 1.5})
+        assert EventFilter().filter(entry)
+    finally:
+        request_id_var.reset(token)
+    line = json.loads(JsonFormatter().format(entry))
+    assert line.pop('ts')
+    assert line == {'level': 'INFO', 'logger': 'chatbot.test', 'event': 'chat.request', 'message': 'message one',
+                    'request_id': 'req-1', 'status': 200, 'timings_ms': {'retrieve': 1.5}}
+
+    try:
+        raise ValueError('bad')
+    except ValueError:
+        failed = record(exc_info=sys.exc_info())
+    failed.exc_text = logging.Formatter().formatException(failed.exc_info)
+    assert 'ValueError: bad' in json.loads(JsonFormatter().format(failed))['exception']
+
+
+def test_rate_limit_per_event(clock):
+    log_filter = EventFilter(rate=1.0, burst=2.0)
+    assert [log_filter.filter(record()) for _ in range(4)] == [True, True, False, False]
+    assert log_filter.filter(record(event='other'))  # Each event has its own bucket
+
+    clock.now += 1.0
+    passed = record()
+    assert log_filter.filter(passed)
+    assert passed.event == 'chatbot.test:message %s'  # Template, not the formatted message
+    assert passed.suppressed == 2
+
+
+def test_sampling(clock, monkeypatch):
+    draws = iter([0.05, 0.5, 0.2])
+    monkeypatch.setattr(structured_logging.random, 'random', lambda: next(draws))
+    log_filter = EventFilter()
+    assert [log_filter.filter(record(sample=0.25)) for _ in range(3)] == [True, False, True]
+    assert log_filter.filter(record()) and log_filter._buckets['chatbot.test:message %s'][2] == 0
+
+
+def test_idle_events_are_evicted_first(clock):
+    log_filter = EventFilter(rate=0.0, burst=1.0, max_events=2)
+    assert log_filter.filter(record(event='a'))
+    assert log_filter.filter(record(event='b'))
+    assert not log_filter.filter(record(event='a'))  # a is now the most recently seen
+    assert log_filter.filter(record(event='c'))  # Evicts b, not a
+    assert list(log_filter._buckets) == ['a', 'c']
+    assert not log_filter.filter(record(event='a'))
+    assert log_filter.filter(record(event='b'))  # A fresh bucket
+
+
+@pytest.fixture
+def configured(tmp_path):
+    """configure_logging writing to a file, undone afterwards"""
+    names = ('_handler', '_listener', '_output', '_listener_running')
+    saved = {name: getattr(structured_logging, name) for name in names}
+    root = logging.getLogger(structured_logging.ROOT_LOGGER)
+    saved_root = (list(root.handlers), root.level, root.propagate)
+    for name in names:
+        setattr(structured_logging, name, False if name == '_listener_running' else None)
+    root.handlers = []
+    path = tmp_path / 'app.log'
+    with open(path, 'a', encoding='utf-8') as stream:
+        structured_logging.configure_logging(stream=stream, fmt='json', level='INFO')
+        yield path
+        structured_logging._stop()
+    for name, value in saved.items():
+        setattr(structured_logging, name, value)
+    root.handlers, root.level, root.propagate = saved_root
+
+
+def read_events(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line)['event'] for line in f]
+
+
+def test_forked_child_gets_its_own_writer(configured):
+    logger = get_logger('test')
+    logger.info('before fork', extra={'event': 'test.parent'})
+    structured_logging._stop()  # Flush, then start again as a running app would be
+    structured_logging._start_listener()
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            logger.info('in child', extra={'event': 'test.child'})
+            structured_logging._stop()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+    logger.info('after fork', extra={'event': 'test.parent_again'})
+    structured_logging._stop()
+    structured_logging._stop()  # Stopping twice is harmless
+    assert read_events(configured) == ['test.parent', 'test.child', 'test.parent_again']